@@ -4,54 +4,245 @@ import time
 import uuid
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor
 import logging
 from datetime import datetime
 import traceback
+import os
+import threading
+from celery import Celery
+from cpu_pool import configure_cpu_executor, default_cpu_workers, run_cpu
+from kombu.utils.url import maybe_sanitize_url
+from result_cache import configure_result_cache, hash_content, make_cache_key
+from task_queue import PayloadStore, TaskQueue, max_attempts, visibility_timeout
+from token_estimator import get_token_budget
+from webhook_dispatcher import configure_webhook_dispatcher, get_webhook_dispatcher
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TASK_TYPES = ["image_analysis", "table_extraction"]
+# 합류한 작업이 대표 작업에서 넘겨받는 필드
+SHARED_RESULT_FIELDS = ["status", "result", "result_file", "error", "started_at", "completed_at", "failed_at", "progress"]
+
+# Celery 앱 (BACKGROUND_BACKEND=celery일 때 작업을 브로커로 보내고, celery -A background_processor worker가 처리)
+celery_app = Celery("background_processor", broker=os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+celery_app.conf.update(
+    task_default_queue=os.getenv("CELERY_QUEUE", "doc-parser"),
+    task_serializer="json",
+    accept_content=["json"],
+    # 상태/결과는 공유 결과 디렉토리의 파일로 주고받으므로 Celery 결과 백엔드는 쓰지 않음
+    task_ignore_result=True,
+    # 처리 도중 워커가 죽으면 메시지가 브로커에 남아 다른 워커가 다시 처리
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    broker_transport_options={"visibility_timeout": visibility_timeout()}
+)
+
+
+def background_backend() -> str:
+    """백그라운드 작업 실행 방식 (BACKGROUND_BACKEND: local=API 프로세스 안의 워커, celery=브로커를 통한 별도 워커 프로세스)"""
+    return os.getenv("BACKGROUND_BACKEND", "local").lower()
+
+
+def cancel_poll_interval() -> float:
+    """Celery 워커가 처리 중인 작업의 취소 표시를 확인하는 간격 (BACKGROUND_CANCEL_POLL_INTERVAL, 초)"""
+    return float(os.getenv("BACKGROUND_CANCEL_POLL_INTERVAL", "1.0"))
+
+
+def shared_results_dir() -> Path:
+    """Celery 워커가 상태/결과 파일을 쓰는 공유 결과 디렉토리 (BACKGROUND_RESULTS_DIR, API의 결과 디렉토리와 같아야 함)"""
+    return Path(os.getenv("BACKGROUND_RESULTS_DIR", str(Path(__file__).parent / "result")))
+
+
+class ConcurrencyLimit:
+    """
+    실행 중에 크기를 바꿀 수 있는 동시 실행 제한 (asyncio.Semaphore는 크기 변경 불가, None이면 제한 없음)
+    
+    워커는 자리가 있는 유형의 작업만 큐에서 가져오므로 자리를 기다리지 않고 바로 차지하거나 포기합니다.
+    """
+    
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.active = 0
+    
+    def has_room(self) -> bool:
+        """자리가 남아 있는지 확인합니다."""
+        return self.limit is None or self.active < self.limit
+    
+    def try_acquire(self) -> bool:
+        """자리가 있으면 차지하고 True, 없으면 False를 반환합니다."""
+        if not self.has_room():
+            return False
+        self.active += 1
+        return True
+    
+    def release(self):
+        """자리를 반환합니다."""
+        self.active -= 1
+    
+    def resize(self, limit: Optional[int]):
+        """제한을 바꿉니다. 줄이면 이미 실행 중인 작업은 끝날 때까지 유지됩니다."""
+        self.limit = limit
+
+
 class BackgroundProcessor:
     """백그라운드에서 이미지 처리를 담당하는 클래스"""
     
-    def __init__(self, results_dir: Path, max_workers: int = 3):
+    def __init__(self, results_dir: Path, max_workers: int = 3, type_limits: Optional[Dict[str, int]] = None, cpu_workers: Optional[int] = None, queue_path: Optional[Path] = None, backend: Optional[str] = None):
+        """
+        Args:
+            results_dir: 결과/상태 파일 디렉토리
+            max_workers: 큐에서 작업을 가져와 동시에 처리하는 워커 수
+            type_limits: 작업 유형별 최대 동시 처리 수 (BACKGROUND_<유형>_CONCURRENCY로도 설정, 없으면 워커 수만큼)
+            cpu_workers: 이미지 전처리/렌더링/문서 파싱/결과 저장에 쓰는 공유 CPU 스레드 수 (기본값: BACKGROUND_CPU_WORKERS 또는 CPU 코어 수)
+            queue_path: 작업 큐 SQLite 파일 (기본값: BACKGROUND_QUEUE_PATH 또는 results_dir/task_queue.db)
+            backend: "local" 또는 "celery" (기본값: BACKGROUND_BACKEND)
+        """
         self.results_dir = results_dir
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.cpu_workers = cpu_workers or default_cpu_workers()
+        configure_cpu_executor(self.cpu_workers)
         self.tasks: Dict[str, Dict[str, Any]] = {}
-        self.task_queue = asyncio.Queue()
+        self.backend = backend or background_backend()
+        if self.backend == "celery":
+            # 작업은 브로커로 보내고, 파일 바이트는 워커와 함께 쓰는 결과 디렉토리에 저장
+            self.queue = None
+            self.payloads = PayloadStore(results_dir / "payloads")
+        else:
+            # 재시작해도 남는 작업 큐 (파일 바이트는 큐 DB 옆 payloads 디렉토리에 저장)
+            self.queue = TaskQueue(queue_path or Path(os.getenv("BACKGROUND_QUEUE_PATH", str(results_dir / "task_queue.db"))))
+            self.payloads = self.queue.payloads
+        self._task_available = asyncio.Event()
+        self._lease_task = None
         self.is_running = False
-        self.worker_task = None
+        self.workers: Dict[int, asyncio.Task] = {}
+        self.busy_workers = 0
+        # 처리 중인 작업 ID -> 처리 중인 asyncio 작업 (취소용)
+        self.running_tasks: Dict[str, asyncio.Task] = {}
+        self._next_worker_id = 0
+        self._retiring: set = set()
+        type_limits = type_limits or {}
+        self.type_limits: Dict[str, ConcurrencyLimit] = {}
+        for task_type in TASK_TYPES:
+            limit = type_limits.get(task_type) or os.getenv(f"BACKGROUND_{task_type.upper()}_CONCURRENCY")
+            self.type_limits[task_type] = ConcurrencyLimit(int(limit) if limit else None)
+        # 동일 요청 합치기: 합치기 키 -> 대표 작업 ID, 대표 작업 ID -> 합류한 작업 ID 목록
+        self.inflight_tasks: Dict[str, str] = {}
+        self.coalesced_tasks: Dict[str, List[str]] = {}
         
     async def start(self):
-        """백그라운드 워커를 시작합니다."""
+        """백그라운드 워커들을 시작합니다."""
         if not self.is_running:
             self.is_running = True
-            self.worker_task = asyncio.create_task(self._worker_loop())
-            logger.info("백그라운드 프로세서가 시작되었습니다.")
+            if self.backend == "celery":
+                logger.info(f"백그라운드 프로세서가 시작되었습니다. (Celery 워커로 전달: {maybe_sanitize_url(celery_app.conf.broker_url)})")
+                return
+            restored = await self._restore_unfinished_tasks()
+            self._lease_task = asyncio.create_task(self._lease_loop())
+            self._spawn_workers(self.max_workers)
+            logger.info(f"백그라운드 프로세서가 시작되었습니다. (워커 {self.max_workers}개, 복원된 작업 {restored}개)")
     
     async def stop(self):
-        """백그라운드 워커를 중지합니다."""
+        """백그라운드 워커들을 중지합니다."""
         if self.is_running:
             self.is_running = False
-            if self.worker_task:
-                self.worker_task.cancel()
-                try:
-                    await self.worker_task
-                except asyncio.CancelledError:
-                    pass
-            self.executor.shutdown(wait=True)
+            workers = list(self.workers.values())
+            for worker in workers:
+                worker.cancel()
+            if self._lease_task:
+                self._lease_task.cancel()
+                workers.append(self._lease_task)
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.workers.clear()
+            self._retiring.clear()
+            # 처리 중이던 작업은 다음 시작 때 바로 다시 가져갈 수 있게 돌려놓음
+            if self.queue is not None:
+                self.queue.release_leases()
             logger.info("백그라운드 프로세서가 중지되었습니다.")
     
+    async def resize(self, max_workers: Optional[int] = None, type_limits: Optional[Dict[str, int]] = None, cpu_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        워커 수, 작업 유형별 동시 처리 수, CPU 스레드 수를 실행 중에 바꿉니다.
+        
+        워커를 줄이면 줄어든 만큼의 워커는 처리 중인 작업을 마친 뒤 종료합니다.
+        
+        Returns:
+            변경 후 워커 통계
+        """
+        for name, value in [("max_workers", max_workers), ("cpu_workers", cpu_workers)] + [(task_type, limit) for task_type, limit in (type_limits or {}).items()]:
+            if value is not None and value < 1:
+                raise ValueError(f"{name}은(는) 1 이상이어야 합니다.")
+        for task_type in (type_limits or {}):
+            if task_type not in self.type_limits:
+                raise ValueError(f"알 수 없는 작업 유형입니다: {task_type}")
+        if self.backend == "celery" and (max_workers is not None or type_limits):
+            raise ValueError("Celery 백엔드의 워커 수는 celery worker --concurrency와 워커 노드 수로 조정합니다.")
+        
+        if max_workers is not None:
+            self.max_workers = max_workers
+            if self.is_running:
+                active = [worker_id for worker_id, worker in self.workers.items() if not worker.done() and worker_id not in self._retiring]
+                if len(active) < max_workers:
+                    self._spawn_workers(max_workers - len(active))
+                else:
+                    # 가장 나중에 만든 워커부터 현재 작업을 마치고 종료
+                    self._retiring.update(sorted(active)[max_workers:])
+        
+        for task_type, limit in (type_limits or {}).items():
+            self.type_limits[task_type].resize(limit)
+        if type_limits:
+            # 자리가 늘어난 유형의 작업을 쉬고 있는 워커가 가져가도록 깨움
+            self._task_available.set()
+        
+        if cpu_workers is not None and cpu_workers != self.cpu_workers:
+            # 표 추출/전처리가 함께 쓰는 공유 풀을 교체 (실행 중인 작업은 기존 스레드에서 마저 끝냄)
+            configure_cpu_executor(cpu_workers)
+            self.cpu_workers = cpu_workers
+        
+        logger.info(f"백그라운드 워커 설정이 변경되었습니다: {self.worker_stats()}")
+        return self.worker_stats()
+    
+    def worker_stats(self) -> Dict[str, Any]:
+        """워커 풀 상태를 반환합니다."""
+        return {
+            "max_workers": self.max_workers,
+            "running_workers": sum(1 for worker in self.workers.values() if not worker.done()),
+            "busy_workers": self.busy_workers,
+            "retiring_workers": len(self._retiring),
+            "backend": self.backend,
+            "queue": self.queue.stats() if self.queue is not None else {"broker": maybe_sanitize_url(celery_app.conf.broker_url)},
+            "cpu_workers": self.cpu_workers,
+            "type_limits": {
+                task_type: {"limit": limit.limit, "active": limit.active}
+                for task_type, limit in self.type_limits.items()
+            }
+        }
+    
+    def _spawn_workers(self, count: int):
+        """워커를 count개 더 만듭니다."""
+        for _ in range(count):
+            worker_id = self._next_worker_id
+            self._next_worker_id += 1
+            worker = asyncio.create_task(self._worker_loop(worker_id))
+            worker.add_done_callback(lambda _, worker_id=worker_id: self._forget_worker(worker_id))
+            self.workers[worker_id] = worker
+    
+    def _forget_worker(self, worker_id: int):
+        """종료된 워커를 목록에서 제거합니다."""
+        self.workers.pop(worker_id, None)
+        self._retiring.discard(worker_id)
+    
     async def submit_image_analysis_task(
         self,
         file_content: bytes,
         filename: str,
         prompt: str = "이 이미지를 분석하고 주요 내용을 설명해주세요.",
         detail: str = "auto",
-        callback_url: Optional[str] = None
+        lossless: bool = False,
+        callback_url: Optional[str] = None,
+        tenant_id: Optional[str] = None
     ) -> str:
         """이미지 분석 작업을 제출합니다."""
         task_id = str(uuid.uuid4())
@@ -62,24 +253,29 @@ class BackgroundProcessor:
             "filename": filename,
             "prompt": prompt,
             "detail": detail,
+            "lossless": lossless,
+            "tenant_id": tenant_id,
             "status": "pending",
             "created_at": datetime.now().isoformat(),
             "callback_url": callback_url,
             "progress": 0
         }
         
-        # 작업을 큐에 추가
-        await self.task_queue.put({
-            "task_id": task_id,
-            "type": "image_analysis",
-            "file_content": file_content,
-            "task_info": task_info,
-            "filename": filename  # 파일명도 함께 전달
-        })
-        
         # 작업 정보 저장
         self.tasks[task_id] = task_info
         
+        # 같은 파일 + 파라미터의 작업이 진행 중이면 큐에 넣지 않고 그 결과를 공유
+        coalesce_key = make_cache_key(
+            hash_content(file_content),
+            task="image_analysis",
+            file_extension=os.path.splitext(filename.lower())[1],
+            prompt=prompt,
+            detail=detail,
+            lossless=lossless
+        )
+        # 합류한 작업도 큐에 기록해 두고 대표 작업이 끝날 때까지 임대해 둠 (재시작 시 따로 처리됨)
+        await self._enqueue(task_id, "image_analysis", file_content, task_info, filename, self._attach_to_inflight(task_id, coalesce_key, task_info))
+        
         # 작업 상태 파일 생성
         await self._save_task_status(task_id, task_info)
         
@@ -91,7 +287,10 @@ class BackgroundProcessor:
         file_content: bytes,
         filename: str,
         model: str = "gpt-4o",
-        callback_url: Optional[str] = None
+        lossless: bool = False,
+        callback_url: Optional[str] = None,
+        detail: str = "high",
+        tenant_id: Optional[str] = None
     ) -> str:
         """표 추출 작업을 제출합니다."""
         task_id = str(uuid.uuid4())
@@ -101,24 +300,30 @@ class BackgroundProcessor:
             "task_id": task_id,
             "filename": filename,
             "model": model,
+            "lossless": lossless,
+            "detail": detail,
+            "tenant_id": tenant_id,
             "status": "pending",
             "created_at": datetime.now().isoformat(),
             "callback_url": callback_url,
             "progress": 0
         }
         
-        # 작업을 큐에 추가
-        await self.task_queue.put({
-            "task_id": task_id,
-            "type": "table_extraction",
-            "file_content": file_content,
-            "task_info": task_info,
-            "filename": filename  # 파일명도 함께 전달
-        })
-        
         # 작업 정보 저장
         self.tasks[task_id] = task_info
         
+        # 같은 파일 + 모델의 작업이 진행 중이면 큐에 넣지 않고 그 결과를 공유
+        coalesce_key = make_cache_key(
+            hash_content(file_content),
+            task="table_extraction",
+            file_extension=os.path.splitext(filename.lower())[1],
+            model=model,
+            lossless=lossless,
+            detail=detail
+        )
+        # 합류한 작업도 큐에 기록해 두고 대표 작업이 끝날 때까지 임대해 둠 (재시작 시 따로 처리됨)
+        await self._enqueue(task_id, "table_extraction", file_content, task_info, filename, self._attach_to_inflight(task_id, coalesce_key, task_info))
+        
         # 작업 상태 파일 저장
         await self._save_task_status(task_id, task_info)
         
@@ -127,48 +332,163 @@ class BackgroundProcessor:
     
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """작업 상태를 조회합니다."""
+        if self.backend == "celery":
+            return await self._refresh_task_status(task_id)
         if task_id in self.tasks:
             return self.tasks[task_id]
         return None
     
     async def get_all_tasks(self) -> List[Dict[str, Any]]:
         """모든 작업 목록을 반환합니다."""
+        if self.backend == "celery":
+            # 다른 API 인스턴스가 제출한 작업도 공유 결과 디렉토리에서 찾음
+            status_files = await self._run_blocking(lambda: list(self.results_dir.glob("task_status_*.json")))
+            for path in status_files:
+                await self._refresh_task_status(path.stem[len("task_status_"):])
         return list(self.tasks.values())
     
     async def cancel_task(self, task_id: str) -> bool:
-        """작업을 취소합니다."""
-        if task_id in self.tasks:
-            task_info = self.tasks[task_id]
-            if task_info["status"] in ["pending", "processing"]:
-                task_info["status"] = "cancelled"
-                task_info["cancelled_at"] = datetime.now().isoformat()
-                await self._save_task_status(task_id, task_info)
-                logger.info(f"작업이 취소되었습니다. Task ID: {task_id}")
-                return True
-        return False
+        """
+        작업을 취소합니다.
+        
+        대기 중인 작업은 큐와 작업 파일에서 지우고, 처리 중인 작업은 asyncio 작업을 취소해
+        진행 중인 OpenAI 요청까지 끊습니다. 취소한 작업에 합류한 작업이 남아 있으면
+        그중 하나가 새 대표 작업으로 큐에 다시 들어갑니다.
+        Celery 백엔드에서는 공유 결과 디렉토리에 취소 표시를 남기고 워커가 이를 확인해 중단합니다.
+        """
+        if self.backend == "celery":
+            task_info = await self._refresh_task_status(task_id)
+        else:
+            task_info = self.tasks.get(task_id)
+        if not task_info or task_info["status"] not in ["pending", "processing"]:
+            return False
+        
+        task_info["status"] = "cancelled"
+        task_info["cancelled_at"] = datetime.now().isoformat()
+        # 상태를 저장하는 동안 도착한 응답으로 작업이 완료 처리되지 않도록 기다리기 전에 먼저 중단
+        running = self.running_tasks.get(task_id) if self.backend != "celery" else None
+        if running is not None:
+            running.cancel()
+        await self._save_task_status(task_id, task_info)
+        
+        if self.backend == "celery":
+            await self._run_blocking(self._cancel_marker(task_id).touch)
+        else:
+            leader_id = task_info.get("coalesced_with")
+            if leader_id:
+                followers = self.coalesced_tasks.get(leader_id, [])
+                if task_id in followers:
+                    followers.remove(task_id)
+            else:
+                await self._promote_follower(task_id, task_info)
+            await self._run_blocking(self.queue.ack, task_id)
+        
+        self._notify_callback(task_id, task_info)
+        logger.info(f"작업이 취소되었습니다. Task ID: {task_id}")
+        return True
     
-    async def _worker_loop(self):
-        """백그라운드 워커 루프"""
-        logger.info("백그라운드 워커 루프가 시작되었습니다.")
+    async def _promote_follower(self, task_id: str, task_info: Dict[str, Any]):
+        """취소된 대표 작업에 합류해 있던 작업 중 첫 번째를 새 대표 작업으로 큐에 다시 넣습니다."""
+        coalesce_key = task_info.get("coalesce_key")
+        if coalesce_key and self.inflight_tasks.get(coalesce_key) == task_id:
+            del self.inflight_tasks[coalesce_key]
+        
+        followers = [
+            follower_id for follower_id in self.coalesced_tasks.pop(task_id, [])
+            if self.tasks.get(follower_id, {}).get("status") in ["pending", "processing"]
+        ]
+        if not followers:
+            return
+        
+        leader_id, rest = followers[0], followers[1:]
+        leader_info = self.tasks[leader_id]
+        leader_info.pop("coalesced_with", None)
+        if coalesce_key:
+            leader_info["coalesce_key"] = coalesce_key
+            self.inflight_tasks[coalesce_key] = leader_id
+        for follower_id in rest:
+            self.tasks[follower_id]["coalesced_with"] = leader_id
+        if rest:
+            self.coalesced_tasks[leader_id] = rest
         
-        while self.is_running:
+        await self._save_task_status(leader_id, leader_info)
+        await self._run_blocking(self.queue.release, leader_id)
+        self._task_available.set()
+        logger.info(f"대표 작업이 취소되어 합류한 작업을 다시 큐에 넣었습니다. Task ID: {leader_id}")
+    
+    async def _worker_loop(self, worker_id: int = 0):
+        """
+        백그라운드 워커 루프. 워커 여러 개가 같은 큐에서 작업을 가져와 동시에 처리합니다.
+        
+        작업 유형별 동시 처리 수 제한에 걸린 유형은 큐에서 가져오지 않으므로, 한 유형이 밀려 있어도
+        워커는 다른 유형의 작업을 처리합니다. 축소 대상이 된 워커는 처리 중인 작업을 마친 뒤 종료합니다.
+        """
+        logger.info(f"백그라운드 워커 {worker_id}이(가) 시작되었습니다.")
+        
+        while self.is_running and worker_id not in self._retiring:
             try:
-                # 큐에서 작업 가져오기 (1초 타임아웃)
-                try:
-                    task_data = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
+                # 자리가 있는 유형의 작업만 큐에서 임대 (없으면 새 작업/빈 자리 알림을 최대 1초 기다린 뒤 축소/중지 여부 확인)
+                self._task_available.clear()
+                open_types = [task_type for task_type, limit in self.type_limits.items() if limit.has_room()]
+                task_data = await self._run_blocking(self.queue.dequeue, open_types)
+                if task_data is None:
+                    try:
+                        await asyncio.wait_for(self._task_available.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        pass
                     continue
                 
-                # 작업 처리
-                await self._process_task(task_data)
+                task_info = self.tasks.setdefault(task_data["task_id"], task_data["task_info"])
+                task_data["task_info"] = task_info
+                if not await self._check_dequeued_task(task_data):
+                    continue
+                
+                task_id = task_data["task_id"]
+                limit = self.type_limits[task_data["type"]]
+                if not limit.try_acquire():
+                    # 임대하는 사이 다른 워커가 마지막 자리를 차지함: 돌려놓고 다른 작업을 찾음
+                    await self._run_blocking(self.queue.return_lease, task_id)
+                    continue
+                
+                # cancel_task로 취소할 수 있도록 별도 asyncio 작업으로 처리
+                running = asyncio.create_task(self._execute_task(task_data))
+                self.running_tasks[task_id] = running
+                try:
+                    await asyncio.wait({running})
+                except asyncio.CancelledError:
+                    # 프로세서 중지: 처리 중인 작업도 중단 (큐에 남아 다음 시작 때 다시 처리)
+                    running.cancel()
+                    await asyncio.gather(running, return_exceptions=True)
+                    raise
+                finally:
+                    self.running_tasks.pop(task_id, None)
+                    # 시작 전에 취소되어 _execute_task가 실행되지 않았어도 자리를 반환
+                    limit.release()
+                    self._task_available.set()
+                
+                if running.cancelled():
+                    logger.info(f"처리 중인 작업을 중단했습니다. Task ID: {task_id}")
+                elif running.exception():
+                    logger.error(f"작업 처리 중 오류 발생. Task ID: {task_id}, Error: {str(running.exception())}")
+                
+                # 끝난 작업을 큐에서 제거
+                await self._run_blocking(self.queue.ack, task_id)
                 
             except asyncio.CancelledError:
-                logger.info("백그라운드 워커가 취소되었습니다.")
+                logger.info(f"백그라운드 워커 {worker_id}이(가) 취소되었습니다.")
                 break
             except Exception as e:
                 logger.error(f"백그라운드 워커에서 오류 발생: {str(e)}")
                 logger.error(traceback.format_exc())
     
+    async def _execute_task(self, task_data: Dict[str, Any]):
+        """작업 유형별 자리를 차지한 작업을 처리합니다. (자리는 _worker_loop에서 반환)"""
+        self.busy_workers += 1
+        try:
+            await self._process_task(task_data)
+        finally:
+            self.busy_workers -= 1
+    
     async def _process_task(self, task_data: Dict[str, Any]):
         """작업을 처리합니다."""
         task_id = task_data["task_id"]
@@ -189,13 +509,280 @@ class BackgroundProcessor:
             elif task_type == "table_extraction":
                 await self._process_table_extraction(task_id, file_content, task_info, filename)
             
+            # 실제 API 호출로 사용한 토큰을 테넌트 예산에 기록
+            result = task_info.get("result") or {}
+            if task_info["status"] == "completed" and not result.get("cached") and not result.get("coalesced"):
+                get_token_budget().record(task_info.get("tenant_id"), (result.get("usage") or {}).get("total_tokens", 0))
+            
         except Exception as e:
-            # 오류 발생 시 상태 업데이트
-            task_info["status"] = "failed"
-            task_info["error"] = str(e)
-            task_info["failed_at"] = datetime.now().isoformat()
-            await self._save_task_status(task_id, task_info)
+            # 오류 발생 시 상태 업데이트 (그사이 취소된 작업은 취소 상태 유지)
+            if task_info["status"] != "cancelled":
+                task_info["status"] = "failed"
+                task_info["error"] = str(e)
+                task_info["failed_at"] = datetime.now().isoformat()
+                await self._save_task_status(task_id, task_info)
             logger.error(f"작업 처리 중 오류 발생. Task ID: {task_id}, Error: {str(e)}")
+        
+        finally:
+            # 취소된 작업은 cancel_task에서 알림
+            if task_info["status"] in ["completed", "failed"]:
+                self._notify_callback(task_id, task_info)
+            # 이 작업에 합류한 작업들에 결과 전달 (취소된 작업에 합류한 작업은 cancel_task가 새 대표 작업으로 넘김)
+            if task_info["status"] != "cancelled":
+                await self._resolve_coalesced_tasks(task_id, task_info)
+    
+    async def _enqueue(self, task_id: str, task_type: str, file_content: bytes, task_info: Dict[str, Any], filename: str, coalesced: bool):
+        """
+        작업을 영속 큐에 추가하고 기다리는 워커를 깨웁니다. (합류한 작업은 임대된 상태로 추가)
+        
+        Celery 백엔드에서는 파일을 공유 디렉토리에 저장하고 브로커로 작업을 보냅니다.
+        합류한 작업은 보내지 않으며, 상태를 조회할 때 대표 작업의 결과를 넘겨받습니다.
+        """
+        if self.queue is None:
+            # 대표 작업이 취소되면 합류한 작업을 다시 보낼 수 있도록 파일 해시와 유형을 기록
+            task_info["payload_hash"] = await self._run_blocking(self.payloads.write, file_content)
+            task_info["task_type"] = task_type
+            if not coalesced:
+                await self._dispatch(task_id, task_info)
+            return
+        await self._run_blocking(self.queue.enqueue, task_id, task_type, file_content, dict(task_info), filename, coalesced)
+        if not coalesced:
+            self._task_available.set()
+    
+    async def _check_dequeued_task(self, task_data: Dict[str, Any]) -> bool:
+        """
+        가져온 작업을 처리할 수 있는지 확인합니다.
+        
+        파일이 없어졌거나 최대 시도 횟수(BACKGROUND_MAX_ATTEMPTS)를 넘긴 작업
+        (처리 도중 프로세스가 계속 죽는 작업)은 실패 처리하고 큐에서 제거합니다.
+        """
+        task_id = task_data["task_id"]
+        task_info = task_data["task_info"]
+        if task_info.get("status") == "cancelled":
+            # 큐에서 지우기 전에 이미 가져간 작업
+            if self.queue is not None:
+                await self._run_blocking(self.queue.ack, task_id)
+            return False
+        if task_data["file_content"] is None:
+            error = "작업 파일을 찾을 수 없습니다."
+        elif task_data["attempts"] > max_attempts():
+            error = f"작업이 {max_attempts()}번 시도하는 동안 끝나지 않아 중단했습니다."
+        else:
+            return True
+        
+        task_info["status"] = "failed"
+        task_info["error"] = error
+        task_info["failed_at"] = datetime.now().isoformat()
+        await self._save_task_status(task_id, task_info)
+        if self.queue is not None:
+            await self._run_blocking(self.queue.ack, task_id)
+        self._notify_callback(task_id, task_info)
+        await self._resolve_coalesced_tasks(task_id, task_info)
+        logger.error(f"작업을 처리할 수 없습니다. Task ID: {task_id}, Error: {error}")
+        return False
+    
+    async def _restore_unfinished_tasks(self) -> int:
+        """
+        이전 실행에서 끝나지 않은 큐 작업을 작업 목록에 복원합니다.
+        
+        상태 파일이 있으면 그 내용을 우선하며, 이미 끝난 작업은 큐에서 제거합니다.
+        종료된 프로세스가 임대하던 작업은 큐에서 바로 다시 가져갈 수 있게 됩니다.
+        
+        Returns:
+            복원된 작업 수
+        """
+        restored = 0
+        for item in await self._run_blocking(self.queue.requeue_unfinished):
+            task_id = item["task_id"]
+            if task_id in self.tasks:
+                continue
+            
+            task_info = self._load_task_status(task_id) or item["task_info"]
+            if task_info.get("status") in ["completed", "failed", "cancelled"]:
+                await self._run_blocking(self.queue.ack, task_id)
+                continue
+            
+            # 합류했던 작업도 대표 작업과 상관없이 따로 처리됨
+            task_info.pop("coalesced_with", None)
+            task_info["status"] = "pending"
+            task_info["progress"] = 0
+            self.tasks[task_id] = task_info
+            if task_info.get("coalesce_key"):
+                self.inflight_tasks.setdefault(task_info["coalesce_key"], task_id)
+            await self._save_task_status(task_id, task_info)
+            restored += 1
+        
+        if restored:
+            self._task_available.set()
+            logger.info(f"끝나지 않은 작업 {restored}개를 큐에서 복원했습니다.")
+        return restored
+    
+    async def _dispatch(self, task_id: str, task_info: Dict[str, Any]):
+        """Celery 백엔드: 작업을 브로커로 보냅니다."""
+        kwargs = {
+            "task_id": task_id,
+            "task_type": task_info["task_type"],
+            "payload_hash": task_info["payload_hash"],
+            "task_info": dict(task_info),
+            "filename": task_info.get("filename", "")
+        }
+        await self._run_blocking(lambda: run_background_task.apply_async(kwargs=kwargs, task_id=task_id))
+    
+    def _cancel_marker(self, task_id: str) -> Path:
+        """Celery 백엔드에서 API가 워커에게 취소를 알리는 표시 파일"""
+        return self.results_dir / f"task_cancel_{task_id}"
+    
+    async def run_shared_task(self, task_id: str, task_type: str, payload_hash: str, task_info: Dict[str, Any], filename: str):
+        """
+        Celery 워커에서 브로커로 받은 작업 하나를 처리합니다.
+        
+        상태 파일이 이미 끝난 상태(취소 포함)면 처리하지 않으며,
+        처리 도중 워커가 죽어 다시 전달된 작업은 처음부터 다시 처리합니다.
+        처리 중에는 취소 표시를 주기적으로 확인해, 취소되면 진행 중인 OpenAI 요청까지 중단합니다.
+        """
+        task_info = await self._run_blocking(self._load_task_status, task_id) or task_info
+        if task_info.get("status") in ["completed", "failed", "cancelled"] or self._cancel_marker(task_id).exists():
+            logger.info(f"이미 끝났거나 취소된 작업이라 건너뜁니다. Task ID: {task_id}")
+            return
+        
+        self.tasks[task_id] = task_info
+        task_data = {
+            "task_id": task_id,
+            "type": task_type,
+            "file_content": await self._run_blocking(self.payloads.read, payload_hash),
+            "task_info": task_info,
+            "filename": filename,
+            "attempts": 1
+        }
+        try:
+            if not await self._check_dequeued_task(task_data):
+                return
+            running = asyncio.create_task(self._process_task(task_data))
+            watcher = asyncio.create_task(self._watch_cancel_marker(task_id, running))
+            try:
+                await asyncio.wait({running})
+            finally:
+                watcher.cancel()
+            
+            if running.cancelled():
+                # 처리 중 저장한 상태가 API의 취소 상태를 덮어썼을 수 있으므로 다시 저장
+                task_info["status"] = "cancelled"
+                task_info.setdefault("cancelled_at", datetime.now().isoformat())
+                await self._save_task_status(task_id, task_info)
+                logger.info(f"처리 중인 작업을 중단했습니다. Task ID: {task_id}")
+        finally:
+            # 워커는 작업 상태를 메모리에 남기지 않음 (API가 상태 파일을 읽음)
+            self.tasks.pop(task_id, None)
+    
+    async def _watch_cancel_marker(self, task_id: str, running: asyncio.Task):
+        """취소 표시가 생기면 처리 중인 작업을 취소합니다."""
+        marker = self._cancel_marker(task_id)
+        while not running.done():
+            await asyncio.sleep(cancel_poll_interval())
+            if await self._run_blocking(marker.exists):
+                running.cancel()
+                return
+    
+    async def _refresh_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Celery 백엔드: 워커가 공유 결과 디렉토리에 쓴 상태 파일로 작업 상태를 갱신합니다.
+        
+        합류한 작업은 대표 작업이 끝났으면 그 결과를 넘겨받아 저장합니다.
+        """
+        task_info = await self._run_blocking(self._load_task_status, task_id)
+        if task_info is None:
+            return self.tasks.get(task_id)
+        
+        if task_info["status"] in ["pending", "processing"] and await self._run_blocking(self._cancel_marker(task_id).exists):
+            # 워커가 취소를 확인하기 전에 진행 상태를 저장한 경우
+            task_info["status"] = "cancelled"
+        
+        leader_id = task_info.get("coalesced_with")
+        if leader_id and task_info["status"] in ["pending", "processing"]:
+            leader_info = await self._run_blocking(self._load_task_status, leader_id)
+            if leader_info and leader_info["status"] in ["completed", "failed"]:
+                for field in SHARED_RESULT_FIELDS:
+                    if field in leader_info:
+                        task_info[field] = leader_info[field]
+                await self._save_task_status(task_id, task_info)
+                self._notify_callback(task_id, task_info)
+            elif leader_info and leader_info["status"] == "cancelled":
+                # 대표 작업이 취소되었으면 합류했던 작업을 따로 처리
+                task_info.pop("coalesced_with")
+                await self._save_task_status(task_id, task_info)
+                await self._dispatch(task_id, task_info)
+                logger.info(f"대표 작업이 취소되어 합류한 작업을 다시 보냈습니다. Task ID: {task_id}")
+        
+        self.tasks[task_id] = task_info
+        return task_info
+    
+    def _load_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """저장된 작업 상태 파일을 읽습니다."""
+        status_file_path = self.results_dir / f"task_status_{task_id}.json"
+        try:
+            with open(status_file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    async def _lease_loop(self):
+        """처리 중이거나 합류 대기 중인 작업의 임대를 임대 시간의 1/3마다 갱신합니다."""
+        while True:
+            await asyncio.sleep(visibility_timeout() / 3)
+            try:
+                await self._run_blocking(self.queue.extend_leases)
+            except Exception as e:
+                logger.error(f"작업 임대 갱신 중 오류 발생: {str(e)}")
+    
+    def _attach_to_inflight(self, task_id: str, coalesce_key: str, task_info: Dict[str, Any]) -> bool:
+        """
+        같은 합치기 키의 작업이 대기 중이거나 처리 중이면 그 작업에 합류시킵니다.
+        
+        Returns:
+            합류했으면 True (큐에 넣지 않아도 됨), 새 대표 작업이면 False
+        """
+        leader_id = self.inflight_tasks.get(coalesce_key)
+        if leader_id and self.tasks.get(leader_id, {}).get("status") in ["pending", "processing"]:
+            task_info["coalesced_with"] = leader_id
+            self.coalesced_tasks.setdefault(leader_id, []).append(task_id)
+            logger.info(f"동일한 작업이 진행 중이어서 결과를 공유합니다. Task ID: {task_id} -> {leader_id}")
+            return True
+        
+        task_info["coalesce_key"] = coalesce_key
+        self.inflight_tasks[coalesce_key] = task_id
+        return False
+    
+    async def _resolve_coalesced_tasks(self, task_id: str, task_info: Dict[str, Any]):
+        """대표 작업이 끝나면 합류한 작업들의 상태를 같은 결과로 갱신합니다."""
+        coalesce_key = task_info.get("coalesce_key")
+        if coalesce_key and self.inflight_tasks.get(coalesce_key) == task_id:
+            del self.inflight_tasks[coalesce_key]
+        
+        for follower_id in self.coalesced_tasks.pop(task_id, []):
+            if self.queue is not None:
+                await self._run_blocking(self.queue.ack, follower_id)
+            follower_info = self.tasks.get(follower_id)
+            if not follower_info or follower_info["status"] == "cancelled":
+                continue
+            
+            for field in SHARED_RESULT_FIELDS:
+                if field in task_info:
+                    follower_info[field] = task_info[field]
+            await self._save_task_status(follower_id, follower_info)
+            self._notify_callback(follower_id, follower_info)
+    
+    def _notify_callback(self, task_id: str, task_info: Dict[str, Any]):
+        """끝난 작업에 callback_url이 있으면 완료/실패/취소 알림을 보냅니다. (전송과 재시도는 기다리지 않음)"""
+        callback_url = task_info.get("callback_url")
+        if not callback_url:
+            return
+        status = task_info["status"]
+        get_webhook_dispatcher().notify(callback_url, {
+            "event": f"task.{status}",
+            "task_id": task_id,
+            "status": status,
+            "task": dict(task_info)
+        })
     
     async def _process_image_analysis(self, task_id: str, file_content: bytes, task_info: Dict[str, Any], filename: str):
         """이미지 분석 작업을 처리합니다."""
@@ -219,13 +806,18 @@ class BackgroundProcessor:
                 file_content, 
                 file_extension,
                 task_info["prompt"], 
-                task_info["detail"]
+                task_info["detail"],
+                task_info.get("lossless", False)
             )
             
             # 진행률 업데이트
             task_info["progress"] = 80
             await self._save_task_status(task_id, task_info)
             
+            if task_info["status"] == "cancelled":
+                # 결과를 기다리는 동안 취소된 작업은 결과를 버림 (알림은 cancel_task에서)
+                return
+            
             if result["success"]:
                 # 성공 시 결과 저장
                 task_info["status"] = "completed"
@@ -237,8 +829,7 @@ class BackgroundProcessor:
                 result_filename = f"background_analysis_{task_id}.json"
                 result_file_path = self.results_dir / result_filename
                 
-                with open(result_file_path, "w", encoding="utf-8") as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
+                await self._write_json(result_file_path, result)
                 
                 task_info["result_file"] = str(result_file_path)
                 
@@ -269,17 +860,44 @@ class BackgroundProcessor:
             task_info["progress"] = 30
             await self._save_task_status(task_id, task_info)
             
-            # 표 추출 실행
-            result = await table_extractor.extract_tables_from_image(
-                file_content, 
-                file_extension,
-                task_info["model"]
-            )
+            # 표 추출 실행 (문서에 구조화된 표가 있으면 LLM 호출 없이 바로 추출)
+            native_result = await table_extractor.extract_native_tables(file_content, file_extension)
+            if native_result is not None:
+                result = native_result
+            elif file_extension == '.pdf':
+                # PDF는 레이아웃으로 표를 찾지 못한 페이지만 LLM으로 추출
+                result = await table_extractor.extract_pdf_tables(
+                    file_content,
+                    task_info["model"],
+                    check_budget=lambda estimate: self._check_token_budget(task_info.get("tenant_id"), estimate),
+                    lossless=task_info.get("lossless", False),
+                    detail=task_info.get("detail", "high")
+                )
+            elif file_extension in ['.docx', '.xlsx', '.xls']:
+                # 문서는 페이지/섹션/시트 단위로 파싱하면서 묶인 청크부터 바로 추출
+                from file_processor import FileProcessor
+                result = await table_extractor.extract_tables_from_units(
+                    FileProcessor().iter_units(file_content, file_extension),
+                    task_info["model"],
+                    check_budget=lambda estimate: self._check_token_budget(task_info.get("tenant_id"), estimate)
+                )
+            else:
+                result = await table_extractor.extract_tables_from_image(
+                    file_content, 
+                    file_extension,
+                    task_info["model"],
+                    task_info.get("lossless", False),
+                    task_info.get("detail", "high")
+                )
             
             # 진행률 업데이트
             task_info["progress"] = 80
             await self._save_task_status(task_id, task_info)
             
+            if task_info["status"] == "cancelled":
+                # 결과를 기다리는 동안 취소된 작업은 결과를 버림 (알림은 cancel_task에서)
+                return
+            
             if result["success"]:
                 # 성공 시 결과 저장
                 task_info["status"] = "completed"
@@ -291,8 +909,7 @@ class BackgroundProcessor:
                 result_filename = f"background_table_extraction_{task_id}.json"
                 result_file_path = self.results_dir / result_filename
                 
-                with open(result_file_path, "w", encoding="utf-8") as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
+                await self._write_json(result_file_path, result)
                 
                 task_info["result_file"] = str(result_file_path)
                 
@@ -307,18 +924,40 @@ class BackgroundProcessor:
         except Exception as e:
             raise e
     
+    def _check_token_budget(self, tenant_id: Optional[str], estimate: Dict[str, Any]):
+        """청크 호출 전에 테넌트 토큰 예산을 확인합니다. (초과 시 작업 실패)"""
+        budget = get_token_budget().check(tenant_id, estimate)
+        if not budget["allowed"]:
+            raise ValueError(budget["reason"])
+    
     async def _save_task_status(self, task_id: str, task_info: Dict[str, Any]):
         """작업 상태를 파일에 저장합니다."""
         try:
             status_filename = f"task_status_{task_id}.json"
             status_file_path = self.results_dir / status_filename
             
-            with open(status_file_path, "w", encoding="utf-8") as f:
-                json.dump(task_info, f, ensure_ascii=False, indent=2)
+            # 직렬화하는 동안 다른 코루틴이 상태를 바꿔도 되도록 얕은 복사본을 저장
+            await self._write_json(status_file_path, dict(task_info))
                 
         except Exception as e:
             logger.error(f"작업 상태 저장 중 오류 발생: {str(e)}")
     
+    async def _write_json(self, path: Path, data: Dict[str, Any]):
+        """
+        JSON 직렬화와 파일 쓰기를 CPU 스레드 풀에서 실행합니다.
+        
+        큰 결과를 이벤트 루프에서 직렬화하면 다른 워커의 API 호출과 상태 조회가 그동안 멈춥니다.
+        """
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        
+        await self._run_blocking(write)
+    
+    async def _run_blocking(self, func, *args):
+        """파일/DB 입출력 함수를 공유 CPU 스레드 풀에서 실행합니다."""
+        return await run_cpu(func, *args)
+    
     async def cleanup_completed_tasks(self, max_age_hours: int = 24):
         """완료된 오래된 작업들을 정리합니다."""
         try:
@@ -350,9 +989,53 @@ class BackgroundProcessor:
                 status_file_path = self.results_dir / status_filename
                 if status_file_path.exists():
                     status_file_path.unlink()
+                self._cancel_marker(task_id).unlink(missing_ok=True)
             
             if tasks_to_remove:
                 logger.info(f"{len(tasks_to_remove)}개의 오래된 작업이 정리되었습니다.")
+            
+            # Celery 백엔드의 파일은 여러 작업이 같이 쓸 수 있어 작업이 끝나도 바로 지우지 않음
+            if self.queue is None:
+                removed = await self._run_blocking(self.payloads.cleanup, max_age_hours * 3600)
+                if removed:
+                    logger.info(f"{removed}개의 오래된 작업 파일이 정리되었습니다.")
                 
         except Exception as e:
             logger.error(f"작업 정리 중 오류 발생: {str(e)}")
+
+
+# ===== Celery 워커 =====
+
+_worker_runtimes: Dict[str, Any] = {}
+_worker_runtimes_lock = threading.Lock()
+
+
+def _get_worker_runtime(results_dir: Path):
+    """
+    Celery 워커 프로세스마다 하나씩 만드는 처리기와 이벤트 루프를 반환합니다.
+    
+    OpenAI 커넥션 풀, 레이트 리미터 등은 이벤트 루프에 묶이므로
+    작업마다 asyncio.run을 하지 않고 별도 스레드에서 도는 루프 하나를 계속 사용합니다.
+    (prefork 자식 프로세스에서 처음 작업을 받을 때 만들어짐)
+    """
+    with _worker_runtimes_lock:
+        runtime = _worker_runtimes.get(str(results_dir))
+        if runtime is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="background-worker-loop", daemon=True).start()
+            configure_result_cache(results_dir / "cache")
+            configure_webhook_dispatcher(results_dir / "webhooks")
+            runtime = (BackgroundProcessor(results_dir, backend="celery"), loop)
+            _worker_runtimes[str(results_dir)] = runtime
+    return runtime
+
+
+@celery_app.task(name="background_processor.run_background_task")
+def run_background_task(task_id: str, task_type: str, payload_hash: str, task_info: Dict[str, Any], filename: str):
+    """Celery 워커에서 백그라운드 작업 하나를 처리합니다. 상태/결과는 공유 결과 디렉토리에 저장합니다."""
+    processor, loop = _get_worker_runtime(shared_results_dir())
+    future = asyncio.run_coroutine_threadsafe(
+        processor.run_shared_task(task_id, task_type, payload_hash, task_info, filename),
+        loop
+    )
+    future.result()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+비동기 OpenAI 호출 경로 벤치마크 스크립트
+
+실제 OpenAI API 대신 지연 시간을 흉내 내는 가짜 전송 계층을 사용하여,
+N개의 동시 표 추출 요청이 요청 1개의 지연 시간 정도에 끝나는지 확인합니다.
+
+사용법:
+    python benchmark_async_client.py --requests 10 --latency 2.0
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import httpx
+from PIL import Image, ImageDraw
+from openai_client import create_async_client, set_async_client, close_async_client
+from table_extractor import TableExtractor
+
+FAKE_TABLE_JSON = json.dumps({
+    "tables": [
+        {
+            "table_id": "table_1",
+            "title": "벤치마크 표",
+            "headers": ["항목", "값"],
+            "rows": [["A", "1"], ["B", "2"]]
+        }
+    ],
+    "markdown": "| 항목 | 값 |\n| --- | --- |\n| A | 1 |\n| B | 2 |",
+    "summary": "표 1개"
+}, ensure_ascii=False)
+
+
+def _make_table_image(index: int) -> bytes:
+    """요청마다 서로 다른 간단한 표 이미지를 생성합니다."""
+    image = Image.new("RGB", (800, 400), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(50, 351, 60):
+        draw.line([(50, y), (750, y)], fill="black", width=2)
+    for x in range(50, 751, 175):
+        draw.line([(x, 50), (x, 350)], fill="black", width=2)
+    draw.text((70, 70), f"request {index}", fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _make_fake_transport(latency: float) -> httpx.MockTransport:
+    """지정된 지연 후 chat.completions 응답을 돌려주는 가짜 전송 계층을 만듭니다."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": FAKE_TABLE_JSON},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+        })
+    return httpx.MockTransport(handler)
+
+
+async def run_benchmark(num_requests: int, latency: float):
+    """단일 요청, 동시 요청의 소요 시간을 측정합니다."""
+    # 가짜 전송 계층을 사용하므로 실제 API 키는 필요 없습니다
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    # 레이트 리미터 대기가 측정에 섞이지 않도록 한도를 넉넉히 설정
+    os.environ.setdefault("OPENAI_RPM_LIMIT", "100000")
+    os.environ.setdefault("OPENAI_TPM_LIMIT", "100000000")
+    set_async_client(create_async_client(httpx.AsyncClient(transport=_make_fake_transport(latency))))
+    table_extractor = TableExtractor()
+
+    try:
+        # 단일 요청
+        start = time.perf_counter()
+        result = await table_extractor.extract_tables_from_image(_make_table_image(-1), ".png", "gpt-4o")
+        single_elapsed = time.perf_counter() - start
+        print(f"단일 요청: {single_elapsed:.2f}s (success={result['success']})")
+
+        # 동시 요청
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            table_extractor.extract_tables_from_image(_make_table_image(i), ".png", "gpt-4o")
+            for i in range(num_requests)
+        ])
+        concurrent_elapsed = time.perf_counter() - start
+        succeeded = sum(1 for r in results if r["success"])
+        print(f"동시 요청 {num_requests}개: {concurrent_elapsed:.2f}s (성공 {succeeded}/{num_requests})")
+        print(f"동기 클라이언트였다면 예상 소요 시간: {single_elapsed * num_requests:.2f}s")
+        print(f"단일 요청 대비 배수: {concurrent_elapsed / single_elapsed:.2f}x")
+    finally:
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="비동기 OpenAI 호출 경로 벤치마크")
+    parser.add_argument("--requests", type=int, default=10, help="동시 요청 수")
+    parser.add_argument("--latency", type=float, default=2.0, help="가짜 API 응답 지연 (초)")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.requests, args.latency))
@@ -0,0 +1,142 @@
+import io
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from PIL import Image
+
+# 분석용으로 축소할 최대 변 길이 (빈 페이지 판정에는 이 정도 해상도로 충분)
+ANALYSIS_MAX_SIDE = 512
+# 배경(중앙값)과 이 값 이상 차이 나는 픽셀을 잉크로 봄
+INK_CONTRAST = 64
+# 픽셀 표준편차가 이 값 미만이면 빈 페이지 (완전히 흰/단색 이미지)
+DEFAULT_MAX_STDDEV = 3.0
+# 잉크 픽셀 비율이 이 값 미만이면 빈 페이지 (스캔 잡티, 쪽번호만 있는 간지 등)
+DEFAULT_MAX_INK_RATIO = 0.0005
+# 알려진 빈 페이지 해시와 이 거리 이하로 가까우면 빈 페이지 (로고가 있는 간지 등)
+DEFAULT_MAX_HASH_DISTANCE = 6
+
+# 빈 페이지 감지 지표 (/metrics에서 조회)
+BLANK_STATS = {"checked": 0, "blank": 0, "variance": 0, "ink_ratio": 0, "known_hash": 0, "saved_tokens": 0}
+# 여러 CPU 스레드에서 동시에 갱신하므로 지표 갱신/조회는 잠금 안에서
+_stats_lock = threading.Lock()
+
+_DCT_SIZE = 32
+_DCT_MATRIX = np.cos(np.pi * (2 * np.arange(_DCT_SIZE)[None, :] + 1) * np.arange(_DCT_SIZE)[:, None] / (2 * _DCT_SIZE))
+
+
+def detection_enabled() -> bool:
+    """빈 페이지 감지 사용 여부 (BLANK_DETECTION_ENABLED)"""
+    return os.getenv("BLANK_DETECTION_ENABLED", "true").lower() == "true"
+
+
+def detect_blank(image_content: bytes) -> Optional[Dict[str, Any]]:
+    """
+    이미지가 빈 페이지(또는 거의 빈 페이지)인지 API 호출 없이 판정합니다.
+
+    순서대로 확인합니다.
+    1. 픽셀 표준편차가 BLANK_MAX_STDDEV 미만 (단색 이미지)
+    2. 배경과 대비되는 잉크 픽셀 비율이 BLANK_MAX_INK_RATIO 미만
+    3. 지각 해시(pHash)가 BLANK_KNOWN_HASHES의 해시와 BLANK_MAX_HASH_DISTANCE 이하 거리 (설정된 경우)
+
+    Args:
+        image_content: 이미지 바이트
+
+    Returns:
+        빈 페이지면 {"reason", "stddev", "ink_ratio", "hash"}, 아니거나 디코딩할 수 없으면 None
+    """
+    if not detection_enabled():
+        return None
+    try:
+        pixels = _grayscale(image_content)
+    except Exception as e:
+        print(f"빈 페이지 감지용 이미지 디코딩 실패: {str(e)}")
+        return None
+
+    with _stats_lock:
+        BLANK_STATS["checked"] += 1
+    stddev = float(pixels.std())
+    ink_ratio = float((np.abs(pixels - np.median(pixels)) >= INK_CONTRAST).mean())
+    known_hashes = _known_hashes()
+    image_hash = perceptual_hash(pixels) if known_hashes else None
+
+    reason = None
+    if stddev < float(os.getenv("BLANK_MAX_STDDEV", str(DEFAULT_MAX_STDDEV))):
+        reason = "variance"
+    elif ink_ratio < float(os.getenv("BLANK_MAX_INK_RATIO", str(DEFAULT_MAX_INK_RATIO))):
+        reason = "ink_ratio"
+    elif image_hash is not None:
+        max_distance = int(os.getenv("BLANK_MAX_HASH_DISTANCE", str(DEFAULT_MAX_HASH_DISTANCE)))
+        if any(hash_distance(image_hash, known) <= max_distance for known in known_hashes):
+            reason = "known_hash"
+
+    if reason is None:
+        return None
+    with _stats_lock:
+        BLANK_STATS["blank"] += 1
+        BLANK_STATS[reason] += 1
+    return {"reason": reason, "stddev": round(stddev, 3), "ink_ratio": round(ink_ratio, 6), "hash": image_hash}
+
+
+def perceptual_hash(image: Any) -> str:
+    """
+    이미지의 64비트 지각 해시(pHash)를 16진수 문자열로 반환합니다.
+
+    32x32 흑백으로 줄인 뒤 2차원 DCT의 저주파 8x8 계수를 중앙값과 비교합니다.
+    BLANK_KNOWN_HASHES에 등록할 해시를 만들 때도 사용합니다.
+
+    Args:
+        image: 이미지 바이트 또는 흑백 픽셀 배열
+    """
+    pixels = _grayscale(image) if isinstance(image, (bytes, bytearray)) else image
+    small = Image.fromarray(pixels.astype(np.uint8)).resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS)
+    coefficients = _DCT_MATRIX @ np.asarray(small, dtype=np.float64) @ _DCT_MATRIX.T
+    low = coefficients[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+def hash_distance(first: str, second: str) -> int:
+    """두 해시의 해밍 거리"""
+    return bin(int(first, 16) ^ int(second, 16)).count("1")
+
+
+def record_saved_tokens(estimate: Optional[Dict[str, Any]]):
+    """빈 페이지로 생략한 호출의 토큰 추정치를 지표에 더합니다."""
+    if estimate:
+        with _stats_lock:
+            BLANK_STATS["saved_tokens"] += estimate.get("total_tokens", 0)
+
+
+def blank_stats() -> Dict[str, int]:
+    """빈 페이지 감지 지표의 스냅샷"""
+    with _stats_lock:
+        return dict(BLANK_STATS)
+
+
+def _grayscale(image_content: bytes) -> np.ndarray:
+    """
+    이미지를 최대 ANALYSIS_MAX_SIDE 정도로 줄인 흑백 픽셀 배열로 디코딩합니다.
+
+    평균으로 줄이면 가는 글자 획이 배경색에 묻히므로, 블록마다 가장 어두운 값을 남깁니다.
+    """
+    image = Image.open(io.BytesIO(image_content))
+    image.seek(0)
+    # JPEG는 축소 배율로 바로 디코딩
+    image.draft("L", (ANALYSIS_MAX_SIDE * 2, ANALYSIS_MAX_SIDE * 2))
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        # 투명 영역은 흰 배경으로
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image.convert("RGBA"))
+    pixels = np.asarray(image.convert("L"), dtype=np.int16)
+    factor = max(1, math.ceil(max(pixels.shape) / ANALYSIS_MAX_SIDE))
+    height, width = pixels.shape[0] // factor, pixels.shape[1] // factor
+    if factor == 1 or not height or not width:
+        return pixels
+    return pixels[:height * factor, :width * factor].reshape(height, factor, width, factor).min(axis=(1, 3))
+
+
+def _known_hashes() -> List[str]:
+    """알려진 빈 페이지 해시 목록 (BLANK_KNOWN_HASHES, 쉼표로 구분)"""
+    return [value.strip() for value in os.getenv("BLANK_KNOWN_HASHES", "").split(",") if value.strip()]
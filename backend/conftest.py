@@ -0,0 +1,142 @@
+"""
+테스트 공용 픽스처
+
+여러 테스트 모듈이 함께 쓰는 가짜 OpenAI 응답과 클라이언트, 테스트용 이미지와 PDF,
+Celery 메모리 브로커 설정을 제공합니다.
+"""
+
+import io
+import os
+import httpx
+import pytest
+from PIL import Image, ImageDraw
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import background_processor
+import rate_limiter
+import result_cache
+from openai_client import create_async_client, set_async_client
+
+
+@pytest.fixture
+def completion():
+    """chat.completions 응답 JSON을 만드는 함수"""
+    def build(content: str, finish_reason: str = "stop", total_tokens: int = 15) -> dict:
+        return {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": total_tokens - 5, "completion_tokens": 5, "total_tokens": total_tokens}
+        }
+    return build
+
+
+@pytest.fixture
+def mock_openai():
+    """
+    가짜 API 핸들러(httpx.MockTransport)로 공유 OpenAI 클라이언트를 바꾸는 함수
+
+    테스트가 끝나면 공유 클라이언트를 원래대로(다음 호출 시 새로 생성) 되돌립니다.
+    """
+    def install(handler):
+        set_async_client(create_async_client(httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    yield install
+    set_async_client(None)
+
+
+@pytest.fixture
+def fresh_services():
+    """앞선 테스트가 소진한 레이트 리미터와 결과 캐시를 새로 만듭니다. (동시 처리 수만 보기 위해)"""
+    rate_limiter._rate_limiter = rate_limiter.RateLimiter(default_rpm=10_000, default_tpm=10_000_000)
+    result_cache._result_cache = result_cache.ResultCache()
+
+
+@pytest.fixture
+def memory_broker(tmp_path):
+    """
+    Celery를 프로세스 내 메모리 브로커로 바꾸고, 워커와 함께 쓸 결과 디렉토리를 반환합니다.
+
+    테스트가 끝나면 브로커 주소와 BACKGROUND_RESULTS_DIR을 원래대로 되돌립니다.
+    """
+    broker_url = background_processor.celery_app.conf.broker_url
+    results_dir = os.environ.get("BACKGROUND_RESULTS_DIR")
+    background_processor.celery_app.conf.broker_url = "memory://"
+    os.environ["BACKGROUND_RESULTS_DIR"] = str(tmp_path)
+    background_processor._worker_runtimes.clear()
+    yield tmp_path
+    background_processor.celery_app.conf.broker_url = broker_url
+    if results_dir is None:
+        os.environ.pop("BACKGROUND_RESULTS_DIR", None)
+    else:
+        os.environ["BACKGROUND_RESULTS_DIR"] = results_dir
+    background_processor._worker_runtimes.clear()
+
+
+@pytest.fixture
+def numbered_image():
+    """작업끼리 합쳐지지 않도록 번호마다 다른 PNG 이미지를 만드는 함수"""
+    def build(number: int) -> bytes:
+        image = Image.new("RGB", (400, 300), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((20, 20), f"image {number}", fill="black")
+        draw.rectangle((20, 60, 60 + number * 20, 100), fill="black")
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        return buffer.getvalue()
+    return build
+
+
+@pytest.fixture
+def text_pdf():
+    """페이지마다 'Page n total n*10' 텍스트가 들어 있는 page_count쪽 PDF를 만드는 함수"""
+    def build(page_count: int) -> bytes:
+        return _pdf_from_content_streams([
+            f"BT /F1 12 Tf 72 720 Td (Page {number} total {number * 10}) Tj ET"
+            for number in range(1, page_count + 1)
+        ])
+    return build
+
+
+@pytest.fixture
+def layout_pdf():
+    """페이지별 내용 스트림(글꼴 /F1 = Helvetica) 목록으로 PDF를 만드는 함수"""
+    return _pdf_from_content_streams
+
+
+@pytest.fixture
+def prose_page() -> str:
+    """표가 없는 평범한 문단 페이지의 내용 스트림"""
+    return "BT /F1 11 Tf 72 720 Td 14 TL (This page is ordinary prose without a table.) Tj T* (Revenue grew by ten percent year over year.) Tj ET"
+
+
+@pytest.fixture
+def ragged_page() -> str:
+    """숫자가 많지만 열이 정렬되지 않아 레이아웃으로는 표를 확정할 수 없는 페이지의 내용 스트림"""
+    return "BT /F1 10 Tf 72 720 Td 14 TL (Growth rates) Tj T* (Revenue grew 10% 12%) Tj T* (Cost 5%) Tj T* (Margin 3% 4% 2%) Tj ET"
+
+
+def _pdf_from_content_streams(streams: list) -> bytes:
+    """페이지별 내용 스트림으로 Helvetica(/F1) 글꼴 PDF를 만듭니다."""
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    })
+    for ops in streams:
+        page = PageObject.create_blank_page(width=612, height=792)
+        content = DecodedStreamObject()
+        content.set_data(ops.encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def default_cpu_workers() -> int:
+    """CPU 작업 스레드 수 (BACKGROUND_CPU_WORKERS, 기본값: CPU 코어 수)"""
+    return int(os.getenv("BACKGROUND_CPU_WORKERS") or str(os.cpu_count() or 1))
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """
+    이미지 전처리, 빈 페이지 감지, 스캔 페이지 렌더링, 문서 파싱, 결과 직렬화에 쓰는 공유 스레드 풀을 반환합니다.
+    (구성되지 않았다면 기본 크기로 생성)
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = default_cpu_workers()
+            _executor = ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix="cpu")
+        return _executor
+
+
+def cpu_executor_workers() -> int:
+    """공유 CPU 스레드 풀의 스레드 수"""
+    get_cpu_executor()
+    return _executor_workers
+
+
+def configure_cpu_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    공유 CPU 스레드 풀의 크기를 바꿉니다.
+
+    크기가 다르면 새 풀로 교체하며, 이미 실행 중인 작업은 이전 풀에서 마저 끝냅니다.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None and _executor_workers == max_workers:
+            return _executor
+        previous = _executor
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu")
+        _executor_workers = max_workers
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _executor
+
+
+async def run_cpu(func: Callable[..., Any], *args: Any) -> Any:
+    """블로킹 함수를 공유 CPU 스레드 풀에서 실행합니다. (이벤트 루프를 막지 않음)"""
+    return await asyncio.get_running_loop().run_in_executor(get_cpu_executor(), func, *args)
+
+
+def shutdown_cpu_executor():
+    """공유 CPU 스레드 풀을 종료합니다. (애플리케이션 종료 시)"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        previous, _executor, _executor_workers = _executor, None, 0
+    if previous is not None:
+        previous.shutdown(wait=True)
@@ -1,19 +1,39 @@
 import io
 import os
 import base64
-from typing import Optional, Dict, Any
-import PyPDF2
+import asyncio
+from typing import Optional, Dict, Any, AsyncIterator, Tuple, List
 from docx import Document
-import pandas as pd
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 from PIL import Image
 import openai
+from openai_client import get_async_client, create_chat_completion, stream_chat_completion
+from result_cache import get_result_cache, hash_content, make_cache_key
+from single_flight import get_single_flight
+from cpu_pool import run_cpu
+from image_preprocessor import preprocess_image
+from token_estimator import estimate_image_request, estimate_pdf_request
+from pdf_text import iter_pdf_pages
+from native_tables import iter_excel_sheets
+from text_chunker import PAGE_SEPARATOR
+
+# Vision 분석 요청 구성이 바뀌면 올려서 이전 캐시 결과가 재사용되지 않도록 합니다
+VISION_PROMPT_VERSION = "1"
+
+# 이미지/PDF 분석 요청의 최대 출력 토큰
+ANALYSIS_MAX_TOKENS = 4000
+
+# process_file에서 DOCX 섹션/Excel 시트 사이를 잇는 구분자 (PDF 페이지 사이는 PAGE_SEPARATOR)
+UNIT_SEPARATOR = "\n\n"
 
 class FileProcessor:
     """다양한 파일 형식에서 텍스트를 추출하는 클래스"""
     
-    def __init__(self):
-        # OpenAI 클라이언트 초기화
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """프로세스 전체에서 공유하는 비동기 OpenAI 클라이언트"""
+        return get_async_client()
     
     async def process_file(self, file_content: bytes, file_extension: str) -> Optional[str]:
         """
@@ -27,21 +47,57 @@ class FileProcessor:
             추출된 텍스트 또는 None
         """
         try:
-            if file_extension == '.pdf':
-                return self._extract_from_pdf(file_content)
-            elif file_extension in ['.docx']:
-                return self._extract_from_docx(file_content)
-            elif file_extension in ['.xlsx', '.xls']:
-                return self._extract_from_excel(file_content)
-            elif file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
+            if file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
                 return await self._extract_from_image_with_vision(file_content, file_extension)
-            else:
-                raise ValueError(f"지원되지 않는 파일 형식: {file_extension}")
+            
+            separator = PAGE_SEPARATOR if file_extension == '.pdf' else UNIT_SEPARATOR
+            return separator.join([unit["text"] async for unit in self.iter_units(file_content, file_extension)])
         except Exception as e:
             print(f"파일 처리 중 오류 발생: {str(e)}")
             return None
     
-    async def analyze_image_with_vision(self, image_content: bytes, image_extension: str, prompt: str = "이 이미지를 분석하고 주요 내용을 설명해주세요.", detail: str = "auto") -> Dict[str, Any]:
+    async def iter_units(self, file_content: bytes, file_extension: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        문서를 페이지(PDF), 섹션(DOCX), 시트(Excel) 단위로 파싱하면서 하나씩 내보냅니다.
+        
+        뒤쪽 단위를 파싱하는 동안 앞쪽 단위를 바로 처리할 수 있어, 전체 문서를 한 문자열로 만들 필요가 없습니다.
+        
+        Args:
+            file_content: 파일의 바이트 내용
+            file_extension: 파일 확장자 (.pdf, .docx, .xlsx, .xls)
+            
+        Yields:
+            {"kind", "index", "page_number", "sheet_name", "title", "text", "start", "end", "byte_offset"}
+            (start/end는 process_file이 반환하는 텍스트에서의 문자 위치,
+            byte_offset은 PDF 파일 내 페이지 객체 위치이며 그 외 형식은 None)
+        """
+        if file_extension == '.pdf':
+            units = self._iter_pdf_units(file_content)
+            separator = PAGE_SEPARATOR
+        elif file_extension in ['.docx']:
+            units = self._iter_docx_units(file_content)
+            separator = UNIT_SEPARATOR
+        elif file_extension in ['.xlsx', '.xls']:
+            units = self._iter_excel_units(file_content, file_extension)
+            separator = UNIT_SEPARATOR
+        else:
+            raise ValueError(f"단위 파싱을 지원하지 않는 파일 형식: {file_extension}")
+        
+        position = 0
+        index = 0
+        async for unit in units:
+            unit.setdefault("page_number", None)
+            unit.setdefault("sheet_name", None)
+            unit.setdefault("title", None)
+            unit.setdefault("byte_offset", None)
+            unit["index"] = index
+            unit["start"] = position
+            unit["end"] = position + len(unit["text"])
+            position = unit["end"] + len(separator)
+            index += 1
+            yield unit
+    
+    async def analyze_image_with_vision(self, image_content: bytes, image_extension: str, prompt: str = "이 이미지를 분석하고 주요 내용을 설명해주세요.", detail: str = "auto", lossless: bool = False) -> Dict[str, Any]:
         """
         OpenAI Vision API를 사용하여 이미지를 분석합니다.
         
@@ -50,44 +106,32 @@ class FileProcessor:
             image_extension: 이미지 파일 확장자
             prompt: 분석 요청 프롬프트
             detail: 이미지 분석 상세도 (low, high, auto)
+            lossless: 이미지를 무손실(PNG)로 재인코딩할지 여부
             
         Returns:
             OpenAI API 분석 결과
         """
         try:
-            # 이미지를 Base64로 인코딩
-            base64_image = base64.b64encode(image_content).decode('utf-8')
-            
-            # OpenAI Vision API 호출 (chat.completions 사용)
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # Vision API 지원 모델
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/{image_extension[1:]};base64,{base64_image}",
-                                    "detail": detail
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=4000
-            )
-            
-            return {
-                "success": True,
-                "output_text": response.choices[0].message.content,
-                "model": response.model,
-                "usage": response.usage.dict() if response.usage else None
-            }
+            # 동일한 이미지 + 프롬프트 + 상세도 조합의 캐시된 결과가 있으면 바로 반환
+            content_hash = hash_content(image_content)
+            cache_key = self._image_analysis_cache_key(content_hash, prompt, detail, lossless)
+            cache = get_result_cache()
+            cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                cached_result["cached"] = True
+                return cached_result
+            
+            async def analyze() -> Dict[str, Any]:
+                result = await self._analyze_image_with_vision_uncached(image_content, image_extension, prompt, detail, lossless)
+                result["content_hash"] = content_hash
+                result["estimate"] = self.estimate_image_analysis(image_content, prompt, detail)
+                cache.set(cache_key, result)
+                return result
+            
+            # 같은 이미지에 대한 동시 요청은 하나의 API 호출을 공유
+            result = await get_single_flight().do(cache_key, analyze)
+            result["cached"] = False
+            return result
             
         except Exception as e:
             print(f"OpenAI Vision API 이미지 분석 오류: {str(e)}")
@@ -96,6 +140,128 @@ class FileProcessor:
                 "error": str(e)
             }
     
+    async def _analyze_image_with_vision_uncached(self, image_content: bytes, image_extension: str, prompt: str, detail: str, lossless: bool = False) -> Dict[str, Any]:
+        """캐시를 거치지 않고 Vision API로 이미지를 분석합니다. (실패 시 예외 발생)"""
+        # Vision 모델이 실제로 보는 해상도로 축소하고 압축 형식으로 재인코딩
+        image_content, image_extension, preprocessing = await run_cpu(
+            preprocess_image, image_content, image_extension, detail, lossless
+        )
+        
+        # OpenAI Vision API 호출 (chat.completions 사용)
+        response = await create_chat_completion(
+            model="gpt-4o",  # Vision API 지원 모델
+            messages=self._vision_messages(image_content, image_extension, prompt, detail),
+            max_tokens=ANALYSIS_MAX_TOKENS
+        )
+        
+        return {
+            "success": True,
+            "output_text": response.choices[0].message.content,
+            "model": response.model,
+            "usage": response.usage.model_dump() if response.usage else None,
+            "preprocessing": preprocessing
+        }
+    
+    async def stream_image_analysis(self, image_content: bytes, image_extension: str, prompt: str = "이 이미지를 분석하고 주요 내용을 설명해주세요.", detail: str = "auto", lossless: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        OpenAI Vision API 분석 결과를 토큰이 생성되는 대로 스트리밍합니다.
+        
+        Args:
+            image_content: 이미지 파일의 바이트 내용
+            image_extension: 이미지 파일 확장자
+            prompt: 분석 요청 프롬프트
+            detail: 이미지 분석 상세도 (low, high, auto)
+            lossless: 이미지를 무손실(PNG)로 재인코딩할지 여부
+            
+        Yields:
+            ("delta", {"text": 텍스트 조각}) 이벤트들, 마지막에 ("done", 전체 분석 결과)
+        """
+        content_hash = hash_content(image_content)
+        cache_key = self._image_analysis_cache_key(content_hash, prompt, detail, lossless)
+        cache = get_result_cache()
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            cached_result["cached"] = True
+            yield "delta", {"text": cached_result.get("output_text", "")}
+            yield "done", cached_result
+            return
+        
+        estimate = self.estimate_image_analysis(image_content, prompt, detail)
+        processed_content, processed_extension, preprocessing = await run_cpu(
+            preprocess_image, image_content, image_extension, detail, lossless
+        )
+        
+        output_text = ""
+        final_chunk = {}
+        async for chunk in stream_chat_completion(
+            model="gpt-4o",
+            messages=self._vision_messages(processed_content, processed_extension, prompt, detail),
+            max_tokens=ANALYSIS_MAX_TOKENS
+        ):
+            if "usage" in chunk:
+                final_chunk = chunk
+            elif chunk["delta"]:
+                output_text += chunk["delta"]
+                yield "delta", {"text": chunk["delta"]}
+        
+        result = {
+            "success": True,
+            "output_text": output_text,
+            "model": "gpt-4o",
+            "usage": final_chunk.get("usage"),
+            "finish_reason": final_chunk.get("finish_reason"),
+            "preprocessing": preprocessing,
+            "content_hash": content_hash,
+            "estimate": estimate
+        }
+        cache.set(cache_key, result)
+        result["cached"] = False
+        yield "done", result
+    
+    def _image_analysis_cache_key(self, content_hash: str, prompt: str, detail: str, lossless: bool) -> str:
+        """이미지 분석 결과의 캐시 키를 만듭니다."""
+        return make_cache_key(
+            content_hash,
+            task="image_analysis",
+            model="gpt-4o",
+            prompt=prompt,
+            detail=detail,
+            lossless=lossless,
+            prompt_version=VISION_PROMPT_VERSION
+        )
+    
+    def _vision_messages(self, image_content: bytes, image_extension: str, prompt: str, detail: str) -> List[Dict[str, Any]]:
+        """이미지와 프롬프트로 Vision API 요청 메시지를 구성합니다."""
+        # 이미지를 Base64로 인코딩
+        base64_image = base64.b64encode(image_content).decode('utf-8')
+        
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/{image_extension[1:]};base64,{base64_image}",
+                            "detail": detail
+                        }
+                    }
+                ]
+            }
+        ]
+    
+    def estimate_image_analysis(self, image_content: bytes, prompt: str, detail: str = "auto") -> Dict[str, Any]:
+        """이미지 분석 요청의 토큰과 비용을 API 호출 없이 추정합니다."""
+        return estimate_image_request(image_content, prompt, detail, "gpt-4o", ANALYSIS_MAX_TOKENS)
+    
+    def estimate_pdf_analysis(self, file_content: bytes, prompt: str) -> Dict[str, Any]:
+        """PDF 분석 요청의 토큰과 비용을 API 호출 없이 추정합니다."""
+        return estimate_pdf_request(file_content, prompt, "gpt-4o", ANALYSIS_MAX_TOKENS)
+    
     async def generate_image_with_gpt(self, prompt: str, size: str = "1024x1024", quality: str = "standard") -> Dict[str, Any]:
         """
         GPT Image 1을 사용하여 이미지를 생성합니다.
@@ -110,7 +276,7 @@ class FileProcessor:
         """
         try:
             # OpenAI Image API 호출
-            response = self.client.images.generate(
+            response = await self.client.images.generate(
                 model="gpt-image-1",
                 prompt=prompt,
                 size=size,
@@ -146,7 +312,7 @@ class FileProcessor:
         """
         try:
             # OpenAI Vision API 호출 (파일 ID 사용)
-            response = self.client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-4o",
                 messages=[
                     {
@@ -173,7 +339,7 @@ class FileProcessor:
                 "success": True,
                 "output_text": response.choices[0].message.content,
                 "model": response.model,
-                "usage": response.usage.dict() if response.usage else None
+                "usage": response.usage.model_dump() if response.usage else None
             }
             
         except Exception as e:
@@ -196,37 +362,19 @@ class FileProcessor:
             OpenAI API 분석 결과
         """
         try:
-            # PDF를 Base64로 인코딩
-            base64_pdf = base64.b64encode(file_content).decode('utf-8')
-            
             # OpenAI API 호출 (chat.completions 사용)
-            response = self.client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-4o",  # PDF 입력을 지원하는 모델
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "file_url",
-                                "file_url": {
-                                    "url": f"data:application/pdf;base64,{base64_pdf}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=4000
+                messages=self._pdf_messages(file_content, prompt),
+                max_tokens=ANALYSIS_MAX_TOKENS
             )
             
             return {
                 "success": True,
                 "output_text": response.choices[0].message.content,
                 "model": response.model,
-                "usage": response.usage.dict() if response.usage else None
+                "usage": response.usage.model_dump() if response.usage else None,
+                "estimate": self.estimate_pdf_analysis(file_content, prompt)
             }
             
         except Exception as e:
@@ -236,6 +384,58 @@ class FileProcessor:
                 "error": str(e)
             }
     
+    async def stream_pdf_analysis(self, file_content: bytes, filename: str, prompt: str = "이 PDF를 분석하고 주요 내용을 요약해주세요.") -> AsyncIterator[Tuple[str, Any]]:
+        """
+        OpenAI의 PDF 입력 기능으로 분석한 결과를 토큰이 생성되는 대로 스트리밍합니다.
+        
+        Yields:
+            ("delta", {"text": 텍스트 조각}) 이벤트들, 마지막에 ("done", 전체 분석 결과)
+        """
+        output_text = ""
+        final_chunk = {}
+        async for chunk in stream_chat_completion(
+            model="gpt-4o",
+            messages=self._pdf_messages(file_content, prompt),
+            max_tokens=ANALYSIS_MAX_TOKENS
+        ):
+            if "usage" in chunk:
+                final_chunk = chunk
+            elif chunk["delta"]:
+                output_text += chunk["delta"]
+                yield "delta", {"text": chunk["delta"]}
+        
+        yield "done", {
+            "success": True,
+            "output_text": output_text,
+            "model": "gpt-4o",
+            "usage": final_chunk.get("usage"),
+            "finish_reason": final_chunk.get("finish_reason"),
+            "estimate": self.estimate_pdf_analysis(file_content, prompt)
+        }
+    
+    def _pdf_messages(self, file_content: bytes, prompt: str) -> List[Dict[str, Any]]:
+        """PDF와 프롬프트로 PDF 입력 요청 메시지를 구성합니다."""
+        # PDF를 Base64로 인코딩
+        base64_pdf = base64.b64encode(file_content).decode('utf-8')
+        
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    },
+                    {
+                        "type": "file_url",
+                        "file_url": {
+                            "url": f"data:application/pdf;base64,{base64_pdf}"
+                        }
+                    }
+                ]
+            }
+        ]
+    
     async def upload_file_to_openai(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """
         파일을 OpenAI Files API에 업로드합니다.
@@ -248,20 +448,11 @@ class FileProcessor:
             업로드된 파일 정보
         """
         try:
-            # 파일을 임시로 저장하여 업로드
-            temp_file_path = f"/tmp/{filename}"
-            with open(temp_file_path, "wb") as f:
-                f.write(file_content)
-            
-            # OpenAI Files API에 업로드
-            with open(temp_file_path, "rb") as f:
-                file_obj = self.client.files.create(
-                    file=f,
-                    purpose="vision"  # 이미지 분석용
-                )
-            
-            # 임시 파일 삭제
-            os.remove(temp_file_path)
+            # OpenAI Files API에 업로드 (임시 파일 없이 메모리에서 바로 전송)
+            file_obj = await self.client.files.create(
+                file=(filename, file_content),
+                purpose="vision"  # 이미지 분석용
+            )
             
             return {
                 "success": True,
@@ -291,7 +482,7 @@ class FileProcessor:
         """
         try:
             # OpenAI API 호출 (파일 ID 사용)
-            response = self.client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-4o",
                 messages=[
                     {
@@ -317,7 +508,7 @@ class FileProcessor:
                 "success": True,
                 "output_text": response.choices[0].message.content,
                 "model": response.model,
-                "usage": response.usage.dict() if response.usage else None
+                "usage": response.usage.model_dump() if response.usage else None
             }
             
         except Exception as e:
@@ -327,68 +518,75 @@ class FileProcessor:
                 "error": str(e)
             }
     
-    def _extract_from_pdf(self, file_content: bytes) -> str:
-        """PDF 파일에서 텍스트 추출"""
-        try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            print(f"PDF 텍스트 추출 오류: {str(e)}")
-            return ""
+    async def _iter_pdf_units(self, file_content: bytes) -> AsyncIterator[Dict[str, Any]]:
+        """PDF 페이지 단위 (페이지 구간을 병렬 추출하면서 앞 페이지부터 내보냄)"""
+        async for page in iter_pdf_pages(file_content):
+            yield {
+                "kind": "page",
+                "page_number": page["page_number"],
+                "text": page["text"].strip(),
+                "byte_offset": page["byte_offset"]
+            }
     
-    def _extract_from_docx(self, file_content: bytes) -> str:
-        """DOCX 파일에서 텍스트 추출"""
-        try:
-            doc = Document(io.BytesIO(file_content))
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            # 표에서도 텍스트 추출
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + "\t"
-                    text += "\n"
-            
-            return text.strip()
-        except Exception as e:
-            print(f"DOCX 텍스트 추출 오류: {str(e)}")
-            return ""
+    async def _iter_docx_units(self, file_content: bytes) -> AsyncIterator[Dict[str, Any]]:
+        """DOCX 섹션 단위 (제목 스타일 문단마다 새 섹션, 본문의 문단과 표는 문서 순서대로)"""
+        doc = await run_cpu(Document, io.BytesIO(file_content))
+        
+        title = None
+        lines: List[str] = []
+        for element in doc.element.body.iterchildren():
+            if element.tag.endswith('}p'):
+                paragraph = Paragraph(element, doc)
+                if self._is_heading(paragraph) and lines:
+                    yield {"kind": "section", "title": title, "text": "\n".join(lines).strip()}
+                    lines = []
+                if self._is_heading(paragraph):
+                    title = paragraph.text.strip()
+                lines.append(paragraph.text)
+            elif element.tag.endswith('}tbl'):
+                # 표는 행마다 셀을 탭으로 구분
+                for row in Table(element, doc).rows:
+                    lines.append("\t".join(cell.text for cell in row.cells))
+        
+        if lines:
+            yield {"kind": "section", "title": title, "text": "\n".join(lines).strip()}
+    
+    def _is_heading(self, paragraph: Paragraph) -> bool:
+        """제목/머리글 스타일 문단인지 확인합니다."""
+        style_name = paragraph.style.name if paragraph.style is not None else ""
+        return bool(paragraph.text.strip()) and style_name.startswith(("Heading", "Title", "제목"))
     
-    def _extract_from_excel(self, file_content: bytes) -> str:
-        """Excel 파일에서 텍스트 추출"""
+    async def _iter_excel_units(self, file_content: bytes, file_extension: str) -> AsyncIterator[Dict[str, Any]]:
+        """Excel 시트 단위 (읽기 전용 모드로 시트를 하나씩 읽어서 내보냄, 셀은 탭으로 구분)"""
+        sheets = iter_excel_sheets(file_content, file_extension)
         try:
-            excel_file = io.BytesIO(file_content)
-            
-            # 모든 시트 읽기
-            excel_data = pd.read_excel(excel_file, sheet_name=None)
-            
-            text = ""
-            for sheet_name, df in excel_data.items():
-                text += f"=== {sheet_name} ===\n"
-                text += df.to_string(index=False) + "\n\n"
-            
-            return text.strip()
-        except Exception as e:
-            print(f"Excel 텍스트 추출 오류: {str(e)}")
-            return ""
+            while True:
+                sheet = await run_cpu(next, sheets, None)
+                if sheet is None:
+                    break
+                sheet_name, rows = sheet
+                yield {
+                    "kind": "sheet",
+                    "sheet_name": sheet_name,
+                    "title": sheet_name,
+                    "text": f"=== {sheet_name} ===\n" + "\n".join("\t".join(row) for row in rows if any(row))
+                }
+        finally:
+            sheets.close()
     
     async def _extract_from_image_with_vision(self, file_content: bytes, file_extension: str) -> str:
         """OpenAI Vision API를 사용하여 이미지에서 텍스트 및 표 추출"""
         try:
+            # Vision 모델이 실제로 보는 해상도로 축소하고 압축 형식으로 재인코딩
+            file_content, file_extension, _ = await run_cpu(
+                preprocess_image, file_content, file_extension, "high"
+            )
+            
             # 이미지를 Base64로 인코딩
             base64_image = base64.b64encode(file_content).decode('utf-8')
             
             # Vision API 호출
-            response = self.client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-4o",  # Vision API 지원 모델
                 messages=[
                     {
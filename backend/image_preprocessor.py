@@ -0,0 +1,121 @@
+import io
+import os
+import time
+from typing import Dict, Any, Tuple
+from PIL import Image, ImageOps
+
+# OpenAI Vision API가 그대로 받는 형식 (그 외 TIFF, BMP 등은 변환 필요)
+API_SUPPORTED_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp', '.gif']
+
+# detail별 모델 내부 리사이즈 기준
+LOW_DETAIL_MAX_SIDE = 512
+HIGH_DETAIL_MAX_SIDE = 2048
+HIGH_DETAIL_SHORT_SIDE = 768
+
+
+def target_size(width: int, height: int, detail: str) -> Tuple[int, int]:
+    """
+    Vision 모델이 detail 수준에서 실제로 보는 최대 해상도를 계산합니다. (확대는 하지 않음)
+
+    - low: 512x512 안에 맞춤
+    - high/auto: 2048x2048 안에 맞춘 뒤 짧은 변이 768이 되도록 축소
+    """
+    if detail == "low":
+        scale = min(1.0, LOW_DETAIL_MAX_SIDE / max(width, height))
+    else:
+        scale = min(1.0, HIGH_DETAIL_MAX_SIDE / max(width, height), HIGH_DETAIL_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def preprocess_image(image_content: bytes, file_extension: str, detail: str = "high", lossless: bool = False) -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    Vision API 업로드 전에 이미지를 detail 수준에 맞게 축소하고 압축 형식으로 다시 인코딩합니다.
+
+    Args:
+        image_content: 원본 이미지 바이트
+        file_extension: 원본 파일 확장자
+        detail: 이미지 분석 상세도 (low, high, auto)
+        lossless: True면 PNG(무손실)로 인코딩 (작은 글씨의 표 등)
+
+    Returns:
+        (전송할 이미지 바이트, 전송할 확장자, 전처리 전후 통계)
+    """
+    started_at = time.perf_counter()
+    stats: Dict[str, Any] = {
+        "original_bytes": len(image_content),
+        "original_format": file_extension.lstrip("."),
+        "lossless": lossless
+    }
+
+    if os.getenv("IMAGE_PREPROCESS_ENABLED", "true").lower() != "true":
+        stats.update({"applied": False, "reason": "disabled", "processed_bytes": len(image_content)})
+        return image_content, file_extension, stats
+
+    try:
+        image = Image.open(io.BytesIO(image_content))
+        # 애니메이션 GIF 등은 첫 프레임만 사용
+        image.seek(0)
+        image = ImageOps.exif_transpose(image)
+    except Exception as e:
+        stats.update({"applied": False, "reason": f"디코딩 실패: {str(e)}", "processed_bytes": len(image_content)})
+        return image_content, file_extension, stats
+
+    original_size = image.size
+    new_size = target_size(image.width, image.height, detail)
+    if new_size != image.size:
+        image = image.resize(new_size, Image.LANCZOS)
+
+    if lossless:
+        processed, output_extension = _encode(_normalize_mode(image, keep_alpha=True), "PNG"), ".png"
+    else:
+        output_format = os.getenv("IMAGE_OUTPUT_FORMAT", "jpeg").upper()
+        if output_format == "WEBP":
+            output_extension = ".webp"
+        else:
+            output_format, output_extension = "JPEG", ".jpeg"
+        image = _normalize_mode(image, keep_alpha=False)
+        processed = _encode(image, output_format, quality=int(os.getenv("IMAGE_JPEG_QUALITY", "85")))
+
+        # 선과 글자 위주의 표 스캔은 PNG가 더 작은 경우가 많아 작은 쪽을 사용
+        png_processed = _encode(image, "PNG")
+        if len(png_processed) < len(processed):
+            processed, output_extension = png_processed, ".png"
+
+    # 모델이 어차피 같은 해상도로 줄이므로, 원본이 API 지원 형식이고 더 작으면 원본을 그대로 보냄
+    if len(processed) >= len(image_content) and file_extension.lower() in API_SUPPORTED_EXTENSIONS:
+        processed, output_extension = image_content, file_extension
+
+    stats.update({
+        "applied": True,
+        "original_size": list(original_size),
+        "processed_size": list(new_size),
+        "processed_format": output_extension.lstrip("."),
+        "processed_bytes": len(processed),
+        "reduction_ratio": round(1 - len(processed) / len(image_content), 4) if image_content else 0.0,
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2)
+    })
+    return processed, output_extension, stats
+
+
+def _encode(image: Image.Image, output_format: str, **save_kwargs: Any) -> bytes:
+    """이미지를 지정된 형식으로 인코딩합니다."""
+    buffer = io.BytesIO()
+    image.save(buffer, format=output_format, optimize=True, **save_kwargs)
+    return buffer.getvalue()
+
+
+def _normalize_mode(image: Image.Image, keep_alpha: bool) -> Image.Image:
+    """인코딩 형식에 맞게 색 공간을 정리합니다. (흑백은 흑백으로 유지하여 크기 절약)"""
+    if image.mode in ("L", "RGB"):
+        return image
+    if image.mode == "1" or image.mode.startswith("I"):
+        return image.convert("L")
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        image = image.convert("RGBA")
+        if keep_alpha:
+            return image
+        # 투명 영역은 흰 배경으로 합성
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert("RGB")
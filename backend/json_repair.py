@@ -0,0 +1,159 @@
+import json
+import re
+from typing import Any, List, Tuple
+
+# ```json ... ``` 코드 블록 (닫는 펜스가 잘린 경우도 허용)
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:\n?```|$)", re.DOTALL)
+# 닫는 괄호 앞의 불필요한 쉼표
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+# 잘린 JSON을 복구할 때 시도할 최대 절단 위치 수
+MAX_CUT_ATTEMPTS = 200
+
+
+def parse_json_tolerant(text: str) -> Tuple[Any, bool]:
+    """
+    모델 응답에서 JSON을 파싱합니다. 엄격한 파싱이 실패하면 로컬에서 복구를 시도합니다.
+
+    복구 순서:
+        1. 코드 블록/앞뒤 설명 문장 제거
+        2. 닫는 괄호 앞 쉼표, 파이썬식 True/False/None 등 가벼운 문법 오류 수정
+        3. 잘린 출력은 열린 문자열/괄호를 닫고, 그래도 안 되면 마지막으로 완결된 값 위치까지 잘라서 닫음
+
+    Args:
+        text: 모델 응답 텍스트
+
+    Returns:
+        (파싱된 값, 복구 여부)
+
+    Raises:
+        json.JSONDecodeError: 복구할 수 없는 경우
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError as e:
+        first_error = e
+
+    candidate = _extract_json_text(text)
+    for fixed in (candidate, _fix_syntax(candidate)):
+        try:
+            return json.loads(fixed), True
+        except json.JSONDecodeError:
+            pass
+
+    closed = _close_truncated(_fix_syntax(candidate))
+    if closed is not None:
+        return closed, True
+    raise first_error
+
+
+def _extract_json_text(text: str) -> str:
+    """코드 블록과 JSON 앞뒤의 설명 문장을 제거합니다."""
+    match = _FENCE_PATTERN.search(text)
+    if match:
+        text = match.group(1)
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return text.strip()
+    text = text[min(starts):]
+
+    # 완결된 JSON 뒤에 붙은 설명 문장은 제거
+    stack, in_string, _ = _scan(text)
+    if not stack and not in_string:
+        end = max(text.rfind("}"), text.rfind("]"))
+        text = text[:end + 1]
+    return text.strip()
+
+
+def _fix_syntax(text: str) -> str:
+    """문자열 밖의 가벼운 문법 오류를 고칩니다."""
+    pieces = []
+    for is_string, piece in _split_strings(text):
+        if not is_string:
+            piece = _TRAILING_COMMA_PATTERN.sub(r"\1", piece)
+            piece = re.sub(r"\bTrue\b", "true", piece)
+            piece = re.sub(r"\bFalse\b", "false", piece)
+            piece = re.sub(r"\bNone\b", "null", piece)
+        pieces.append(piece)
+    return "".join(pieces)
+
+
+def _close_truncated(text: str) -> Any:
+    """잘린 JSON의 열린 문자열과 괄호를 닫아 파싱합니다. (실패 시 None)"""
+    stack, in_string, cuts = _scan(text)
+
+    # 1) 끝에서 바로 닫아보기 (값 문자열 도중에 잘린 경우)
+    tail = text + ('"' if in_string else "")
+    tail = re.sub(r"[,:\s]+$", "", tail)
+    try:
+        return json.loads(tail + "".join(reversed(stack)))
+    except json.JSONDecodeError:
+        pass
+
+    # 2) 마지막으로 완결된 값 위치부터 거꾸로 잘라서 닫아보기
+    for position, open_stack in reversed(cuts[-MAX_CUT_ATTEMPTS:]):
+        try:
+            return json.loads(text[:position] + "".join(reversed(open_stack)))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _scan(text: str) -> Tuple[List[str], bool, List[Tuple[int, List[str]]]]:
+    """
+    문자열을 고려하여 JSON 텍스트를 훑습니다.
+
+    Returns:
+        (닫히지 않은 괄호의 닫는 문자 스택, 문자열 안에서 끝났는지 여부, 완결된 값 직후의 절단 위치 목록)
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char == "{":
+            stack.append("}")
+        elif char == "[":
+            stack.append("]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((index + 1, list(stack)))
+        elif char == ",":
+            cuts.append((index, list(stack)))
+    return stack, in_string, cuts
+
+
+def _split_strings(text: str) -> List[Tuple[bool, str]]:
+    """텍스트를 (문자열 여부, 조각) 목록으로 나눕니다."""
+    pieces = []
+    start = 0
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                pieces.append((True, text[start:index + 1]))
+                start = index + 1
+                in_string = False
+        elif char == '"':
+            pieces.append((False, text[start:index]))
+            start = index
+            in_string = True
+    pieces.append((in_string, text[start:]))
+    return pieces
@@ -1,17 +1,28 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Header
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import json
 import shutil
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import openai
 from dotenv import load_dotenv
-from table_extractor import TableExtractor
+from table_extractor import TableExtractor, PARSE_STATS
+from blank_detector import blank_stats
 from file_processor import FileProcessor
 from background_processor import BackgroundProcessor
+from openai_client import close_async_client
+from pdf_text import shutdown_pdf_process_pool
+from cpu_pool import shutdown_cpu_executor
+from result_cache import configure_result_cache, hash_content, make_cache_key
+from single_flight import get_single_flight
+from rate_limiter import get_rate_limiter
+from resilience import get_resilient_caller
+from token_estimator import get_token_budget
+from streaming import result_events, sse_stream
+from webhook_dispatcher import configure_webhook_dispatcher, is_valid_callback_url
 
 # 환경 변수 로드
 load_dotenv()
@@ -96,7 +107,13 @@ RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
 # 백그라운드 프로세서 초기화
-background_processor = BackgroundProcessor(RESULTS_DIR, max_workers=3)
+background_processor = BackgroundProcessor(RESULTS_DIR, max_workers=int(os.getenv("BACKGROUND_WORKERS", "3")))
+
+# 분석 결과 캐시 초기화 (메모리 LRU + RESULTS_DIR/cache 디스크 계층)
+result_cache = configure_result_cache(RESULTS_DIR / "cache")
+
+# 작업 완료 콜백 디스패처 초기화 (보내지 못한 콜백은 RESULTS_DIR/webhooks에 저장)
+webhook_dispatcher = configure_webhook_dispatcher(RESULTS_DIR / "webhooks")
 
 # Docker 환경에서 /tmp/uploads 경로도 확인
 DOCKER_UPLOADS_DIR = Path("/tmp/uploads")
@@ -110,8 +127,12 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """애플리케이션 종료 시 백그라운드 프로세서를 중지합니다."""
+    """애플리케이션 종료 시 백그라운드 프로세서를 중지하고 남은 콜백을 보낸 뒤 커넥션 풀, PDF 추출 프로세스 풀, CPU 스레드 풀을 정리합니다."""
     await background_processor.stop()
+    await webhook_dispatcher.close()
+    await close_async_client()
+    shutdown_pdf_process_pool()
+    shutdown_cpu_executor()
 
 @app.get("/")
 async def root():
@@ -142,6 +163,100 @@ async def get_paths():
         "uploads_dir_exists": UPLOADS_DIR.exists()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    OpenAI 호출 경로의 운영 지표를 반환합니다.
+    
+    Returns:
+        레이트 리미터 대기열/대기 시간, 재시도/헤징, 동일 요청 합치기, 결과 캐시, 토큰 예산, 표 JSON 파싱, 빈 페이지 감지, 백그라운드 워커, 작업 완료 콜백 지표
+    """
+    return {
+        "rate_limiter": get_rate_limiter().stats(),
+        "resilience": get_resilient_caller().stats(),
+        "single_flight": get_single_flight().stats(),
+        "result_cache": result_cache.stats(),
+        "token_budget": get_token_budget().stats(),
+        "table_parsing": PARSE_STATS,
+        "blank_detection": blank_stats(),
+        "background_workers": background_processor.worker_stats(),
+        "webhooks": webhook_dispatcher.stats()
+    }
+
+@app.post("/estimate")
+async def estimate_tokens(
+    file: UploadFile = File(...),
+    task: Optional[str] = Form("analyze-image"),
+    prompt: Optional[str] = Form(None),
+    detail: Optional[str] = Form(None),
+    model: Optional[str] = Form(None),
+    x_tenant_id: Optional[str] = Header(None)
+):
+    """
+    OpenAI를 호출하지 않고 요청의 토큰 수와 비용을 미리 계산합니다. (dry-run)
+    
+    Args:
+        file: 분석할 파일
+        task: 추정할 작업 (analyze-image, analyze-pdf, extract-tables)
+        prompt: 분석 요청 프롬프트 (선택사항, analyze-image/analyze-pdf)
+        detail: 이미지 분석 상세도 (선택사항)
+        model: 사용할 모델명 (선택사항, extract-tables)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 예산 확인용)
+    
+    Returns:
+        토큰/비용 추정치와 예산 판정 결과 (허용, 다운그레이드, 거절)
+    """
+    try:
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="파일명이 없습니다.")
+        
+        file_content = await file.read()
+        file_extension = os.path.splitext(file.filename.lower())[1]
+        image_formats = ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']
+        downgraded_estimate = None
+        
+        if task == "analyze-image":
+            prompt = prompt or "이 이미지를 분석하고 주요 내용을 설명해주세요."
+            detail = detail if detail in ["low", "high", "auto"] else "auto"
+            estimate = file_processor.estimate_image_analysis(file_content, prompt, detail)
+            if detail != "low":
+                downgraded_estimate = file_processor.estimate_image_analysis(file_content, prompt, "low")
+        elif task == "analyze-pdf":
+            estimate = file_processor.estimate_pdf_analysis(file_content, prompt or "이 PDF를 분석하고 주요 내용을 요약해주세요.")
+        elif task == "extract-tables":
+            selected_model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
+            if file_extension in image_formats:
+                detail = detail if detail in ["low", "high"] else "high"
+                estimate = table_extractor.estimate_image_extraction(file_content, selected_model, detail)
+                if detail != "low":
+                    downgraded_estimate = table_extractor.estimate_image_extraction(file_content, selected_model, "low")
+            else:
+                # 네이티브 표가 있는 문서는 API를 호출하지 않음
+                native_result = await table_extractor.extract_native_tables(file_content, file_extension)
+                if native_result is not None:
+                    estimate = native_result["estimate"]
+                else:
+                    extracted_text = await file_processor.process_file(file_content, file_extension)
+                    if not extracted_text:
+                        raise HTTPException(status_code=400, detail="파일에서 텍스트를 추출할 수 없습니다.")
+                    estimate = table_extractor.estimate_text_extraction(extracted_text, selected_model)
+        else:
+            raise HTTPException(status_code=400, detail="task는 analyze-image, analyze-pdf, extract-tables 중 하나여야 합니다.")
+        
+        budget = get_token_budget().check(x_tenant_id, estimate, downgraded_estimate, dry_run=True)
+        
+        return JSONResponse(content={
+            "success": True,
+            "task": task,
+            "estimate": estimate,
+            "budget": budget
+        }, status_code=200)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"토큰 추정 중 오류가 발생했습니다: {str(e)}")
+
 @app.post("/upload-image")
 async def upload_image(file: UploadFile = File(...)):
     """
@@ -279,7 +394,10 @@ async def delete_image(filename: str):
 async def analyze_image(
     file: UploadFile = File(...),
     prompt: Optional[str] = Form("이 이미지를 분석하고 주요 내용을 설명해주세요."),
-    detail: Optional[str] = Form("auto")
+    detail: Optional[str] = Form("auto"),
+    lossless: Optional[bool] = Form(False),
+    stream: Optional[bool] = Form(False),
+    x_tenant_id: Optional[str] = Header(None)
 ):
     """
     OpenAI Vision API를 사용하여 이미지를 분석합니다.
@@ -288,9 +406,12 @@ async def analyze_image(
         file: 업로드된 이미지 파일
         prompt: 분석 요청 프롬프트 (선택사항)
         detail: 이미지 분석 상세도 (low, high, auto) (선택사항)
+        lossless: 업로드 전 무손실(PNG) 재인코딩 여부 (선택사항, 작은 글씨 이미지용)
+        stream: True면 생성되는 토큰을 SSE(delta 이벤트)로 전달하고 done 이벤트로 전체 결과 전달 (선택사항)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 토큰 예산 적용)
     
     Returns:
-        OpenAI Vision API 분석 결과
+        OpenAI Vision API 분석 결과 (stream이면 text/event-stream)
     """
     try:
         # 파일 유효성 검사
@@ -316,12 +437,31 @@ async def analyze_image(
         if detail not in ["low", "high", "auto"]:
             detail = "auto"
         
+        # 토큰 예산 확인 (초과 시 detail을 low로 낮추거나 거절)
+        budget = _check_token_budget(
+            x_tenant_id,
+            file_processor.estimate_image_analysis(file_content, prompt, detail),
+            file_processor.estimate_image_analysis(file_content, prompt, "low") if detail != "low" else None
+        )
+        if budget["downgraded"]:
+            detail = "low"
+        
+        if stream:
+            return _sse_response(
+                file_processor.stream_image_analysis(file_content, file_extension, prompt, detail, lossless),
+                x_tenant_id,
+                budget
+            )
+        
         # OpenAI Vision API 분석 실행
-        result = await file_processor.analyze_image_with_vision(file_content, file_extension, prompt, detail)
+        result = await file_processor.analyze_image_with_vision(file_content, file_extension, prompt, detail, lossless)
         
         if not result["success"]:
             raise HTTPException(status_code=500, detail=f"이미지 분석 중 오류가 발생했습니다: {result['error']}")
         
+        _record_token_usage(x_tenant_id, result)
+        result["budget"] = {"downgraded": budget["downgraded"], "reason": budget["reason"]}
+        
         # 분석 결과를 결과 디렉토리에 저장
         timestamp = int(time.time())
         result_filename = f"analysis_result_{timestamp}.json"
@@ -333,6 +473,7 @@ async def analyze_image(
             "analysis_time": timestamp,
             "prompt": prompt,
             "detail": detail,
+            "lossless": lossless,
             "result_file": str(result_file_path)
         }
         
@@ -342,6 +483,8 @@ async def analyze_image(
         
         return JSONResponse(content=result, status_code=200)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -381,7 +524,9 @@ async def analyze_image_with_file_id(
 @app.post("/analyze-pdf")
 async def analyze_pdf(
     file: UploadFile = File(...),
-    prompt: Optional[str] = Form("이 PDF를 분석하고 주요 내용을 요약해주세요.")
+    prompt: Optional[str] = Form("이 PDF를 분석하고 주요 내용을 요약해주세요."),
+    stream: Optional[bool] = Form(False),
+    x_tenant_id: Optional[str] = Header(None)
 ):
     """
     OpenAI의 PDF 입력 기능을 사용하여 PDF를 분석합니다.
@@ -389,9 +534,11 @@ async def analyze_pdf(
     Args:
         file: 업로드된 PDF 파일
         prompt: 분석 요청 프롬프트 (선택사항)
+        stream: True면 생성되는 토큰을 SSE(delta 이벤트)로 전달하고 done 이벤트로 전체 결과 전달 (선택사항)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 토큰 예산 적용)
     
     Returns:
-        OpenAI API 분석 결과
+        OpenAI API 분석 결과 (stream이면 text/event-stream)
     """
     try:
         # 파일 유효성 검사
@@ -407,14 +554,25 @@ async def analyze_pdf(
         if len(file_content) > 10 * 1024 * 1024:  # 10MB
             raise HTTPException(status_code=400, detail="파일 크기는 10MB를 초과할 수 없습니다.")
         
+        # 토큰 예산 확인 (PDF는 낮출 수 있는 detail이 없어 초과 시 거절)
+        budget = _check_token_budget(x_tenant_id, file_processor.estimate_pdf_analysis(file_content, prompt))
+        
+        if stream:
+            return _sse_response(file_processor.stream_pdf_analysis(file_content, file.filename, prompt), x_tenant_id, budget)
+        
         # OpenAI PDF 분석 실행
         result = await file_processor.process_pdf_with_openai(file_content, file.filename, prompt)
         
         if not result["success"]:
             raise HTTPException(status_code=500, detail=f"PDF 분석 중 오류가 발생했습니다: {result['error']}")
         
+        _record_token_usage(x_tenant_id, result)
+        result["budget"] = {"downgraded": budget["downgraded"], "reason": budget["reason"]}
+        
         return JSONResponse(content=result, status_code=200)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF 분석 중 오류가 발생했습니다: {str(e)}")
 
@@ -490,7 +648,10 @@ async def analyze_with_file_id(
 @app.post("/extract-tables")
 async def extract_tables(
     file: UploadFile = File(...),
-    model: Optional[str] = Form(None)
+    model: Optional[str] = Form(None),
+    lossless: Optional[bool] = Form(False),
+    stream: Optional[bool] = Form(False),
+    x_tenant_id: Optional[str] = Header(None)
 ):
     """
     첨부파일에서 표를 추출하여 JSON과 Markdown으로 정리합니다.
@@ -498,9 +659,12 @@ async def extract_tables(
     Args:
         file: 업로드된 파일 (PDF, DOCX, XLSX, 이미지 등)
         model: 사용할 모델명 (선택사항, 기본값: 환경변수에서 설정된 모델)
+        lossless: 이미지 업로드 전 무손실(PNG) 재인코딩 여부 (선택사항, 작은 글씨의 표에 사용)
+        stream: True면 표 객체가 완성될 때마다 SSE(table 이벤트)로 전달하고 done 이벤트로 전체 결과 전달 (선택사항)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 토큰 예산 적용)
     
     Returns:
-        JSON 형태의 표 정보와 Markdown
+        JSON 형태의 표 정보와 Markdown (stream이면 text/event-stream)
     """
     try:
         # 파일 유효성 검사
@@ -523,24 +687,146 @@ async def extract_tables(
         # 사용할 모델 결정 (파라미터 > 환경변수 > 기본값)
         selected_model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
         
-        # 이미지 파일인 경우 Vision API를 직접 사용
+        # 이미지는 업로드 전에 토큰 예산 확인 (초과 시 detail을 low로 낮추거나 거절)
+        detail = "high"
+        budget = None
         if file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
-            result = await table_extractor.extract_tables_from_image(file_content, file_extension, selected_model)
-        else:
-            # 다른 파일 형식의 경우 텍스트 추출 후 표 분석
-            extracted_text = await file_processor.process_file(file_content, file_extension)
-            
-            if not extracted_text:
-                raise HTTPException(status_code=400, detail="파일에서 텍스트를 추출할 수 없습니다.")
-            
-            # 선택된 모델을 사용하여 표 추출 및 정리
-            result = await table_extractor.extract_tables_with_gpt5(extracted_text, selected_model)
+            budget = _check_token_budget(
+                x_tenant_id,
+                table_extractor.estimate_image_extraction(file_content, selected_model, "high"),
+                table_extractor.estimate_image_extraction(file_content, selected_model, "low")
+            )
+            if budget["downgraded"]:
+                detail = "low"
+        
+        if stream:
+            return _sse_response(
+                await _stream_table_extraction(file_content, file_extension, selected_model, lossless, detail, x_tenant_id),
+                x_tenant_id,
+                budget
+            )
+        
+        # 같은 테넌트의 같은 파일 + 모델로 진행 중인 요청이 있으면 그 결과를 공유
+        # (문서는 청크마다 호출한 테넌트의 예산을 확인하므로, 다른 테넌트의 요청에 합류하지 않음)
+        flight_key = make_cache_key(
+            hash_content(file_content),
+            task="extract_tables",
+            file_extension=file_extension,
+            model=selected_model,
+            lossless=lossless,
+            detail=detail,
+            tenant_id=x_tenant_id
+        )
+        result = await get_single_flight().do(
+            flight_key,
+            lambda: _run_table_extraction(file_content, file_extension, selected_model, lossless, detail, x_tenant_id)
+        )
+        
+        _record_token_usage(x_tenant_id, result)
+        if budget is not None:
+            result["budget"] = {"downgraded": budget["downgraded"], "reason": budget["reason"]}
         
         return JSONResponse(content=result, status_code=200)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"표 추출 중 오류가 발생했습니다: {str(e)}")
 
+async def _run_table_extraction(file_content: bytes, file_extension: str, selected_model: str, lossless: bool = False, detail: str = "high", tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """파일 형식에 따라 이미지 또는 텍스트 경로로 표를 추출합니다."""
+    # 이미지 파일인 경우 Vision API를 직접 사용
+    if file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
+        return await table_extractor.extract_tables_from_image(file_content, file_extension, selected_model, lossless, detail)
+    
+    # 문서에 구조화된 표가 있으면 LLM 호출 없이 바로 반환
+    native_result = await table_extractor.extract_native_tables(file_content, file_extension)
+    if native_result is not None:
+        return native_result
+    
+    # 다른 파일 형식은 페이지/섹션/시트 단위로 파싱하면서, 묶인 청크부터 바로 표 추출 시작
+    # (토큰 예산은 청크를 호출하기 전마다 누적 추정치로 확인하고, 초과 시 거절)
+    # PDF는 레이아웃으로 표를 찾은 페이지를 제외한 나머지 페이지만 LLM으로 추출 (스캔 페이지는 이미지로 렌더링해 Vision으로 추출)
+    check_budget = lambda estimate: _check_token_budget(tenant_id, estimate)
+    if file_extension == '.pdf':
+        result = await table_extractor.extract_pdf_tables(file_content, selected_model, check_budget, lossless, detail)
+    else:
+        result = await table_extractor.extract_tables_from_units(
+            file_processor.iter_units(file_content, file_extension),
+            selected_model,
+            check_budget=check_budget
+        )
+    
+    if result.get("chunk_count") == 0 and not result.get("success"):
+        raise HTTPException(status_code=400, detail="파일에서 텍스트를 추출할 수 없습니다.")
+    
+    result["budget"] = {"downgraded": False, "reason": None}
+    return result
+
+async def _stream_table_extraction(file_content: bytes, file_extension: str, selected_model: str, lossless: bool = False, detail: str = "high", tenant_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    파일 형식에 따라 표 추출 스트림을 준비합니다.
+    
+    문서는 파싱과 추출이 함께 진행되므로, 도중에 토큰 예산을 넘으면 스트림의 error 이벤트로 알립니다.
+    """
+    if file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
+        return table_extractor.stream_tables_from_image(file_content, file_extension, selected_model, lossless, detail)
+    
+    native_result = await table_extractor.extract_native_tables(file_content, file_extension)
+    if native_result is not None:
+        return result_events(native_result)
+    
+    if file_extension == '.pdf':
+        return table_extractor.stream_pdf_tables(
+            file_content,
+            selected_model,
+            check_budget=lambda estimate: _check_token_budget(tenant_id, estimate),
+            lossless=lossless,
+            detail=detail
+        )
+    
+    return table_extractor.stream_tables_from_units(
+        file_processor.iter_units(file_content, file_extension),
+        selected_model,
+        check_budget=lambda estimate: _check_token_budget(tenant_id, estimate)
+    )
+
+def _sse_response(events: AsyncIterator[Tuple[str, Any]], tenant_id: Optional[str], budget: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+    """이벤트 스트림을 SSE 응답으로 감싸고, done 이벤트에서 예산 정보를 붙이고 사용량을 기록합니다."""
+    async def events_with_budget():
+        async for event, data in events:
+            if event == "done":
+                _record_token_usage(tenant_id, data)
+                if budget is not None:
+                    data["budget"] = {"downgraded": budget["downgraded"], "reason": budget["reason"]}
+            yield event, data
+    
+    return StreamingResponse(
+        sse_stream(events_with_budget()),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 이벤트를 모아두지 않도록 버퍼링 비활성화
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _check_token_budget(tenant_id: Optional[str], estimate: Dict[str, Any], downgraded_estimate: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    OpenAI 호출 전에 토큰 예산을 확인합니다.
+    
+    요청당 한도를 넘으면 413, 테넌트 예산이 부족하면 429로 거절합니다.
+    """
+    budget = get_token_budget().check(tenant_id, estimate, downgraded_estimate)
+    if not budget["allowed"]:
+        status_code = 429 if budget["limit"] == "tenant" else 413
+        raise HTTPException(status_code=status_code, detail=budget["reason"])
+    return budget
+
+def _record_token_usage(tenant_id: Optional[str], result: Dict[str, Any]):
+    """실제 API 호출로 사용한 토큰을 테넌트 예산에 기록합니다. (캐시/합쳐진 결과는 제외)"""
+    if result.get("cached") or result.get("coalesced"):
+        return
+    usage = result.get("usage") or {}
+    get_token_budget().record(tenant_id, usage.get("total_tokens", 0))
+
 # ===== 백그라운드 처리 API 엔드포인트 =====
 
 @app.post("/background/analyze-image")
@@ -548,7 +834,9 @@ async def background_analyze_image(
     file: UploadFile = File(...),
     prompt: Optional[str] = Form("이 이미지를 분석하고 주요 내용을 설명해주세요."),
     detail: Optional[str] = Form("auto"),
-    callback_url: Optional[str] = Form(None)
+    lossless: Optional[bool] = Form(False),
+    callback_url: Optional[str] = Form(None),
+    x_tenant_id: Optional[str] = Header(None)
 ):
     """
     이미지 분석을 백그라운드에서 실행합니다.
@@ -557,7 +845,9 @@ async def background_analyze_image(
         file: 업로드된 이미지 파일
         prompt: 분석 요청 프롬프트 (선택사항)
         detail: 이미지 분석 상세도 (low, high, auto) (선택사항)
+        lossless: 업로드 전 무손실(PNG) 재인코딩 여부 (선택사항)
         callback_url: 완료 시 호출할 콜백 URL (선택사항)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 토큰 예산 적용)
     
     Returns:
         작업 ID와 상태 정보
@@ -586,13 +876,27 @@ async def background_analyze_image(
         if detail not in ["low", "high", "auto"]:
             detail = "auto"
         
+        if callback_url and not await is_valid_callback_url(callback_url):
+            raise HTTPException(status_code=400, detail="콜백 URL은 외부에서 접근할 수 있는 http(s) 주소여야 합니다.")
+        
+        # 작업 제출 전에 토큰 예산 확인 (초과 시 detail을 low로 낮추거나 거절)
+        budget = _check_token_budget(
+            x_tenant_id,
+            file_processor.estimate_image_analysis(file_content, prompt, detail),
+            file_processor.estimate_image_analysis(file_content, prompt, "low") if detail != "low" else None
+        )
+        if budget["downgraded"]:
+            detail = "low"
+        
         # 백그라운드 작업 제출
         task_id = await background_processor.submit_image_analysis_task(
             file_content=file_content,
             filename=file.filename,
             prompt=prompt,
             detail=detail,
-            callback_url=callback_url
+            lossless=lossless,
+            callback_url=callback_url,
+            tenant_id=x_tenant_id
         )
         
         return JSONResponse(content={
@@ -600,9 +904,13 @@ async def background_analyze_image(
             "message": "이미지 분석이 백그라운드에서 시작되었습니다.",
             "task_id": task_id,
             "status": "pending",
+            "estimate": budget["estimate"],
+            "budget": {"downgraded": budget["downgraded"], "reason": budget["reason"]},
             "check_status_url": f"/background/task-status/{task_id}"
         }, status_code=202)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"백그라운드 작업 제출 중 오류가 발생했습니다: {str(e)}")
 
@@ -610,7 +918,9 @@ async def background_analyze_image(
 async def background_extract_tables(
     file: UploadFile = File(...),
     model: Optional[str] = Form(None),
-    callback_url: Optional[str] = Form(None)
+    lossless: Optional[bool] = Form(False),
+    callback_url: Optional[str] = Form(None),
+    x_tenant_id: Optional[str] = Header(None)
 ):
     """
     표 추출을 백그라운드에서 실행합니다.
@@ -618,7 +928,9 @@ async def background_extract_tables(
     Args:
         file: 업로드된 파일
         model: 사용할 모델명 (선택사항)
+        lossless: 이미지 업로드 전 무손실(PNG) 재인코딩 여부 (선택사항)
         callback_url: 완료 시 호출할 콜백 URL (선택사항)
+        x_tenant_id: 테넌트 ID 헤더 (선택사항, 테넌트 토큰 예산 적용)
     
     Returns:
         작업 ID와 상태 정보
@@ -638,18 +950,34 @@ async def background_extract_tables(
                 detail=f"지원되지 않는 파일 형식입니다. 지원 형식: {', '.join(supported_formats)}"
             )
         
+        if callback_url and not await is_valid_callback_url(callback_url):
+            raise HTTPException(status_code=400, detail="콜백 URL은 외부에서 접근할 수 있는 http(s) 주소여야 합니다.")
+        
         # 파일 내용 읽기
         file_content = await file.read()
         
         # 사용할 모델 결정
         selected_model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
         
+        # 이미지는 작업 제출 전에 토큰 예산 확인 (초과 시 detail을 low로 낮추거나 거절)
+        # 문서는 워커가 청크를 호출하기 전마다 확인
+        budget = {"downgraded": False, "reason": None, "estimate": None}
+        if file_extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
+            budget = _check_token_budget(
+                x_tenant_id,
+                table_extractor.estimate_image_extraction(file_content, selected_model, "high"),
+                table_extractor.estimate_image_extraction(file_content, selected_model, "low")
+            )
+        
         # 백그라운드 작업 제출
         task_id = await background_processor.submit_table_extraction_task(
             file_content=file_content,
             filename=file.filename,
             model=selected_model,
-            callback_url=callback_url
+            lossless=lossless,
+            callback_url=callback_url,
+            detail="low" if budget["downgraded"] else "high",
+            tenant_id=x_tenant_id
         )
         
         return JSONResponse(content={
@@ -657,9 +985,13 @@ async def background_extract_tables(
             "message": "표 추출이 백그라운드에서 시작되었습니다.",
             "task_id": task_id,
             "status": "pending",
+            "estimate": budget["estimate"],
+            "budget": {"downgraded": budget["downgraded"], "reason": budget["reason"]},
             "check_status_url": f"/background/task-status/{task_id}"
         }, status_code=202)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"백그라운드 작업 제출 중 오류가 발생했습니다: {str(e)}")
 
@@ -713,6 +1045,8 @@ async def cancel_background_task(task_id: str):
     """
     백그라운드 작업을 취소합니다.
     
+    대기 중인 작업은 큐에서 지우고, 처리 중인 작업은 진행 중인 OpenAI 요청까지 중단합니다.
+    
     Args:
         task_id: 취소할 작업 ID
     
@@ -730,6 +1064,8 @@ async def cancel_background_task(task_id: str):
             "message": f"작업 '{task_id}'이(가) 성공적으로 취소되었습니다."
         }, status_code=200)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"작업 취소 중 오류가 발생했습니다: {str(e)}")
 
@@ -755,6 +1091,162 @@ async def cleanup_background_tasks(max_age_hours: int = 24):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"작업 정리 중 오류가 발생했습니다: {str(e)}")
 
+@app.get("/background/workers")
+async def get_background_workers():
+    """
+    백그라운드 워커 풀 상태를 반환합니다.
+    
+    Returns:
+        워커 수, 처리 중인 워커 수, 대기열 길이, 작업 유형별 동시 처리 제한
+    """
+    return JSONResponse(content={
+        "success": True,
+        "workers": background_processor.worker_stats()
+    }, status_code=200)
+
+@app.post("/background/workers")
+async def resize_background_workers(
+    max_workers: Optional[int] = Form(None),
+    image_analysis_limit: Optional[int] = Form(None),
+    table_extraction_limit: Optional[int] = Form(None),
+    cpu_workers: Optional[int] = Form(None)
+):
+    """
+    재시작 없이 백그라운드 워커 풀 크기를 바꿉니다. (지정하지 않은 값은 유지)
+    
+    Args:
+        max_workers: 동시에 작업을 처리하는 워커 수
+        image_analysis_limit: 이미지 분석 작업 최대 동시 처리 수
+        table_extraction_limit: 표 추출 작업 최대 동시 처리 수
+        cpu_workers: 이미지 전처리/렌더링/문서 파싱/결과 저장에 쓰는 공유 CPU 스레드 수
+    
+    Returns:
+        변경 후 워커 풀 상태
+    """
+    type_limits = {
+        task_type: limit
+        for task_type, limit in [("image_analysis", image_analysis_limit), ("table_extraction", table_extraction_limit)]
+        if limit is not None
+    }
+    try:
+        workers = await background_processor.resize(max_workers, type_limits, cpu_workers)
+        
+        return JSONResponse(content={
+            "success": True,
+            "workers": workers
+        }, status_code=200)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"워커 설정 변경 중 오류가 발생했습니다: {str(e)}")
+
+# ===== 작업 완료 콜백 API 엔드포인트 =====
+
+@app.get("/webhooks/dead-letters")
+async def get_webhook_dead_letters():
+    """
+    재시도 끝에 보내지 못한 작업 완료 콜백 목록을 반환합니다.
+    
+    Returns:
+        콜백 URL, 본문, 마지막 오류, 실패 시각
+    """
+    try:
+        return JSONResponse(content={
+            "success": True,
+            "dead_letters": webhook_dispatcher.dead_letters()
+        }, status_code=200)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"실패 콜백 조회 중 오류가 발생했습니다: {str(e)}")
+
+@app.post("/webhooks/dead-letters/retry")
+async def retry_webhook_dead_letters():
+    """
+    보내지 못한 작업 완료 콜백을 다시 보냅니다. (또 실패하면 다시 목록에 남음)
+    
+    Returns:
+        다시 보낸 콜백 수
+    """
+    try:
+        retried_count = await webhook_dispatcher.retry_dead_letters()
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": "실패한 콜백을 다시 보내기 시작했습니다.",
+            "retried_count": retried_count
+        }, status_code=202)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"실패 콜백 재전송 중 오류가 발생했습니다: {str(e)}")
+
+# ===== 결과 캐시 관리 API 엔드포인트 =====
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    결과 캐시 통계를 반환합니다.
+    
+    Returns:
+        메모리/디스크 계층의 항목 수, 용량, 적중률 등
+    """
+    try:
+        return JSONResponse(content={
+            "success": True,
+            "cache_stats": result_cache.stats()
+        }, status_code=200)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"캐시 통계 조회 중 오류가 발생했습니다: {str(e)}")
+
+@app.delete("/cache")
+async def clear_cache():
+    """
+    결과 캐시 전체를 비웁니다.
+    
+    Returns:
+        삭제된 항목 수
+    """
+    try:
+        removed_count = result_cache.invalidate()
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": "결과 캐시가 비워졌습니다.",
+            "removed_count": removed_count
+        }, status_code=200)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"캐시 삭제 중 오류가 발생했습니다: {str(e)}")
+
+@app.delete("/cache/{content_hash}")
+async def invalidate_cache(content_hash: str):
+    """
+    특정 파일의 캐시 결과를 무효화합니다.
+    
+    Args:
+        content_hash: 파일 바이트의 SHA-256 해시 (응답의 content_hash 값)
+    
+    Returns:
+        삭제된 항목 수
+    """
+    try:
+        if len(content_hash) != 64 or not all(c in "0123456789abcdef" for c in content_hash):
+            raise HTTPException(status_code=400, detail="content_hash는 64자리 SHA-256 16진수 문자열이어야 합니다.")
+        
+        removed_count = result_cache.invalidate(content_hash)
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": f"'{content_hash}'에 대한 캐시가 무효화되었습니다.",
+            "removed_count": removed_count
+        }, status_code=200)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"캐시 무효화 중 오류가 발생했습니다: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
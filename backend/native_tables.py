@@ -0,0 +1,353 @@
+import datetime
+import io
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+# 표 바로 앞 문단을 제목으로 쓸 최대 길이 (더 길면 본문으로 간주)
+MAX_TITLE_LENGTH = 100
+# 한 시트 안에서 표를 나누는 최소 빈 행/열 수
+MIN_TABLE_GAP = 1
+# 표 위의 값 하나짜리 영역을 제목으로 붙일 최대 거리 (행)
+MAX_TITLE_DISTANCE = 2
+
+
+def extract_docx_tables(file_content: bytes) -> List[Dict[str, Any]]:
+    """
+    DOCX의 표를 LLM 호출 없이 python-docx 구조에서 바로 추출합니다.
+
+    병합된 셀은 병합 영역의 모든 칸에 같은 값을 채우고 merged_cells에 기록합니다.
+    첫 행에 가로 병합이 있으면(묶음 헤더) 두 번째 행까지 헤더로 보고 "상위 / 하위" 형태로 합칩니다.
+
+    Args:
+        file_content: DOCX 바이트
+
+    Returns:
+        표 추출 응답 스키마(table_id, title, headers, rows, row_count, column_count)의 표 목록
+    """
+    doc = Document(io.BytesIO(file_content))
+
+    tables = []
+    previous_text = ""
+    for element in doc.element.body.iterchildren():
+        if element.tag.endswith('}p'):
+            previous_text = Paragraph(element, doc).text.strip()
+        elif element.tag.endswith('}tbl'):
+            table = _convert_table(Table(element, doc), previous_text, len(tables) + 1)
+            if table is not None:
+                tables.append(table)
+            previous_text = ""
+    return tables
+
+
+def extract_excel_tables(file_content: bytes, file_extension: str) -> List[Dict[str, Any]]:
+    """
+    Excel 시트의 표를 LLM 호출 없이 통합 문서에서 바로 추출합니다.
+
+    시트는 iter_excel_sheets로 하나씩 읽고, 헤더 행은 값의 형태로 추정합니다.
+
+    Args:
+        file_content: Excel 바이트
+        file_extension: .xlsx 또는 .xls
+
+    Returns:
+        표 추출 응답 스키마의 표 목록 (한 시트에 빈 행/열로 떨어진 표가 여러 개면 각각 하나씩)
+    """
+    tables = []
+    for sheet_name, rows in iter_excel_sheets(file_content, file_extension):
+        tables.extend(sheet_to_tables(sheet_name, rows, len(tables) + 1))
+    return tables
+
+
+def iter_excel_sheets(file_content: bytes, file_extension: str) -> Iterator[Tuple[str, List[List[str]]]]:
+    """
+    Excel 시트를 하나씩 읽어 (시트 이름, 셀 문자열 행 목록)으로 내보냅니다.
+
+    .xlsx는 openpyxl 읽기 전용 모드로 행을 스트리밍하면서 바로 문자열로 바꾸어, 통합 문서 객체나
+    원본 값 사본 없이 시트 하나 분량만 메모리에 둡니다. .xls는 openpyxl이 읽지 못하므로 pandas로 시트별로 읽습니다.
+    시트 끝의 빈 행/열은 잘라냅니다.
+    """
+    if file_extension == '.xls':
+        excel_file = pd.ExcelFile(io.BytesIO(file_content))
+        for sheet_name in excel_file.sheet_names:
+            df = excel_file.parse(sheet_name, header=None)
+            rows = [[_format_value(None if pd.isna(value) else value) for value in row] for row in df.itertuples(index=False)]
+            yield str(sheet_name), _trim(rows)
+        return
+
+    workbook = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield worksheet.title, _trim([[_format_value(value) for value in row] for row in worksheet.iter_rows(values_only=True)])
+    finally:
+        workbook.close()
+
+
+def sheet_to_tables(sheet_name: str, rows: List[List[str]], start_number: int = 1) -> List[Dict[str, Any]]:
+    """
+    시트의 셀 문자열 행에서 표 영역(섬)을 찾아 각각 표 객체로 변환합니다.
+
+    값 하나뿐인 작은 영역이 표 바로 위에 있으면 그 표의 제목으로 붙입니다.
+
+    Args:
+        sheet_name: 시트 이름
+        rows: 셀 문자열 행 목록 (iter_excel_sheets 결과)
+        start_number: 첫 표의 번호 (table_id에 사용)
+
+    Returns:
+        표 객체 목록 (range에 A1 형식의 셀 범위 포함)
+    """
+    if not rows:
+        return []
+    column_count = max(len(row) for row in rows)
+    if column_count == 0:
+        return []
+    cells = np.array([row + [""] * (column_count - len(row)) for row in rows], dtype=object)
+    mask = cells != ""
+
+    islands = find_table_islands(mask)
+
+    # 값 하나짜리 영역이 표 바로 위에 있으면 그 표의 제목으로 사용
+    titles = {}
+    title_islands = set()
+    for island in islands:
+        top, bottom, left, right = island
+        if bottom - top != 1 or right - left != 1:
+            continue
+        below = next((
+            other for other in islands
+            if other != island and 0 <= other[0] - bottom < MAX_TITLE_DISTANCE and other[2] <= left < other[3]
+        ), None)
+        if below is not None and below not in titles:
+            titles[below] = cells[top, left]
+            title_islands.add(island)
+
+    tables = []
+    for island in islands:
+        if island in title_islands:
+            continue
+        top, bottom, left, right = island
+        table = sheet_to_table(
+            sheet_name,
+            cells[top:bottom, left:right].tolist(),
+            start_number + len(tables),
+            titles.get(island)
+        )
+        if table is not None:
+            table["range"] = f"{get_column_letter(left + 1)}{top + 1}:{get_column_letter(right)}{bottom}"
+            tables.append(table)
+    return tables
+
+
+def find_table_islands(mask: np.ndarray, min_gap: int = MIN_TABLE_GAP) -> List[Tuple[int, int, int, int]]:
+    """
+    값이 있는 셀 마스크에서 빈 행/열로 둘러싸인 직사각형 영역(섬)을 찾습니다.
+
+    행/열 단위 투영(any)으로 빈 띠를 찾아 나누는 과정을 더 나눌 수 없을 때까지 반복합니다.
+    모든 연산이 NumPy 벡터 연산이라 수백만 셀 시트도 셀 단위 반복 없이 처리합니다.
+
+    Args:
+        mask: 값이 있는 셀이 True인 2차원 배열
+        min_gap: 영역을 나누는 최소 빈 행/열 수
+
+    Returns:
+        (top, bottom, left, right) 목록 (bottom/right는 미포함), 위에서 아래, 왼쪽에서 오른쪽 순서
+    """
+    islands = []
+    pending = [(0, mask.shape[0], 0, mask.shape[1])]
+    while pending:
+        top, bottom, left, right = pending.pop()
+        block = mask[top:bottom, left:right]
+        row_segments = _segments(block.any(axis=1), min_gap)
+        if not row_segments:
+            continue
+        if len(row_segments) > 1:
+            pending.extend((top + start, top + end, left, right) for start, end in row_segments)
+            continue
+
+        top, bottom = top + row_segments[0][0], top + row_segments[0][1]
+        column_segments = _segments(mask[top:bottom, left:right].any(axis=0), min_gap)
+        if len(column_segments) > 1:
+            pending.extend((top, bottom, left + start, left + end) for start, end in column_segments)
+            continue
+
+        islands.append((top, bottom, left + column_segments[0][0], left + column_segments[0][1]))
+    return sorted(islands)
+
+
+def _segments(filled: np.ndarray, min_gap: int) -> List[Tuple[int, int]]:
+    """1차원 불리언 배열에서 min_gap 미만의 빈칸은 이어붙인 True 구간 (start, end) 목록"""
+    if not filled.any():
+        return []
+    padded = np.concatenate(([False], filled, [False])).astype(np.int8)
+    changes = np.diff(padded)
+    starts = np.flatnonzero(changes == 1)
+    ends = np.flatnonzero(changes == -1)
+
+    # 사이 간격이 min_gap보다 짧은 구간은 합침
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    merged_starts = starts[keep]
+    merged_ends = np.concatenate((ends[:-1][keep[1:]], [ends[-1]]))
+    return list(zip(merged_starts.tolist(), merged_ends.tolist()))
+
+
+def sheet_to_table(sheet_name: str, rows: List[List[str]], number: int, title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    셀 문자열 행을 표 객체로 변환합니다. (내용이 없으면 None)
+
+    값이 하나뿐인 맨 위 행은 표 제목으로, 그다음 행이 글자 위주이고 아래 행과 형태가 다르면 헤더로 봅니다.
+    """
+    values = [row for row in rows if any(row)]
+    if not values:
+        return None
+    column_count = max(len(row) for row in values)
+    values = [row + [""] * (column_count - len(row)) for row in values]
+
+    title = title or sheet_name
+    if column_count > 1 and len(values) > 1 and sum(1 for value in values[0] if value) == 1:
+        title = next(value for value in values[0] if value)
+        values = values[1:]
+
+    if _is_header_row(values):
+        headers = [value or f"열{index + 1}" for index, value in enumerate(values[0])]
+        values = values[1:]
+    else:
+        headers = [f"열{index + 1}" for index in range(column_count)]
+
+    return {
+        "table_id": f"table_{number}",
+        "title": title,
+        "headers": headers,
+        "rows": values,
+        "row_count": len(values),
+        "column_count": column_count,
+        "sheet_name": sheet_name
+    }
+
+
+def _is_header_row(values: List[List[str]]) -> bool:
+    """첫 행이 헤더인지 추정합니다. (숫자가 아닌 글자 위주, 중복 없음, 아래 행에는 숫자가 있음)"""
+    if len(values) < 2:
+        return False
+    first = [value for value in values[0] if value]
+    if len(first) < max(1, len(values[0]) // 2) or len(set(first)) != len(first):
+        return False
+    if any(_is_number(value) for value in first):
+        return False
+    # 아래 행에 숫자가 하나라도 있거나, 아래 행이 모두 글자면 첫 행 값이 아래에서 반복되지 않아야 헤더로 봄
+    below = values[1:min(len(values), 21)]
+    if any(_is_number(value) for row in below for value in row):
+        return True
+    below_values = {value for row in below for value in row}
+    return not any(value in below_values for value in first)
+
+
+def _is_number(value: str) -> bool:
+    """숫자(천 단위 쉼표, %, 통화 기호 허용)처럼 보이는지 확인합니다."""
+    text = value.replace(",", "").replace("%", "").replace("₩", "").replace("$", "").strip()
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _format_value(value: Any) -> str:
+    """셀 값을 문자열로 변환합니다. (정수형 실수는 소수점 없이, 날짜는 ISO 형식)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def _trim(rows: List[List[str]]) -> List[List[str]]:
+    """시트 끝의 빈 행과 빈 열을 잘라냅니다."""
+    while rows and not any(rows[-1]):
+        rows.pop()
+    width = max((max((index + 1 for index, value in enumerate(row) if value), default=0) for row in rows), default=0)
+    return [row[:width] for row in rows]
+
+
+def _convert_table(table: Table, previous_text: str, number: int) -> Optional[Dict[str, Any]]:
+    """python-docx 표를 표 객체로 변환합니다. (내용이 없으면 None)"""
+    # 셀 프록시를 모두 붙잡아 두어야 같은 병합 셀(_tc)이 같은 객체로 비교됨
+    grid = [list(row.cells) for row in table.rows]
+    if not grid:
+        return None
+    column_count = max(len(cells) for cells in grid)
+
+    values = [[_cell_text(cell) for cell in cells] + [""] * (column_count - len(cells)) for cells in grid]
+    merged_cells = _find_merged_cells(grid)
+    if not any(value for row in values for value in row):
+        return None
+
+    header_rows = 1
+    if len(values) > 2 and any(merge["row"] == 0 and merge["column_span"] > 1 for merge in merged_cells):
+        header_rows = 2
+    if len(values) == 1:
+        header_rows = 0
+
+    headers = _combine_headers(values[:header_rows]) if header_rows else [f"열{index + 1}" for index in range(column_count)]
+    rows = values[header_rows:]
+
+    return {
+        "table_id": f"table_{number}",
+        "title": previous_text if 0 < len(previous_text) <= MAX_TITLE_LENGTH else f"표 {number}",
+        "headers": headers,
+        "rows": rows,
+        "row_count": len(rows),
+        "column_count": column_count,
+        "merged_cells": merged_cells
+    }
+
+
+def _cell_text(cell) -> str:
+    """셀 텍스트 (셀 안의 줄바꿈은 공백으로)"""
+    return " ".join(line.strip() for line in cell.text.splitlines() if line.strip())
+
+
+def _find_merged_cells(grid: List[List[Any]]) -> List[Dict[str, Any]]:
+    """같은 셀(_tc)이 여러 칸을 차지하는 병합 영역을 찾습니다."""
+    merged = []
+    seen = set()
+    for row_index, cells in enumerate(grid):
+        for column_index, cell in enumerate(cells):
+            if (row_index, column_index) in seen:
+                continue
+            column_span = 1
+            while column_index + column_span < len(cells) and cells[column_index + column_span]._tc is cell._tc:
+                column_span += 1
+            row_span = 1
+            while (row_index + row_span < len(grid) and column_index < len(grid[row_index + row_span])
+                   and grid[row_index + row_span][column_index]._tc is cell._tc):
+                row_span += 1
+            for covered_row in range(row_index, row_index + row_span):
+                for covered_column in range(column_index, column_index + column_span):
+                    seen.add((covered_row, covered_column))
+            if row_span > 1 or column_span > 1:
+                merged.append({"row": row_index, "column": column_index, "row_span": row_span, "column_span": column_span})
+    return merged
+
+
+def _combine_headers(header_rows: List[List[str]]) -> List[str]:
+    """여러 헤더 행을 열마다 "상위 / 하위" 형태로 합칩니다. (같은 값은 한 번만)"""
+    headers = []
+    for column_index, parts in enumerate(zip(*header_rows)):
+        unique_parts = []
+        for part in parts:
+            if part and part not in unique_parts:
+                unique_parts.append(part)
+        headers.append(" / ".join(unique_parts) or f"열{column_index + 1}")
+    return headers
@@ -0,0 +1,169 @@
+import os
+from typing import Optional, Dict, Any, AsyncIterator
+import httpx
+import openai
+from rate_limiter import get_rate_limiter
+from token_estimator import estimate_request_tokens, estimate_text_tokens
+from resilience import get_resilient_caller
+
+# 프로세스 전체에서 공유하는 비동기 OpenAI 클라이언트
+_async_client: Optional[openai.AsyncOpenAI] = None
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """환경 변수로 조정 가능한 커넥션 풀을 가진 httpx 클라이언트를 생성합니다."""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("OPENAI_TIMEOUT", "120")),
+        connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def create_async_client(http_client: Optional[httpx.AsyncClient] = None) -> openai.AsyncOpenAI:
+    """
+    비동기 OpenAI 클라이언트를 생성합니다.
+
+    Args:
+        http_client: 사용할 httpx.AsyncClient (선택사항, 기본값: 환경 변수 기반 커넥션 풀)
+
+    Returns:
+        openai.AsyncOpenAI 인스턴스
+    """
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=http_client or _create_http_client(),
+        # 재시도는 resilience 계층에서 처리하므로 SDK 자체 재시도는 끕니다
+        max_retries=0
+    )
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """공유 비동기 OpenAI 클라이언트를 반환합니다. (최초 호출 시 생성)"""
+    global _async_client
+    if _async_client is None:
+        _async_client = create_async_client()
+    return _async_client
+
+
+def set_async_client(client: Optional[openai.AsyncOpenAI]):
+    """공유 클라이언트를 교체합니다. (테스트 및 벤치마크용)"""
+    global _async_client
+    _async_client = client
+
+
+async def close_async_client():
+    """공유 클라이언트의 커넥션 풀을 정리합니다."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+async def create_chat_completion(**kwargs):
+    """
+    공유 레이트 리미터와 재시도 계층을 거쳐 chat.completions.create를 호출합니다.
+
+    매 시도마다 RPM/TPM 여유가 생길 때까지 대기한 뒤 호출하고, 응답의 x-ratelimit-* 헤더와
+    실제 usage로 리미터 상태를 보정합니다. 429/5xx/타임아웃은 지수 백오프로 재시도하며,
+    헤징이 켜져 있으면 p95 지연을 넘긴 요청을 한 번 더 보냅니다.
+    리미터 대기 시간은 시도별 타임아웃과 지연 시간 통계에 넣지 않습니다. (대기열이 길어도 실패하거나 헤징하지 않음)
+
+    Args:
+        **kwargs: chat.completions.create에 전달할 파라미터 (model 필수)
+
+    Returns:
+        ChatCompletion 응답 객체
+    """
+    limiter = get_rate_limiter()
+    model = kwargs["model"]
+    estimated_tokens = estimate_request_tokens(kwargs)
+
+    async def acquire():
+        await limiter.acquire(model, estimated_tokens)
+
+    async def attempt():
+        try:
+            raw_response = await get_async_client().chat.completions.with_raw_response.create(**kwargs)
+        except openai.RateLimitError as e:
+            limiter.penalize(model, e.response.headers)
+            raise
+
+        limiter.update_from_headers(model, raw_response.headers)
+        response = raw_response.parse()
+        if response.usage:
+            limiter.record_usage(model, estimated_tokens, response.usage.total_tokens)
+        return response
+
+    return await get_resilient_caller().call(model, attempt, prepare=acquire)
+
+
+async def stream_chat_completion(**kwargs) -> AsyncIterator[Dict[str, Any]]:
+    """
+    공유 레이트 리미터와 재시도 계층을 거쳐 chat.completions를 스트리밍으로 호출합니다.
+
+    재시도/헤징은 스트림 연결까지만 적용하고, 토큰을 받기 시작한 뒤의 오류는 호출자에게 전달합니다.
+    연결까지의 지연 시간은 전체 응답 지연과 분포가 다르므로 "{model}:stream" 이름으로 따로 추적합니다.
+
+    Args:
+        **kwargs: chat.completions.create에 전달할 파라미터 (model 필수, stream 제외)
+
+    Yields:
+        {"delta": 텍스트 조각, "finish_reason": 종료 사유} 형태의 조각.
+        마지막에는 출력 길이로 근사한 "usage"가 담긴 조각을 한 번 더 보냅니다.
+    """
+    limiter = get_rate_limiter()
+    model = kwargs["model"]
+    estimated_tokens = estimate_request_tokens(kwargs)
+
+    async def acquire():
+        await limiter.acquire(model, estimated_tokens)
+
+    async def close(stream):
+        # 헤징에서 진 스트림의 커넥션 반환
+        await stream.response.aclose()
+
+    async def attempt():
+        try:
+            stream = await get_async_client().chat.completions.create(stream=True, **kwargs)
+        except openai.RateLimitError as e:
+            limiter.penalize(model, e.response.headers)
+            raise
+
+        limiter.update_from_headers(model, stream.response.headers)
+        return stream
+
+    stream = await get_resilient_caller().call(f"{model}:stream", attempt, prepare=acquire, discard=close)
+    output_text = ""
+    finish_reason = None
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta.content or ""
+            output_text += delta
+            finish_reason = choice.finish_reason or finish_reason
+            yield {"delta": delta, "finish_reason": choice.finish_reason}
+    finally:
+        # 클라이언트가 연결을 끊어도 OpenAI 스트림을 닫아 커넥션을 반환
+        await stream.response.aclose()
+
+    # 스트리밍 응답에는 usage가 없으므로 입력 추정치와 출력 길이로 근사
+    prompt_tokens = estimated_tokens - int(kwargs.get("max_tokens") or 0)
+    completion_tokens = estimate_text_tokens(output_text, model)
+    limiter.record_usage(model, estimated_tokens, prompt_tokens + completion_tokens)
+    yield {
+        "delta": "",
+        "finish_reason": finish_reason,
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "estimated": True
+        }
+    }
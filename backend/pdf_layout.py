@@ -0,0 +1,453 @@
+import io
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import PyPDF2
+from PyPDF2._cmap import build_char_map
+from PyPDF2.generic import ContentStream, DictionaryObject
+from pdf_text import iter_page_results
+
+# 이 신뢰도 이상인 표만 있는 페이지는 LLM 없이 레이아웃 결과를 사용
+DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+# 같은 행으로 볼 기준선 차이 (글자 크기 대비)
+ROW_TOLERANCE = 0.4
+# 같은 셀로 이어붙일 글자 사이 간격 (글자 크기 대비)
+CELL_GAP = 0.8
+# 표 블록 안에서 허용하는 행 간격 (글자 크기 대비)
+MAX_ROW_SPACING = 2.6
+# 선으로 볼 사각형의 최대 두께 (pt)
+MAX_RULE_THICKNESS = 2.0
+# 표 셀로 볼 최대 단어 수 (이보다 길면 문장으로 보고 감점)
+MAX_CELL_WORDS = 4
+# 문장처럼 긴 셀 비율에 곱하는 감점
+SENTENCE_PENALTY = 0.8
+# 따라 들어갈 폼 XObject의 최대 중첩 깊이 (자기 자신을 참조하는 폼 방지)
+MAX_FORM_DEPTH = 8
+
+_MULTI_SPACE_PATTERN = re.compile(r" {2,}")
+_NUMERIC_CHAR_PATTERN = re.compile(r"[\d.,%()+\-]")
+_PAINT_OPERATORS = {b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*"}
+
+
+def analyze_page_range(file_content: bytes, start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    PDF의 [start, end) 페이지에서 글자 좌표와 괘선으로 표를 찾습니다. (프로세스 풀 워커에서 실행)
+
+    Returns:
+        페이지마다 {"text", "tables", "confidence", "scanned"}
+        (confidence는 표가 없으면 0, scanned는 텍스트 레이어 없이 이미지만 있는 페이지)
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    results = []
+    for index in range(start, end):
+        page = reader.pages[index]
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            print(f"PDF {index + 1}페이지 텍스트 추출 오류: {str(e)}")
+            text = ""
+        try:
+            spans, rules = _read_page_layout(page)
+            tables = detect_tables(spans, rules, index + 1)
+        except Exception as e:
+            print(f"PDF {index + 1}페이지 레이아웃 분석 오류: {str(e)}")
+            tables = []
+        results.append({
+            "text": text,
+            "tables": tables,
+            "confidence": min((table["confidence"] for table in tables), default=0.0),
+            "scanned": not text.strip() and has_images(page)
+        })
+    return results
+
+
+async def iter_pdf_layout(file_content: bytes) -> AsyncIterator[Dict[str, Any]]:
+    """
+    PDF 페이지별 레이아웃 표 탐지 결과를 페이지 순서대로 내보냅니다. (페이지 구간 병렬 처리)
+
+    Yields:
+        {"page_number", "text", "tables", "confidence", "scanned", "byte_offset"}
+    """
+    async for page_number, result, byte_offset in iter_page_results(file_content, analyze_page_range):
+        result["page_number"] = page_number
+        result["byte_offset"] = byte_offset
+        yield result
+
+
+def has_images(page: PyPDF2.PageObject) -> bool:
+    """페이지 리소스(폼 XObject 안 포함)에 이미지 XObject가 있는지 확인합니다."""
+    try:
+        return _resources_have_images(page_resources(page), 0)
+    except Exception:
+        return False
+
+
+def page_resources(page: PyPDF2.PageObject) -> Dict[str, Any]:
+    """페이지 리소스 사전 (페이지에 없으면 상위 페이지 트리에서 상속, 어디에도 없으면 빈 사전)"""
+    node = page
+    while isinstance(node, DictionaryObject):
+        resources = node.get("/Resources")
+        resources = resources.get_object() if resources is not None else None
+        if isinstance(resources, DictionaryObject):
+            return resources
+        parent = node.get("/Parent")
+        node = parent.get_object() if parent is not None else None
+    return {}
+
+
+def x_objects_of(resources: Dict[str, Any]) -> Dict[str, Any]:
+    """리소스 사전의 XObject 사전 (없으면 빈 사전)"""
+    x_objects = resources.get("/XObject")
+    return x_objects.get_object() if x_objects is not None else {}
+
+
+def _resources_have_images(resources: Dict[str, Any], depth: int) -> bool:
+    """리소스에 이미지 XObject가 있는지 폼 XObject의 리소스까지 따라가며 확인합니다."""
+    x_objects = x_objects_of(resources)
+    for name in x_objects:
+        x_object = x_objects[name].get_object()
+        if x_object.get("/Subtype") == "/Image":
+            return True
+        form_resources = x_object.get("/Resources")
+        if x_object.get("/Subtype") == "/Form" and form_resources is not None and depth < MAX_FORM_DEPTH:
+            if _resources_have_images(form_resources.get_object(), depth + 1):
+                return True
+    return False
+
+
+def confidence_threshold() -> float:
+    """레이아웃 표를 그대로 쓸 최소 신뢰도 (PDF_LAYOUT_CONFIDENCE)"""
+    return float(os.getenv("PDF_LAYOUT_CONFIDENCE", str(DEFAULT_CONFIDENCE_THRESHOLD)))
+
+
+def detect_tables(spans: List[Dict[str, Any]], rules: List[Tuple[float, float, float, float]], page_number: int) -> List[Dict[str, Any]]:
+    """
+    글자 조각과 괘선으로 표를 재구성합니다.
+
+    1. 기준선이 같은 조각을 행으로 묶고, 간격이 넓은 곳에서 셀을 나눔
+    2. 셀이 두 개 이상인 행이 연속되는 구간을 표 블록으로 봄
+    3. 열 경계는 세로 괘선이 있으면 괘선으로, 없으면 셀의 가로 범위가 겹치지 않는 빈 띠로 정함
+    4. 열 수 일치도, 채움 비율, 행 수, 괘선 유무로 신뢰도를 계산
+
+    Args:
+        spans: {"x0", "x1", "y", "size", "text"} 글자 조각 목록
+        rules: (x0, y0, x1, y1) 괘선 목록
+        page_number: 페이지 번호 (제목 기본값에 사용)
+
+    Returns:
+        표 객체 목록 (confidence, pages 포함)
+    """
+    rows = _group_rows(spans)
+    tables = []
+    for block_start, block_end in _table_blocks(rows):
+        block = rows[block_start:block_end]
+        table = _build_table(block, rules)
+        if table is None:
+            continue
+
+        # 바로 위의 셀 하나짜리 짧은 행을 제목으로 사용
+        title = f"{page_number}페이지 표 {len(tables) + 1}"
+        if block_start > 0:
+            above = rows[block_start - 1]
+            if len(above["cells"]) == 1 and above["y"] - block[0]["y"] <= block[0]["size"] * MAX_ROW_SPACING and len(above["cells"][0]["text"]) <= 100:
+                title = above["cells"][0]["text"]
+
+        table.update({"table_id": f"table_{len(tables) + 1}", "title": title, "pages": [page_number, page_number]})
+        tables.append(table)
+    return tables
+
+
+def _build_table(block: List[Dict[str, Any]], rules: List[Tuple[float, float, float, float]]) -> Optional[Dict[str, Any]]:
+    """표 블록의 행들을 열에 맞춰 표 객체로 만듭니다."""
+    top = block[0]["y"] + block[0]["size"]
+    bottom = block[-1]["y"] - block[-1]["size"] * 0.5
+    left = min(cell["x0"] for row in block for cell in row["cells"])
+    right = max(cell["x1"] for row in block for cell in row["cells"])
+
+    vertical = sorted({round(rule[0], 1) for rule in rules if abs(rule[0] - rule[2]) <= MAX_RULE_THICKNESS
+                       and min(rule[1], rule[3]) <= top and max(rule[1], rule[3]) >= bottom and left - 5 <= rule[0] <= right + 5})
+    horizontal = [rule for rule in rules if abs(rule[1] - rule[3]) <= MAX_RULE_THICKNESS
+                  and bottom - 5 <= rule[1] <= top + 5 and min(rule[0], rule[2]) <= right and max(rule[0], rule[2]) >= left]
+
+    columns = _columns_from_rules(vertical, block) if len(vertical) >= 2 else []
+    if len(columns) < 2:
+        columns = _columns_from_gaps(block)
+    if len(columns) < 2:
+        return None
+
+    grid = []
+    collisions = 0
+    for row in block:
+        values = [""] * len(columns)
+        for cell in row["cells"]:
+            center = (cell["x0"] + cell["x1"]) / 2
+            column = min(range(len(columns)), key=lambda index: _distance(center, columns[index]))
+            if values[column]:
+                values[column] += " " + cell["text"]
+                collisions += 1
+            else:
+                values[column] = cell["text"]
+        grid.append(values)
+
+    column_count = len(columns)
+    consistency = sum(1 for row in block if len(row["cells"]) == column_count) / len(block)
+    fill = sum(1 for values in grid for value in values if value) / (len(grid) * column_count)
+    row_factor = min(1.0, (len(grid) - 1) / 4)
+    ruling = 1.0 if len(vertical) >= 2 or len(horizontal) >= min(len(grid), 3) else 0.0
+    collision_penalty = collisions / max(1, sum(len(row["cells"]) for row in block))
+    # 괘선이 없으면 짧거나 숫자인 셀이 있어야 표로 봄 (두 단 본문은 정렬은 맞지만 셀이 문장)
+    values = [value for values in grid for value in values if value]
+    tabular = sum(1 for value in values if _is_tabular_cell(value)) / len(values)
+    sentences = 1.0 - tabular
+    layout = 0.35 * consistency + 0.3 * fill + 0.2 * row_factor + 0.15 * ruling
+    confidence = layout * max(ruling, tabular) - 0.5 * collision_penalty - SENTENCE_PENALTY * sentences
+
+    headers = grid[0]
+    body = grid[1:]
+    return {
+        "headers": [value or f"열{index + 1}" for index, value in enumerate(headers)],
+        "rows": body,
+        "row_count": len(body),
+        "column_count": column_count,
+        "confidence": round(max(0.0, min(1.0, confidence)), 3)
+    }
+
+
+def _is_tabular_cell(value: str) -> bool:
+    """셀 값이 짧거나 숫자 위주인지 확인합니다. (그렇지 않으면 문장 조각)"""
+    if len(value.split()) <= MAX_CELL_WORDS:
+        return True
+    characters = value.replace(" ", "")
+    return len(_NUMERIC_CHAR_PATTERN.findall(characters)) >= len(characters) / 2
+
+
+def _columns_from_rules(vertical: List[float], block: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+    """세로 괘선 사이 구간 중 셀이 들어 있는 구간을 열로 사용합니다."""
+    boundaries = []
+    for x in vertical:
+        if not boundaries or x - boundaries[-1] > MAX_RULE_THICKNESS:
+            boundaries.append(x)
+    columns = []
+    for x0, x1 in zip(boundaries, boundaries[1:]):
+        if any(x0 <= (cell["x0"] + cell["x1"]) / 2 <= x1 for row in block for cell in row["cells"]):
+            columns.append((x0, x1))
+    return columns
+
+
+def _columns_from_gaps(block: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+    """셀의 가로 범위를 합쳐서 어느 셀도 덮지 않는 빈 띠를 열 경계로 사용합니다."""
+    intervals = sorted((cell["x0"], cell["x1"]) for row in block for cell in row["cells"])
+    columns: List[List[float]] = []
+    for x0, x1 in intervals:
+        if columns and x0 <= columns[-1][1]:
+            columns[-1][1] = max(columns[-1][1], x1)
+        else:
+            columns.append([x0, x1])
+    return [(x0, x1) for x0, x1 in columns]
+
+
+def _distance(x: float, column: Tuple[float, float]) -> float:
+    """점과 열 구간 사이 거리 (구간 안이면 0)"""
+    if column[0] <= x <= column[1]:
+        return 0.0
+    return min(abs(x - column[0]), abs(x - column[1]))
+
+
+def _table_blocks(rows: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """셀이 두 개 이상인 행이 세 줄 이상 촘촘히 이어지는 구간 (start, end) 목록"""
+    blocks = []
+    start = None
+    for index, row in enumerate(rows):
+        continues = (
+            start is not None
+            and len(row["cells"]) >= 2
+            and rows[index - 1]["y"] - row["y"] <= row["size"] * MAX_ROW_SPACING
+        )
+        if continues:
+            continue
+        if start is not None and index - start >= 3:
+            blocks.append((start, index))
+        start = index if len(row["cells"]) >= 2 else None
+    if start is not None and len(rows) - start >= 3:
+        blocks.append((start, len(rows)))
+    return blocks
+
+
+def _group_rows(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """기준선이 같은 글자 조각을 위에서 아래 순서의 행으로 묶고, 넓은 간격에서 셀을 나눕니다."""
+    rows: List[Dict[str, Any]] = []
+    for span in sorted(spans, key=lambda item: (-item["y"], item["x0"])):
+        if rows and abs(rows[-1]["y"] - span["y"]) <= max(rows[-1]["size"], span["size"]) * ROW_TOLERANCE:
+            rows[-1]["spans"].append(span)
+        else:
+            rows.append({"y": span["y"], "size": span["size"], "spans": [span]})
+
+    for row in rows:
+        cells: List[Dict[str, Any]] = []
+        for span in sorted(row["spans"], key=lambda item: item["x0"]):
+            if cells and span["x0"] - cells[-1]["x1"] <= span["size"] * CELL_GAP:
+                cells[-1]["text"] += ("" if cells[-1]["text"].endswith(" ") or span["text"].startswith(" ") else " ") + span["text"]
+                cells[-1]["x1"] = max(cells[-1]["x1"], span["x1"])
+            else:
+                cells.append(dict(span))
+        row["cells"] = [dict(cell, text=cell["text"].strip()) for cell in cells if cell["text"].strip()]
+        del row["spans"]
+    return [row for row in rows if row["cells"]]
+
+
+def _read_page_layout(page: PyPDF2.PageObject) -> Tuple[List[Dict[str, Any]], List[Tuple[float, float, float, float]]]:
+    """
+    페이지 내용 스트림을 해석해 글자 조각 좌표와 괘선을 읽습니다.
+
+    텍스트 행렬(Tm/Td/T*)과 변환 행렬(cm, q/Q)을 따라가며 Tj/TJ의 시작 위치를 계산하고,
+    글자 폭은 글꼴 크기로 추정합니다. 괘선은 칠해진 경로의 선분과 얇은 사각형에서 얻습니다.
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return [], []
+    operations = ContentStream(contents, page.pdf).operations
+    fonts = {}
+
+    spans: List[Dict[str, Any]] = []
+    rules: List[Tuple[float, float, float, float]] = []
+    ctm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    stack = []
+    tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    line_matrix = list(tm)
+    font = None
+    font_size = 10.0
+    leading = 0.0
+    path: List[Tuple[float, float, float, float]] = []
+    current_point = None
+    subpath_start = None
+
+    def show(text: str, matrix: List[float]) -> float:
+        """글자 조각을 기록하고 글자 폭 추정치(텍스트 공간)를 반환합니다."""
+        x, y = apply_matrix(multiply_matrix(matrix, ctm), 0.0, 0.0)
+        scale = abs(multiply_matrix(matrix, ctm)[0]) or 1.0
+        size = font_size * scale
+        offset = 0.0
+        for index, piece in enumerate(_MULTI_SPACE_PATTERN.split(text)):
+            if index > 0:
+                offset += _text_width("  ", font_size)
+            if piece.strip():
+                width = _text_width(piece, font_size)
+                spans.append({"x0": x + offset * scale, "x1": x + (offset + width) * scale, "y": y, "size": size, "text": piece})
+                offset += width
+            else:
+                offset += _text_width(piece, font_size)
+        return offset
+
+    for operands, operator in operations:
+        if operator == b"q":
+            stack.append(list(ctm))
+        elif operator == b"Q":
+            if stack:
+                ctm = stack.pop()
+        elif operator == b"cm":
+            ctm = multiply_matrix([float(value) for value in operands], ctm)
+        elif operator == b"BT":
+            tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+            line_matrix = list(tm)
+        elif operator == b"Tf":
+            font = operands[0]
+            font_size = float(operands[1])
+            if font not in fonts:
+                try:
+                    fonts[font] = build_char_map(font, 200.0, page)
+                except Exception:
+                    fonts[font] = None
+        elif operator == b"TL":
+            leading = float(operands[0])
+        elif operator in (b"Td", b"TD"):
+            if operator == b"TD":
+                leading = -float(operands[1])
+            line_matrix = multiply_matrix([1.0, 0.0, 0.0, 1.0, float(operands[0]), float(operands[1])], line_matrix)
+            tm = list(line_matrix)
+        elif operator == b"Tm":
+            line_matrix = [float(value) for value in operands]
+            tm = list(line_matrix)
+        elif operator in (b"T*", b"'", b'"'):
+            line_matrix = multiply_matrix([1.0, 0.0, 0.0, 1.0, 0.0, -leading], line_matrix)
+            tm = list(line_matrix)
+            if operator != b"T*":
+                advance = show(_decode(operands[-1], fonts.get(font)), tm)
+                tm = multiply_matrix([1.0, 0.0, 0.0, 1.0, advance, 0.0], tm)
+        elif operator == b"Tj":
+            advance = show(_decode(operands[0], fonts.get(font)), tm)
+            tm = multiply_matrix([1.0, 0.0, 0.0, 1.0, advance, 0.0], tm)
+        elif operator == b"TJ":
+            for item in operands[0]:
+                if isinstance(item, (int, float)) or hasattr(item, "as_numeric"):
+                    tm = multiply_matrix([1.0, 0.0, 0.0, 1.0, -float(item) / 1000.0 * font_size, 0.0], tm)
+                else:
+                    advance = show(_decode(item, fonts.get(font)), tm)
+                    tm = multiply_matrix([1.0, 0.0, 0.0, 1.0, advance, 0.0], tm)
+        elif operator == b"m":
+            current_point = subpath_start = apply_matrix(ctm, float(operands[0]), float(operands[1]))
+        elif operator == b"l":
+            point = apply_matrix(ctm, float(operands[0]), float(operands[1]))
+            if current_point is not None:
+                path.append((current_point[0], current_point[1], point[0], point[1]))
+            current_point = point
+        elif operator == b"h":
+            if current_point is not None and subpath_start is not None:
+                path.append((current_point[0], current_point[1], subpath_start[0], subpath_start[1]))
+                current_point = subpath_start
+        elif operator == b"re":
+            x, y, width, height = (float(value) for value in operands)
+            x0, y0 = apply_matrix(ctm, x, y)
+            x1, y1 = apply_matrix(ctm, x + width, y + height)
+            if abs(y1 - y0) <= MAX_RULE_THICKNESS or abs(x1 - x0) <= MAX_RULE_THICKNESS:
+                # 얇은 사각형은 선 하나로 봄 (표 괘선을 채운 사각형으로 그리는 경우)
+                middle_y, middle_x = (y0 + y1) / 2, (x0 + x1) / 2
+                path.append((x0, middle_y, x1, middle_y) if abs(y1 - y0) <= MAX_RULE_THICKNESS else (middle_x, y0, middle_x, y1))
+            else:
+                path.extend([(x0, y0, x1, y0), (x1, y0, x1, y1), (x1, y1, x0, y1), (x0, y1, x0, y0)])
+        elif operator in _PAINT_OPERATORS:
+            rules.extend(path)
+            path = []
+        elif operator == b"n":
+            path = []
+    return spans, [rule for rule in rules if abs(rule[0] - rule[2]) <= MAX_RULE_THICKNESS or abs(rule[1] - rule[3]) <= MAX_RULE_THICKNESS]
+
+
+def _decode(value: Any, char_map: Optional[Tuple]) -> str:
+    """Tj/TJ 문자열 피연산자를 글꼴 인코딩/ToUnicode로 해석합니다."""
+    if isinstance(value, str) or char_map is None:
+        return str(value)
+    encoding, map_dict = char_map[2], char_map[3]
+    data = bytes(value)
+    if isinstance(encoding, str):
+        try:
+            text = data.decode(encoding, "surrogatepass")
+        except Exception:
+            text = data.decode("utf-16-be" if encoding == "charmap" else "charmap", "surrogatepass")
+    else:
+        text = "".join(encoding[byte] if byte in encoding else chr(byte) for byte in data)
+    return "".join(map_dict.get(char, char) for char in text)
+
+
+def _text_width(text: str, font_size: float) -> float:
+    """글자 폭 추정 (라틴 문자 0.5em, 그 외 1em)"""
+    return sum(0.5 if ord(char) < 0x2E80 else 1.0 for char in text) * font_size
+
+
+def multiply_matrix(first: List[float], second: List[float]) -> List[float]:
+    """PDF 3x2 행렬 곱 (first x second)"""
+    a1, b1, c1, d1, e1, f1 = first
+    a2, b2, c2, d2, e2, f2 = second
+    return [
+        a1 * a2 + b1 * c2,
+        a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2,
+        c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2,
+        e1 * b2 + f1 * d2 + f2
+    ]
+
+
+def apply_matrix(matrix: List[float], x: float, y: float) -> Tuple[float, float]:
+    """점에 행렬을 적용합니다."""
+    a, b, c, d, e, f = matrix
+    return a * x + c * y + e, b * x + d * y + f
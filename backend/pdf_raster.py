@@ -0,0 +1,186 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import PyPDF2
+from PIL import Image, ImageOps
+from PyPDF2.filters import _xobj_to_image
+from PyPDF2.generic import ContentStream
+from image_preprocessor import target_size
+from pdf_layout import MAX_FORM_DEPTH, apply_matrix, multiply_matrix, page_resources, x_objects_of
+
+# 스캔 페이지를 렌더링할 최대 해상도 (실제 해상도는 Vision detail 수준에 맞춰 이보다 낮아질 수 있음)
+DEFAULT_MAX_DPI = 200
+# 렌더링한 페이지 이미지를 보관할 메모리 캐시 용량 (결과 캐시와 별도)
+DEFAULT_RASTER_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def max_dpi() -> int:
+    """스캔 페이지 렌더링 최대 DPI (PDF_RASTER_MAX_DPI)"""
+    return max(36, int(os.getenv("PDF_RASTER_MAX_DPI", str(DEFAULT_MAX_DPI))))
+
+
+class RasterCache:
+    """
+    렌더링한 스캔 페이지 PNG를 보관하는 메모리 전용 LRU 캐시
+
+    재시도할 때 같은 페이지를 다시 렌더링하지 않기 위한 캐시입니다. 페이지 이미지는 추출 결과보다
+    훨씬 크므로 공유 결과 캐시(디스크 계층 포함)에 넣지 않고, 이 캐시에서 용량을 따로 제한합니다.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RASTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시된 페이지 이미지를 조회합니다."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def set(self, key: str, image: bytes):
+        """페이지 이미지를 저장하고 용량을 넘으면 오래된 항목부터 제거합니다."""
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._images[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계를 반환합니다."""
+        with self._lock:
+            return {"entries": len(self._images), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+# 프로세스 전체에서 공유하는 렌더링 캐시
+_raster_cache: Optional[RasterCache] = None
+
+
+def get_raster_cache() -> RasterCache:
+    """공유 렌더링 캐시를 반환합니다. (용량은 PDF_RASTER_CACHE_BYTES)"""
+    global _raster_cache
+    if _raster_cache is None:
+        _raster_cache = RasterCache(int(os.getenv("PDF_RASTER_CACHE_BYTES", str(DEFAULT_RASTER_CACHE_BYTES))))
+    return _raster_cache
+
+
+def render_dpi(width: float, height: float, detail: str) -> float:
+    """
+    페이지 크기(pt)와 Vision detail 수준에 맞는 렌더링 DPI를 계산합니다.
+
+    모델이 detail 수준에서 보는 해상도보다 크게 렌더링해도 전송 전에 다시 축소되므로,
+    그 해상도에 맞춰 렌더링하고 PDF_RASTER_MAX_DPI를 넘지 않게 합니다.
+    """
+    limit = max_dpi()
+    pixel_width, _ = target_size(round(width * limit / 72), round(height * limit / 72), detail)
+    return pixel_width / width * 72
+
+
+def render_page(file_content: bytes, page_index: int, detail: str = "high") -> bytes:
+    """
+    스캔 PDF 페이지를 PNG 이미지로 렌더링합니다.
+
+    텍스트 레이어가 없는 페이지는 내용이 이미지 XObject이므로, 내용 스트림의 변환 행렬(cm, q/Q)을 따라
+    각 이미지를 페이지 크기의 흰 캔버스에 배치합니다. 폼 XObject 안에 그려진 이미지도 따라가며,
+    JPEG 스캔은 목표 해상도 근처로 바로 디코딩합니다.
+
+    Args:
+        file_content: PDF 바이트
+        page_index: 0부터 시작하는 페이지 번호
+        detail: Vision detail 수준 (렌더링 해상도 결정)
+
+    Returns:
+        PNG 바이트
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    page = reader.pages[page_index]
+    box = page.mediabox
+    left, bottom = float(box.left), float(box.bottom)
+    width, height = float(box.width), float(box.height)
+    scale = render_dpi(width, height, detail) / 72
+    canvas = Image.new("RGB", (max(1, round(width * scale)), max(1, round(height * scale))), "white")
+
+    for x_object, matrix in _image_placements(page, reader):
+        corners = [apply_matrix(matrix, x, y) for x, y in ((0, 0), (1, 0), (0, 1), (1, 1))]
+        x0 = (min(x for x, _ in corners) - left) * scale
+        x1 = (max(x for x, _ in corners) - left) * scale
+        y0 = (height - (max(y for _, y in corners) - bottom)) * scale
+        y1 = (height - (min(y for _, y in corners) - bottom)) * scale
+        size = (max(1, round(x1 - x0)), max(1, round(y1 - y0)))
+        try:
+            image = _decode_image(x_object, size)
+        except Exception as e:
+            print(f"PDF {page_index + 1}페이지 이미지 디코딩 오류: {str(e)}")
+            continue
+        # 이미지 공간은 위쪽이 y=1이므로, 행렬이 축을 뒤집으면 이미지도 뒤집음
+        if matrix[0] < 0:
+            image = ImageOps.mirror(image)
+        if matrix[3] < 0:
+            image = ImageOps.flip(image)
+        canvas.paste(image.resize(size), (round(x0), round(y0)))
+
+    rotation = int(page.get("/Rotate", 0) or 0) % 360
+    if rotation:
+        canvas = canvas.rotate(-rotation, expand=True)
+
+    buffer = io.BytesIO()
+    canvas.save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def _image_placements(page: PyPDF2.PageObject, reader: PyPDF2.PdfReader) -> List[Tuple[Dict[str, Any], List[float]]]:
+    """내용 스트림에서 Do로 그리는 이미지 XObject와 그때의 변환 행렬 목록"""
+    contents = page.get_contents()
+    if contents is None:
+        return []
+    placements = []
+    _collect_placements(ContentStream(contents, reader), page_resources(page), [1.0, 0.0, 0.0, 1.0, 0.0, 0.0], reader, placements, 0)
+    return placements
+
+
+def _collect_placements(content: ContentStream, resources: Dict[str, Any], ctm: List[float], reader: PyPDF2.PdfReader,
+                        placements: List[Tuple[Dict[str, Any], List[float]]], depth: int) -> None:
+    """내용 스트림을 따라가며 이미지 배치를 모읍니다. (폼 XObject는 자체 행렬과 리소스로 안쪽 스트림을 따라감)"""
+    x_objects = x_objects_of(resources)
+    stack = []
+    for operands, operator in content.operations:
+        if operator == b"q":
+            stack.append(list(ctm))
+        elif operator == b"Q":
+            if stack:
+                ctm = stack.pop()
+        elif operator == b"cm":
+            ctm = multiply_matrix([float(value) for value in operands], ctm)
+        elif operator == b"Do" and operands[0] in x_objects:
+            x_object = x_objects[operands[0]].get_object()
+            if x_object.get("/Subtype") == "/Image":
+                placements.append((x_object, list(ctm)))
+            elif x_object.get("/Subtype") == "/Form" and depth < MAX_FORM_DEPTH:
+                matrix = [float(value) for value in x_object.get("/Matrix", [1.0, 0.0, 0.0, 1.0, 0.0, 0.0])]
+                # 폼에 리소스가 없으면 그리는 쪽 리소스를 그대로 씀
+                form_resources = x_object.get("/Resources")
+                form_resources = form_resources.get_object() if form_resources is not None else resources
+                _collect_placements(ContentStream(x_object, reader), form_resources, multiply_matrix(matrix, ctm),
+                                    reader, placements, depth + 1)
+
+
+def _decode_image(x_object: Dict[str, Any], size: Tuple[int, int]) -> Image.Image:
+    """이미지 XObject를 RGB 이미지로 디코딩합니다."""
+    extension, data = _xobj_to_image(x_object)
+    if extension is None:
+        raise ValueError("지원하지 않는 이미지 형식")
+    image = Image.open(io.BytesIO(data))
+    # JPEG는 목표 크기에 가까운 1/2, 1/4, 1/8 배율로 디코딩 (큰 스캔 이미지의 디코딩 시간 절감)
+    image.draft("RGB", size)
+    return image.convert("RGB")
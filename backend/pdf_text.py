@@ -0,0 +1,148 @@
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
+import PyPDF2
+from cpu_pool import run_cpu
+
+# 이 페이지 수 미만의 PDF는 프로세스 풀을 쓰지 않고 스레드에서 바로 추출 (작업 전달 비용이 더 큼)
+DEFAULT_PARALLEL_MIN_PAGES = 16
+# 한 작업이 맡는 최소 페이지 수
+MIN_PAGES_PER_TASK = 8
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def extract_page_range(file_content: bytes, start: int, end: int) -> List[str]:
+    """
+    PDF의 [start, end) 페이지 텍스트를 추출합니다. (프로세스 풀 워커에서 실행)
+
+    페이지 하나의 추출이 실패해도 나머지 페이지는 계속 추출하며, 실패한 페이지는 빈 문자열입니다.
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    pages = []
+    for index in range(start, end):
+        try:
+            pages.append(reader.pages[index].extract_text() or "")
+        except Exception as e:
+            print(f"PDF {index + 1}페이지 텍스트 추출 오류: {str(e)}")
+            pages.append("")
+    return pages
+
+
+def page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """페이지를 워커 수의 두 배 정도의 연속 구간으로 나눕니다. (느린 구간이 있어도 고르게 분배)"""
+    size = max(MIN_PAGES_PER_TASK, math.ceil(page_count / max(1, workers * 2)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+async def extract_pdf_pages(file_content: bytes) -> List[str]:
+    """
+    PDF의 페이지별 텍스트를 추출합니다.
+
+    Args:
+        file_content: PDF 바이트
+
+    Returns:
+        페이지 순서대로의 텍스트 목록
+    """
+    return [page["text"] async for page in iter_pdf_pages(file_content)]
+
+
+async def iter_pdf_pages(file_content: bytes) -> AsyncIterator[Dict[str, Any]]:
+    """
+    PDF 페이지를 순서대로 추출하면서 하나씩 내보냅니다.
+
+    페이지가 많으면 페이지 구간을 프로세스 풀에서 병렬로 추출하고 앞 구간이 끝나는 대로 내보내며,
+    적으면 스레드에서 추출합니다. 어느 경우든 이벤트 루프를 막지 않습니다.
+
+    Args:
+        file_content: PDF 바이트
+
+    Yields:
+        {"page_number", "text", "byte_offset"} (byte_offset은 파일 내 페이지 객체 위치, 알 수 없으면 None)
+    """
+    async for page_number, text, byte_offset in iter_page_results(file_content, extract_page_range):
+        yield {"page_number": page_number, "text": text, "byte_offset": byte_offset}
+
+
+async def iter_page_results(file_content: bytes, function: Callable[[bytes, int, int], List[Any]]) -> AsyncIterator[Tuple[int, Any, Optional[int]]]:
+    """
+    페이지 구간 함수를 PDF 전체에 적용하고 페이지 순서대로 결과를 내보냅니다.
+
+    function(file_content, start, end)는 [start, end) 페이지의 결과 목록을 반환하는 최상위 함수여야 합니다.
+    (프로세스 풀로 전달되므로 pickle 가능해야 함)
+
+    Yields:
+        (페이지 번호, 결과, 페이지 객체 바이트 위치)
+    """
+    # 상호 참조 표 파싱과 페이지 트리 순회도 큰 PDF에서는 오래 걸리므로 스레드에서 실행
+    offsets = await run_cpu(_page_offsets, file_content)
+    page_count = len(offsets)
+    workers = _worker_count()
+
+    if workers <= 1 or page_count < int(os.getenv("PDF_PARALLEL_MIN_PAGES", str(DEFAULT_PARALLEL_MIN_PAGES))):
+        ranges = [(0, page_count)]
+        futures = [asyncio.ensure_future(run_cpu(function, file_content, 0, page_count))]
+    else:
+        loop = asyncio.get_running_loop()
+        pool = get_pdf_process_pool()
+        ranges = page_ranges(page_count, workers)
+        futures = [loop.run_in_executor(pool, function, file_content, start, end) for start, end in ranges]
+
+    try:
+        for (start, end), future in zip(ranges, futures):
+            try:
+                results = await future
+            except BrokenProcessPool as e:
+                # 워커가 비정상 종료되면 풀을 다시 만들도록 버리고 남은 페이지는 스레드에서 처리
+                print(f"PDF 추출 프로세스 풀 오류, 단일 스레드로 추출합니다: {str(e)}")
+                shutdown_pdf_process_pool(wait=False)
+                results = await run_cpu(function, file_content, start, end)
+            for index, result in enumerate(results, start=start):
+                yield index + 1, result, offsets[index]
+    finally:
+        # 소비자가 중간에 멈추면 아직 시작하지 않은 구간은 취소
+        for future in futures:
+            future.cancel()
+
+
+def _page_offsets(file_content: bytes) -> List[Optional[int]]:
+    """각 페이지 객체의 파일 내 바이트 위치 (교차 참조 표 기준, 목록 길이가 페이지 수)"""
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    offsets = []
+    for page in reader.pages:
+        reference = getattr(page, "indirect_reference", None)
+        offset = reader.xref.get(reference.generation, {}).get(reference.idnum) if reference is not None else None
+        offsets.append(offset)
+    return offsets
+
+
+def get_pdf_process_pool() -> ProcessPoolExecutor:
+    """프로세스 전체에서 공유하는 PDF 추출용 프로세스 풀 (PDF_EXTRACT_WORKERS로 워커 수 설정)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 이벤트 루프/커넥션 풀 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(max_workers=_worker_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pdf_process_pool(wait: bool = True) -> None:
+    """PDF 추출용 프로세스 풀을 종료합니다."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _worker_count() -> int:
+    """PDF 추출 워커 수 (기본값: CPU 코어 수)"""
+    return max(1, int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1))))
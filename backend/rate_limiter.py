@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Mapping
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    OpenAI 레이트 리밋 리셋 헤더 값을 초 단위로 변환합니다.
+
+    예: "1s" -> 1.0, "6m0s" -> 360.0, "20ms" -> 0.02, "1h2m3.5s" -> 3723.5
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        if unit == "ms":
+            total += amount / 1000
+        elif unit == "h":
+            total += amount * 3600
+        elif unit == "m":
+            total += amount * 60
+        else:
+            total += amount
+    return total if matched else None
+
+
+class TokenBucket:
+    """일정 속도로 채워지는 토큰 버킷"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until_available(self, amount: float) -> float:
+        """amount만큼 사용할 수 있을 때까지 남은 시간(초)을 반환합니다."""
+        self._refill()
+        # 버킷 용량보다 큰 요청은 가득 찼을 때 통과시킵니다
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        """토큰을 사용합니다. (음수면 반환)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def set_limit(self, capacity: float, window_seconds: float = 60.0):
+        """버킷 용량과 충전 속도를 변경합니다."""
+        self._refill()
+        self.capacity = capacity
+        self.refill_per_second = capacity / window_seconds
+        self.tokens = min(self.tokens, capacity)
+
+    def set_remaining(self, remaining: float):
+        """서버가 알려준 잔여량보다 많이 가지고 있지 않도록 맞춥니다."""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+
+class ModelRateLimit:
+    """모델별 분당 요청 수(RPM)와 분당 토큰 수(TPM) 제한 상태"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.admitted = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.recent_waits = deque(maxlen=1000)
+        self.rate_limited_responses = 0
+
+
+class RateLimiter:
+    """프로세스 전체의 OpenAI 호출을 RPM/TPM 한도에 맞춰 대기시키는 레이트 리미터"""
+
+    def __init__(self, default_rpm: int = 500, default_tpm: int = 30000, model_limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.model_limits = model_limits or {}
+        self._models: Dict[str, ModelRateLimit] = {}
+
+    def _get_model(self, model: str) -> ModelRateLimit:
+        state = self._models.get(model)
+        if state is None:
+            limits = self.model_limits.get(model, {})
+            state = ModelRateLimit(
+                rpm=limits.get("rpm", self.default_rpm),
+                tpm=limits.get("tpm", self.default_tpm)
+            )
+            self._models[model] = state
+        return state
+
+    async def acquire(self, model: str, estimated_tokens: int) -> float:
+        """
+        요청 1건과 예상 토큰만큼의 여유가 생길 때까지 기다립니다. (실패하지 않고 순서대로 대기)
+
+        Args:
+            model: 호출할 모델명
+            estimated_tokens: 요청의 예상 토큰 수 (프롬프트 + 최대 출력)
+
+        Returns:
+            대기한 시간(초)
+        """
+        state = self._get_model(model)
+        started_at = time.monotonic()
+        state.waiting += 1
+        try:
+            # lock으로 대기자들이 도착 순서대로 통과하도록 보장
+            async with state.lock:
+                while True:
+                    wait = max(
+                        state.blocked_until - time.monotonic(),
+                        state.requests.time_until_available(1),
+                        state.tokens.time_until_available(estimated_tokens)
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(min(wait, 5.0))
+
+                state.requests.consume(1)
+                state.tokens.consume(estimated_tokens)
+        finally:
+            state.waiting -= 1
+
+        waited = time.monotonic() - started_at
+        state.admitted += 1
+        state.total_wait_seconds += waited
+        state.max_wait_seconds = max(state.max_wait_seconds, waited)
+        state.recent_waits.append(waited)
+        return waited
+
+    def record_usage(self, model: str, estimated_tokens: int, actual_tokens: int):
+        """실제 사용 토큰과 예상치의 차이만큼 버킷을 보정합니다."""
+        self._get_model(model).tokens.consume(actual_tokens - estimated_tokens)
+
+    def update_from_headers(self, model: str, headers: Mapping[str, str]):
+        """x-ratelimit-* 응답 헤더로 한도와 잔여량을 갱신합니다."""
+        state = self._get_model(model)
+
+        limit_requests = headers.get("x-ratelimit-limit-requests")
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+
+        try:
+            if limit_requests and float(limit_requests) != state.requests.capacity:
+                state.requests.set_limit(float(limit_requests))
+            if limit_tokens and float(limit_tokens) != state.tokens.capacity:
+                state.tokens.set_limit(float(limit_tokens))
+            if remaining_requests is not None:
+                state.requests.set_remaining(float(remaining_requests))
+            if remaining_tokens is not None:
+                state.tokens.set_remaining(float(remaining_tokens))
+        except ValueError:
+            pass
+
+    def penalize(self, model: str, headers: Optional[Mapping[str, str]] = None):
+        """429 응답을 받으면 retry-after 또는 리셋 시간까지 해당 모델의 호출을 멈춥니다."""
+        state = self._get_model(model)
+        state.rate_limited_responses += 1
+
+        delay = None
+        if headers is not None:
+            delay = parse_reset_duration(headers.get("retry-after"))
+            if delay is None:
+                resets = [
+                    parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+                    parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                ]
+                resets = [reset for reset in resets if reset is not None]
+                delay = max(resets) if resets else None
+            self.update_from_headers(model, headers)
+
+        state.blocked_until = max(state.blocked_until, time.monotonic() + (delay if delay is not None else 1.0))
+
+    def stats(self) -> Dict[str, Any]:
+        """모델별 대기열 및 대기 시간 지표를 반환합니다."""
+        models = {}
+        for model, state in self._models.items():
+            waits = sorted(state.recent_waits)
+            models[model] = {
+                "rpm_limit": state.requests.capacity,
+                "tpm_limit": state.tokens.capacity,
+                "queue_depth": state.waiting,
+                "admitted": state.admitted,
+                "rate_limited_responses": state.rate_limited_responses,
+                "total_wait_seconds": round(state.total_wait_seconds, 3),
+                "avg_wait_seconds": round(state.total_wait_seconds / state.admitted, 4) if state.admitted else 0.0,
+                "p50_wait_seconds": round(waits[len(waits) // 2], 4) if waits else 0.0,
+                "p95_wait_seconds": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                "max_wait_seconds": round(state.max_wait_seconds, 4)
+            }
+        return {"models": models}
+
+
+# 프로세스 전체에서 공유하는 레이트 리미터
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """환경 변수 설정에 따라 생성된 공유 레이트 리미터를 반환합니다."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            default_rpm=int(os.getenv("OPENAI_RPM_LIMIT", "500")),
+            default_tpm=int(os.getenv("OPENAI_TPM_LIMIT", "30000")),
+            model_limits=json.loads(os.getenv("OPENAI_RATE_LIMITS", "{}"))
+        )
+    return _rate_limiter
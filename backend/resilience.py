@@ -0,0 +1,241 @@
+import asyncio
+import os
+import random
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+import openai
+from rate_limiter import parse_reset_duration
+
+
+class RetryPolicy:
+    """OpenAI 호출의 재시도, 시도별 타임아웃, 헤징 설정"""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        attempt_timeout: float = 90.0,
+        hedge_enabled: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.attempt_timeout = attempt_timeout
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """환경 변수로 정책을 생성합니다."""
+        return cls(
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("OPENAI_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("OPENAI_BACKOFF_MAX", "20")),
+            attempt_timeout=float(os.getenv("OPENAI_ATTEMPT_TIMEOUT", "90")),
+            hedge_enabled=os.getenv("OPENAI_HEDGE_ENABLED", "false").lower() == "true",
+            hedge_quantile=float(os.getenv("OPENAI_HEDGE_QUANTILE", "0.95")),
+            hedge_min_samples=int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+        )
+
+    def backoff_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """지수 백오프에 full jitter를 적용한 대기 시간을 반환합니다. (retry-after가 있으면 그 이상)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if isinstance(error, openai.APIStatusError):
+            retry_after = parse_reset_duration(error.response.headers.get("retry-after"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+class LatencyTracker:
+    """최근 성공 호출의 지연 시간 분포를 추적합니다."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * quantile))]
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """일시적인 오류(429, 5xx, 연결 오류, 타임아웃)인지 확인합니다."""
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+class ResilientCaller:
+    """재시도, 시도별 타임아웃, 헤징을 적용하여 비동기 호출을 실행합니다."""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy.from_env()
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "hedges_sent": 0,
+            "hedge_wins": 0,
+            "failures": 0
+        }
+
+    def tracker(self, name: str) -> LatencyTracker:
+        """이름(모델 등)별 지연 시간 추적기를 반환합니다."""
+        if name not in self._trackers:
+            self._trackers[name] = LatencyTracker()
+        return self._trackers[name]
+
+    async def call(
+        self,
+        name: str,
+        attempt: Callable[[], Awaitable[Any]],
+        prepare: Optional[Callable[[], Awaitable[Any]]] = None,
+        discard: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        attempt를 실행하고, 일시적 오류면 지수 백오프로 재시도합니다.
+
+        Args:
+            name: 지연 시간 통계를 구분할 이름 (예: 모델명)
+            attempt: 시도 1회를 수행하는 코루틴 팩토리 (호출마다 새 코루틴 생성)
+            prepare: 시도(헤지 요청 포함)마다 attempt 전에 기다릴 코루틴 팩토리 (예: 레이트 리미터 대기).
+                     시도별 타임아웃과 지연 시간 통계에 포함되지 않습니다.
+            discard: 헤징에서 진 쪽의 결과를 정리할 코루틴 함수 (예: 스트림 닫기)
+
+        Returns:
+            처음으로 성공한 시도의 결과
+        """
+        self._stats["calls"] += 1
+        tracker = self.tracker(name)
+
+        for attempt_number in range(self.policy.max_retries + 1):
+            try:
+                return await self._hedged_attempt(attempt, tracker, prepare, discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self._stats["timeouts"] += 1
+                if attempt_number >= self.policy.max_retries or not is_retryable_error(e):
+                    self._stats["failures"] += 1
+                    raise
+                delay = self.policy.backoff_delay(attempt_number, e)
+                self._stats["retries"] += 1
+                print(f"OpenAI 호출 재시도 {attempt_number + 1}/{self.policy.max_retries} ({delay:.2f}s 후): {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+
+    async def _timed_attempt(
+        self,
+        attempt: Callable[[], Awaitable[Any]],
+        tracker: LatencyTracker,
+        prepare: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """시도별 타임아웃을 적용하고 성공한 시도의 지연 시간을 기록합니다. (prepare 대기 시간은 제외)"""
+        if prepare is not None:
+            await prepare()
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        result = await asyncio.wait_for(attempt(), timeout=self.policy.attempt_timeout)
+        tracker.record(loop.time() - started_at)
+        return result
+
+    async def _hedged_attempt(
+        self,
+        attempt: Callable[[], Awaitable[Any]],
+        tracker: LatencyTracker,
+        prepare: Optional[Callable[[], Awaitable[Any]]] = None,
+        discard: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        """지연이 p95를 넘으면 같은 요청을 한 번 더 보내고 먼저 도착한 응답을 사용합니다."""
+        # 헤지 대기 시간은 첫 요청이 실제로 나간 시점부터 잼
+        if prepare is not None:
+            await prepare()
+
+        hedge_delay = None
+        if self.policy.hedge_enabled and len(tracker.samples) >= self.policy.hedge_min_samples:
+            hedge_delay = tracker.percentile(self.policy.hedge_quantile)
+
+        if hedge_delay is None:
+            return await self._timed_attempt(attempt, tracker)
+
+        primary = asyncio.ensure_future(self._timed_attempt(attempt, tracker))
+        pending = {primary}
+        winner: Optional[asyncio.Future] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            hedge = asyncio.ensure_future(self._timed_attempt(attempt, tracker, prepare))
+            pending.add(hedge)
+            self._stats["hedges_sent"] += 1
+
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if winner is None:
+                            winner = task
+                            if task is hedge:
+                                self._stats["hedge_wins"] += 1
+                        elif discard is not None:
+                            # 두 요청이 동시에 끝나면 진 쪽의 결과를 정리
+                            await discard(task.result())
+                    else:
+                        last_error = task.exception()
+                if winner is not None:
+                    return winner.result()
+            raise last_error
+        finally:
+            # 늦게 도착하는 쪽의 요청은 취소하여 커넥션을 반환
+            for task in pending:
+                task.cancel()
+                if discard is not None:
+                    task.add_done_callback(self._discard_late_result(discard))
+
+    @staticmethod
+    def _discard_late_result(discard: Callable[[Any], Awaitable[Any]]) -> Callable[[asyncio.Future], None]:
+        """취소가 닿기 전에 끝나 버린 시도의 결과도 정리하는 완료 콜백"""
+        def callback(task: asyncio.Future):
+            if not task.cancelled() and task.exception() is None:
+                asyncio.ensure_future(discard(task.result()))
+        return callback
+
+    def stats(self) -> Dict[str, Any]:
+        """재시도/헤징 통계와 이름별 지연 시간 분위수를 반환합니다."""
+        stats = dict(self._stats)
+        stats["latency"] = {
+            name: {
+                "samples": len(tracker.samples),
+                "p50_seconds": round(tracker.percentile(0.5) or 0.0, 4),
+                "p95_seconds": round(tracker.percentile(0.95) or 0.0, 4)
+            }
+            for name, tracker in self._trackers.items()
+        }
+        stats["hedge_enabled"] = self.policy.hedge_enabled
+        return stats
+
+
+# 프로세스 전체에서 공유하는 재시도 실행기
+_resilient_caller: Optional[ResilientCaller] = None
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """공유 재시도 실행기를 반환합니다."""
+    global _resilient_caller
+    if _resilient_caller is None:
+        _resilient_caller = ResilientCaller()
+    return _resilient_caller
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+def hash_content(content: bytes) -> str:
+    """파일 바이트의 SHA-256 해시를 반환합니다."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def make_cache_key(content_hash: str, **params: Any) -> str:
+    """
+    콘텐츠 해시와 호출 파라미터로 캐시 키를 생성합니다.
+
+    키는 "{content_hash}_{params_hash}" 형식이므로 콘텐츠 해시 접두사로 무효화할 수 있습니다.
+
+    Args:
+        content_hash: 파일 바이트의 SHA-256 해시
+        **params: 결과에 영향을 주는 파라미터 (model, prompt, detail, prompt_version 등)
+
+    Returns:
+        캐시 키 문자열
+    """
+    params_json = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    params_hash = hashlib.sha256(params_json.encode("utf-8")).hexdigest()[:16]
+    return f"{content_hash}_{params_hash}"
+
+
+class ResultCache:
+    """메모리 LRU 계층과 디스크 계층으로 구성된 콘텐츠 주소 기반 결과 캐시"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_memory_bytes: int = 64 * 1024 * 1024, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 결과를 조회합니다. 메모리 → 디스크 순서로 찾습니다."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return json.loads(data)
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None and disk_path.exists():
+            try:
+                data = disk_path.read_bytes()
+                result = json.loads(data)
+            except Exception as e:
+                print(f"캐시 파일 읽기 오류: {str(e)}")
+                return None
+            with self._lock:
+                self._stats["disk_hits"] += 1
+                self._put_memory(key, data)
+            return result
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """결과를 메모리와 디스크에 저장합니다."""
+        if not self.enabled:
+            return
+
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._put_memory(key, data)
+            self._stats["stores"] += 1
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None:
+            try:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = disk_path.with_suffix(".tmp")
+                temp_path.write_bytes(data)
+                os.replace(temp_path, disk_path)
+            except Exception as e:
+                print(f"캐시 파일 저장 오류: {str(e)}")
+
+    def invalidate(self, content_hash: Optional[str] = None) -> int:
+        """
+        캐시 항목을 무효화합니다.
+
+        Args:
+            content_hash: 무효화할 파일의 SHA-256 해시 (None이면 전체 삭제)
+
+        Returns:
+            삭제된 항목 수 (메모리와 디스크 중 큰 값)
+        """
+        prefix = f"{content_hash}_" if content_hash else ""
+
+        with self._lock:
+            memory_keys = [key for key in self._memory if key.startswith(prefix)]
+            for key in memory_keys:
+                self._memory_bytes -= len(self._memory.pop(key))
+
+        disk_removed = 0
+        if self.cache_dir is not None and self.cache_dir.exists():
+            pattern = f"{content_hash[:2]}/{prefix}*.json" if content_hash else "*/*.json"
+            for path in self.cache_dir.glob(pattern):
+                try:
+                    path.unlink()
+                    disk_removed += 1
+                except FileNotFoundError:
+                    pass
+
+        return max(len(memory_keys), disk_removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        stats["max_memory_bytes"] = self.max_memory_bytes
+        stats["enabled"] = self.enabled
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+
+        if self.cache_dir is not None and self.cache_dir.exists():
+            disk_files = list(self.cache_dir.glob("*/*.json"))
+            stats["disk_entries"] = len(disk_files)
+            stats["disk_bytes"] = sum(path.stat().st_size for path in disk_files)
+            stats["cache_dir"] = str(self.cache_dir)
+
+        return stats
+
+    def _put_memory(self, key: str, data: bytes):
+        """메모리 계층에 저장하고 용량을 넘으면 오래된 항목부터 제거합니다. (lock 보유 상태에서 호출)"""
+        if len(data) > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        """캐시 키에 해당하는 디스크 경로를 반환합니다."""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+
+# 프로세스 전체에서 공유하는 결과 캐시
+_result_cache: Optional[ResultCache] = None
+
+
+def configure_result_cache(cache_dir: Optional[Path]) -> ResultCache:
+    """환경 변수 설정에 따라 공유 결과 캐시를 구성합니다."""
+    global _result_cache
+    enabled = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    use_disk = os.getenv("RESULT_CACHE_DISK", "true").lower() == "true"
+    _result_cache = ResultCache(
+        cache_dir=cache_dir if use_disk else None,
+        max_memory_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        enabled=enabled
+    )
+    return _result_cache
+
+
+def get_result_cache() -> ResultCache:
+    """공유 결과 캐시를 반환합니다. (구성되지 않았다면 메모리 전용 캐시 생성)"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = configure_result_cache(None)
+    return _result_cache
@@ -0,0 +1,92 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """동일한 키로 동시에 들어온 요청들을 하나의 실행으로 합치는 클래스"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {
+            "executions": 0,
+            "coalesced": 0
+        }
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        키에 해당하는 실행이 진행 중이면 그 결과를 기다리고, 없으면 새로 실행합니다.
+
+        모든 호출자는 같은 결과의 복사본을 받습니다. 결과가 dict이면 합류한 호출자의
+        결과에는 "coalesced": True가 표시됩니다. 모든 호출자가 취소되면 실행도 취소됩니다.
+
+        Args:
+            key: 요청 식별 키 (콘텐츠 해시 + 파라미터)
+            func: 실제 작업을 수행하는 코루틴 팩토리
+
+        Returns:
+            작업 결과
+        """
+        task = self._inflight.get(key)
+        coalesced = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            self._stats["executions"] += 1
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._stats["coalesced"] += 1
+
+        self._waiters[key] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 기다리는 호출자가 더 이상 없으면 실제 작업도 취소
+            if not task.done() and self._release(key, task) == 0:
+                task.cancel()
+            raise
+        else:
+            self._release(key, task)
+
+        result = copy.deepcopy(result)
+        if coalesced and isinstance(result, dict):
+            result["coalesced"] = True
+        return result
+
+    def is_inflight(self, key: str) -> bool:
+        """키에 해당하는 실행이 진행 중인지 확인합니다."""
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        """단일 실행 통계를 반환합니다."""
+        stats = dict(self._stats)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+    def _release(self, key: str, task: asyncio.Task) -> int:
+        """대기자 수를 줄이고 남은 대기자 수를 반환합니다."""
+        if self._inflight.get(key) is not task:
+            return 0
+        self._waiters[key] -= 1
+        return self._waiters[key]
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """완료된 실행을 진행 중 목록에서 제거합니다."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+
+
+# 프로세스 전체에서 공유하는 단일 실행 그룹
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """공유 단일 실행 그룹을 반환합니다."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,126 @@
+import json
+import re
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+
+# "tables": [ 까지 찾는 패턴 (키와 배열 시작 사이 공백 허용)
+_TABLES_ARRAY_PATTERN = re.compile(r'"tables"\s*:\s*\[')
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Server-Sent Events 형식의 메시지를 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """
+    (이벤트명, 데이터) 스트림을 SSE 메시지로 변환합니다.
+
+    스트리밍 중 오류가 나면 이미 응답 헤더가 전송된 뒤이므로 error 이벤트로 알립니다.
+    """
+    try:
+        async for event, data in events:
+            yield format_sse(event, data)
+    except Exception as e:
+        # HTTPException은 detail에 메시지가 있음
+        message = str(getattr(e, "detail", None) or e)
+        print(f"스트리밍 중 오류 발생: {message}")
+        yield format_sse("error", {"success": False, "error": message})
+
+
+async def result_events(result: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+    """이미 완성된 표 추출 결과를 스트리밍 이벤트 형태(table..., done)로 내보냅니다."""
+    for table in result.get("tables", []):
+        yield "table", table
+    yield "done", result
+
+
+class IncrementalTableParser:
+    """
+    모델이 스트리밍하는 JSON에서 "tables" 배열의 표 객체를 닫히는 즉시 꺼내는 파서입니다.
+
+    ```json 코드 블록이나 앞뒤 설명 문장이 섞여 있어도 "tables": [ 이후만 해석합니다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.tables: List[Dict[str, Any]] = []
+        self._array_start: Optional[int] = None
+        self._position = 0
+        self._depth = 0
+        self._object_start: Optional[int] = None
+        self._in_string = False
+        self._escaped = False
+        self._finished = False
+
+    @property
+    def finished(self) -> bool:
+        """tables 배열이 닫혔는지 여부"""
+        return self._finished
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        새로 받은 텍스트를 추가하고, 이번에 완성된 표 객체 목록을 반환합니다.
+
+        Args:
+            text: 스트림에서 받은 텍스트 조각
+
+        Returns:
+            새로 닫힌 표 객체 목록 (없으면 빈 리스트)
+        """
+        self.buffer += text
+        if self._finished:
+            return []
+
+        if self._array_start is None:
+            match = _TABLES_ARRAY_PATTERN.search(self.buffer)
+            if not match:
+                return []
+            self._array_start = self._position = match.end()
+
+        completed = []
+        buffer = self.buffer
+        for index in range(self._position, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # tables 배열 자체가 닫힘
+                    self._finished = True
+                    self._position = index + 1
+                    return completed
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    table = self._load_table(buffer[self._object_start:index + 1])
+                    if table is not None:
+                        completed.append(table)
+                    self._object_start = None
+
+        self._position = len(buffer)
+        return completed
+
+    def _load_table(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            table = json.loads(text)
+        except json.JSONDecodeError as e:
+            print(f"스트리밍 표 파싱 오류: {str(e)}")
+            return None
+        if not isinstance(table, dict):
+            return None
+        if "table_id" not in table:
+            table["table_id"] = f"table_{len(self.tables) + 1}"
+        self.tables.append(table)
+        return table
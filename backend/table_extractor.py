@@ -1,15 +1,120 @@
 import json
+import re
+import asyncio
 import openai
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple, Callable
 import os
 import base64
+from openai_client import get_async_client, create_chat_completion, stream_chat_completion
+from result_cache import get_result_cache, hash_content, make_cache_key
+from single_flight import get_single_flight
+from image_preprocessor import preprocess_image
+from token_estimator import estimate_image_request, estimate_text_request
+from streaming import IncrementalTableParser
+from json_repair import parse_json_tolerant
+from text_chunker import PAGE_SEPARATOR, chunk_text, chunk_units
+from native_tables import extract_docx_tables, extract_excel_tables
+from pdf_layout import confidence_threshold, iter_pdf_layout
+from cpu_pool import run_cpu
+from pdf_raster import get_raster_cache, max_dpi, render_page
+from blank_detector import detect_blank, record_saved_tokens
+from table_presence import filter_enabled, image_table_score, presence_threshold, text_table_score
+
+# 프롬프트 템플릿이 바뀌면 올려서 이전 캐시 결과가 재사용되지 않도록 합니다
+PROMPT_TEMPLATE_VERSION = "2"
+
+# 표 추출 요청의 시스템 프롬프트와 최대 출력 토큰
+TEXT_SYSTEM_PROMPT = "당신은 문서에서 표를 정확하게 추출하고 정리하는 전문가입니다. JSON 형식을 엄격하게 지켜주세요."
+IMAGE_SYSTEM_PROMPT = "당신은 이미지에서 표를 정확하게 추출하고 정리하는 전문가입니다. JSON 형식을 엄격하게 지켜주세요."
+EXTRACTION_MAX_TOKENS = 4000
+
+# 모델 출력이 따라야 하는 표 추출 결과 스키마 (Structured Outputs strict 모드 규칙: 모든 필드 필수, 추가 필드 금지)
+TABLE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tables": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "table_id": {"type": "string"},
+                    "title": {"type": "string"},
+                    "headers": {"type": "array", "items": {"type": "string"}},
+                    "rows": {"type": "array", "items": {"type": "array", "items": {"type": "string"}}},
+                    "row_count": {"type": "integer"},
+                    "column_count": {"type": "integer"}
+                },
+                "required": ["table_id", "title", "headers", "rows", "row_count", "column_count"],
+                "additionalProperties": False
+            }
+        },
+        "markdown": {"type": "string"},
+        "summary": {"type": "string"}
+    },
+    "required": ["tables", "markdown", "summary"],
+    "additionalProperties": False
+}
+
+# response_format을 거부한 (모델, 형식) 조합. 이후 요청은 한 단계 낮은 형식을 사용
+_UNSUPPORTED_RESPONSE_FORMATS = set()
+
+# 청크 동시 추출 수 제한 (이벤트 루프별)
+_CHUNK_SEMAPHORES: Dict[Any, asyncio.Semaphore] = {}
+
+# 청크 위치 안내에 쓰는 문서 단위 이름
+_UNIT_NAMES = {"page": "페이지", "section": "섹션", "sheet": "시트"}
+
+# 응답 파싱 결과 통계 (그대로 파싱 / 로컬 복구 / 실패)
+PARSE_STATS = {"parsed": 0, "repaired": 0, "failed": 0}
+
+# max_tokens에서 잘린 출력을 이어받을 때 보내는 요청
+CONTINUATION_PROMPT = (
+    "출력이 길이 제한으로 중간에 끊겼습니다. 마지막 문자 바로 다음부터 이어서 출력하세요. "
+    "이미 출력한 내용을 반복하지 말고, 설명이나 코드 블록 없이 JSON의 나머지 부분만 출력하세요."
+)
+# 이어받은 출력과 이전 출력의 겹침을 찾을 범위 (짧은 우연한 일치는 겹침으로 보지 않음)
+CONTINUATION_MIN_OVERLAP = 10
+CONTINUATION_MAX_OVERLAP = 500
+# 이어받은 출력이 JSON을 처음부터 다시 시작했는지 확인하는 패턴
+_RESTARTED_OUTPUT_PATTERN = re.compile(r'\s*(```(json)?\s*)?\{\s*"tables"')
+
+
+async def _iterate(items: List[Any]) -> AsyncIterator[Any]:
+    """목록을 비동기 이터레이터로 감쌉니다."""
+    for item in items:
+        yield item
+
+def _empty_estimate() -> Dict[str, Any]:
+    """API를 호출하지 않는 결과의 추정치"""
+    return {
+        "model": None,
+        "prompt_tokens": 0,
+        "image_tokens": 0,
+        "input_tokens": 0,
+        "max_output_tokens": 0,
+        "total_tokens": 0,
+        "estimated_cost_usd": 0.0
+    }
+
+def _add_usage(total: Optional[Dict[str, Any]], usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """여러 요청의 usage를 합산합니다."""
+    if not usage:
+        return total
+    if not total:
+        return dict(usage)
+    return {key: total.get(key, 0) + value if isinstance(value, int) else value for key, value in usage.items()}
+
 
 class TableExtractor:
     """GPT-4o Vision을 사용하여 텍스트와 이미지에서 표를 추출하고 정리하는 클래스"""
     
     def __init__(self):
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """프로세스 전체에서 공유하는 비동기 OpenAI 클라이언트"""
+        return get_async_client()
     
     async def extract_tables_with_gpt5(self, text: str, model: str = None) -> Dict[str, Any]:
         """
@@ -26,14 +131,21 @@ class TableExtractor:
             # 사용할 모델 결정
             selected_model = model or self.model
             
+            # 긴 텍스트는 페이지/문단 경계에서 나누어 동시에 추출한 뒤 병합
+            chunks = self._chunk_text(text, selected_model)
+            if len(chunks) > 1:
+                return await self._collect_chunk_results(_iterate(chunks), selected_model)
+            
             # 프롬프트 구성
             prompt = self._create_extraction_prompt(text)
             
-            # OpenAI API 호출
-            response = await self._call_openai_api(prompt, selected_model)
+            # OpenAI API 호출 (max_tokens에서 잘리면 이어받기)
+            completion = await self._call_openai_api(prompt, selected_model)
             
             # 응답 파싱 및 정리
-            result = self._parse_and_clean_response(response, selected_model)
+            result = self._parse_and_clean_response(completion["content"], selected_model)
+            result.update(self._completion_info(completion))
+            result["estimate"] = self.estimate_text_extraction(text, selected_model)
             
             return result
             
@@ -47,7 +159,7 @@ class TableExtractor:
                 "summary": ""
             }
     
-    async def extract_tables_from_image(self, image_content: bytes, file_extension: str, model: str = None) -> Dict[str, Any]:
+    async def extract_tables_from_image(self, image_content: bytes, file_extension: str, model: str = None, lossless: bool = False, detail: str = "high") -> Dict[str, Any]:
         """
         지정된 Vision 모델을 사용하여 이미지에서 직접 표를 추출합니다.
         
@@ -55,54 +167,86 @@ class TableExtractor:
             image_content: 이미지 바이트 내용
             file_extension: 파일 확장자
             model: 사용할 Vision 모델명 (선택사항, 기본값: 클래스 초기화 시 설정된 모델)
+            lossless: 이미지를 무손실(PNG)로 재인코딩할지 여부 (작은 글씨의 표에 사용)
+            detail: 이미지 분석 상세도 (기본값 high, 토큰 예산 초과 시 low로 낮춤)
             
         Returns:
             표 정보가 포함된 JSON 응답
         """
         try:
-            # 사용할 모델 결정 (Vision API 지원 모델만 사용)
-            selected_model = model or self.model
+            selected_model = self._select_vision_model(model)
+            estimate = self.estimate_image_extraction(image_content, selected_model, detail)
             
-            # Vision API 지원 모델인지 확인
-            vision_models = ["gpt-4o", "gpt-4o-mini", "gpt-4-vision-preview"]
-            if selected_model not in vision_models:
-                print(f"경고: {selected_model}은 Vision API를 지원하지 않습니다. gpt-4o를 사용합니다.")
-                selected_model = "gpt-4o"
+            # 빈 페이지/거의 빈 이미지는 API를 호출하지 않고 빈 결과를 바로 반환
+            blank = await run_cpu(detect_blank, image_content)
+            if blank is not None:
+                return self._blank_image_result(blank, estimate)
             
-            # 이미지를 Base64로 인코딩
-            base64_image = base64.b64encode(image_content).decode('utf-8')
+            # 동일한 파일 + 파라미터 조합의 캐시된 결과가 있으면 바로 반환
+            content_hash = hash_content(image_content)
+            cache_key = self._image_extraction_cache_key(content_hash, selected_model, detail, lossless)
+            cache = get_result_cache()
+            cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                cached_result["cached"] = True
+                return cached_result
             
-            # Vision API를 사용한 표 추출
-            response = self.client.chat.completions.create(
-                model=selected_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 이미지에서 표를 정확하게 추출하고 정리하는 전문가입니다. JSON 형식을 엄격하게 지켜주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": self._create_image_extraction_prompt()
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/{file_extension[1:]};base64,{base64_image}",
-                                    "detail": "high"  # 고해상도 분석으로 표 구조 정확히 파악
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=4000,
-                temperature=0.1
+            async def extract() -> Dict[str, Any]:
+                result = await self._extract_tables_from_image_uncached(image_content, file_extension, selected_model, lossless, detail)
+                result["content_hash"] = content_hash
+                result["estimate"] = estimate
+                if result["success"]:
+                    cache.set(cache_key, result)
+                return result
+            
+            # 같은 이미지에 대한 동시 요청은 하나의 API 호출을 공유
+            result = await get_single_flight().do(cache_key, extract)
+            result["cached"] = False
+            return result
+        
+        except Exception as e:
+            print(f"이미지 표 추출 중 오류 발생: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "tables": [],
+                "markdown": "",
+                "summary": ""
+            }
+    
+    def _blank_image_result(self, blank: Dict[str, Any], estimate: Dict[str, Any]) -> Dict[str, Any]:
+        """빈 페이지로 판정된 이미지의 결과 (API 호출 없음, 생략한 토큰은 지표에 기록)"""
+        record_saved_tokens(estimate)
+        return {
+            "success": True,
+            "tables": [],
+            "markdown": "",
+            "summary": "빈 페이지로 판정되어 표 추출을 생략했습니다.",
+            "table_count": 0,
+            "extraction_method": "빈 페이지 감지",
+            "blank": blank,
+            "usage": None,
+            "estimate": _empty_estimate()
+        }
+    
+    async def _extract_tables_from_image_uncached(self, image_content: bytes, file_extension: str, selected_model: str, lossless: bool = False, detail: str = "high") -> Dict[str, Any]:
+        """캐시를 거치지 않고 Vision API로 이미지에서 표를 추출합니다."""
+        try:
+            # Vision 모델이 실제로 보는 해상도로 축소하고 압축 형식으로 재인코딩
+            image_content, file_extension, preprocessing = await run_cpu(
+                preprocess_image, image_content, file_extension, detail, lossless
+            )
+            
+            # Vision API를 사용한 표 추출 (max_tokens에서 잘리면 이어받기)
+            completion = await self._create_completion_with_continuation(
+                self._image_extraction_messages(image_content, file_extension, detail),
+                selected_model
             )
             
             # 응답 파싱 및 정리
-            result = self._parse_and_clean_response(response.choices[0].message.content, selected_model)
+            result = self._parse_and_clean_response(completion["content"], selected_model)
+            result.update(self._completion_info(completion))
+            result["preprocessing"] = preprocessing
             
             return result
             
@@ -116,13 +260,773 @@ class TableExtractor:
                 "summary": ""
             }
     
-    def _create_extraction_prompt(self, text: str) -> str:
-        """텍스트에서 표 추출을 위한 프롬프트를 생성합니다."""
+    async def stream_tables_from_image(self, image_content: bytes, file_extension: str, model: str = None, lossless: bool = False, detail: str = "high") -> AsyncIterator[Tuple[str, Any]]:
+        """
+        이미지에서 표를 추출하면서 표 객체가 완성되는 대로 스트리밍합니다.
+        
+        Yields:
+            ("table", 표 객체) 이벤트들, 마지막에 ("done", extract_tables_from_image와 같은 형태의 전체 결과)
+        """
+        selected_model = self._select_vision_model(model)
+        blank = await run_cpu(detect_blank, image_content)
+        if blank is not None:
+            yield "done", self._blank_image_result(blank, self.estimate_image_extraction(image_content, selected_model, detail))
+            return
+        
+        content_hash = hash_content(image_content)
+        cache_key = self._image_extraction_cache_key(content_hash, selected_model, detail, lossless)
+        cache = get_result_cache()
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            cached_result["cached"] = True
+            for table in cached_result.get("tables", []):
+                yield "table", table
+            yield "done", cached_result
+            return
+        
+        estimate = self.estimate_image_extraction(image_content, selected_model, detail)
+        processed_content, processed_extension, preprocessing = await run_cpu(
+            preprocess_image, image_content, file_extension, detail, lossless
+        )
+        messages = self._image_extraction_messages(processed_content, processed_extension, detail)
+        
+        async for event, data in self._stream_tables(messages, selected_model):
+            if event == "done":
+                data.update({"preprocessing": preprocessing, "content_hash": content_hash, "estimate": estimate})
+                if data["success"]:
+                    cache.set(cache_key, data)
+                data["cached"] = False
+            yield event, data
+    
+    async def stream_tables_from_text(self, text: str, model: str = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        텍스트에서 표를 추출하면서 표 객체가 완성되는 대로 스트리밍합니다.
+        
+        Yields:
+            ("table", 표 객체) 이벤트들, 마지막에 ("done", extract_tables_with_gpt5와 같은 형태의 전체 결과)
+        """
+        selected_model = model or self.model
+        chunks = self._chunk_text(text, selected_model)
+        
+        if len(chunks) > 1:
+            async for event, data in self._stream_chunk_results(_iterate(chunks), selected_model):
+                yield event, data
+            return
+        
+        messages = self._text_extraction_messages(self._create_extraction_prompt(text))
+        
+        async for event, data in self._stream_tables(messages, selected_model):
+            if event == "done":
+                data["estimate"] = self.estimate_text_extraction(text, selected_model)
+            yield event, data
+    
+    async def extract_native_tables(self, file_content: bytes, file_extension: str) -> Optional[Dict[str, Any]]:
+        """
+        문서에 구조화된 표가 있으면 LLM 호출 없이 바로 추출합니다.
+        
+        Args:
+            file_content: 파일 바이트
+            file_extension: 파일 확장자
+            
+        Returns:
+            extract_tables_with_gpt5와 같은 형태의 결과, 네이티브 표가 없거나 지원하지 않는 형식이면 None
+        """
+        if file_extension == '.docx':
+            extract, method = extract_docx_tables, "python-docx"
+        elif file_extension in ['.xlsx', '.xls']:
+            extract, method = (lambda content: extract_excel_tables(content, file_extension)), "openpyxl 읽기 전용"
+        else:
+            return None
+        
+        try:
+            tables = await run_cpu(extract, file_content)
+        except Exception as e:
+            print(f"네이티브 표 추출 오류, LLM 추출로 진행합니다: {str(e)}")
+            return None
+        
+        if not tables:
+            return None
+        
+        return {
+            "success": True,
+            "tables": tables,
+            "markdown": self.generate_markdown_from_tables(tables),
+            "summary": f"문서에 포함된 표 {len(tables)}개를 직접 추출했습니다.",
+            "table_count": len(tables),
+            "extraction_method": f"{method} (네이티브 표)",
+            "native": True,
+            "usage": None,
+            "estimate": _empty_estimate()
+        }
+    
+    async def extract_pdf_tables(self, file_content: bytes, model: str = None, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None, lossless: bool = False, detail: str = "high") -> Dict[str, Any]:
+        """
+        PDF 페이지의 글자 배치와 괘선으로 표를 먼저 찾고, 신뢰도가 낮은 페이지만 LLM으로 추출합니다.
+        
+        텍스트 레이어가 없는 스캔 페이지는 이미지로 렌더링해 Vision API로 페이지마다 동시에 추출합니다.
+        
+        Args:
+            file_content: PDF 바이트
+            model: 사용할 모델명 (선택사항)
+            check_budget: API 호출 전마다 지금까지의 누적 추정치로 호출되는 함수 (예외를 던지면 추출 중단)
+            lossless: 스캔 페이지 이미지를 무손실(PNG)로 전송할지 여부
+            detail: 스캔 페이지 이미지 분석 상세도 (렌더링 해상도도 이에 맞춤)
+            
+        Returns:
+            extract_tables_with_gpt5와 같은 형태의 결과 (native_pages, llm_pages, image_pages, page_confidence 포함)
+        """
+        async for event, data in self.stream_pdf_tables(file_content, model, check_budget, lossless, detail):
+            if event == "done":
+                return data
+    
+    async def stream_pdf_tables(self, file_content: bytes, model: str = None, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None, lossless: bool = False, detail: str = "high") -> AsyncIterator[Tuple[str, Any]]:
+        """
+        PDF 표 추출 스트림. 레이아웃으로 찾은 표는 페이지 분석이 끝나는 대로, API로 추출한 표는 호출이 끝나는 대로 내보냅니다.
+        
+        - 페이지의 모든 표가 PDF_LAYOUT_CONFIDENCE 이상이면 API를 호출하지 않음
+        - 스캔 페이지는 렌더링한 이미지로 extract_tables_from_image를 페이지마다 동시에 호출
+        - 나머지 페이지는 페이지 단위로 stream_tables_from_units에 넘김
+        - 레이아웃 표가 없고 표 존재 점수가 TABLE_PRESENCE_THRESHOLD 미만인 페이지는 API를 호출하지 않음
+          (생략한 호출 수와 토큰 추정치는 결과의 prefilter에 기록)
+        
+        Yields:
+            ("table", 표 객체) 이벤트들, 마지막에 ("done", extract_pdf_tables와 같은 형태의 전체 결과)
+        """
+        selected_model = model or self.model
+        threshold = confidence_threshold()
+        content_hash = hash_content(file_content)
+        events: asyncio.Queue = asyncio.Queue()
+        native_tables: List[Dict[str, Any]] = []
+        native_pages: List[int] = []
+        llm_pages: List[int] = []
+        page_confidence: List[float] = []
+        image_tasks: Dict[int, asyncio.Task] = {}
+        image_estimates: List[Dict[str, Any]] = []
+        text_estimate: Dict[str, Any] = {}
+        prefilter = filter_enabled()
+        presence = presence_threshold()
+        skipped_pages: List[int] = []
+        saved_estimates: List[Dict[str, Any]] = []
+        
+        def check_total_budget():
+            # 텍스트 청크와 스캔 페이지 호출 추정치를 합쳐서 예산 확인
+            if check_budget is None:
+                return
+            estimates = ([text_estimate] if text_estimate else []) + image_estimates
+            total = self._sum_estimates(estimates, selected_model)
+            total["chunks"] = text_estimate.get("chunks", 0) + len(image_estimates)
+            check_budget(total)
+        
+        def check_text_budget(estimate: Dict[str, Any]):
+            text_estimate.clear()
+            text_estimate.update(estimate)
+            check_total_budget()
+        
+        async def extract_scanned_page(page_number: int) -> Dict[str, Any]:
+            async with self._chunk_semaphore():
+                image = await self._render_scanned_page(file_content, content_hash, page_number - 1, detail)
+                estimate = self.estimate_image_extraction(image, selected_model, detail)
+                if prefilter and await run_cpu(image_table_score, image) < presence:
+                    skipped_pages.append(page_number)
+                    saved_estimates.append(estimate)
+                    return None
+                image_estimates.append(estimate)
+                try:
+                    check_total_budget()
+                except Exception as e:
+                    # 예산 초과는 페이지 실패가 아니라 전체 추출 중단
+                    events.put_nowait(("error", e))
+                    raise
+                result = await self.extract_tables_from_image(image, ".png", selected_model, lossless, detail)
+            for table in result.get("tables", []):
+                table["pages"] = [page_number, page_number]
+                events.put_nowait(("table", table))
+            return result
+        
+        async def text_pages() -> AsyncIterator[Dict[str, Any]]:
+            offset = 0
+            async for page in iter_pdf_layout(file_content):
+                page_number = page["page_number"]
+                page_confidence.append(page["confidence"])
+                if page["tables"] and page["confidence"] >= threshold:
+                    native_pages.append(page_number)
+                    for table in page["tables"]:
+                        native_tables.append(table)
+                        events.put_nowait(("table", table))
+                elif page["scanned"]:
+                    task = asyncio.create_task(extract_scanned_page(page_number))
+                    task.add_done_callback(lambda _: events.put_nowait(("page_done", None)))
+                    image_tasks[page_number] = task
+                elif prefilter and not page["tables"] and text_table_score(page["text"]) < presence:
+                    if page["text"].strip():
+                        skipped_pages.append(page_number)
+                        saved_estimates.append(estimate_text_request(
+                            self._create_extraction_prompt(page["text"]),
+                            selected_model,
+                            EXTRACTION_MAX_TOKENS,
+                            TEXT_SYSTEM_PROMPT
+                        ))
+                else:
+                    llm_pages.append(page_number)
+                    yield {
+                        "kind": "page",
+                        "index": page_number - 1,
+                        "page_number": page_number,
+                        "text": page["text"],
+                        "start": offset,
+                        "end": offset + len(page["text"]),
+                        "byte_offset": page["byte_offset"]
+                    }
+                offset += len(page["text"]) + len(PAGE_SEPARATOR)
+        
+        async def extract_text_pages():
+            try:
+                async for event, data in self.stream_tables_from_units(text_pages(), selected_model, check_text_budget):
+                    events.put_nowait((event, data))
+            except Exception as e:
+                events.put_nowait(("error", e))
+        
+        consumer = asyncio.create_task(extract_text_pages())
+        llm_result = None
+        try:
+            while llm_result is None or not all(task.done() for task in image_tasks.values()):
+                event, data = await events.get()
+                if event == "error":
+                    raise data
+                if event == "done":
+                    llm_result = data
+                elif event == "table":
+                    yield event, data
+            # 마지막 페이지 작업과 같은 때에 들어온 표 이벤트
+            while not events.empty():
+                event, data = events.get_nowait()
+                if event == "table":
+                    yield event, data
+        finally:
+            consumer.cancel()
+            for task in image_tasks.values():
+                task.cancel()
+        
+        image_results = {page_number: task.exception() or task.result() for page_number, task in image_tasks.items()}
+        # 사전 필터로 호출을 생략한 스캔 페이지는 제외
+        image_results = {page_number: page_result for page_number, page_result in image_results.items() if page_result is not None}
+        
+        result = self._merge_pdf_results(native_tables, image_results, llm_result, selected_model, bool(skipped_pages))
+        saved = self._sum_estimates(saved_estimates, selected_model)
+        result.update({
+            "native_pages": native_pages,
+            "llm_pages": llm_pages,
+            "image_pages": sorted(image_results),
+            "page_confidence": page_confidence,
+            "prefilter": {
+                "enabled": prefilter,
+                "threshold": presence,
+                "skipped_pages": sorted(skipped_pages),
+                "saved_calls": len(saved_estimates),
+                "saved_tokens": saved["total_tokens"],
+                "saved_cost_usd": saved["estimated_cost_usd"]
+            }
+        })
+        if image_estimates:
+            result["estimate"] = self._sum_estimates(([llm_result["estimate"]] if llm_result.get("estimate") else []) + image_estimates, selected_model)
+        yield "done", result
+    
+    async def _render_scanned_page(self, file_content: bytes, content_hash: str, page_index: int, detail: str) -> bytes:
+        """스캔 페이지를 렌더링합니다. 렌더링한 이미지는 렌더링 캐시에 보관해 재시도 시 다시 렌더링하지 않습니다."""
+        cache = get_raster_cache()
+        cache_key = make_cache_key(content_hash, kind="pdf_page_image", page=page_index, detail=detail, max_dpi=max_dpi())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 이미지 디코딩/리사이즈는 GIL을 풀고 실행되므로 스레드에서 여러 페이지를 동시에 렌더링
+        image = await run_cpu(render_page, file_content, page_index, detail)
+        cache.set(cache_key, image)
+        return image
+    
+    def _merge_pdf_results(self, native_tables: List[Dict[str, Any]], image_results: Dict[int, Any], llm_result: Dict[str, Any], selected_model: str, filtered: bool = False) -> Dict[str, Any]:
+        """레이아웃으로 찾은 표, 스캔 페이지 Vision 결과, LLM 추출 결과를 페이지 순서대로 합칩니다."""
+        if not native_tables and not image_results and filtered and not llm_result.get("chunk_count"):
+            # 모든 페이지가 사전 필터에서 표 없음으로 판정된 경우 (API 호출 없음)
+            return {
+                "success": True,
+                "tables": [],
+                "markdown": "",
+                "summary": "표가 있는 페이지를 찾지 못했습니다.",
+                "table_count": 0,
+                "extraction_method": "표 존재 사전 필터",
+                "chunk_count": 0,
+                "usage": None,
+                "estimate": _empty_estimate()
+            }
+        if not native_tables and not image_results:
+            return llm_result
+        
+        failed_pages = []
+        tables = list(native_tables)
+        usage = None
+        methods = []
+        summaries = []
+        if native_tables:
+            methods.append("PDF 레이아웃 분석 (네이티브 표)")
+            summaries.append(f"PDF 레이아웃에서 표 {len(native_tables)}개를 직접 추출했습니다.")
+        
+        succeeded_pages = 0
+        for page_number, page_result in sorted(image_results.items()):
+            if isinstance(page_result, BaseException) or not page_result.get("success"):
+                error = str(page_result) if isinstance(page_result, BaseException) else page_result.get("error")
+                print(f"스캔 페이지 {page_number} 표 추출 실패: {error}")
+                failed_pages.append({"page": page_number, "error": error})
+                continue
+            succeeded_pages += 1
+            tables.extend(page_result.get("tables", []))
+            if not page_result.get("cached"):
+                usage = _add_usage(usage, page_result.get("usage"))
+            if page_result.get("summary"):
+                summaries.append(page_result["summary"])
+        if image_results:
+            methods.append(f"{self._select_vision_model(selected_model)} Vision API (스캔 페이지 {len(image_results)}개 병렬 추출)")
+        
+        if llm_result.get("chunk_count"):
+            methods.append(llm_result.get("extraction_method", f"OpenAI API ({selected_model})"))
+            if llm_result.get("success"):
+                tables.extend(llm_result.get("tables", []))
+                usage = _add_usage(usage, llm_result.get("usage"))
+                if llm_result.get("summary"):
+                    summaries.append(llm_result["summary"])
+        
+        if not native_tables and not succeeded_pages and not llm_result.get("success"):
+            return {
+                "success": False,
+                "error": "모든 페이지에서 표 추출에 실패했습니다.",
+                "failed_pages": failed_pages,
+                "failed_chunks": llm_result.get("failed_chunks", []),
+                "chunk_count": llm_result.get("chunk_count", 0) + len(image_results),
+                "tables": [],
+                "markdown": "",
+                "summary": ""
+            }
+        
+        tables.sort(key=lambda table: table.get("pages", [0])[0])
+        for index, table in enumerate(tables):
+            table["table_id"] = f"table_{index + 1}"
+        
+        result = {key: value for key, value in llm_result.items() if key != "error"}
+        result.update({
+            "success": True,
+            "tables": tables,
+            "markdown": self.generate_markdown_from_tables(tables),
+            "summary": "\n".join(summaries),
+            "table_count": len(tables),
+            "extraction_method": " + ".join(methods),
+            "chunk_count": llm_result.get("chunk_count", 0) + len(image_results),
+            "failed_pages": failed_pages,
+            "native": not image_results and not llm_result.get("chunk_count"),
+            "usage": usage,
+            "estimate": llm_result.get("estimate") or _empty_estimate()
+        })
+        return result
+    
+    async def extract_tables_from_units(self, units: AsyncIterator[Dict[str, Any]], model: str = None, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """
+        문서 단위 스트림(FileProcessor.iter_units)에서 표를 추출합니다.
+        
+        단위를 청크로 묶는 대로 바로 API 호출을 시작하므로, 뒤쪽 페이지를 파싱하는 동안 앞쪽 페이지의 추출이 진행됩니다.
+        
+        Args:
+            units: 페이지/섹션/시트 단위 스트림
+            model: 사용할 모델명 (선택사항)
+            check_budget: 청크 호출 전마다 지금까지의 누적 추정치로 호출되는 함수 (예외를 던지면 추출 중단)
+            
+        Returns:
+            extract_tables_with_gpt5와 같은 형태의 결과 (텍스트가 없으면 chunk_count가 0)
+        """
+        selected_model = model or self.model
+        return await self._collect_chunk_results(self._chunk_units(units, selected_model), selected_model, check_budget)
+    
+    async def stream_tables_from_units(self, units: AsyncIterator[Dict[str, Any]], model: str = None, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        문서 단위 스트림에서 표를 추출하면서 청크가 끝나는 대로 그 청크의 표를 스트리밍합니다.
+        
+        Yields:
+            ("table", 표 객체) 이벤트들, 마지막에 ("done", extract_tables_from_units와 같은 형태의 전체 결과)
+        """
+        selected_model = model or self.model
+        async for event, data in self._stream_chunk_results(self._chunk_units(units, selected_model), selected_model, check_budget):
+            yield event, data
+    
+    async def _collect_chunk_results(self, chunks: AsyncIterator[Dict[str, Any]], selected_model: str, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """
+        청크별 표 추출을 동시에 실행하고(map) 청크 경계에서 이어지는 표를 병합합니다(reduce).
+        
+        동시 실행 수는 TABLE_CHUNK_CONCURRENCY로 제한하며, 실제 호출 속도는 공유 레이트 리미터가 조절합니다.
+        """
+        async for event, data in self._stream_chunk_results(chunks, selected_model, check_budget):
+            if event == "done":
+                return data
+    
+    async def _stream_chunk_results(self, chunks: AsyncIterator[Dict[str, Any]], selected_model: str, check_budget: Optional[Callable[[Dict[str, Any]], Any]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        청크 스트림을 받는 대로 추출 작업을 시작하고, 작업이 끝나는 순서대로 그 청크의 표를 내보냅니다.
+        
+        Yields:
+            ("table", 표 객체) 이벤트들, 마지막에 ("done", 문서 순서로 병합한 전체 결과)
+        """
+        started: List[Tuple[Dict[str, Any], asyncio.Task]] = []
+        estimates: List[Dict[str, Any]] = []
+        finished: asyncio.Queue = asyncio.Queue()
+        
+        def start(chunk: Dict[str, Any], chunk_count: Optional[int]):
+            estimates.append(estimate_text_request(
+                self._create_extraction_prompt(chunk["text"], chunk, chunk_count),
+                selected_model,
+                EXTRACTION_MAX_TOKENS,
+                TEXT_SYSTEM_PROMPT
+            ))
+            if check_budget is not None:
+                check_budget(self._sum_estimates(estimates, selected_model))
+            task = asyncio.create_task(self._extract_chunk(chunk, chunk_count, selected_model))
+            task.add_done_callback(lambda _: finished.put_nowait(None))
+            started.append((chunk, task))
+        
+        async def produce():
+            # 청크가 하나뿐인 문서는 구간 안내 없이 요청하도록 첫 청크는 두 번째 청크가 나올 때까지 보류
+            try:
+                held = None
+                async for chunk in chunks:
+                    if held is not None:
+                        start(held, None)
+                    held = chunk
+                if held is not None:
+                    start(held, 1 if not started else None)
+                finished.put_nowait("end")
+            except Exception as e:
+                finished.put_nowait(e)
+        
+        producer = asyncio.create_task(produce())
+        emitted = set()
+        produced_all = False
+        try:
+            while not produced_all or len(emitted) < len(started):
+                signal = await finished.get()
+                if isinstance(signal, Exception):
+                    raise signal
+                if signal == "end":
+                    produced_all = True
+                
+                for chunk, task in started:
+                    if task.done() and chunk["index"] not in emitted:
+                        emitted.add(chunk["index"])
+                        if task.exception() is not None:
+                            print(f"청크 {chunk['index']} 표 추출 중 오류 발생: {str(task.exception())}")
+                            continue
+                        for table in task.result().get("tables", []):
+                            yield "table", table
+        finally:
+            producer.cancel()
+            for _, task in started:
+                task.cancel()
+        
+        if not started:
+            yield "done", {
+                "success": False,
+                "error": "표를 추출할 텍스트가 없습니다.",
+                "chunk_count": 0,
+                "tables": [],
+                "markdown": "",
+                "summary": ""
+            }
+            return
+        
+        result = self._merge_chunk_results(
+            [chunk for chunk, _ in started],
+            [task.exception() or task.result() for _, task in started],
+            selected_model
+        )
+        result["estimate"] = self._sum_estimates(estimates, selected_model)
+        yield "done", result
+    
+    async def _chunk_units(self, units: AsyncIterator[Dict[str, Any]], selected_model: str) -> AsyncIterator[Dict[str, Any]]:
+        """문서 단위 스트림을 TABLE_CHUNK_TOKENS 이하의 청크 스트림으로 묶습니다."""
+        async for chunk in chunk_units(units, int(os.getenv("TABLE_CHUNK_TOKENS", "3000")), selected_model):
+            yield chunk
+    
+    async def _extract_chunk(self, chunk: Dict[str, Any], chunk_count: Optional[int], selected_model: str) -> Dict[str, Any]:
+        """청크 하나에서 표를 추출합니다."""
+        async with self._chunk_semaphore():
+            completion = await self._call_openai_api(self._create_extraction_prompt(chunk["text"], chunk, chunk_count), selected_model)
+        
+        result = self._parse_and_clean_response(completion["content"], selected_model)
+        result.update(self._completion_info(completion))
+        for table in result.get("tables", []):
+            table["pages"] = [chunk["start_page"], chunk["end_page"]]
+        return result
+    
+    def _merge_chunk_results(self, chunks: List[Dict[str, Any]], chunk_results: List[Any], selected_model: str) -> Dict[str, Any]:
+        """청크별 결과를 문서 순서대로 합치고, 청크 경계에서 이어지는 표는 하나로 병합합니다."""
+        tables: List[Dict[str, Any]] = []
+        summaries = []
+        failed_chunks = []
+        usage = None
+        last_table_chunk = None
+        
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, BaseException) or not chunk_result.get("success"):
+                error = str(chunk_result) if isinstance(chunk_result, BaseException) else chunk_result.get("error")
+                print(f"청크 {chunk['index']} 표 추출 실패: {error}")
+                failed_chunks.append({"index": chunk["index"], "pages": [chunk["start_page"], chunk["end_page"]], "error": error})
+                continue
+            
+            usage = _add_usage(usage, chunk_result.get("usage"))
+            if chunk_result.get("summary"):
+                summaries.append(chunk_result["summary"])
+            
+            for position, table in enumerate(chunk_result.get("tables", [])):
+                # 바로 앞 청크의 마지막 표가 이 청크의 첫 표로 이어지는 경우 행을 이어붙임
+                if position == 0 and tables and last_table_chunk == chunk["index"] - 1 and self._continues_table(tables[-1], table):
+                    previous = tables[-1]
+                    rows = table.get("rows", [])
+                    if rows and rows[0] == previous.get("headers"):
+                        rows = rows[1:]
+                    previous["rows"] = previous.get("rows", []) + rows
+                    previous["pages"] = [previous["pages"][0], table.get("pages", previous["pages"])[1]]
+                    previous["row_count"] = len(previous["rows"])
+                    continue
+                tables.append(table)
+            if chunk_result.get("tables"):
+                last_table_chunk = chunk["index"]
+        
+        for index, table in enumerate(tables):
+            table["table_id"] = f"table_{index + 1}"
+            table["row_count"] = len(table.get("rows", []))
+            if table.get("rows"):
+                table["column_count"] = len(table["rows"][0])
+        
+        succeeded = [result for result in chunk_results if isinstance(result, dict) and result.get("success")]
+        if not succeeded:
+            return {
+                "success": False,
+                "error": "모든 청크에서 표 추출에 실패했습니다.",
+                "failed_chunks": failed_chunks,
+                "tables": [],
+                "markdown": "",
+                "summary": ""
+            }
+        
+        return {
+            "success": True,
+            "tables": tables,
+            "markdown": self.generate_markdown_from_tables(tables),
+            "summary": "\n".join(summaries),
+            "table_count": len(tables),
+            "extraction_method": f"OpenAI API ({selected_model}, {len(chunks)}개 청크 병렬 추출)" if len(chunks) > 1 else f"OpenAI API ({selected_model})",
+            "chunk_count": len(chunks),
+            "failed_chunks": failed_chunks,
+            "json_repaired": any(result.get("json_repaired") for result in succeeded),
+            "continuations": sum(result.get("continuations", 0) for result in succeeded),
+            "truncated": any(result.get("truncated") for result in succeeded),
+            "usage": usage
+        }
+    
+    def _continues_table(self, previous: Dict[str, Any], table: Dict[str, Any]) -> bool:
+        """청크 경계에서 잘린 표의 뒷부분인지 판단합니다. (헤더가 같거나, 헤더 없이 열 수가 같음)"""
+        previous_headers = [str(header).strip().lower() for header in previous.get("headers", [])]
+        headers = [str(header).strip().lower() for header in table.get("headers", [])]
+        if previous_headers and headers == previous_headers:
+            return True
+        rows = table.get("rows", [])
+        return not headers and bool(rows) and len(rows[0]) == len(previous_headers)
+    
+    def _chunk_text(self, text: str, selected_model: str) -> List[Dict[str, Any]]:
+        """텍스트를 TABLE_CHUNK_TOKENS 이하의 청크로 나눕니다."""
+        return chunk_text(text, int(os.getenv("TABLE_CHUNK_TOKENS", "3000")), selected_model)
+    
+    def _chunk_semaphore(self) -> asyncio.Semaphore:
+        """청크 동시 추출 수를 제한하는 세마포어 (이벤트 루프마다 하나)"""
+        loop = asyncio.get_running_loop()
+        semaphore = _CHUNK_SEMAPHORES.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(int(os.getenv("TABLE_CHUNK_CONCURRENCY", "8")))
+            _CHUNK_SEMAPHORES[loop] = semaphore
+        return semaphore
+    
+    async def _stream_tables(self, messages: List[Dict[str, Any]], selected_model: str) -> AsyncIterator[Tuple[str, Any]]:
+        """응답을 스트리밍으로 받으며 tables 배열의 표 객체를 닫히는 즉시 내보냅니다."""
+        parser = IncrementalTableParser()
+        final_chunk = {}
+        while True:
+            response_format = self._response_format(selected_model)
+            try:
+                async for chunk in stream_chat_completion(
+                    model=selected_model,
+                    messages=messages,
+                    max_tokens=EXTRACTION_MAX_TOKENS,
+                    temperature=0.1,
+                    **({"response_format": response_format} if response_format else {})
+                ):
+                    if "usage" in chunk:
+                        final_chunk = chunk
+                        continue
+                    for table in parser.feed(chunk["delta"]):
+                        yield "table", table
+                break
+            except openai.BadRequestError as e:
+                # 스트림 연결 시점에 response_format이 거부되면 낮은 형식으로 다시 연결
+                if parser.buffer or not self._mark_response_format_unsupported(selected_model, response_format, e):
+                    raise
+        
+        # max_tokens에서 잘렸으면 이어받은 출력을 파서에 계속 넣어 남은 표를 내보냄
+        completion = {
+            "content": parser.buffer,
+            "usage": final_chunk.get("usage"),
+            "finish_reason": final_chunk.get("finish_reason"),
+            "continuations": 0
+        }
+        max_continuations = int(os.getenv("TABLE_MAX_CONTINUATIONS", "3"))
+        while completion["finish_reason"] == "length" and completion["continuations"] < max_continuations:
+            part = await self._request_continuation(messages, completion["content"], selected_model)
+            stitched = self._stitch_continuation(completion["content"], part["content"])
+            if stitched.startswith(completion["content"]):
+                for table in parser.feed(stitched[len(completion["content"]):]):
+                    yield "table", table
+            completion.update({
+                "content": stitched,
+                "usage": _add_usage(completion["usage"], part["usage"]),
+                "finish_reason": part["finish_reason"],
+                "continuations": completion["continuations"] + 1
+            })
+        
+        # 전체 응답은 기존과 같은 방식으로 파싱하여 최종 결과로 전달
+        result = self._parse_and_clean_response(completion["content"], selected_model)
+        result.update(self._completion_info(completion))
+        yield "done", result
+    
+    def _image_extraction_cache_key(self, content_hash: str, selected_model: str, detail: str, lossless: bool) -> str:
+        """이미지 표 추출 결과의 캐시 키를 만듭니다."""
+        return make_cache_key(
+            content_hash,
+            task="table_extraction",
+            model=selected_model,
+            prompt=self._create_image_extraction_prompt(),
+            detail=detail,
+            lossless=lossless,
+            prompt_version=PROMPT_TEMPLATE_VERSION
+        )
+    
+    def _image_extraction_messages(self, image_content: bytes, file_extension: str, detail: str) -> List[Dict[str, Any]]:
+        """이미지 표 추출 요청 메시지를 구성합니다."""
+        # 이미지를 Base64로 인코딩
+        base64_image = base64.b64encode(image_content).decode('utf-8')
+        
+        return [
+            {
+                "role": "system",
+                "content": IMAGE_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": self._create_image_extraction_prompt()
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/{file_extension[1:]};base64,{base64_image}",
+                            "detail": detail  # 기본값 high: 고해상도 분석으로 표 구조 정확히 파악
+                        }
+                    }
+                ]
+            }
+        ]
+    
+    def _text_extraction_messages(self, prompt: str) -> List[Dict[str, Any]]:
+        """텍스트 표 추출 요청 메시지를 구성합니다."""
+        return [
+            {
+                "role": "system",
+                "content": TEXT_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def estimate_text_extraction(self, text: str, model: str = None) -> Dict[str, Any]:
+        """텍스트 표 추출 요청의 토큰과 비용을 API 호출 없이 추정합니다. (긴 텍스트는 청크별 요청의 합)"""
+        selected_model = model or self.model
+        chunks = self._chunk_text(text, selected_model)
+        if len(chunks) <= 1:
+            return estimate_text_request(
+                self._create_extraction_prompt(text),
+                selected_model,
+                EXTRACTION_MAX_TOKENS,
+                TEXT_SYSTEM_PROMPT
+            )
+        
+        return self._sum_estimates([
+            estimate_text_request(self._create_extraction_prompt(chunk["text"], chunk, len(chunks)), selected_model, EXTRACTION_MAX_TOKENS, TEXT_SYSTEM_PROMPT)
+            for chunk in chunks
+        ], selected_model)
+    
+    def _sum_estimates(self, estimates: List[Dict[str, Any]], selected_model: str) -> Dict[str, Any]:
+        """청크별 요청 추정치를 합칩니다."""
+        costs = [estimate["estimated_cost_usd"] for estimate in estimates]
+        return {
+            "model": selected_model,
+            "chunks": len(estimates),
+            "prompt_tokens": sum(estimate["prompt_tokens"] for estimate in estimates),
+            "image_tokens": sum(estimate.get("image_tokens", 0) for estimate in estimates),
+            "input_tokens": sum(estimate["input_tokens"] for estimate in estimates),
+            "max_output_tokens": sum(estimate["max_output_tokens"] for estimate in estimates),
+            "total_tokens": sum(estimate["total_tokens"] for estimate in estimates),
+            "estimated_cost_usd": round(sum(costs), 6) if None not in costs else None
+        }
+    
+    def estimate_image_extraction(self, image_content: bytes, model: str = None, detail: str = "high") -> Dict[str, Any]:
+        """이미지 표 추출 요청의 토큰과 비용을 API 호출 없이 추정합니다."""
+        return estimate_image_request(
+            image_content,
+            self._create_image_extraction_prompt(),
+            detail,
+            self._select_vision_model(model),
+            EXTRACTION_MAX_TOKENS,
+            IMAGE_SYSTEM_PROMPT
+        )
+    
+    def _select_vision_model(self, model: str = None) -> str:
+        """사용할 Vision 모델을 결정합니다. (Vision API 미지원 모델이면 gpt-4o)"""
+        selected_model = model or self.model
+        
+        # Vision API 지원 모델인지 확인
+        vision_models = ["gpt-4o", "gpt-4o-mini", "gpt-4-vision-preview"]
+        if selected_model not in vision_models:
+            print(f"경고: {selected_model}은 Vision API를 지원하지 않습니다. gpt-4o를 사용합니다.")
+            selected_model = "gpt-4o"
+        return selected_model
+    
+    def _create_extraction_prompt(self, text: str, chunk: Optional[Dict[str, Any]] = None, chunk_count: Optional[int] = 1) -> str:
+        """
+        텍스트에서 표 추출을 위한 프롬프트를 생성합니다.
+        
+        문서를 나눈 청크면 문서 내 위치를 함께 알립니다. (chunk_count가 None이면 전체 청크 수를 아직 모르는 경우)
+        """
+        chunk_note = ""
+        if chunk is not None and chunk_count != 1:
+            total = f"{chunk_count}개 " if chunk_count else ""
+            unit_name = _UNIT_NAMES.get(chunk.get("unit_kind"), "페이지")
+            chunk_note = (
+                f"\n이 텍스트는 긴 문서를 나눈 {total}구간 중 {chunk['index'] + 1}번째 구간"
+                f"({unit_name} {chunk['start_page']}-{chunk['end_page']})입니다. "
+                "구간의 처음이나 끝에서 잘린 표도 보이는 행까지 추출하고, 헤더가 보이지 않으면 headers를 빈 배열로 두세요.\n"
+            )
         prompt = f"""
 다음 텍스트에서 표를 찾아서 추출하고 정리해주세요.
-
+{chunk_note}
 텍스트:
-{text[:4000]}  # 텍스트가 너무 길면 처음 4000자만 사용
+{text}
 
 다음 형식으로 JSON 응답을 제공해주세요:
 
@@ -189,50 +1093,184 @@ class TableExtractor:
 """
         return prompt
     
-    async def _call_openai_api(self, prompt: str, model: str = None) -> str:
-        """OpenAI API를 호출합니다."""
+    async def _call_openai_api(self, prompt: str, model: str = None) -> Dict[str, Any]:
+        """OpenAI API를 호출하고 이어받기까지 합친 응답을 반환합니다."""
         try:
             # 사용할 모델 결정
             selected_model = model or self.model
             
-            response = self.client.chat.completions.create(
-                model=selected_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 문서에서 표를 정확하게 추출하고 정리하는 전문가입니다. JSON 형식을 엄격하게 지켜주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # 일관된 결과를 위해 낮은 temperature 사용
-                max_tokens=4000
-            )
-            
-            return response.choices[0].message.content
+            return await self._create_completion_with_continuation(self._text_extraction_messages(prompt), selected_model)
             
         except Exception as e:
             raise Exception(f"OpenAI API 호출 실패: {str(e)}")
     
+    async def _create_completion(self, messages: List[Dict[str, Any]], selected_model: str) -> Any:
+        """
+        표 추출 요청을 보냅니다. 모델이 지원하면 스키마를 강제한 JSON 출력을 요청합니다.
+        
+        모델이 json_schema를 거부하면 json_object로, 그것도 거부하면 response_format 없이 다시 요청합니다.
+        """
+        response_format = self._response_format(selected_model)
+        try:
+            return await create_chat_completion(
+                model=selected_model,
+                messages=messages,
+                temperature=0.1,  # 일관된 결과를 위해 낮은 temperature 사용
+                max_tokens=EXTRACTION_MAX_TOKENS,
+                **({"response_format": response_format} if response_format else {})
+            )
+        except openai.BadRequestError as e:
+            if not self._mark_response_format_unsupported(selected_model, response_format, e):
+                raise
+            return await self._create_completion(messages, selected_model)
+    
+    async def _create_completion_with_continuation(self, messages: List[Dict[str, Any]], selected_model: str) -> Dict[str, Any]:
+        """
+        표 추출 요청을 보내고, finish_reason이 length면 이어받기 요청으로 나머지 출력을 받아 이어붙입니다.
+        
+        Returns:
+            {"content": 이어붙인 전체 출력, "usage": 합산 사용량, "finish_reason": 마지막 종료 사유, "continuations": 이어받기 횟수}
+        """
+        response = await self._create_completion(messages, selected_model)
+        completion = {
+            "content": response.choices[0].message.content or "",
+            "usage": response.usage.model_dump() if response.usage else None,
+            "finish_reason": response.choices[0].finish_reason,
+            "continuations": 0
+        }
+        
+        max_continuations = int(os.getenv("TABLE_MAX_CONTINUATIONS", "3"))
+        while completion["finish_reason"] == "length" and completion["continuations"] < max_continuations:
+            part = await self._request_continuation(messages, completion["content"], selected_model)
+            completion["content"] = self._stitch_continuation(completion["content"], part["content"])
+            completion["usage"] = _add_usage(completion["usage"], part["usage"])
+            completion["finish_reason"] = part["finish_reason"]
+            completion["continuations"] += 1
+        
+        return completion
+    
+    async def _request_continuation(self, messages: List[Dict[str, Any]], partial_output: str, selected_model: str) -> Dict[str, Any]:
+        """잘린 출력을 assistant 메시지로 넘겨 나머지 부분을 요청합니다."""
+        print(f"표 추출 출력이 max_tokens({EXTRACTION_MAX_TOKENS})에서 잘려 이어받기를 요청합니다. (현재 {len(partial_output)}자)")
+        
+        # 이어받은 조각은 그 자체로 완결된 JSON이 아니므로 response_format 없이 요청
+        response = await create_chat_completion(
+            model=selected_model,
+            messages=messages + [
+                {"role": "assistant", "content": partial_output},
+                {"role": "user", "content": CONTINUATION_PROMPT}
+            ],
+            temperature=0.1,
+            max_tokens=EXTRACTION_MAX_TOKENS
+        )
+        return {
+            "content": response.choices[0].message.content or "",
+            "usage": response.usage.model_dump() if response.usage else None,
+            "finish_reason": response.choices[0].finish_reason
+        }
+    
+    def _stitch_continuation(self, previous: str, continuation: str) -> str:
+        """
+        이전 출력과 이어받은 출력을 합칩니다.
+        
+        - 이어받은 출력이 이전 출력의 끝부분을 반복하면 겹친 부분을 제거
+        - 모델이 JSON을 처음부터 다시 출력했으면 두 결과의 표를 table_id 기준으로 병합
+        """
+        if _RESTARTED_OUTPUT_PATTERN.match(continuation):
+            return json.dumps(self._merge_restarted_output(previous, continuation), ensure_ascii=False)
+        
+        # 이어받은 출력 앞의 코드 블록 시작 표시 제거
+        stripped = continuation.lstrip()
+        if stripped.startswith("```"):
+            continuation = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        
+        max_overlap = min(len(previous), len(continuation), CONTINUATION_MAX_OVERLAP)
+        for size in range(max_overlap, CONTINUATION_MIN_OVERLAP - 1, -1):
+            if previous.endswith(continuation[:size]):
+                return previous + continuation[size:]
+        return previous + continuation
+    
+    def _merge_restarted_output(self, previous: str, restarted: str) -> Dict[str, Any]:
+        """잘린 이전 출력과 처음부터 다시 시작한 출력의 표와 행을 병합합니다."""
+        try:
+            first, _ = parse_json_tolerant(previous)
+        except json.JSONDecodeError:
+            first = {}
+        second, _ = parse_json_tolerant(restarted)
+        if not isinstance(first, dict):
+            first = {}
+        if not isinstance(second, dict):
+            return first
+        
+        merged = {
+            "tables": [dict(table) for table in first.get("tables", []) if isinstance(table, dict)],
+            "markdown": second.get("markdown") or first.get("markdown", ""),
+            "summary": second.get("summary") or first.get("summary", "")
+        }
+        tables_by_id = {table.get("table_id"): table for table in merged["tables"]}
+        for table in second.get("tables", []):
+            if not isinstance(table, dict):
+                continue
+            existing = tables_by_id.get(table.get("table_id"))
+            if existing is None:
+                merged["tables"].append(table)
+                continue
+            # 다시 출력한 행 중 이미 받은 행은 건너뛰고 나머지만 이어붙임
+            existing_rows = existing.get("rows", [])
+            new_rows = table.get("rows", [])
+            # 이전 출력의 마지막 행은 잘려서 불완전할 수 있으므로 그 앞까지만 일치하면 새 출력으로 대체
+            if new_rows[:len(existing_rows) - 1] == existing_rows[:-1] and len(new_rows) >= len(existing_rows):
+                existing["rows"] = new_rows
+            else:
+                existing["rows"] = existing_rows + [row for row in new_rows if row not in existing_rows]
+        return merged
+    
+    def _completion_info(self, completion: Dict[str, Any]) -> Dict[str, Any]:
+        """결과에 붙일 사용량과 이어받기 정보를 만듭니다."""
+        return {
+            "usage": completion["usage"],
+            "continuations": completion["continuations"],
+            # 최대 이어받기 횟수를 넘겨서도 잘린 경우
+            "truncated": completion["finish_reason"] == "length"
+        }
+    
+    def _response_format(self, selected_model: str) -> Optional[Dict[str, Any]]:
+        """
+        TABLE_RESPONSE_FORMAT(json_schema, json_object, none)과 모델 지원 여부에 따라 response_format을 결정합니다.
+        """
+        mode = os.getenv("TABLE_RESPONSE_FORMAT", "json_schema").lower()
+        if mode == "json_schema" and (selected_model, "json_schema") not in _UNSUPPORTED_RESPONSE_FORMATS:
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "table_extraction",
+                    "strict": True,
+                    "schema": TABLE_RESPONSE_SCHEMA
+                }
+            }
+        if mode in ["json_schema", "json_object"] and (selected_model, "json_object") not in _UNSUPPORTED_RESPONSE_FORMATS:
+            return {"type": "json_object"}
+        return None
+    
+    def _mark_response_format_unsupported(self, selected_model: str, response_format: Optional[Dict[str, Any]], error: Exception) -> bool:
+        """response_format 때문에 거부된 요청이면 기록하고 True를 반환합니다. (다시 요청 가능)"""
+        if response_format is None or "response_format" not in str(error):
+            return False
+        print(f"경고: {selected_model}이 response_format({response_format['type']})을 지원하지 않아 낮은 형식으로 다시 요청합니다.")
+        _UNSUPPORTED_RESPONSE_FORMATS.add((selected_model, response_format["type"]))
+        return True
+    
     def _parse_and_clean_response(self, response: str, model: str = None) -> Dict[str, Any]:
         """GPT 응답을 파싱하고 정리합니다."""
         try:
             # 사용할 모델 결정
             selected_model = model or self.model
             
-            # JSON 부분 추출 (```json``` 블록이 있는 경우)
-            if "```json" in response:
-                start = response.find("```json") + 7
-                end = response.find("```", start)
-                json_str = response[start:end].strip()
-            else:
-                # JSON 블록이 없는 경우 전체 응답에서 JSON 찾기
-                json_str = response.strip()
-            
-            # JSON 파싱
-            parsed_data = json.loads(json_str)
+            # JSON 파싱 (코드 블록, 잘린 출력, 가벼운 문법 오류는 로컬에서 복구)
+            parsed_data, repaired = parse_json_tolerant(response)
+            if isinstance(parsed_data, list):
+                parsed_data = {"tables": parsed_data}
+            PARSE_STATS["repaired" if repaired else "parsed"] += 1
             
             # 응답 구조 검증 및 정리
             result = {
@@ -241,7 +1279,8 @@ class TableExtractor:
                 "markdown": parsed_data.get("markdown", ""),
                 "summary": parsed_data.get("summary", ""),
                 "table_count": len(parsed_data.get("tables", [])),
-                "extraction_method": f"OpenAI API ({selected_model})"
+                "extraction_method": f"OpenAI API ({selected_model})",
+                "json_repaired": repaired
             }
             
             # 표 데이터 검증
@@ -258,6 +1297,7 @@ class TableExtractor:
             return result
             
         except json.JSONDecodeError as e:
+            PARSE_STATS["failed"] += 1
             print(f"JSON 파싱 오류: {str(e)}")
             # JSON 파싱 실패 시 기본 응답 반환
             return {
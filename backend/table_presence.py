@@ -0,0 +1,116 @@
+import io
+import os
+import re
+from collections import Counter
+from typing import List
+import numpy as np
+from PIL import Image
+
+# 이 점수 미만인 페이지는 표가 없다고 보고 API 호출을 생략
+DEFAULT_THRESHOLD = 0.25
+# 이미지 분석 시 축소할 최대 너비 (투영 프로파일에는 이 정도 해상도로 충분)
+IMAGE_ANALYSIS_WIDTH = 600
+
+_NUMBER_PATTERN = re.compile(r"^[-+(]?[$₩€¥]?\d[\d,.]*%?[)]?$")
+_COLUMN_GAP_PATTERN = re.compile(r"\t| {2,}| ?\| ?")
+_SENTENCE_END_PATTERN = re.compile(r"[.!?。]$|[다요죠]\.?$")
+
+
+def filter_enabled() -> bool:
+    """표 존재 사전 필터 사용 여부 (TABLE_PRESENCE_FILTER)"""
+    return os.getenv("TABLE_PRESENCE_FILTER", "true").lower() == "true"
+
+
+def presence_threshold() -> float:
+    """표가 있다고 볼 최소 점수 (TABLE_PRESENCE_THRESHOLD, 낮출수록 보수적으로 API를 호출)"""
+    return float(os.getenv("TABLE_PRESENCE_THRESHOLD", str(DEFAULT_THRESHOLD)))
+
+
+def text_table_score(text: str) -> float:
+    """
+    텍스트 페이지에 표가 있을 가능성을 0~1 점수로 추정합니다.
+
+    - 열 간격: 탭/두 칸 이상 공백/파이프로 나뉜 줄의 비율과, 그 간격 위치가 여러 줄에서 반복되는 정도
+    - 숫자 밀도: 숫자 토큰 비율 (표는 숫자 셀이 많음)
+    - 줄 구조: 짧은 줄의 비율과 줄마다 토큰 수가 같은 정도
+    - 문장 줄(30자 이상 + 문장 부호로 끝남)의 비율만큼 감점
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if len(lines) < 2:
+        return 0.0
+
+    gap_positions = Counter()
+    gapped_lines = 0
+    for line in lines:
+        matches = list(_COLUMN_GAP_PATTERN.finditer(line.strip()))
+        if matches:
+            gapped_lines += 1
+            # 글꼴 폭 차이를 감안해 4글자 단위로 묶은 간격 위치
+            gap_positions.update({match.start() // 4 for match in matches})
+    recurring = sum(count for count in gap_positions.values() if count >= max(2, len(lines) * 0.3))
+    alignment = recurring / max(1, sum(gap_positions.values()))
+    gap_score = gapped_lines / len(lines) * (0.5 + 0.5 * alignment)
+
+    tokens = [token for line in lines for token in line.split()]
+    numeric_ratio = sum(1 for token in tokens if _NUMBER_PATTERN.match(token)) / max(1, len(tokens))
+
+    token_counts = [len(line.split()) for line in lines]
+    short_ratio = sum(1 for count in token_counts if count <= 8) / len(lines)
+    multi_token = [count for count in token_counts if count >= 2]
+    # 토큰 수가 같은 줄이 세 줄 이상이어야 열 구조로 봄
+    consistency = Counter(multi_token).most_common(1)[0][1] / len(multi_token) if len(multi_token) >= 3 else 0.0
+    structure_score = 0.5 * short_ratio * consistency + 0.5 * min(1.0, numeric_ratio * 2.5)
+
+    prose_ratio = sum(1 for line in lines if len(line) >= 30 and _SENTENCE_END_PATTERN.search(line)) / len(lines)
+    return round(max(0.0, min(1.0, max(gap_score, structure_score) * (1 - 0.6 * prose_ratio))), 3)
+
+
+def image_table_score(image_content: bytes) -> float:
+    """
+    페이지 이미지에 표가 있을 가능성을 투영 프로파일로 0~1 점수로 추정합니다.
+
+    - 괘선: 행/열 방향으로 잉크가 길게 이어진 얇은 띠의 개수
+    - 열 간격: 글자 영역 안에서 위아래로 비어 있는 세로 띠(열 사이 여백)의 개수
+    """
+    image = Image.open(io.BytesIO(image_content))
+    image.draft("L", (IMAGE_ANALYSIS_WIDTH, IMAGE_ANALYSIS_WIDTH * 2))
+    image = image.convert("L")
+    if image.width > IMAGE_ANALYSIS_WIDTH:
+        image = image.resize((IMAGE_ANALYSIS_WIDTH, max(1, round(image.height * IMAGE_ANALYSIS_WIDTH / image.width))))
+    ink = np.asarray(image) < 160
+    if ink.sum() < ink.size * 0.0005:
+        return 0.0
+
+    rows = np.flatnonzero(ink.any(axis=1))
+    columns = np.flatnonzero(ink.any(axis=0))
+    content = ink[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+    height, width = content.shape
+
+    horizontal_rules = _thin_runs(content.mean(axis=1) >= 0.4, max(2, height // 100))
+    vertical_rules = _thin_runs(content.mean(axis=0) >= 0.3, max(2, width // 100))
+    if horizontal_rules >= 2 and vertical_rules >= 2:
+        ruled_score = 1.0
+    else:
+        ruled_score = min(1.0, horizontal_rules / 4)
+
+    # 열 사이 여백: 글자 줄이 있는 행만 보고 잉크가 전혀 없는 세로 띠 (너비의 1.5% 이상)
+    text_rows = content[content.mean(axis=1) < 0.4]
+    gutters = 0
+    if len(text_rows):
+        blank_columns = ~text_rows.any(axis=0)
+        gutters = sum(1 for start, end in _runs(blank_columns) if end - start >= width * 0.015)
+    gutter_score = 0.0 if gutters < 2 else min(1.0, 0.3 * gutters)
+
+    return round(max(ruled_score, gutter_score), 3)
+
+
+def _runs(mask: np.ndarray) -> List[tuple]:
+    """True가 이어지는 구간 (start, end) 목록"""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(changes[::2], changes[1::2]))
+
+
+def _thin_runs(mask: np.ndarray, max_thickness: int) -> int:
+    """두께가 max_thickness 이하인 True 구간 수 (선), 두꺼운 구간(채워진 영역)은 제외"""
+    return sum(1 for start, end in _runs(mask) if end - start <= max_thickness)
@@ -0,0 +1,270 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from result_cache import hash_content
+
+# 처리 중인 작업이 이 시간(초) 동안 임대 갱신이 없으면 다른 워커가 다시 가져감
+DEFAULT_VISIBILITY_TIMEOUT = 600
+# 이 횟수만큼 가져갔는데도 끝나지 않은 작업은 실패 처리 (처리 중 프로세스를 죽이는 작업 방지)
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL UNIQUE,
+    task_type TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    filename TEXT,
+    task_info TEXT NOT NULL,
+    visible_at REAL NOT NULL,
+    lease_owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_visible ON tasks (visible_at, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner ON tasks (lease_owner);
+CREATE INDEX IF NOT EXISTS idx_tasks_payload ON tasks (payload_hash);
+"""
+
+
+def visibility_timeout() -> float:
+    """작업 임대 시간 (BACKGROUND_VISIBILITY_TIMEOUT, 초)"""
+    return float(os.getenv("BACKGROUND_VISIBILITY_TIMEOUT", str(DEFAULT_VISIBILITY_TIMEOUT)))
+
+
+def max_attempts() -> int:
+    """작업당 최대 시도 횟수 (BACKGROUND_MAX_ATTEMPTS)"""
+    return int(os.getenv("BACKGROUND_MAX_ATTEMPTS", str(DEFAULT_MAX_ATTEMPTS)))
+
+
+class PayloadStore:
+    """작업 파일 바이트를 콘텐츠 해시 이름으로 저장하는 디렉토리 (같은 파일은 한 번만 저장)"""
+
+    def __init__(self, payload_dir: Path):
+        self.payload_dir = payload_dir
+        self.payload_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, payload_hash: str) -> Path:
+        """해시 앞 두 글자로 디렉토리를 나눈 파일 경로"""
+        return self.payload_dir / payload_hash[:2] / payload_hash
+
+    def write(self, file_content: bytes) -> str:
+        """같은 해시의 파일이 없을 때만 원자적으로 저장하고 해시를 반환합니다."""
+        payload_hash = hash_content(file_content)
+        path = self.path(payload_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{payload_hash}.{uuid.uuid4().hex[:8]}.tmp")
+            temp_path.write_bytes(file_content)
+            os.replace(temp_path, path)
+        return payload_hash
+
+    def read(self, payload_hash: str) -> Optional[bytes]:
+        """저장된 파일 바이트를 읽습니다. (없으면 None)"""
+        try:
+            return self.path(payload_hash).read_bytes()
+        except FileNotFoundError:
+            print(f"큐 작업 파일이 없습니다: {payload_hash}")
+            return None
+
+    def delete(self, payload_hash: str):
+        """저장된 파일을 지웁니다."""
+        try:
+            self.path(payload_hash).unlink()
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self, max_age_seconds: float) -> int:
+        """max_age_seconds보다 오래된 파일을 지우고 지운 개수를 반환합니다."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for path in self.payload_dir.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class TaskQueue:
+    """
+    재시작해도 대기 중인 작업이 남는 SQLite(WAL) 기반 작업 큐
+
+    - 파일 바이트는 DB가 아니라 payload_dir에 콘텐츠 해시 이름으로 저장합니다. (같은 파일은 한 번만 저장)
+    - 가져간 작업은 visible_at을 임대 만료 시각으로 미뤄 두고, 만료되면 다시 가져갈 수 있게 됩니다.
+      처리 중에는 extend_leases로 주기적으로 임대를 갱신합니다.
+    - 완료/실패한 작업은 ack로 행을 지우고, 더 이상 참조되지 않는 파일도 지웁니다.
+    """
+
+    def __init__(self, db_path: Path, payload_dir: Optional[Path] = None):
+        self.db_path = db_path
+        self.payloads = PayloadStore(payload_dir or db_path.parent / "payloads")
+        self.payload_dir = self.payloads.payload_dir
+        # 같은 호스트의 다른 프로세스와 구분되는 임대 소유자 ID
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL이어도 커밋된 트랜잭션이 프로세스 종료로 사라지지 않음 (전원 장애 시 마지막 몇 개만 유실 가능)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, task_id: str, task_type: str, file_content: bytes, task_info: Dict[str, Any], filename: str = "", leased: bool = False):
+        """
+        작업을 큐에 추가합니다. 파일 바이트는 해시 이름의 파일로 저장합니다.
+
+        Args:
+            leased: True면 이 프로세스가 임대한 상태로 추가 (다른 작업의 결과를 기다리는 합류 작업)
+        """
+        payload_hash = self.payloads.write(file_content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO tasks (task_id, task_type, payload_hash, filename, task_info, visible_at, lease_owner, enqueued_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (task_id, task_type, payload_hash, filename, json.dumps(task_info, ensure_ascii=False),
+                 now + visibility_timeout() if leased else now, self.owner if leased else None, now)
+            )
+        # 행을 넣기 전에 다른 작업의 ack가 같은 파일을 지웠을 수 있음
+        self.payloads.write(file_content)
+
+    def dequeue(self, task_types: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        가져갈 수 있는 가장 오래된 작업을 임대합니다.
+
+        Args:
+            task_types: 이 유형의 작업만 가져옴 (None이면 모든 유형)
+
+        Returns:
+            {"task_id", "type", "file_content", "task_info", "filename", "attempts"} 또는 없으면 None
+            (파일이 없어졌으면 file_content는 None)
+        """
+        if task_types is not None and not task_types:
+            return None
+        type_filter = f" AND task_type IN ({', '.join('?' * len(task_types))})" if task_types else ""
+        while True:
+            now = time.time()
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT seq, task_id, task_type, payload_hash, filename, task_info, attempts FROM tasks "
+                    f"WHERE visible_at <= ?{type_filter} ORDER BY visible_at, seq LIMIT 1",
+                    (now, *(task_types or []))
+                ).fetchone()
+                if row is None:
+                    return None
+                # 다른 프로세스가 먼저 가져갔으면 다음 작업을 다시 찾음
+                claimed = self._conn.execute(
+                    "UPDATE tasks SET visible_at = ?, lease_owner = ?, attempts = attempts + 1 WHERE seq = ? AND visible_at <= ?",
+                    (now + visibility_timeout(), self.owner, row[0], now)
+                ).rowcount
+            if claimed:
+                break
+
+        _, task_id, task_type, payload_hash, filename, task_info, attempts = row
+        return {
+            "task_id": task_id,
+            "type": task_type,
+            "file_content": self.payloads.read(payload_hash),
+            "task_info": json.loads(task_info),
+            "filename": filename,
+            "attempts": attempts + 1
+        }
+
+    def ack(self, task_id: str):
+        """끝난 작업을 큐에서 지웁니다. 다른 작업이 쓰지 않는 파일도 함께 지웁니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload_hash FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+            in_use = self._conn.execute("SELECT 1 FROM tasks WHERE payload_hash = ? LIMIT 1", (row[0],)).fetchone()
+            if not in_use:
+                self.payloads.delete(row[0])
+
+    def release(self, task_id: str):
+        """임대 중인 작업 하나를 바로 다시 가져갈 수 있게 돌려놓습니다. (대표 작업이 취소된 합류 작업)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET visible_at = ?, lease_owner = NULL, attempts = 0 WHERE task_id = ?",
+                (time.time(), task_id)
+            )
+
+    def return_lease(self, task_id: str):
+        """가져갔지만 처리를 시작하지 않은 작업을 시도 횟수를 되돌려 바로 다시 가져갈 수 있게 돌려놓습니다."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET visible_at = ?, lease_owner = NULL, attempts = MAX(0, attempts - 1) WHERE task_id = ? AND lease_owner = ?",
+                (time.time(), task_id, self.owner)
+            )
+
+    def extend_leases(self) -> int:
+        """이 프로세스가 임대 중인 모든 작업의 임대를 연장합니다."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE tasks SET visible_at = ? WHERE lease_owner = ? AND visible_at > ?",
+                (time.time() + visibility_timeout(), self.owner, time.time())
+            ).rowcount
+
+    def release_leases(self) -> int:
+        """이 프로세스가 임대 중인 작업을 바로 다시 가져갈 수 있게 돌려놓습니다. (정상 종료 시, 시도 횟수도 되돌림)"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE tasks SET visible_at = ?, lease_owner = NULL, attempts = MAX(attempts - 1, 0) WHERE lease_owner = ?",
+                (time.time(), self.owner)
+            ).rowcount
+
+    def requeue_unfinished(self) -> List[Dict[str, Any]]:
+        """
+        시작할 때 호출합니다. 같은 호스트에서 이미 종료된 프로세스가 임대하고 있던 작업을
+        임대 만료를 기다리지 않고 바로 다시 가져갈 수 있게 돌려놓습니다.
+
+        Returns:
+            임대되지 않은 작업의 {"task_id", "type", "task_info", "filename"} 목록 (추가된 순서, 다른 프로세스가 처리 중인 작업 제외)
+        """
+        hostname = socket.gethostname()
+        now = time.time()
+        with self._lock:
+            owners = [row[0] for row in self._conn.execute("SELECT DISTINCT lease_owner FROM tasks WHERE lease_owner IS NOT NULL")]
+            for owner in owners:
+                host, pid, _ = owner.rsplit(":", 2)
+                if owner != self.owner and host == hostname and not _process_alive(int(pid)):
+                    self._conn.execute("UPDATE tasks SET visible_at = ?, lease_owner = NULL WHERE lease_owner = ?", (now, owner))
+            rows = self._conn.execute("SELECT task_id, task_type, task_info, filename FROM tasks WHERE lease_owner IS NULL ORDER BY seq").fetchall()
+        return [
+            {"task_id": task_id, "type": task_type, "task_info": json.loads(task_info), "filename": filename}
+            for task_id, task_type, task_info, filename in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """대기/임대 중인 작업 수"""
+        now = time.time()
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM tasks WHERE visible_at <= ?", (now,)).fetchone()[0]
+            leased = self._conn.execute("SELECT COUNT(*) FROM tasks WHERE visible_at > ?", (now,)).fetchone()[0]
+        return {"queued": queued, "leased": leased, "db_path": str(self.db_path)}
+
+    def close(self):
+        """DB 연결을 닫습니다."""
+        with self._lock:
+            self._conn.close()
+
+
+def _process_alive(pid: int) -> bool:
+    """같은 호스트에서 pid 프로세스가 살아 있는지 확인합니다. (현재 프로세스면 이전 큐 인스턴스이므로 False)"""
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
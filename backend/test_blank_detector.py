@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+빈 페이지/거의 빈 이미지 감지(Vision 호출 생략) 테스트 스크립트
+"""
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
+from PIL import Image, ImageDraw
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from blank_detector import blank_stats, detect_blank, perceptual_hash, record_saved_tokens
+from table_extractor import TableExtractor
+
+def _encode(image: Image.Image, image_format: str = "PNG") -> bytes:
+    """이미지를 바이트로 인코딩합니다."""
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+def _scanned_blank() -> Image.Image:
+    """스캐너 잡음, 먼지 몇 점, 쪽번호만 있는 간지 이미지를 만듭니다."""
+    random = np.random.default_rng(0)
+    image = Image.fromarray(np.clip(random.normal(245, 2, (3300, 2550)), 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(image)
+    for _ in range(30):
+        draw.point((int(random.integers(2550)), int(random.integers(3300))), fill=0)
+    draw.text((1270, 3200), "3", fill=0)
+    return image
+
+def _text_page() -> Image.Image:
+    """가는 글씨 몇 줄만 있는 페이지 이미지를 만듭니다."""
+    image = Image.new("L", (2550, 3300), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(5):
+        draw.text((300, 300 + line * 40), "Region  Sales  Cost  2024", fill=0)
+    return image
+
+def test_blank_and_near_blank_pages_are_detected():
+    """단색 이미지와 잡음/쪽번호만 있는 스캔은 빈 페이지, 글씨가 있으면 빈 페이지가 아닌지 확인합니다."""
+    assert detect_blank(_encode(Image.new("RGB", (800, 600), "white")))["reason"] == "variance"
+    assert detect_blank(_encode(_scanned_blank(), "JPEG")) is not None
+    assert detect_blank(_encode(_scanned_blank())) is not None
+    # 축소해도 가는 글자 획이 사라지지 않아야 함
+    assert detect_blank(_encode(_text_page())) is None
+    assert detect_blank(_encode(_text_page(), "JPEG")) is None
+    assert detect_blank(b"not an image") is None
+
+def test_known_blank_hash():
+    """BLANK_KNOWN_HASHES에 등록한 간지(로고만 있는 페이지)와 비슷한 이미지를 빈 페이지로 보는지 확인합니다."""
+    separator = Image.new("L", (1700, 2200), 255)
+    draw = ImageDraw.Draw(separator)
+    draw.ellipse((250, 300, 750, 800), fill=0)
+    draw.rectangle((300, 1500, 1500, 1650), fill=80)
+    draw.polygon([(1100, 400), (1500, 1000), (900, 1100)], fill=40)
+    scanned_again = separator.rotate(0.3, fillcolor=255)
+
+    os.environ["BLANK_KNOWN_HASHES"] = perceptual_hash(_encode(separator))
+    try:
+        assert detect_blank(_encode(scanned_again, "JPEG"))["reason"] == "known_hash"
+        assert detect_blank(_encode(_text_page())) is None
+    finally:
+        del os.environ["BLANK_KNOWN_HASHES"]
+    assert detect_blank(_encode(scanned_again)) is None
+
+def test_blank_image_skips_vision_call(mock_openai):
+    """빈 이미지는 API를 호출하지 않고 빈 결과를 반환하며 지표에 기록되는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        mock_openai(handler)
+        extractor = TableExtractor()
+        image = _encode(Image.new("RGB", (1700, 2200), "white"))
+        result = await extractor.extract_tables_from_image(image, ".png", "gpt-4o")
+        events = [event async for event in extractor.stream_tables_from_image(image, ".png", "gpt-4o")]
+        return result, events
+
+    saved_tokens = blank_stats()["saved_tokens"]
+    result, events = asyncio.run(run())
+
+    assert requests == []
+    assert result["success"] is True and result["tables"] == []
+    assert result["blank"]["reason"] == "variance"
+    assert events[0][0] == "done" and events[0][1]["blank"] is not None
+    assert blank_stats()["saved_tokens"] > saved_tokens
+
+def test_detection_can_be_disabled():
+    """BLANK_DETECTION_ENABLED=false면 감지하지 않는지 확인합니다."""
+    os.environ["BLANK_DETECTION_ENABLED"] = "false"
+    try:
+        assert detect_blank(_encode(Image.new("RGB", (800, 600), "white"))) is None
+    finally:
+        del os.environ["BLANK_DETECTION_ENABLED"]
+
+def test_stats_updates_from_threads_are_not_lost():
+    """여러 스레드에서 동시에 갱신해도 빈 페이지 지표가 빠짐없이 더해지는지 확인합니다."""
+    before = blank_stats()
+    blank = _encode(Image.new("RGB", (64, 64), "white"))
+
+    def work(_):
+        for _ in range(200):
+            record_saved_tokens({"total_tokens": 1})
+        return detect_blank(blank)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(work, range(16)))
+
+    after = blank_stats()
+    assert all(result["reason"] == "variance" for result in results)
+    assert after["saved_tokens"] - before["saved_tokens"] == 16 * 200
+    assert after["checked"] - before["checked"] == 16
+    assert after["blank"] - before["blank"] == 16
+
+if __name__ == "__main__":
+    print("🚀 빈 페이지 감지 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
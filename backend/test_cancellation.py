@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+백그라운드 작업 취소(큐 제거, 처리 중인 작업과 OpenAI 요청 중단) 테스트 스크립트
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from pathlib import Path
+import httpx
+from celery.contrib.testing.worker import start_worker
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from background_processor import BackgroundProcessor, celery_app
+
+class _HangingApi:
+    """처음 hang_count개 요청은 응답하지 않고 기다리며, 요청이 끊기면 기록하는 가짜 API"""
+
+    def __init__(self, completion, hang_count: int = 1):
+        self.completion = completion
+        self.hang_count = hang_count
+        self.requests = 0
+        self.cancelled = 0
+        self.started = threading.Event()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.requests <= self.hang_count:
+            self.started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return httpx.Response(200, json=self.completion("이미지 설명"))
+
+async def _wait_until(condition, timeout: float = 5.0):
+    """조건이 참이 될 때까지 기다립니다."""
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return
+        await asyncio.sleep(0.05)
+
+def test_cancel_pending_task_removes_queue_item(numbered_image):
+    """대기 중인 작업을 취소하면 큐와 작업 파일에서 지워지는지 확인합니다."""
+    async def run():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            processor = BackgroundProcessor(Path(temp_dir), max_workers=1)
+            task_id = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png")
+            cancelled = await processor.cancel_task(task_id)
+            again = await processor.cancel_task(task_id)
+            return cancelled, again, processor.queue.stats(), list(processor.payloads.payload_dir.glob("*/*")), processor.tasks[task_id]
+
+    cancelled, again, stats, payloads, task = asyncio.run(run())
+
+    assert cancelled is True and again is False
+    assert stats["queued"] == 0 and stats["leased"] == 0
+    assert payloads == []
+    assert task["status"] == "cancelled"
+
+def test_cancel_running_task_aborts_openai_request(mock_openai, completion, fresh_services, numbered_image):
+    """처리 중인 작업을 취소하면 진행 중인 요청이 끊기고 상태가 다시 덮어써지지 않는지 확인합니다."""
+    api = _HangingApi(completion)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            processor = BackgroundProcessor(Path(temp_dir), max_workers=1)
+            await processor.start()
+            task_id = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png")
+            await _wait_until(api.started.is_set)
+            assert await processor.cancel_task(task_id) is True
+            await _wait_until(lambda: not processor.running_tasks and processor.busy_workers == 0)
+            await asyncio.sleep(0.2)
+            result = processor.tasks[task_id], processor.queue.stats(), processor.worker_stats()
+            await processor.stop()
+        return result
+
+    task, stats, worker_stats = asyncio.run(run())
+
+    assert api.cancelled == 1
+    assert task["status"] == "cancelled" and "result" not in task
+    assert stats["queued"] == 0 and stats["leased"] == 0
+    assert worker_stats["type_limits"]["image_analysis"]["active"] == 0
+
+def test_response_during_cancel_does_not_complete_task(mock_openai, completion, fresh_services, numbered_image):
+    """취소 상태를 저장하는 사이에 API 응답이 와도 작업이 완료로 바뀌거나 완료 알림이 나가지 않는지 확인합니다."""
+    started = threading.Event()
+    respond = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started.set()
+        await respond.wait()
+        return httpx.Response(200, json=completion("이미지 설명"))
+
+    async def run(results_dir: Path):
+        mock_openai(handler)
+        processor = BackgroundProcessor(results_dir, max_workers=1)
+        notified = []
+        save_task_status = processor._save_task_status
+        notify_callback = processor._notify_callback
+
+        async def slow_save(task_id, task_info):
+            if task_info["status"] == "cancelled" and not respond.is_set():
+                # 취소 상태를 저장하는 동안 응답이 도착해 처리 작업이 먼저 실행될 기회를 줌
+                respond.set()
+                await asyncio.sleep(0.2)
+            await save_task_status(task_id, task_info)
+
+        def record_callback(task_id, task_info):
+            notified.append(task_info["status"])
+            notify_callback(task_id, task_info)
+
+        processor._save_task_status = slow_save
+        processor._notify_callback = record_callback
+        await processor.start()
+        task_id = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png")
+        await _wait_until(started.is_set)
+        assert await processor.cancel_task(task_id) is True
+        await _wait_until(lambda: not processor.running_tasks)
+        await asyncio.sleep(0.2)
+        task = await processor.get_task_status(task_id)
+        await processor.stop()
+        return task, notified
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        task, notified = asyncio.run(run(Path(temp_dir)))
+        result_files = list(Path(temp_dir).glob("background_analysis_*.json"))
+
+    assert task["status"] == "cancelled" and "result" not in task
+    assert result_files == []
+    assert notified == ["cancelled"]
+
+def test_cancelled_leader_hands_over_to_follower(mock_openai, completion, fresh_services, numbered_image):
+    """대표 작업을 취소해도 같은 파일로 합류한 작업은 다시 처리되어 완료되는지 확인합니다."""
+    api = _HangingApi(completion)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            processor = BackgroundProcessor(Path(temp_dir), max_workers=1)
+            await processor.start()
+            leader = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png")
+            follower = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png")
+            await _wait_until(api.started.is_set)
+            await processor.cancel_task(leader)
+            await _wait_until(lambda: processor.tasks[follower]["status"] == "completed")
+            result = processor.tasks[leader], processor.tasks[follower]
+            await processor.stop()
+        return result
+
+    leader, follower = asyncio.run(run())
+
+    assert leader["status"] == "cancelled"
+    assert follower["status"] == "completed" and "coalesced_with" not in follower
+    assert api.cancelled == 1 and api.requests == 2
+
+def test_cancel_running_celery_task(mock_openai, completion, fresh_services, numbered_image, memory_broker):
+    """Celery 워커에서 처리 중인 작업도 취소 표시를 보고 요청을 끊는지 확인합니다."""
+    api = _HangingApi(completion)
+
+    async def run(producer: BackgroundProcessor):
+        task_id = await producer.submit_image_analysis_task(numbered_image(1), "image_1.png")
+        await asyncio.to_thread(api.started.wait, 5)
+        assert await producer.cancel_task(task_id) is True
+        await _wait_until(lambda: api.cancelled == 1)
+        await asyncio.sleep(0.3)
+        return await producer.get_task_status(task_id)
+
+    os.environ["BACKGROUND_CANCEL_POLL_INTERVAL"] = "0.05"
+    mock_openai(api.handler)
+    try:
+        with start_worker(celery_app, pool="solo", perform_ping_check=False):
+            task = asyncio.run(run(BackgroundProcessor(memory_broker, backend="celery")))
+    finally:
+        del os.environ["BACKGROUND_CANCEL_POLL_INTERVAL"]
+
+    assert api.cancelled == 1
+    assert task["status"] == "cancelled" and "result" not in task
+
+if __name__ == "__main__":
+    print("🚀 백그라운드 작업 취소 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Celery 백엔드(브로커를 통한 별도 워커, 공유 결과 디렉토리) 테스트 스크립트
+
+Redis 대신 kombu의 프로세스 내 메모리 브로커와 같은 프로세스에서 도는 Celery 워커를 사용합니다.
+"""
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+import httpx
+from celery.contrib.testing.worker import start_worker
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from background_processor import BackgroundProcessor, celery_app
+
+async def _wait_for(processor: BackgroundProcessor, task_ids: list) -> list:
+    """모든 작업이 끝날 때까지 상태 파일을 조회합니다."""
+    for _ in range(200):
+        tasks = [await processor.get_task_status(task_id) for task_id in task_ids]
+        if all(task["status"] in ("completed", "failed") for task in tasks):
+            return tasks
+        await asyncio.sleep(0.05)
+    return tasks
+
+def test_worker_processes_tasks_from_broker(mock_openai, completion, fresh_services, numbered_image, memory_broker):
+    """API 쪽 프로세서는 작업을 브로커로 보내기만 하고, 워커가 처리한 결과를 공유 디렉토리에서 읽는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=completion("이미지 설명"))
+
+    async def submit(producer: BackgroundProcessor):
+        await producer.start()
+        first = await producer.submit_image_analysis_task(numbered_image(1), "image_1.png")
+        duplicate = await producer.submit_image_analysis_task(numbered_image(1), "image_1.png")
+        second = await producer.submit_image_analysis_task(numbered_image(2), "image_2.png")
+        # API 프로세스에는 처리 중인 워커가 없음
+        assert producer.worker_stats()["running_workers"] == 0
+        return [first, duplicate, second]
+
+    async def read(reader: BackgroundProcessor, task_ids: list):
+        tasks = await _wait_for(reader, task_ids)
+        listed = await reader.get_all_tasks()
+        return tasks, listed
+
+    mock_openai(handler)
+    with start_worker(celery_app, pool="solo", perform_ping_check=False):
+        task_ids = asyncio.run(submit(BackgroundProcessor(memory_broker, backend="celery")))
+        # 작업을 제출하지 않은 다른 API 인스턴스에서도 상태를 조회할 수 있음
+        tasks, listed = asyncio.run(read(BackgroundProcessor(memory_broker, backend="celery"), task_ids))
+
+    assert [task["status"] for task in tasks] == ["completed", "completed", "completed"]
+    assert tasks[1]["coalesced_with"] == task_ids[0]
+    assert tasks[1]["result"] == tasks[0]["result"]
+    assert len(requests) == 2
+    assert {task["task_id"] for task in listed} == set(task_ids)
+
+def test_redelivered_finished_task_is_skipped(mock_openai, completion, fresh_services, numbered_image):
+    """이미 끝난(또는 취소된) 작업이 다시 전달되면 처리하지 않는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=completion("이미지 설명"))
+
+    async def run(results_dir: Path):
+        producer = BackgroundProcessor(results_dir, backend="celery")
+        payload_hash = producer.payloads.write(numbered_image(3))
+        task_info = {"task_id": "cancelled-task", "status": "cancelled", "prompt": "설명", "detail": "auto"}
+        await producer._save_task_status("cancelled-task", task_info)
+        worker = BackgroundProcessor(results_dir, backend="celery")
+        await worker.run_shared_task("cancelled-task", "image_analysis", payload_hash, dict(task_info, status="pending"), "image_3.png")
+        return await producer.get_task_status("cancelled-task")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mock_openai(handler)
+        task = asyncio.run(run(Path(temp_dir)))
+
+    assert requests == []
+    assert task["status"] == "cancelled"
+
+def test_celery_backend_rejects_local_resize():
+    """Celery 백엔드에서 API 프로세스의 워커 수를 바꾸려 하면 거부되는지 확인합니다."""
+    async def run():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            processor = BackgroundProcessor(Path(temp_dir), backend="celery")
+            try:
+                await processor.resize(max_workers=8)
+            except ValueError:
+                return True
+            return False
+
+    assert asyncio.run(run()) is True
+
+if __name__ == "__main__":
+    print("🚀 Celery 백엔드 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
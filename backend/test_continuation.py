@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+max_tokens에서 잘린 표 추출 출력 이어받기 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from table_extractor import TableExtractor
+
+FULL_OUTPUT = json.dumps({
+    "tables": [
+        {
+            "table_id": "table_1",
+            "title": "분기별 재무제표",
+            "headers": ["분기", "매출", "영업이익"],
+            "rows": [[f"{year}-Q{quarter}", str(year * quarter), str(quarter)] for year in range(2000, 2010) for quarter in range(1, 5)],
+            "row_count": 40,
+            "column_count": 3
+        }
+    ],
+    "markdown": "| 분기 | 매출 | 영업이익 |",
+    "summary": "재무제표 1개"
+}, ensure_ascii=False)
+
+def test_stitch_removes_repeated_overlap():
+    """이어받은 출력이 이전 출력의 끝을 반복하면 겹친 부분이 제거되는지 확인합니다."""
+    extractor = TableExtractor()
+    previous = FULL_OUTPUT[:300]
+    # 모델이 마지막 40자를 반복하면서 이어서 출력한 경우
+    continuation = FULL_OUTPUT[260:]
+    assert extractor._stitch_continuation(previous, continuation) == FULL_OUTPUT
+    # 겹침 없이 정확히 이어서 출력한 경우
+    assert extractor._stitch_continuation(previous, "```json\n" + FULL_OUTPUT[300:]) == FULL_OUTPUT
+
+def test_restarted_output_is_merged():
+    """모델이 JSON을 처음부터 다시 출력하면 표의 행이 병합되는지 확인합니다."""
+    extractor = TableExtractor()
+    previous = '{"tables": [{"table_id": "table_1", "rows": [["a", "1"], ["b", "2"], ["c"'
+    restarted = '{"tables": [{"table_id": "table_1", "rows": [["a", "1"], ["b", "2"], ["c", "3"], ["d", "4"]]}], "markdown": "", "summary": "표 1개"}'
+    merged = json.loads(extractor._stitch_continuation(previous, restarted))
+    assert merged["tables"][0]["rows"] == [["a", "1"], ["b", "2"], ["c", "3"], ["d", "4"]]
+    assert merged["summary"] == "표 1개"
+
+def test_length_finish_triggers_continuation(mock_openai, completion):
+    """finish_reason이 length면 이어받기 요청을 보내고 완전한 결과를 만드는지 확인합니다."""
+    cut = len(FULL_OUTPUT) // 2
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if len(requests) == 1:
+            return httpx.Response(200, json=completion(FULL_OUTPUT[:cut], "length", 4100))
+        # 이어받기: 끝의 20자를 반복하면서 나머지 출력
+        return httpx.Response(200, json=completion(FULL_OUTPUT[cut - 20:], "stop", 6000))
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_tables_with_gpt5("분기별 재무제표 텍스트", "gpt-4o")
+        return result
+
+    result = asyncio.run(run())
+    assert result["success"] is True
+    assert result["json_repaired"] is False
+    assert result["continuations"] == 1
+    assert result["truncated"] is False
+    assert len(result["tables"][0]["rows"]) == 40
+    assert result["usage"]["total_tokens"] == 10100
+
+    # 이어받기 요청은 잘린 출력을 assistant 메시지로 포함하고 response_format을 쓰지 않음
+    continuation_request = requests[1]
+    assert continuation_request["messages"][-2] == {"role": "assistant", "content": FULL_OUTPUT[:cut]}
+    assert "response_format" not in continuation_request
+
+def test_continuation_limit(mock_openai, completion):
+    """이어받기 최대 횟수를 넘으면 복구된 부분 결과와 truncated 표시를 반환하는지 확인합니다."""
+    os.environ["TABLE_MAX_CONTINUATIONS"] = "2"
+    requests = []
+    step = len(FULL_OUTPUT) // 5
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        start = (len(requests) - 1) * step
+        return httpx.Response(200, json=completion(FULL_OUTPUT[start:start + step], "length", 100))
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_tables_with_gpt5("분기별 재무제표 텍스트", "gpt-4o")
+        return result
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        del os.environ["TABLE_MAX_CONTINUATIONS"]
+    assert len(requests) == 3
+    assert result["success"] is True
+    assert result["truncated"] is True
+    assert result["json_repaired"] is True
+    assert 0 < len(result["tables"][0]["rows"]) < 40
+
+if __name__ == "__main__":
+    print("🚀 출력 이어받기 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
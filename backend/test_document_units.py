@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+문서 단위(페이지/섹션/시트) 스트리밍 파싱 및 단위 기반 표 추출 테스트 스크립트
+"""
+
+import asyncio
+import io
+import json
+import os
+import httpx
+import pandas as pd
+from docx import Document
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from file_processor import FileProcessor
+from table_extractor import TableExtractor
+
+def _collect_units(file_content: bytes, file_extension: str) -> list:
+    """iter_units가 내보내는 단위를 모읍니다."""
+    async def run():
+        return [unit async for unit in FileProcessor().iter_units(file_content, file_extension)]
+    return asyncio.run(run())
+
+def test_pdf_units_are_pages(text_pdf):
+    """PDF는 페이지 단위로 나오고, 위치 정보가 process_file 텍스트와 일치하는지 확인합니다."""
+    pdf = text_pdf(5)
+    units = _collect_units(pdf, ".pdf")
+    text = asyncio.run(FileProcessor().process_file(pdf, ".pdf"))
+
+    assert [unit["page_number"] for unit in units] == [1, 2, 3, 4, 5]
+    assert all(unit["kind"] == "page" for unit in units)
+    assert all(isinstance(unit["byte_offset"], int) for unit in units)
+    assert all(text[unit["start"]:unit["end"]] == unit["text"] for unit in units)
+    assert "Page 3 " in units[2]["text"]
+
+def test_docx_units_are_sections_in_document_order():
+    """DOCX는 제목마다 섹션으로 나뉘고, 표는 본문 순서대로 들어가는지 확인합니다."""
+    doc = Document()
+    doc.add_paragraph("머리말")
+    doc.add_heading("1. 매출", level=1)
+    doc.add_paragraph("분기별 매출입니다.")
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text, table.cell(0, 1).text = "분기", "금액"
+    table.cell(1, 0).text, table.cell(1, 1).text = "1Q", "100"
+    doc.add_heading("2. 비용", level=1)
+    doc.add_paragraph("비용 내역입니다.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    units = _collect_units(buffer.getvalue(), ".docx")
+    text = asyncio.run(FileProcessor().process_file(buffer.getvalue(), ".docx"))
+
+    assert [unit["title"] for unit in units] == [None, "1. 매출", "2. 비용"]
+    assert units[1]["text"] == "1. 매출\n분기별 매출입니다.\n분기\t금액\n1Q\t100"
+    assert all(unit["kind"] == "section" for unit in units)
+    assert all(text[unit["start"]:unit["end"]] == unit["text"] for unit in units)
+
+def test_excel_units_are_sheets():
+    """Excel은 시트 단위로 나오는지 확인합니다."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"분기": ["1Q"], "금액": [100]}).to_excel(writer, sheet_name="매출", index=False)
+        pd.DataFrame({"항목": ["인건비"]}).to_excel(writer, sheet_name="비용", index=False)
+
+    units = _collect_units(buffer.getvalue(), ".xlsx")
+    assert [unit["sheet_name"] for unit in units] == ["매출", "비용"]
+    assert units[0]["text"].startswith("=== 매출 ===\n")
+    assert "인건비" in units[1]["text"]
+
+def test_extraction_starts_before_parsing_finishes(mock_openai, completion):
+    """앞쪽 페이지의 API 호출이 뒤쪽 페이지를 파싱하기 전에 시작되는지 확인합니다."""
+    os.environ["TABLE_CHUNK_TOKENS"] = "500"
+    first_request = asyncio.Event()
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        first_request.set()
+        content = json.dumps({"tables": [{"title": "표", "headers": ["행", "값"], "rows": [["1", "2"]]}], "markdown": "", "summary": ""})
+        return httpx.Response(200, json=completion(content))
+
+    async def units():
+        for number in range(1, 4):
+            if number == 3:
+                # 세 번째 페이지는 첫 청크 요청이 시작되어야만 파싱이 끝남
+                await asyncio.wait_for(first_request.wait(), timeout=2)
+            # 첫 페이지는 청크 두 개 분량
+            page = "\n".join(f"행 {line} | 값 {line}" for line in range(250 if number == 1 else 120))
+            yield {"kind": "page", "index": number - 1, "page_number": number, "text": page, "start": 0, "end": len(page)}
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_tables_from_units(units(), "gpt-4o")
+        return result
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        del os.environ["TABLE_CHUNK_TOKENS"]
+
+    assert result["success"] is True
+    assert result["chunk_count"] == len(requests) > 2
+    assert result["tables"][0]["pages"][0] == 1
+    assert "페이지 1-1" in requests[0]["messages"][-1]["content"]
+
+def test_budget_check_stops_extraction(mock_openai, completion):
+    """청크 호출 전 예산 확인이 실패하면 추출이 중단되는지 확인합니다."""
+    os.environ["TABLE_CHUNK_TOKENS"] = "200"
+
+    def check_budget(estimate):
+        if estimate["chunks"] > 2:
+            raise ValueError("테넌트 토큰 예산 초과")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=completion('{"tables": [], "markdown": "", "summary": ""}'))
+
+    async def units():
+        for number in range(1, 6):
+            text = "\n".join(f"{number}페이지 {line}행" for line in range(60))
+            yield {"kind": "page", "index": number - 1, "page_number": number, "text": text, "start": 0, "end": len(text)}
+
+    async def run():
+        mock_openai(handler)
+        await TableExtractor().extract_tables_from_units(units(), "gpt-4o", check_budget=check_budget)
+
+    try:
+        asyncio.run(run())
+    except ValueError as e:
+        assert "예산" in str(e)
+        return
+    finally:
+        del os.environ["TABLE_CHUNK_TOKENS"]
+    assert False, "예산 초과 오류가 발생해야 합니다"
+
+if __name__ == "__main__":
+    print("🚀 문서 단위 파싱 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Vision 업로드 전 이미지 전처리 테스트 스크립트
+"""
+
+import io
+from PIL import Image, ImageDraw
+from image_preprocessor import preprocess_image, target_size
+
+def _make_image(width: int, height: int, file_format: str = "PNG", mode: str = "RGB") -> bytes:
+    """격자 선이 그려진 테스트 이미지를 생성합니다."""
+    image = Image.new(mode, (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 40):
+        draw.line([(0, y), (width, y)], fill="black", width=2)
+    for x in range(0, width, 120):
+        draw.line([(x, 0), (x, height)], fill="black", width=2)
+    buffer = io.BytesIO()
+    image.save(buffer, format=file_format)
+    return buffer.getvalue()
+
+def test_target_size_follows_detail_level():
+    """detail 수준별 목표 해상도를 확인합니다."""
+    assert target_size(4000, 3000, "high") == (1024, 768)
+    assert target_size(10000, 1000, "high") == (2048, 205)
+    assert target_size(4000, 3000, "low") == (512, 384)
+    assert target_size(600, 400, "high") == (600, 400)
+
+def test_large_scan_is_downscaled_and_reencoded():
+    """큰 스캔 이미지가 축소되고 재인코딩되는지 확인합니다."""
+    original = _make_image(3000, 4000, "TIFF")
+    processed, extension, stats = preprocess_image(original, ".tiff", "high")
+    print(f"   전처리 통계: {stats}")
+    assert extension in [".jpeg", ".png"]
+    assert stats["processed_size"] == [768, 1024]
+    assert len(processed) < len(original)
+    assert Image.open(io.BytesIO(processed)).size == (768, 1024)
+
+def test_smaller_original_is_kept():
+    """재인코딩 결과가 원본보다 크면 API가 받는 원본을 그대로 보내는지 확인합니다."""
+    original = _make_image(3000, 4000)
+    processed, extension, stats = preprocess_image(original, ".png", "high")
+    assert processed == original
+    assert extension == ".png"
+    assert stats["reduction_ratio"] == 0.0
+
+def test_photo_like_scan_uses_lossy_encoding():
+    """잡음이 많은 사진형 스캔은 JPEG로 인코딩되는지 확인합니다."""
+    image = Image.effect_noise((2400, 3200), 40).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    processed, extension, stats = preprocess_image(buffer.getvalue(), ".png", "high")
+    assert extension == ".jpeg"
+    assert stats["reduction_ratio"] > 0.5
+
+def test_lossless_keeps_png():
+    """무손실 옵션이면 PNG로 인코딩되는지 확인합니다."""
+    processed, extension, stats = preprocess_image(_make_image(3000, 4000), ".png", "high", lossless=True)
+    assert extension == ".png"
+    assert Image.open(io.BytesIO(processed)).format == "PNG"
+    assert stats["lossless"] is True
+
+def test_unsupported_format_is_converted():
+    """API가 받지 않는 TIFF도 지원 형식으로 변환되는지 확인합니다."""
+    processed, extension, _ = preprocess_image(_make_image(500, 300, "TIFF"), ".tiff", "auto")
+    assert extension in [".jpeg", ".png"]
+    assert Image.open(io.BytesIO(processed)).format in ["JPEG", "PNG"]
+
+def test_transparent_image_is_flattened():
+    """투명 배경 이미지가 흰 배경으로 합성되어 JPEG로 저장되는지 확인합니다."""
+    image = Image.effect_noise((3000, 2000), 40).convert("RGBA")
+    image.putalpha(128)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    processed, extension, _ = preprocess_image(buffer.getvalue(), ".png", "low")
+    result = Image.open(io.BytesIO(processed))
+    assert extension == ".jpeg"
+    assert result.mode == "RGB"
+    assert result.size == (512, 341)
+
+def test_undecodable_bytes_pass_through():
+    """디코딩할 수 없는 데이터는 원본 그대로 전달되는지 확인합니다."""
+    processed, extension, stats = preprocess_image(b"not an image", ".png", "high")
+    assert processed == b"not an image"
+    assert extension == ".png"
+    assert stats["applied"] is False
+
+if __name__ == "__main__":
+    print("🚀 이미지 전처리 테스트 시작")
+
+    print("\n1. detail별 목표 해상도 테스트...")
+    test_target_size_follows_detail_level()
+
+    print("\n2. 큰 스캔 이미지 축소/재인코딩 테스트...")
+    test_large_scan_is_downscaled_and_reencoded()
+
+    print("\n3. 원본 유지 테스트...")
+    test_smaller_original_is_kept()
+
+    print("\n4. 사진형 스캔 손실 압축 테스트...")
+    test_photo_like_scan_uses_lossy_encoding()
+
+    print("\n5. 무손실 옵션 테스트...")
+    test_lossless_keeps_png()
+
+    print("\n6. 미지원 형식 변환 테스트...")
+    test_unsupported_format_is_converted()
+
+    print("\n7. 투명 배경 합성 테스트...")
+    test_transparent_image_is_flattened()
+
+    print("\n8. 디코딩 실패 시 원본 전달 테스트...")
+    test_undecodable_bytes_pass_through()
+
+    print("\n🎉 모든 테스트 완료!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+표 추출 응답 JSON 복구 및 구조화 출력 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from json_repair import parse_json_tolerant
+from table_extractor import TableExtractor
+
+def test_valid_json_is_not_repaired():
+    """정상 JSON은 그대로 파싱되는지 확인합니다."""
+    data, repaired = parse_json_tolerant('{"tables": [], "summary": "없음"}')
+    assert data == {"tables": [], "summary": "없음"}
+    assert repaired is False
+
+def test_fenced_json_with_prose():
+    """코드 블록과 앞뒤 설명 문장이 있어도 파싱되는지 확인합니다."""
+    text = '다음은 결과입니다.\n```json\n{"tables": [{"title": "A"}]}\n```\n추가 설명입니다.'
+    data, repaired = parse_json_tolerant(text)
+    assert data["tables"][0]["title"] == "A"
+    assert repaired is True
+
+def test_minor_syntax_errors():
+    """닫는 괄호 앞 쉼표와 파이썬 리터럴을 고치되 문자열 안은 건드리지 않는지 확인합니다."""
+    text = '{"tables": [{"title": "True, ]", "merged": True, "note": None,},], "summary": "x",}'
+    data, _ = parse_json_tolerant(text)
+    assert data["tables"][0] == {"title": "True, ]", "merged": True, "note": None}
+
+def test_truncated_in_string_value():
+    """문자열 값 도중에 잘린 출력이 복구되는지 확인합니다."""
+    text = '{"tables": [{"title": "매출", "rows": [["1Q", "100"], ["2Q", "20'
+    data, repaired = parse_json_tolerant(text)
+    assert repaired is True
+    assert data["tables"][0]["rows"][0] == ["1Q", "100"]
+    assert data["tables"][0]["rows"][1] == ["2Q", "20"]
+
+def test_truncated_in_key():
+    """키 도중에 잘린 출력은 마지막 완결된 값까지 잘라서 복구되는지 확인합니다."""
+    text = '{"tables": [{"title": "매출", "rows": [["1Q", "100"]]}], "mark'
+    data, _ = parse_json_tolerant(text)
+    assert data == {"tables": [{"title": "매출", "rows": [["1Q", "100"]]}]}
+
+def test_unrecoverable_raises():
+    """JSON이 전혀 없으면 JSONDecodeError가 발생하는지 확인합니다."""
+    try:
+        parse_json_tolerant("표를 찾을 수 없습니다.")
+    except json.JSONDecodeError:
+        return
+    assert False, "JSONDecodeError가 발생해야 합니다"
+
+def test_parse_and_clean_response_salvages_truncated_output():
+    """잘린 모델 응답이 실패 대신 복구된 결과로 반환되는지 확인합니다."""
+    result = TableExtractor()._parse_and_clean_response('```json\n{"tables": [{"headers": ["a", "b"], "rows": [["1", "2"], ["3"', "gpt-4o")
+    assert result["success"] is True
+    assert result["json_repaired"] is True
+    assert result["table_count"] == 1
+
+def test_response_format_falls_back_when_unsupported(mock_openai):
+    """모델이 json_schema를 거부하면 json_object로 다시 요청하는지 확인합니다."""
+    requested_formats = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        response_format = body.get("response_format", {}).get("type")
+        requested_formats.append(response_format)
+        if response_format == "json_schema":
+            return httpx.Response(400, json={"error": {"message": "Invalid parameter: 'response_format' of type 'json_schema' is not supported with this model.", "type": "invalid_request_error"}})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4-turbo",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": '{"tables": [], "markdown": "", "summary": "표 없음"}'}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        })
+
+    async def run():
+        mock_openai(handler)
+        extractor = TableExtractor()
+        first = await extractor.extract_tables_with_gpt5("이름 나이\n홍길동 30", "gpt-4-turbo")
+        second = await extractor.extract_tables_with_gpt5("이름 나이\n김철수 40", "gpt-4-turbo")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["success"] and second["success"]
+    # 거부된 형식은 기억해서 두 번째 요청부터는 바로 json_object 사용
+    assert requested_formats == ["json_schema", "json_object", "json_object"]
+
+if __name__ == "__main__":
+    print("🚀 JSON 복구/구조화 출력 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
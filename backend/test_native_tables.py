@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+DOCX/Excel 네이티브 표 추출 (LLM 호출 없는 빠른 경로) 테스트 스크립트
+"""
+
+import asyncio
+import datetime
+import io
+import os
+import httpx
+import numpy as np
+import openpyxl
+from docx import Document
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from native_tables import extract_docx_tables, extract_excel_tables, find_table_islands, sheet_to_tables
+from table_extractor import TableExtractor
+
+def _make_docx(with_table: bool = True) -> bytes:
+    """묶음 헤더와 세로 병합 셀이 있는 표가 들어 있는 DOCX를 만듭니다."""
+    doc = Document()
+    doc.add_paragraph("2024년 지역별 매출")
+    if with_table:
+        table = doc.add_table(rows=4, cols=3)
+        table.cell(0, 0).merge(table.cell(1, 0)).text = "지역"
+        table.cell(0, 1).merge(table.cell(0, 2)).text = "매출"
+        table.cell(1, 1).text, table.cell(1, 2).text = "상반기", "하반기"
+        table.cell(2, 0).merge(table.cell(3, 0)).text = "서울"
+        table.cell(2, 1).text, table.cell(2, 2).text = "100", "120"
+        table.cell(3, 1).text, table.cell(3, 2).text = "90", "95"
+    doc.add_paragraph("본문입니다.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def test_merged_cells_and_grouped_headers():
+    """병합 셀 값이 채워지고 묶음 헤더가 두 행으로 합쳐지는지 확인합니다."""
+    tables = extract_docx_tables(_make_docx())
+
+    assert len(tables) == 1
+    table = tables[0]
+    assert table["title"] == "2024년 지역별 매출"
+    assert table["headers"] == ["지역", "매출 / 상반기", "매출 / 하반기"]
+    assert table["rows"] == [["서울", "100", "120"], ["서울", "90", "95"]]
+    assert table["row_count"] == 2 and table["column_count"] == 3
+    assert {"row": 0, "column": 1, "row_span": 1, "column_span": 2} in table["merged_cells"]
+    assert {"row": 2, "column": 0, "row_span": 2, "column_span": 1} in table["merged_cells"]
+
+def test_native_path_skips_llm(mock_openai):
+    """네이티브 표가 있으면 API를 호출하지 않고, 없으면 None을 반환하는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        mock_openai(handler)
+        extractor = TableExtractor()
+        native = await extractor.extract_native_tables(_make_docx(), ".docx")
+        without_tables = await extractor.extract_native_tables(_make_docx(with_table=False), ".docx")
+        return native, without_tables
+
+    native, without_tables = asyncio.run(run())
+    assert requests == []
+    assert native["success"] is True and native["native"] is True
+    assert native["estimate"]["total_tokens"] == 0
+    assert "| 지역 | 매출 / 상반기 | 매출 / 하반기 |" in native["markdown"]
+    assert without_tables is None
+
+def _make_xlsx() -> bytes:
+    """제목 행/헤더가 있는 시트, 헤더 없는 숫자 시트, 빈 시트가 있는 통합 문서를 만듭니다."""
+    workbook = openpyxl.Workbook()
+    sales = workbook.active
+    sales.title = "매출"
+    sales.append(["2024년 월별 매출"])
+    sales.append(["월", "금액", "비고"])
+    sales.append([datetime.datetime(2024, 1, 1), 1200.0, None])
+    sales.append([datetime.datetime(2024, 2, 1), 980.5, "할인"])
+    numbers = workbook.create_sheet("원자료")
+    for row in range(3):
+        numbers.append([row, row * 2])
+    workbook.create_sheet("빈 시트")
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def test_excel_tables_with_inferred_headers():
+    """시트마다 표가 만들어지고 제목/헤더 행이 추정되는지 확인합니다."""
+    tables = extract_excel_tables(_make_xlsx(), ".xlsx")
+
+    assert [table["sheet_name"] for table in tables] == ["매출", "원자료"]
+    sales, numbers = tables
+    assert sales["title"] == "2024년 월별 매출"
+    assert sales["headers"] == ["월", "금액", "비고"]
+    assert sales["rows"] == [["2024-01-01", "1200", ""], ["2024-02-01", "980.5", "할인"]]
+    # 숫자만 있는 시트는 첫 행을 헤더로 쓰지 않음
+    assert numbers["headers"] == ["열1", "열2"]
+    assert numbers["row_count"] == 3
+
+def test_multiple_table_islands_in_one_sheet():
+    """빈 행/열로 떨어진 표들이 각각의 표로 나뉘고, 위의 값 하나짜리 셀은 제목이 되는지 확인합니다."""
+    rows = [
+        ["지역", "금액", "", "품목", "수량"],
+        ["서울", "100", "", "A", "1"],
+        ["부산", "90", "", "B", "2"],
+        ["", "", "", "", ""],
+        ["비용 내역", "", "", "", ""],
+        ["", "", "", "", ""],
+        ["항목", "금액", "", "", ""],
+        ["인건비", "50", "", "", ""]
+    ]
+    tables = sheet_to_tables("요약", rows)
+
+    assert [table["range"] for table in tables] == ["A1:B3", "D1:E3", "A7:B8"]
+    assert tables[0]["headers"] == ["지역", "금액"]
+    assert tables[1]["rows"] == [["A", "1"], ["B", "2"]]
+    assert tables[2]["title"] == "비용 내역"
+    assert [table["table_id"] for table in tables] == ["table_1", "table_2", "table_3"]
+
+def test_island_detection_on_large_mask():
+    """수백만 셀 마스크에서도 표 영역을 찾는지 확인합니다."""
+    mask = np.zeros((500000, 20), dtype=bool)
+    mask[10:200000, 0:8] = True
+    mask[250000:450000, 10:20] = True
+    mask[300000, 12] = False
+    assert find_table_islands(mask) == [(10, 200000, 0, 8), (250000, 450000, 10, 20)]
+
+if __name__ == "__main__":
+    print("🚀 네이티브 표 추출 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
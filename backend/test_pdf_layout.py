@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+PDF 레이아웃(글자 좌표/괘선) 기반 표 탐지 및 LLM 폴백 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from pdf_layout import analyze_page_range, confidence_threshold
+from table_extractor import TableExtractor
+
+_ROWS = [["Region", "Sales", "Cost"], ["Seoul", "100", "80"], ["Busan", "90", "70"], ["Daegu", "85", "60"], ["Incheon", "70", "50"]]
+_RULES = (
+    " ".join(f"{x} 632 m {x} 712 l S" for x in (66, 190, 320, 420))
+    + " " + " ".join(f"66 {y} m 420 {y} l S" for y in (712, 698, 684, 670, 656, 642, 632))
+)
+
+def _table_page(ruled: bool) -> str:
+    """제목 아래에 열이 정렬된 표가 있는 페이지 내용 스트림 (ruled면 괘선 포함)"""
+    ops = "BT /F1 12 Tf 72 720 Td (Quarterly Report) Tj ET "
+    for index, row in enumerate(_ROWS):
+        ops += " ".join(f"BT /F1 10 Tf {x} {700 - index * 14} Td ({value}) Tj ET" for x, value in zip((72, 200, 330), row)) + " "
+    return ops + ("0.5 w " + _RULES if ruled else "")
+
+def test_ruled_and_aligned_tables_are_detected(layout_pdf):
+    """괘선이 있는 표와 열만 정렬된 표가 모두 높은 신뢰도로 재구성되는지 확인합니다."""
+    pages = analyze_page_range(layout_pdf([_table_page(ruled=True), _table_page(ruled=False)]), 0, 2)
+
+    for page in pages:
+        assert len(page["tables"]) == 1
+        table = page["tables"][0]
+        assert table["title"] == "Quarterly Report"
+        assert table["headers"] == ["Region", "Sales", "Cost"]
+        assert table["rows"][0] == ["Seoul", "100", "80"] and table["row_count"] == 4
+        assert page["confidence"] >= 0.75
+    # 괘선이 있으면 신뢰도가 더 높음
+    assert pages[0]["confidence"] > pages[1]["confidence"]
+
+def test_tj_offsets_split_cells(layout_pdf):
+    """TJ 배열의 큰 간격으로 벌어진 글자들이 서로 다른 열로 나뉘는지 확인합니다."""
+    ops = "BT /F1 10 Tf 72 700 Td [(Name) -9000 (Qty)] TJ 0 -14 Td [(Apple) -8800 (3)] TJ 0 -14 Td [(Pear) -9000 (5)] TJ 0 -14 Td [(Fig) -9100 (7)] TJ ET"
+    page = analyze_page_range(layout_pdf([ops]), 0, 1)[0]
+
+    assert page["tables"][0]["headers"] == ["Name", "Qty"]
+    assert page["tables"][0]["rows"] == [["Apple", "3"], ["Pear", "5"], ["Fig", "7"]]
+
+def test_two_column_prose_is_not_a_native_table(layout_pdf):
+    """열은 정렬되어 있지만 셀이 문장 조각인 두 단 본문은 표로 확정하지 않는지 확인합니다."""
+    left = ["The quarterly results were strong", "across every region, and the board", "expects the trend to continue into",
+            "the next fiscal year as demand for", "the new product line keeps growing", "faster than earlier forecasts said."]
+    right = ["Management noted that supply chain", "pressure eased during the quarter,", "which lowered shipping costs and",
+             "allowed the company to rebuild its", "inventory ahead of the holiday", "season without raising prices."]
+    ops = " ".join(
+        f"BT /F1 10 Tf 72 {720 - index * 14} Td ({first}) Tj ET BT /F1 10 Tf 320 {720 - index * 14} Td ({second}) Tj ET"
+        for index, (first, second) in enumerate(zip(left, right))
+    )
+    page = analyze_page_range(layout_pdf([ops]), 0, 1)[0]
+
+    assert all(table["confidence"] < confidence_threshold() for table in page["tables"])
+
+def test_only_low_confidence_pages_go_to_llm(mock_openai, completion, layout_pdf, ragged_page):
+    """표가 확실한 페이지는 LLM 없이 추출하고, 나머지 페이지만 API로 보내는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        content = json.dumps({"tables": [{"title": "성장률", "headers": ["항목", "값"], "rows": [["매출", "10%"]]}], "markdown": "", "summary": "요약"})
+        return httpx.Response(200, json=completion(content))
+
+    async def run():
+        mock_openai(handler)
+        events = [event async for event in TableExtractor().stream_pdf_tables(layout_pdf([_table_page(ruled=True), ragged_page]), "gpt-4o")]
+        return events
+
+    events = asyncio.run(run())
+    result = events[-1][1]
+
+    assert len(requests) == 1
+    assert "Revenue grew" in requests[0]["messages"][-1]["content"]
+    assert "Seoul" not in requests[0]["messages"][-1]["content"]
+    assert [event for event, _ in events] == ["table", "table", "done"]
+    assert result["native_pages"] == [1] and result["llm_pages"] == [2]
+    assert [table["title"] for table in result["tables"]] == ["Quarterly Report", "성장률"]
+    assert [table["table_id"] for table in result["tables"]] == ["table_1", "table_2"]
+    assert result["tables"][1]["pages"] == [2, 2]
+    assert result["usage"]["total_tokens"] == 15
+
+def test_all_native_pages_skip_llm(mock_openai, layout_pdf):
+    """모든 페이지의 표가 확실하면 API를 호출하지 않는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_pdf_tables(layout_pdf([_table_page(ruled=True)]), "gpt-4o")
+        return result
+
+    result = asyncio.run(run())
+    assert requests == []
+    assert result["success"] is True and result["native"] is True
+    assert result["estimate"]["total_tokens"] == 0
+    assert "| Region | Sales | Cost |" in result["markdown"]
+
+if __name__ == "__main__":
+    print("🚀 PDF 레이아웃 표 탐지 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+PDF 페이지 병렬 텍스트 추출 테스트 스크립트
+"""
+
+import asyncio
+import os
+import threading
+import time
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pdf_text
+from file_processor import FileProcessor
+from pdf_text import extract_pdf_pages, page_ranges, shutdown_pdf_process_pool
+from text_chunker import PAGE_SEPARATOR
+
+def test_page_ranges_cover_all_pages():
+    """페이지 구간이 빠짐없이 겹치지 않게 나뉘는지 확인합니다."""
+    ranges = page_ranges(500, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 500
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert len(ranges) == 8
+    assert page_ranges(5, 4) == [(0, 5)]
+
+def test_parallel_extraction_keeps_page_order(text_pdf):
+    """프로세스 풀로 추출해도 페이지 순서와 경계가 유지되는지 확인합니다."""
+    os.environ["PDF_EXTRACT_WORKERS"] = "2"
+    os.environ["PDF_PARALLEL_MIN_PAGES"] = "4"
+    pdf = text_pdf(40)
+    try:
+        pages = asyncio.run(extract_pdf_pages(pdf))
+        text = asyncio.run(FileProcessor().process_file(pdf, ".pdf"))
+    finally:
+        shutdown_pdf_process_pool()
+        del os.environ["PDF_EXTRACT_WORKERS"]
+        del os.environ["PDF_PARALLEL_MIN_PAGES"]
+
+    assert len(pages) == 40
+    assert all(f"Page {number} " in page for number, page in enumerate(pages, start=1))
+    assert text.split(PAGE_SEPARATOR) == [page.strip() for page in pages]
+
+def test_small_pdf_does_not_block_event_loop(text_pdf):
+    """작은 PDF도 스레드에서 추출되어 이벤트 루프가 계속 동작하는지 확인합니다."""
+    pdf = text_pdf(10)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        started_at = time.perf_counter()
+        pages = await extract_pdf_pages(pdf)
+        task.cancel()
+        return pages, ticks, time.perf_counter() - started_at
+
+    pages, ticks, elapsed = asyncio.run(run())
+    print(f"   10페이지 추출: {elapsed:.3f}초, 이벤트 루프 틱 {ticks}회")
+    assert len(pages) == 10
+    assert ticks > 1
+
+def test_page_index_is_read_off_event_loop(text_pdf):
+    """PDF 파싱과 페이지 위치 계산도 이벤트 루프 스레드가 아닌 곳에서 실행되는지 확인합니다."""
+    threads = []
+    page_offsets = pdf_text._page_offsets
+
+    def recording_page_offsets(file_content: bytes):
+        threads.append(threading.current_thread())
+        return page_offsets(file_content)
+
+    pdf_text._page_offsets = recording_page_offsets
+    try:
+        pages = asyncio.run(extract_pdf_pages(text_pdf(3)))
+    finally:
+        pdf_text._page_offsets = page_offsets
+
+    assert len(pages) == 3
+    assert threads and threads[0] is not threading.main_thread()
+
+if __name__ == "__main__":
+    print("🚀 PDF 병렬 텍스트 추출 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
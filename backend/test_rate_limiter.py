@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+OpenAI 레이트 리미터 테스트 스크립트
+"""
+
+import asyncio
+import time
+from rate_limiter import RateLimiter, parse_reset_duration
+from token_estimator import estimate_request_tokens
+
+def test_parse_reset_duration():
+    """리셋 헤더 값 변환을 확인합니다."""
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("20ms") == 0.02
+    assert parse_reset_duration("1h2m3.5s") == 3723.5
+    assert parse_reset_duration("2") == 2.0
+    assert parse_reset_duration(None) is None
+
+def test_callers_queue_instead_of_failing():
+    """RPM을 넘는 요청이 실패하지 않고 대기 후 통과하는지 확인합니다."""
+    async def run():
+        # 분당 120회 = 초당 2회, 버킷 용량 120이므로 처음 120건은 즉시 통과
+        limiter = RateLimiter(default_rpm=120, default_tpm=1_000_000)
+        for _ in range(120):
+            await limiter.acquire("gpt-4o", 10)
+
+        started = time.monotonic()
+        waits = await asyncio.gather(*[limiter.acquire("gpt-4o", 10) for _ in range(2)])
+        return time.monotonic() - started, waits, limiter.stats()
+
+    elapsed, waits, stats = asyncio.run(run())
+    print(f"   대기 시간: {elapsed:.2f}s, 지표: {stats['models']['gpt-4o']}")
+    assert 0.8 <= elapsed <= 2.0
+    assert stats["models"]["gpt-4o"]["admitted"] == 122
+    assert stats["models"]["gpt-4o"]["max_wait_seconds"] > 0
+
+def test_token_budget_limits_large_requests():
+    """TPM 한도가 큰 요청을 대기시키는지 확인합니다."""
+    async def run():
+        limiter = RateLimiter(default_rpm=10_000, default_tpm=600)  # 초당 10토큰
+        await limiter.acquire("gpt-4o", 600)
+        return await limiter.acquire("gpt-4o", 5)
+
+    waited = asyncio.run(run())
+    assert 0.3 <= waited <= 1.0
+
+def test_update_from_headers_and_penalize():
+    """응답 헤더로 한도와 잔여량이 보정되고 429 후 호출이 멈추는지 확인합니다."""
+    async def run():
+        limiter = RateLimiter(default_rpm=500, default_tpm=30000)
+        limiter.update_from_headers("gpt-4o", {
+            "x-ratelimit-limit-requests": "5000",
+            "x-ratelimit-limit-tokens": "800000",
+            "x-ratelimit-remaining-requests": "4999",
+            "x-ratelimit-remaining-tokens": "799000"
+        })
+        await limiter.acquire("gpt-4o", 100)
+        limiter.penalize("gpt-4o", {"retry-after": "0.5"})
+        waited = await limiter.acquire("gpt-4o", 100)
+        return limiter.stats(), waited
+
+    stats, waited = asyncio.run(run())
+    model_stats = stats["models"]["gpt-4o"]
+    assert model_stats["rpm_limit"] == 5000
+    assert model_stats["tpm_limit"] == 800000
+    assert model_stats["rate_limited_responses"] == 1
+    assert waited >= 0.4
+
+def test_estimate_request_tokens():
+    """요청 토큰 추정치가 텍스트, 이미지, 최대 출력을 반영하는지 확인합니다."""
+    request = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "a" * 400},
+            {"role": "user", "content": [
+                {"type": "text", "text": "b" * 40},
+                {"type": "image_url", "image_url": {"url": "data:", "detail": "low"}}
+            ]}
+        ],
+        "max_tokens": 1000
+    }
+    assert estimate_request_tokens(request) == 100 + 4 + 10 + 85 + 4 + 1000
+
+if __name__ == "__main__":
+    print("🚀 레이트 리미터 테스트 시작")
+
+    print("\n1. 리셋 헤더 변환 테스트...")
+    test_parse_reset_duration()
+
+    print("\n2. RPM 초과 요청 대기 테스트...")
+    test_callers_queue_instead_of_failing()
+
+    print("\n3. TPM 한도 테스트...")
+    test_token_budget_limits_large_requests()
+
+    print("\n4. 응답 헤더 보정 및 429 처리 테스트...")
+    test_update_from_headers_and_penalize()
+
+    print("\n5. 요청 토큰 추정 테스트...")
+    test_estimate_request_tokens()
+
+    print("\n🎉 모든 테스트 완료!")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+OpenAI 호출 재시도/타임아웃/헤징 테스트 스크립트
+"""
+
+import asyncio
+import httpx
+import openai
+from resilience import ResilientCaller, RetryPolicy
+
+def _status_error(status_code: int, headers: dict = None) -> openai.APIStatusError:
+    """테스트용 OpenAI 상태 코드 오류를 생성합니다."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    error_class = {429: openai.RateLimitError, 400: openai.BadRequestError}.get(status_code, openai.InternalServerError)
+    return error_class(f"status {status_code}", response=response, body=None)
+
+def test_retries_transient_errors():
+    """429/5xx 오류는 재시도 후 성공하는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=3, backoff_base=0.01, backoff_max=0.05))
+        errors = [_status_error(500), _status_error(429, {"retry-after": "0.01"})]
+
+        async def attempt():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        return await caller.call("gpt-4o", attempt), caller.stats()
+
+    result, stats = asyncio.run(run())
+    print(f"   통계: {stats}")
+    assert result == "ok"
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+
+def test_does_not_retry_client_errors():
+    """400 같은 영구 오류는 재시도하지 않는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=3, backoff_base=0.01))
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            raise _status_error(400)
+
+        try:
+            await caller.call("gpt-4o", attempt)
+        except openai.BadRequestError:
+            return attempts
+        return None
+
+    assert asyncio.run(run()) == 1
+
+def test_attempt_timeout_is_retried():
+    """시도별 타임아웃이 지나면 다음 시도로 넘어가는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=1, backoff_base=0.01, attempt_timeout=0.1))
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                await asyncio.sleep(1)
+            return attempts
+
+        return await caller.call("gpt-4o", attempt), caller.stats()
+
+    result, stats = asyncio.run(run())
+    assert result == 2
+    assert stats["timeouts"] == 1
+
+def test_hedged_request_wins_over_slow_primary():
+    """p95 지연을 넘긴 요청에 헤지 요청이 나가고 먼저 끝난 응답이 사용되는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=0, hedge_enabled=True, hedge_min_samples=5))
+        for _ in range(10):
+            caller.tracker("gpt-4o").record(0.05)
+
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            # 첫 요청은 꼬리 지연, 헤지 요청은 정상 지연
+            await asyncio.sleep(2.0 if attempts == 1 else 0.05)
+            return f"attempt-{attempts}"
+
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        result = await caller.call("gpt-4o", attempt)
+        return result, loop.time() - started_at, caller.stats()
+
+    result, elapsed, stats = asyncio.run(run())
+    print(f"   결과: {result}, 소요 시간: {elapsed:.2f}s")
+    assert result == "attempt-2"
+    assert elapsed < 0.5
+    assert stats["hedges_sent"] == 1
+    assert stats["hedge_wins"] == 1
+
+def test_prepare_wait_is_not_timed():
+    """레이트 리미터 대기(prepare)는 시도별 타임아웃과 지연 시간 통계에 들어가지 않는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=0, attempt_timeout=0.1))
+        prepared = 0
+
+        async def prepare():
+            nonlocal prepared
+            prepared += 1
+            await asyncio.sleep(0.3)
+
+        async def attempt():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        return await caller.call("gpt-4o", attempt, prepare=prepare), prepared, caller.stats()
+
+    result, prepared, stats = asyncio.run(run())
+    assert result == "ok" and prepared == 1
+    assert stats["timeouts"] == 0
+    assert stats["latency"]["gpt-4o"]["p95_seconds"] < 0.1
+
+def test_losing_hedge_result_is_discarded():
+    """두 요청이 거의 동시에 끝나면 반환하지 않은 쪽의 결과가 discard로 정리되는지 확인합니다."""
+    async def run():
+        caller = ResilientCaller(RetryPolicy(max_retries=0, hedge_enabled=True, hedge_min_samples=5))
+        for _ in range(10):
+            caller.tracker("gpt-4o").record(0.05)
+
+        attempts = 0
+        discarded = []
+        hedge_returned = asyncio.Event()
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                # 헤지 응답과 거의 같은 순간에 도착해 취소가 닿기 전에 끝나는 첫 요청
+                await hedge_returned.wait()
+                return "late-stream"
+            hedge_returned.set()
+            return "hedge-stream"
+
+        async def discard(result):
+            discarded.append(result)
+
+        result = await caller.call("gpt-4o", attempt, discard=discard)
+        await asyncio.sleep(0.05)
+        return result, discarded
+
+    result, discarded = asyncio.run(run())
+    assert len(discarded) == 1
+    assert sorted([result] + discarded) == ["hedge-stream", "late-stream"]
+
+if __name__ == "__main__":
+    print("🚀 재시도/헤징 테스트 시작")
+
+    print("\n1. 일시적 오류 재시도 테스트...")
+    test_retries_transient_errors()
+
+    print("\n2. 영구 오류 미재시도 테스트...")
+    test_does_not_retry_client_errors()
+
+    print("\n3. 시도별 타임아웃 테스트...")
+    test_attempt_timeout_is_retried()
+
+    print("\n4. 헤징 테스트...")
+    test_hedged_request_wins_over_slow_primary()
+
+    print("\n5. 리미터 대기 시간 제외 테스트...")
+    test_prepare_wait_is_not_timed()
+
+    print("\n6. 헤징에서 진 결과 정리 테스트...")
+    test_losing_hedge_result_is_discarded()
+
+    print("\n🎉 모든 테스트 완료!")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+결과 캐시 테스트 스크립트
+"""
+
+import tempfile
+from pathlib import Path
+from result_cache import ResultCache, hash_content, make_cache_key
+
+def test_memory_and_disk_tiers():
+    """메모리 적중, 디스크 적중, 미스를 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ResultCache(Path(temp_dir), max_memory_bytes=1024 * 1024)
+        key = make_cache_key(hash_content(b"image bytes"), model="gpt-4o", prompt="p", detail="high", prompt_version="1")
+
+        assert cache.get(key) is None
+        cache.set(key, {"success": True, "tables": []})
+        assert cache.get(key) == {"success": True, "tables": []}
+
+        # 새 인스턴스는 메모리가 비어 있으므로 디스크 계층에서 읽어야 합니다
+        reopened = ResultCache(Path(temp_dir))
+        assert reopened.get(key) == {"success": True, "tables": []}
+        assert reopened.stats()["disk_hits"] == 1
+
+        stats = cache.stats()
+        print(f"   캐시 통계: {stats}")
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+
+def test_parameters_change_key():
+    """모델, 프롬프트, 상세도가 다르면 다른 키가 생성되는지 확인합니다."""
+    content_hash = hash_content(b"same file")
+    base = make_cache_key(content_hash, model="gpt-4o", prompt="p", detail="high", prompt_version="1")
+    assert base == make_cache_key(content_hash, prompt="p", model="gpt-4o", detail="high", prompt_version="1")
+    assert base != make_cache_key(content_hash, model="gpt-4o-mini", prompt="p", detail="high", prompt_version="1")
+    assert base != make_cache_key(content_hash, model="gpt-4o", prompt="p", detail="low", prompt_version="1")
+    assert base != make_cache_key(content_hash, model="gpt-4o", prompt="p", detail="high", prompt_version="2")
+
+def test_lru_byte_eviction():
+    """메모리 계층이 바이트 용량을 넘으면 가장 오래된 항목부터 제거되는지 확인합니다."""
+    cache = ResultCache(None, max_memory_bytes=300)
+    for i in range(5):
+        cache.set(f"key_{i}", {"payload": "x" * 80})
+
+    stats = cache.stats()
+    assert stats["memory_bytes"] <= 300
+    assert stats["evictions"] > 0
+    assert cache.get("key_0") is None
+    assert cache.get("key_4") is not None
+
+def test_invalidate_by_content_hash():
+    """콘텐츠 해시로 해당 파일의 캐시만 무효화되는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ResultCache(Path(temp_dir))
+        hash_a = hash_content(b"file a")
+        hash_b = hash_content(b"file b")
+        cache.set(make_cache_key(hash_a, detail="high"), {"a": 1})
+        cache.set(make_cache_key(hash_a, detail="low"), {"a": 2})
+        cache.set(make_cache_key(hash_b, detail="high"), {"b": 1})
+
+        assert cache.invalidate(hash_a) == 2
+        assert cache.get(make_cache_key(hash_a, detail="high")) is None
+        assert cache.get(make_cache_key(hash_b, detail="high")) == {"b": 1}
+
+        cache.invalidate()
+        assert cache.stats()["disk_entries"] == 0
+
+if __name__ == "__main__":
+    print("🚀 결과 캐시 테스트 시작")
+
+    print("\n1. 메모리/디스크 계층 테스트...")
+    test_memory_and_disk_tiers()
+
+    print("\n2. 캐시 키 파라미터 테스트...")
+    test_parameters_change_key()
+
+    print("\n3. LRU 바이트 용량 제거 테스트...")
+    test_lru_byte_eviction()
+
+    print("\n4. 콘텐츠 해시 무효화 테스트...")
+    test_invalidate_by_content_hash()
+
+    print("\n🎉 모든 테스트 완료!")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+스캔 PDF(텍스트 레이어 없는 페이지) 렌더링 및 페이지별 Vision 표 추출 테스트 스크립트
+"""
+
+import asyncio
+import io
+import json
+import os
+import httpx
+import PyPDF2
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+from PIL import Image, ImageDraw
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pdf_raster
+import result_cache
+import table_extractor
+from pdf_layout import analyze_page_range, has_images, page_resources
+from pdf_raster import RasterCache, render_page
+from table_extractor import TableExtractor
+
+def _scan(label: str) -> Image.Image:
+    """300 DPI Letter 크기의 괘선 표 스캔처럼 보이는 페이지 이미지를 만듭니다."""
+    image = Image.new("RGB", (2550, 3300), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((300, 300, 2100, 1200), fill="black")
+    draw.text((320, 1300), label, fill="black")
+    for y in range(1400, 2401, 200):
+        draw.line((300, y, 2100, y), fill="black", width=6)
+    for x in (300, 900, 1500, 2100):
+        draw.line((x, 1400, x, 2400), fill="black", width=6)
+    return image
+
+def _make_scanned_pdf(page_count: int, text_pdf: bytes = None) -> bytes:
+    """스캔 이미지 페이지로 이루어진 PDF를 만듭니다. (text_pdf가 있으면 그 첫 페이지를 맨 앞에 추가)"""
+    images = [_scan(f"page {number}") for number in range(page_count)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PDF", resolution=300, save_all=True, append_images=images[1:])
+    if text_pdf is None:
+        return buffer.getvalue()
+
+    writer = PyPDF2.PdfWriter()
+    writer.add_page(PyPDF2.PdfReader(io.BytesIO(text_pdf)).pages[0])
+    for page in PyPDF2.PdfReader(buffer).pages:
+        writer.add_page(page)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def _wrap_in_form(pdf: bytes) -> bytes:
+    """첫 페이지 내용을 폼 XObject로 옮기고, 페이지는 그 폼만 그리는 PDF를 만듭니다."""
+    writer = PyPDF2.PdfWriter()
+    page = writer.add_page(PyPDF2.PdfReader(io.BytesIO(pdf)).pages[0])
+    form = DecodedStreamObject()
+    form.set_data(page.get_contents().get_data())
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): page.mediabox,
+        NameObject("/Resources"): page["/Resources"]
+    })
+    content = DecodedStreamObject()
+    content.set_data(b"q /Fm0 Do Q")
+    page[NameObject("/Contents")] = writer._add_object(content)
+    page[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/XObject"): DictionaryObject({NameObject("/Fm0"): writer._add_object(form)})
+    })
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def test_scanned_pages_are_detected_and_rendered_per_detail(layout_pdf, prose_page):
+    """이미지만 있는 페이지가 스캔 페이지로 표시되고 detail 수준에 맞는 해상도로 렌더링되는지 확인합니다."""
+    pdf = _make_scanned_pdf(1)
+    assert analyze_page_range(pdf, 0, 1)[0]["scanned"] is True
+    assert analyze_page_range(layout_pdf([prose_page]), 0, 1)[0]["scanned"] is False
+
+    high = Image.open(io.BytesIO(render_page(pdf, 0, "high")))
+    low = Image.open(io.BytesIO(render_page(pdf, 0, "low")))
+    assert min(high.size) == 768
+    assert max(low.size) == 512
+    # 스캔 이미지의 검은 사각형이 같은 위치에 그려짐
+    x, y = round(1200 / 2550 * high.size[0]), round(700 / 3300 * high.size[1])
+    assert high.getpixel((x, y)) == (0, 0, 0)
+    assert high.getpixel((10, 10)) == (255, 255, 255)
+
+def test_images_inside_form_xobjects_are_rendered():
+    """폼 XObject 안에 그려진 스캔 이미지도 스캔 페이지로 보고 렌더링하는지 확인합니다."""
+    pdf = _wrap_in_form(_make_scanned_pdf(1))
+    assert analyze_page_range(pdf, 0, 1)[0]["scanned"] is True
+
+    image = Image.open(io.BytesIO(render_page(pdf, 0, "low")))
+    x, y = round(1200 / 2550 * image.size[0]), round(700 / 3300 * image.size[1])
+    assert image.getpixel((x, y)) == (0, 0, 0)
+
+def test_page_resources_are_inherited_or_empty():
+    """페이지에 리소스가 없으면 상위 페이지 트리의 리소스를 쓰고, 어디에도 없으면 빈 사전을 쓰는지 확인합니다."""
+    page = PyPDF2.PageObject.create_blank_page(width=612, height=792)
+    del page["/Resources"]
+    assert page_resources(page) == {} and has_images(page) is False
+
+    resources = DictionaryObject({NameObject("/XObject"): DictionaryObject()})
+    page[NameObject("/Parent")] = DictionaryObject({NameObject("/Type"): NameObject("/Pages"), NameObject("/Resources"): resources})
+    assert page_resources(page) is resources
+
+def test_scanned_pages_extracted_concurrently(mock_openai, completion, layout_pdf, ragged_page):
+    """스캔 페이지는 Vision API로 동시에 추출되고, 텍스트 페이지와 페이지 순서대로 합쳐지는지 확인합니다."""
+    result_cache._result_cache = result_cache.ResultCache()
+    in_flight = 0
+    max_in_flight = 0
+    requests = []
+    both_started = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        body = json.loads(request.content)
+        requests.append(body)
+        is_image = isinstance(body["messages"][-1]["content"], list)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        if in_flight >= 2:
+            both_started.set()
+        try:
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+        except asyncio.TimeoutError:
+            pass
+        in_flight -= 1
+        title = "스캔 표" if is_image else "본문 표"
+        content = json.dumps({"tables": [{"title": title, "headers": ["항목", "값"], "rows": [["a", "1"]]}], "markdown": "", "summary": ""})
+        return httpx.Response(200, json=completion(content))
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_pdf_tables(_make_scanned_pdf(2, layout_pdf([ragged_page])), "gpt-4o", detail="low")
+        return result
+
+    result = asyncio.run(run())
+
+    assert result["success"] is True
+    assert max_in_flight >= 2
+    assert len(requests) == 3
+    assert result["image_pages"] == [2, 3] and result["llm_pages"] == [1]
+    assert [table["pages"] for table in result["tables"]] == [[1, 1], [2, 2], [3, 3]]
+    assert [table["title"] for table in result["tables"]] == ["본문 표", "스캔 표", "스캔 표"]
+    assert result["chunk_count"] == 3
+    assert result["estimate"]["image_tokens"] > 0
+
+def test_rendered_pages_are_cached(mock_openai, completion):
+    """다시 시도할 때 스캔 페이지를 다시 렌더링하지 않고, 페이지 이미지는 결과 캐시가 아닌 렌더링 캐시에 두는지 확인합니다."""
+    result_cache._result_cache = result_cache.ResultCache()
+    pdf_raster._raster_cache = RasterCache()
+    rendered = []
+    original_render_page = table_extractor.render_page
+
+    def counting_render_page(file_content, page_index, detail):
+        rendered.append(page_index)
+        return original_render_page(file_content, page_index, detail)
+
+    responses = iter([
+        httpx.Response(200, json=completion("표 없음")),
+        httpx.Response(200, json=completion(json.dumps({"tables": [], "markdown": "", "summary": ""})))
+    ])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return next(responses)
+
+    async def run():
+        mock_openai(handler)
+        extractor = TableExtractor()
+        pdf = _make_scanned_pdf(1)
+        first = await extractor.extract_pdf_tables(pdf, "gpt-4o")
+        second = await extractor.extract_pdf_tables(pdf, "gpt-4o")
+        return first, second
+
+    table_extractor.render_page = counting_render_page
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        table_extractor.render_page = original_render_page
+
+    assert first["success"] is False and first["failed_pages"][0]["page"] == 1
+    assert second["success"] is True
+    assert rendered == [0]
+    assert pdf_raster.get_raster_cache().stats()["entries"] == 1
+    assert result_cache.get_result_cache().stats()["memory_bytes"] < pdf_raster.get_raster_cache().stats()["bytes"]
+
+def test_raster_cache_is_size_bounded():
+    """렌더링 캐시가 용량을 넘으면 가장 오래 쓰지 않은 페이지 이미지부터 버리는지 확인합니다."""
+    cache = RasterCache(max_bytes=25)
+    cache.set("a", b"a" * 10)
+    cache.set("b", b"b" * 10)
+    assert cache.get("a") is not None
+    cache.set("c", b"c" * 10)
+    cache.set("huge", b"h" * 26)
+
+    assert cache.get("b") is None and cache.get("huge") is None
+    assert cache.get("a") == b"a" * 10 and cache.get("c") == b"c" * 10
+    assert cache.stats()["bytes"] == 20
+
+if __name__ == "__main__":
+    print("🚀 스캔 PDF 표 추출 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
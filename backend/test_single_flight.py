@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+동일 요청 합치기(single-flight) 테스트 스크립트
+"""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+import httpx
+import pytest
+import main
+import result_cache
+import token_estimator
+from single_flight import SingleFlight
+from background_processor import BackgroundProcessor
+
+def test_concurrent_calls_share_one_execution():
+    """동시에 들어온 같은 키의 요청이 한 번만 실행되는지 확인합니다."""
+    async def run():
+        group = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return {"success": True, "tables": []}
+
+        results = await asyncio.gather(*[group.do("same-key", work) for _ in range(5)])
+        other = await group.do("other-key", work)
+        return calls, results, other, group.stats()
+
+    calls, results, other, stats = asyncio.run(run())
+    print(f"   실행 횟수: {calls}, 통계: {stats}")
+    assert calls == 2
+    assert all(r["success"] for r in results)
+    assert sum(1 for r in results if r.get("coalesced")) == 4
+    assert "coalesced" not in other
+    assert stats["inflight"] == 0
+
+def test_results_are_independent_copies():
+    """합류한 호출자들이 서로의 결과를 수정해도 영향이 없는지 확인합니다."""
+    async def run():
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return {"tables": [{"table_id": "table_1"}]}
+
+        return await asyncio.gather(group.do("key", work), group.do("key", work))
+
+    first, second = asyncio.run(run())
+    first["tables"].append({"table_id": "table_2"})
+    assert len(second["tables"]) == 1
+
+def test_cancelling_all_waiters_cancels_work():
+    """모든 호출자가 취소되면 실제 작업도 취소되는지 확인합니다."""
+    async def run():
+        group = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(group.do("key", work))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        return group.stats()
+
+    stats = asyncio.run(run())
+    assert stats["inflight"] == 0
+
+def test_background_submissions_coalesce():
+    """백그라운드 작업 제출 시 동일 작업이 큐에 한 번만 들어가는지 확인합니다."""
+    async def run():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            processor = BackgroundProcessor(Path(temp_dir), max_workers=1)
+            first = await processor.submit_table_extraction_task(b"same document", "scan.png", "gpt-4o")
+            second = await processor.submit_table_extraction_task(b"same document", "scan.png", "gpt-4o")
+            third = await processor.submit_table_extraction_task(b"same document", "scan.png", "gpt-4o-mini")
+            return processor, first, second, third, processor.queue.stats()
+
+    processor, first, second, third, queue_stats = asyncio.run(run())
+    # 합류한 작업은 대표 작업이 끝날 때까지 임대된 상태로 큐에 기록됨
+    assert queue_stats["queued"] == 2 and queue_stats["leased"] == 1
+    assert processor.tasks[second]["coalesced_with"] == first
+    assert "coalesced_with" not in processor.tasks[third]
+    assert processor.coalesced_tasks[first] == [second]
+
+def test_tenants_do_not_share_table_extraction(mock_openai, completion, layout_pdf, ragged_page):
+    """예산을 다 쓴 테넌트는 다른 테넌트가 진행 중인 같은 문서 추출에 합류하지 못하고 429를 받는지 확인합니다."""
+    result_cache._result_cache = result_cache.ResultCache()
+    token_estimator._token_budget = token_estimator.TokenBudget(tenant_budget=100_000)
+    token_estimator._token_budget.record("spent", 100_000)
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.2)
+        content = json.dumps({"tables": [{"title": "성장률", "headers": ["항목", "값"], "rows": [["매출", "10%"]]}], "markdown": "", "summary": ""})
+        return httpx.Response(200, json=completion(content))
+
+    async def run():
+        mock_openai(handler)
+        pdf = layout_pdf([ragged_page])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            async def extract(tenant_id: str) -> httpx.Response:
+                return await client.post("/extract-tables", files={"file": ("report.pdf", pdf, "application/pdf")},
+                                         headers={"X-Tenant-ID": tenant_id})
+
+            return await asyncio.gather(extract("active"), extract("spent"))
+
+    try:
+        active, spent = asyncio.run(run())
+    finally:
+        token_estimator._token_budget = None
+
+    assert active.status_code == 200 and active.json()["success"] is True
+    assert spent.status_code == 429
+    assert len(requests) == 1
+
+if __name__ == "__main__":
+    print("🚀 동일 요청 합치기 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
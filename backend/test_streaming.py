@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+SSE 스트리밍 및 증분 표 JSON 파서 테스트 스크립트
+"""
+
+import asyncio
+import io
+import json
+import os
+import httpx
+from PIL import Image, ImageDraw
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+
+from streaming import IncrementalTableParser, format_sse
+from table_extractor import TableExtractor
+
+RESPONSE_JSON = json.dumps({
+    "tables": [
+        {"table_id": "table_1", "title": "매출 {분기}", "headers": ["분기", "금액"], "rows": [["1Q", "100"], ["2Q", "\"200\""]]},
+        {"title": "비용", "headers": ["항목"], "rows": [["인건비]"]]}
+    ],
+    "markdown": "| 분기 | 금액 |",
+    "summary": "표 2개"
+}, ensure_ascii=False)
+
+def _sse_chunk(content: str = None, finish_reason: str = None) -> bytes:
+    """chat.completions 스트리밍 조각을 SSE 바이트로 만듭니다."""
+    delta = {"content": content} if content is not None else {}
+    chunk = {
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+def test_parser_emits_tables_as_they_close():
+    """한 글자씩 들어와도 표 객체가 닫히는 시점에 바로 나오는지 확인합니다."""
+    parser = IncrementalTableParser()
+    text = "```json\n" + RESPONSE_JSON + "\n```"
+    emitted_at = []
+    for index, char in enumerate(text):
+        for table in parser.feed(char):
+            emitted_at.append((index, table))
+
+    assert [table["title"] for _, table in emitted_at] == ["매출 {분기}", "비용"]
+    # 첫 번째 표는 두 번째 표가 시작되기 전에 나와야 함
+    assert emitted_at[0][0] < text.index('"비용"')
+    assert emitted_at[0][1]["rows"][1] == ["2Q", "\"200\""]
+    assert emitted_at[1][1]["table_id"] == "table_2"
+    assert parser.finished
+
+def test_format_sse():
+    """SSE 메시지 형식을 확인합니다."""
+    assert format_sse("table", {"title": "표"}) == 'event: table\ndata: {"title": "표"}\n\n'
+
+def test_stream_tables_from_image(mock_openai):
+    """모델 스트림에서 표 이벤트가 done보다 먼저, 스트림 도중에 나오는지 확인합니다."""
+    chunks = [RESPONSE_JSON[i:i + 20] for i in range(0, len(RESPONSE_JSON), 20)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        assert body["stream"] is True
+
+        async def content():
+            for chunk in chunks:
+                await asyncio.sleep(0.01)
+                yield _sse_chunk(chunk)
+            yield _sse_chunk(finish_reason="stop")
+            yield b"data: [DONE]\n\n"
+
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=content())
+
+    async def run():
+        mock_openai(handler)
+        buffer = io.BytesIO()
+        image = Image.new("RGB", (800, 600), "white")
+        # 빈 페이지로 판정되지 않도록 표 괘선을 그림
+        draw = ImageDraw.Draw(image)
+        for y in range(100, 501, 100):
+            draw.line((100, y, 700, y), fill="black", width=2)
+        image.save(buffer, format="PNG")
+
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        events = []
+        async for event, data in TableExtractor().stream_tables_from_image(buffer.getvalue(), ".png", "gpt-4o"):
+            events.append((event, data, loop.time() - started_at))
+        return events
+
+    events = asyncio.run(run())
+    names = [event for event, _, _ in events]
+    print(f"   이벤트 순서: {names}")
+    assert names == ["table", "table", "done"]
+    # 첫 표는 전체 스트림이 끝나기 전에 도착
+    assert events[0][2] < events[-1][2] - 0.02
+    result = events[-1][1]
+    assert result["success"] is True
+    assert result["table_count"] == 2
+    assert result["usage"]["estimated"] is True
+    assert result["estimate"]["image_size"] == [800, 600]
+
+if __name__ == "__main__":
+    print("🚀 스트리밍 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
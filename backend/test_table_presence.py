@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+페이지 표 존재 사전 필터(API 호출 생략) 테스트 스크립트
+"""
+
+import asyncio
+import io
+import os
+import httpx
+from PIL import Image, ImageDraw
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from table_extractor import TableExtractor
+from table_presence import image_table_score, presence_threshold, text_table_score
+
+def _page_image(draw_page) -> bytes:
+    """Letter 300 DPI 크기 흰 페이지에 그림을 그린 PNG를 만듭니다."""
+    image = Image.new("RGB", (2550, 3300), "white")
+    draw_page(ImageDraw.Draw(image))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_text_scores_separate_tables_from_prose():
+    """열 간격/숫자가 많은 텍스트는 높은 점수, 문장으로 된 본문은 낮은 점수인지 확인합니다."""
+    table = "지역\t상반기\t하반기\n서울\t100\t120\n부산\t90\t95\n대구\t85\t70"
+    flattened = "Region Sales Cost\nSeoul 100 80\nBusan 90 70\nDaegu 85 60"
+    prose = (
+        "The committee met on Tuesday to review the proposed budget for the coming year.\n"
+        "Members discussed several options for reducing costs without affecting services.\n"
+        "올해 사업 계획은 지난해 성과를 바탕으로 고객 경험을 개선하는 데 중점을 두었습니다."
+    )
+
+    threshold = presence_threshold()
+    assert text_table_score(table) >= threshold
+    assert text_table_score(flattened) >= threshold
+    assert text_table_score(prose) < threshold
+    assert text_table_score("") == 0.0
+
+def test_image_scores_use_projection_profiles():
+    """괘선 격자 이미지는 높은 점수, 본문 줄과 빈 페이지는 낮은 점수인지 확인합니다."""
+    def grid(draw):
+        for y in range(1400, 2401, 200):
+            draw.line((300, y, 2100, y), fill="black", width=6)
+        for x in (300, 900, 1500, 2100):
+            draw.line((x, 1400, x, 2400), fill="black", width=6)
+
+    def prose(draw):
+        for line in range(40):
+            for word in range(12):
+                draw.rectangle((300 + word * 150, 300 + line * 60, 400 + word * 150, 325 + line * 60), fill="black")
+
+    threshold = presence_threshold()
+    assert image_table_score(_page_image(grid)) >= threshold
+    assert image_table_score(_page_image(prose)) < threshold
+    assert image_table_score(_page_image(lambda draw: None)) == 0.0
+
+def test_prose_pages_skip_llm_and_report_savings(mock_openai, layout_pdf, prose_page):
+    """표가 없는 페이지는 API를 호출하지 않고, 생략한 호출 수와 토큰을 보고하는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_pdf_tables(layout_pdf([prose_page, prose_page]), "gpt-4o")
+        return result
+
+    result = asyncio.run(run())
+
+    assert requests == []
+    assert result["success"] is True and result["table_count"] == 0
+    assert result["prefilter"]["skipped_pages"] == [1, 2]
+    assert result["prefilter"]["saved_calls"] == 2
+    assert result["prefilter"]["saved_tokens"] > 0
+
+def test_filter_can_be_disabled(mock_openai, completion, layout_pdf, prose_page):
+    """TABLE_PRESENCE_FILTER=false면 모든 페이지를 API로 보내는지 확인합니다."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=completion('{"tables": [], "markdown": "", "summary": ""}'))
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_pdf_tables(layout_pdf([prose_page]), "gpt-4o")
+        return result
+
+    os.environ["TABLE_PRESENCE_FILTER"] = "false"
+    try:
+        result = asyncio.run(run())
+    finally:
+        del os.environ["TABLE_PRESENCE_FILTER"]
+
+    assert len(requests) == 1
+    assert result["prefilter"]["enabled"] is False and result["prefilter"]["saved_calls"] == 0
+
+if __name__ == "__main__":
+    print("🚀 표 존재 사전 필터 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
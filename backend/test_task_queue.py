@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SQLite 영속 작업 큐(임대/가시성 제한 시간, 재시작 복원) 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from background_processor import BackgroundProcessor
+from task_queue import TaskQueue
+
+def test_payloads_are_shared_and_removed_after_ack():
+    """같은 파일은 한 번만 저장되고, 마지막 작업이 끝나면 파일도 지워지는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        queue = TaskQueue(Path(temp_dir) / "queue.db")
+        queue.enqueue("a", "image_analysis", b"same bytes", {"status": "pending"}, "a.png")
+        queue.enqueue("b", "image_analysis", b"same bytes", {"status": "pending"}, "b.png")
+        assert len(list(queue.payload_dir.glob("*/*"))) == 1
+        assert queue.dequeue()["task_id"] == "a"
+
+        second = queue.dequeue()
+        assert second["task_id"] == "b" and second["file_content"] == b"same bytes"
+        assert queue.dequeue() is None
+
+        queue.ack("a")
+        assert len(list(queue.payload_dir.glob("*/*"))) == 1
+        queue.ack("b")
+        assert list(queue.payload_dir.glob("*/*")) == []
+        assert queue.stats()["queued"] == 0 and queue.stats()["leased"] == 0
+        queue.close()
+
+def test_dequeue_by_type_and_return_lease():
+    """지정한 유형의 작업만 가져오고, 돌려놓은 작업은 시도 횟수 없이 다시 가져갈 수 있는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        queue = TaskQueue(Path(temp_dir) / "queue.db")
+        queue.enqueue("image", "image_analysis", b"image", {}, "a.png")
+        queue.enqueue("table", "table_extraction", b"doc", {}, "b.pdf")
+        assert queue.dequeue([]) is None
+        assert queue.dequeue(["table_extraction"])["task_id"] == "table"
+        assert queue.dequeue(["table_extraction"]) is None
+
+        queue.return_lease("table")
+        again = queue.dequeue(["table_extraction"])
+        assert again["task_id"] == "table" and again["attempts"] == 1
+        assert queue.dequeue()["task_id"] == "image"
+        queue.close()
+
+def test_expired_leases_become_visible_again():
+    """임대가 만료된 작업은 다시 가져갈 수 있고, 임대를 갱신하면 숨겨진 상태가 유지되는지 확인합니다."""
+    os.environ["BACKGROUND_VISIBILITY_TIMEOUT"] = "0.2"
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue = TaskQueue(Path(temp_dir) / "queue.db")
+            queue.enqueue("a", "table_extraction", b"doc", {}, "a.pdf")
+            assert queue.dequeue()["attempts"] == 1
+            time.sleep(0.1)
+            assert queue.extend_leases() == 1
+            time.sleep(0.15)
+            assert queue.dequeue() is None
+
+            time.sleep(0.1)
+            assert queue.dequeue()["attempts"] == 2
+            queue.close()
+    finally:
+        del os.environ["BACKGROUND_VISIBILITY_TIMEOUT"]
+
+def test_unfinished_tasks_survive_restart(mock_openai, completion, fresh_services, numbered_image):
+    """처리 중이거나 대기 중이던 작업이 다시 시작한 프로세서에서 끝까지 처리되는지 확인합니다."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=completion("이미지 설명"))
+
+    async def run(results_dir: Path):
+        # 첫 프로세서: 작업 두 개를 받고 하나를 처리하던 중 종료됨 (start/stop 없이 버려짐)
+        crashed = BackgroundProcessor(results_dir, max_workers=1)
+        in_progress = await crashed.submit_image_analysis_task(numbered_image(1), "image_1.png")
+        pending = await crashed.submit_image_analysis_task(numbered_image(2), "image_2.png")
+        assert crashed.queue.dequeue()["task_id"] == in_progress
+        crashed.queue.close()
+
+        mock_openai(handler)
+        restarted = BackgroundProcessor(results_dir, max_workers=2)
+        await restarted.start()
+        task_ids = [in_progress, pending]
+        for _ in range(100):
+            stats = restarted.queue.stats()
+            if stats["queued"] == stats["leased"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        await restarted.stop()
+        return task_ids, stats
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results_dir = Path(temp_dir)
+        task_ids, stats = asyncio.run(run(results_dir))
+
+        for task_id in task_ids:
+            with open(results_dir / f"task_status_{task_id}.json", encoding="utf-8") as f:
+                assert json.load(f)["status"] == "completed"
+        assert stats["queued"] == 0 and stats["leased"] == 0
+        assert list((results_dir / "payloads").glob("*/*")) == []
+
+def test_operations_stay_fast_with_deep_queue():
+    """작업이 수만 개 쌓여 있어도 추가/가져오기가 1ms 안에 끝나는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        queue = TaskQueue(Path(temp_dir) / "queue.db")
+        task_info = {"status": "pending", "filename": "scan.png"}
+        for number in range(20000):
+            queue.enqueue(f"fill-{number}", "image_analysis", b"payload", task_info, "scan.png")
+
+        started = time.perf_counter()
+        for number in range(500):
+            queue.enqueue(f"timed-{number}", "image_analysis", b"payload", task_info, "scan.png")
+        enqueue_seconds = (time.perf_counter() - started) / 500
+
+        started = time.perf_counter()
+        for _ in range(500):
+            queue.ack(queue.dequeue()["task_id"])
+        dequeue_seconds = (time.perf_counter() - started) / 500
+        queue.close()
+
+    print(f"   추가: {enqueue_seconds * 1000:.3f}ms, 가져오기+완료: {dequeue_seconds * 1000:.3f}ms")
+    assert enqueue_seconds < 0.001
+    assert dequeue_seconds < 0.001
+
+if __name__ == "__main__":
+    print("🚀 영속 작업 큐 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
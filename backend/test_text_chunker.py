@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+긴 문서 텍스트 청크 분할 및 청크별 표 추출 병합 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from table_extractor import TableExtractor
+from text_chunker import PAGE_SEPARATOR, chunk_text
+
+def _page(number: int, lines: int = 40) -> str:
+    """표 행이 들어 있는 페이지 텍스트를 만듭니다."""
+    return "\n".join(f"{number}페이지 {line}행 | 값 {line * number}" for line in range(lines))
+
+def test_chunks_follow_page_boundaries():
+    """청크가 페이지 경계에서 나뉘고 한도를 넘지 않으며 원문을 빠짐없이 덮는지 확인합니다."""
+    text = PAGE_SEPARATOR.join(_page(number) for number in range(1, 11))
+    chunks = chunk_text(text, 1500, "gpt-4o")
+
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 1500 for chunk in chunks)
+    # 각 청크는 페이지 중간이 아닌 페이지 시작에서 시작
+    assert all(chunk["text"].startswith(f"{chunk['start_page']}페이지 0행") for chunk in chunks)
+    assert chunks[0]["start_page"] == 1 and chunks[-1]["end_page"] == 10
+    assert "".join(text[chunk["start"]:chunk["end"]] for chunk in chunks) == text
+
+def test_oversized_page_is_split_by_lines():
+    """한 페이지가 한도를 넘으면 줄 단위로 나뉘는지 확인합니다."""
+    text = _page(1, lines=400)
+    chunks = chunk_text(text, 500, "gpt-4o")
+
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 500 for chunk in chunks)
+    assert all(chunk["text"].startswith("1페이지") for chunk in chunks)
+    assert all(chunk["start_page"] == chunk["end_page"] == 1 for chunk in chunks)
+
+def test_merge_table_continued_across_chunks():
+    """청크 경계에서 이어지는 표가 하나로 병합되고 반복된 헤더 행은 제거되는지 확인합니다."""
+    extractor = TableExtractor()
+    chunks = [
+        {"index": 0, "start_page": 1, "end_page": 2},
+        {"index": 1, "start_page": 3, "end_page": 4},
+        {"index": 2, "start_page": 5, "end_page": 5}
+    ]
+    usage = {"prompt_tokens": 90, "completion_tokens": 10, "total_tokens": 100}
+    results = [
+        {"success": True, "summary": "매출표", "usage": usage, "tables": [
+            {"table_id": "table_1", "title": "요약", "headers": ["항목"], "rows": [["A"]], "pages": [1, 2]},
+            {"table_id": "table_2", "title": "매출", "headers": ["분기", "금액"], "rows": [["1Q", "100"]], "pages": [1, 2]}
+        ]},
+        {"success": True, "summary": "", "usage": usage, "tables": [
+            {"table_id": "table_1", "title": "", "headers": [], "rows": [["분기", "금액"], ["2Q", "200"]], "pages": [3, 4]}
+        ]},
+        RuntimeError("연결 실패")
+    ]
+    # 헤더 없는 이어진 표는 열 수로 판단하되, 첫 행이 헤더와 같으면 제거
+    results[1]["tables"][0]["headers"] = []
+    merged = extractor._merge_chunk_results(chunks, results, "gpt-4o")
+
+    assert merged["success"] is True
+    assert merged["chunk_count"] == 3
+    assert [table["table_id"] for table in merged["tables"]] == ["table_1", "table_2"]
+    assert merged["tables"][1]["rows"] == [["1Q", "100"], ["2Q", "200"]]
+    assert merged["tables"][1]["pages"] == [1, 4]
+    assert merged["usage"]["total_tokens"] == 200
+    assert merged["failed_chunks"][0]["index"] == 2
+
+def test_long_text_is_extracted_in_parallel_chunks(mock_openai):
+    """긴 텍스트가 잘리지 않고 여러 청크 요청으로 동시에 추출되는지 확인합니다."""
+    os.environ["TABLE_CHUNK_TOKENS"] = "1500"
+    prompts = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        body = json.loads(request.content)
+        prompts.append(body["messages"][-1]["content"])
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        content = json.dumps({"tables": [{"title": "표", "headers": ["행", "값"], "rows": [[str(len(prompts)), "1"]]}], "markdown": "", "summary": ""})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        })
+
+    text = PAGE_SEPARATOR.join(_page(number) for number in range(1, 11))
+
+    async def run():
+        mock_openai(handler)
+        result = await TableExtractor().extract_tables_with_gpt5(text, "gpt-4o")
+        return result
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        del os.environ["TABLE_CHUNK_TOKENS"]
+
+    assert result["success"] is True
+    assert result["chunk_count"] == len(prompts) > 1
+    assert max_in_flight > 1
+    # 마지막 페이지 내용까지 모델에 전달됨 (4000자 잘림 없음)
+    assert any("10페이지 39행" in prompt for prompt in prompts)
+    # 같은 헤더의 표는 청크 경계를 넘어 하나로 병합됨
+    assert result["table_count"] == 1
+    assert len(result["tables"][0]["rows"]) == len(prompts)
+    assert result["estimate"]["chunks"] == len(prompts)
+
+if __name__ == "__main__":
+    print("🚀 텍스트 청크 분할 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Vision 토큰/비용 추정 및 토큰 예산 테스트 스크립트
+"""
+
+import base64
+import io
+import time
+import PyPDF2
+from PIL import Image
+import token_estimator
+from token_estimator import (
+    TokenBudget,
+    estimate_image_tokens,
+    estimate_image_request,
+    estimate_pdf_request,
+    estimate_request_tokens,
+    estimate_text_tokens
+)
+
+def _make_image(width: int, height: int) -> bytes:
+    """테스트용 PNG 이미지를 생성합니다."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_image_tokens_follow_tile_formula():
+    """detail과 해상도에 따라 512px 타일 수로 토큰이 계산되는지 확인합니다."""
+    assert estimate_image_tokens(4000, 3000, "low") == 85
+    # 1024x1024 -> 768x768 -> 2x2 타일
+    assert estimate_image_tokens(1024, 1024, "high") == 85 + 170 * 4
+    # 2048x4096 -> 1024x2048 -> 768x1536 -> 2x3 타일
+    assert estimate_image_tokens(2048, 4096, "high") == 85 + 170 * 6
+    # 작은 이미지는 확대하지 않음 -> 1타일
+    assert estimate_image_tokens(300, 200, "auto") == 85 + 170
+    # gpt-4o-mini는 타일당 토큰이 다름
+    assert estimate_image_tokens(1024, 1024, "high", "gpt-4o-mini") == 2833 + 5667 * 4
+
+def test_image_request_uses_decoded_dimensions():
+    """이미지 헤더에서 읽은 크기로 요청 추정치가 계산되는지 확인합니다."""
+    estimate = estimate_image_request(_make_image(4000, 3000), "표를 추출해주세요.", "high", max_tokens=1000)
+    print(f"   추정치: {estimate}")
+    assert estimate["image_size"] == [4000, 3000]
+    assert estimate["image_tokens"] == 765
+    assert estimate["total_tokens"] == estimate["prompt_tokens"] + 765 + 1000
+    assert estimate["estimated_cost_usd"] > 0
+
+def test_text_tokens_heuristic():
+    """tiktoken이 없을 때 한글/영문 근사치를 확인합니다."""
+    if token_estimator.tiktoken is not None:
+        print("   tiktoken 설치됨: 근사치 테스트 건너뜀")
+        return
+    assert estimate_text_tokens("a" * 400) == 100
+    assert estimate_text_tokens("가" * 30) == 20
+    assert estimate_text_tokens("") == 0
+
+def test_request_tokens_read_data_url_image():
+    """chat.completions 요청의 data URL 이미지 크기가 추정에 반영되는지 확인합니다."""
+    data_url = "data:image/png;base64," + base64.b64encode(_make_image(2048, 4096)).decode("utf-8")
+    request = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "user", "content": [
+                {"type": "image_url", "image_url": {"url": data_url, "detail": "high"}}
+            ]}
+        ],
+        "max_tokens": 100
+    }
+    assert estimate_request_tokens(request) == 4 + 85 + 170 * 6 + 100
+
+def test_pdf_request_counts_pages():
+    """PDF 추정치가 페이지마다 페이지 이미지 토큰을 더하는지 확인합니다."""
+    writer = PyPDF2.PdfWriter()
+    writer.add_blank_page(612, 792)
+    writer.add_blank_page(612, 792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    estimate = estimate_pdf_request(buffer.getvalue(), "요약해주세요.")
+    assert estimate["page_count"] == 2
+    assert estimate["image_tokens"] == 2 * 765
+
+def test_request_budget_downgrades_or_rejects():
+    """요청당 한도를 넘으면 detail을 낮추거나 거절하는지 확인합니다."""
+    image = _make_image(4000, 3000)
+    high = estimate_image_request(image, "분석", "high", max_tokens=4000)
+    low = estimate_image_request(image, "분석", "low", max_tokens=4000)
+    limit = low["total_tokens"] + 100
+
+    budget = TokenBudget(max_request_tokens=limit, policy="downgrade")
+    decision = budget.check(None, high, low)
+    assert decision["allowed"] and decision["downgraded"]
+    assert decision["estimate"]["detail"] == "low"
+
+    budget = TokenBudget(max_request_tokens=limit, policy="reject")
+    decision = budget.check(None, high, low)
+    assert not decision["allowed"]
+    assert decision["limit"] == "request"
+    assert budget.stats()["rejected"] == 1
+
+def test_tenant_budget_window():
+    """테넌트 사용량이 예산을 넘으면 거절되고, 기간이 지나면 다시 허용되는지 확인합니다."""
+    budget = TokenBudget(tenant_budget=10000, window_seconds=0.2, policy="reject")
+    estimate = {"total_tokens": 3000}
+    budget.record("tenant-a", 8000)
+
+    decision = budget.check("tenant-a", estimate)
+    assert not decision["allowed"]
+    assert decision["limit"] == "tenant"
+    # 다른 테넌트와 dry-run 판정은 영향 없음
+    assert budget.check("tenant-b", estimate)["allowed"]
+    budget.check("tenant-a", estimate, dry_run=True)
+    assert budget.stats()["rejected"] == 1
+
+    time.sleep(0.3)
+    assert budget.check("tenant-a", estimate)["allowed"]
+
+if __name__ == "__main__":
+    print("🚀 토큰 추정/예산 테스트 시작")
+
+    print("\n1. 이미지 타일 토큰 계산 테스트...")
+    test_image_tokens_follow_tile_formula()
+
+    print("\n2. 이미지 요청 추정 테스트...")
+    test_image_request_uses_decoded_dimensions()
+
+    print("\n3. 텍스트 토큰 근사치 테스트...")
+    test_text_tokens_heuristic()
+
+    print("\n4. 요청 파라미터 토큰 추정 테스트...")
+    test_request_tokens_read_data_url_image()
+
+    print("\n5. PDF 페이지 토큰 추정 테스트...")
+    test_pdf_request_counts_pages()
+
+    print("\n6. 요청당 예산 다운그레이드/거절 테스트...")
+    test_request_budget_downgrades_or_rejects()
+
+    print("\n7. 테넌트 예산 기간 테스트...")
+    test_tenant_budget_window()
+
+    print("\n🎉 모든 테스트 완료!")
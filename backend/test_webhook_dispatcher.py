@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+작업 완료 콜백(재시도, 실패 저장소, 서명, 묶어 보내기) 테스트 스크립트
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from email.utils import formatdate
+from pathlib import Path
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from background_processor import BackgroundProcessor
+from webhook_dispatcher import WebhookDispatcher, configure_webhook_dispatcher, is_valid_callback_url, retry_after_seconds, sign_payload
+
+class _Receiver:
+    """처음 fail_count개 요청은 status로 응답하고, 받은 본문과 헤더를 기록하는 가짜 콜백 수신 서버"""
+
+    def __init__(self, fail_count: int = 0, status: int = 503):
+        self.fail_count = fail_count
+        self.status = status
+        self.requests = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if len(self.requests) <= self.fail_count:
+            return httpx.Response(self.status)
+        return httpx.Response(200)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def bodies(self) -> list:
+        return [json.loads(request.content) for request in self.requests]
+
+def _dispatcher(receiver: _Receiver, dead_letter_dir: Path = None, **options) -> WebhookDispatcher:
+    """백오프 대기 없이 바로 재시도하는 디스패처"""
+    options.setdefault("backoff_base", 0.0)
+    return WebhookDispatcher(dead_letter_dir, http_client=receiver.client(), **options)
+
+def test_retries_until_delivered():
+    """5xx 응답은 재시도하고, 재시도해도 같은 전송 ID를 쓰는지 확인합니다."""
+    receiver = _Receiver(fail_count=2)
+
+    async def run():
+        dispatcher = _dispatcher(receiver, max_retries=3)
+        dispatcher.notify("http://client.test/hook", {"event": "task.completed", "task_id": "a"})
+        await dispatcher.close()
+        return dispatcher.stats()
+
+    stats = asyncio.run(run())
+
+    assert len(receiver.requests) == 3
+    assert len({request.headers["x-webhook-id"] for request in receiver.requests}) == 1
+    assert stats["delivered"] == 1 and stats["retries"] == 2 and stats["dead_lettered"] == 0
+
+def test_failed_callbacks_are_dead_lettered_and_retried():
+    """재시도를 다 쓰거나 4xx로 거절된 콜백은 실패 저장소에 남고, 다시 보내면 지워지는지 확인합니다."""
+    receiver = _Receiver(fail_count=4)
+
+    async def run(dead_letter_dir: Path):
+        dispatcher = _dispatcher(receiver, dead_letter_dir, max_retries=2)
+        dispatcher.notify("http://client.test/hook", {"event": "task.failed", "task_id": "a"})
+        await dispatcher.drain()
+        # 4xx는 다시 보내도 같은 결과이므로 재시도하지 않음
+        receiver.status = 404
+        dispatcher.notify("http://client.test/other", {"event": "task.completed", "task_id": "b"})
+        await dispatcher.drain()
+        letters = dispatcher.dead_letters()
+        requests_before_retry = len(receiver.requests)
+
+        retried = await dispatcher.retry_dead_letters()
+        await dispatcher.close()
+        return letters, requests_before_retry, retried, dispatcher.dead_letters()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        letters, requests_before_retry, retried, remaining = asyncio.run(run(Path(temp_dir)))
+
+    assert requests_before_retry == 4
+    assert sorted(letter["payload"]["task_id"] for letter in letters) == ["a", "b"]
+    assert all(letter["error"] for letter in letters)
+    assert retried == 2 and remaining == []
+    assert len(receiver.requests) == 6
+
+def test_payload_signature():
+    """비밀 키가 있으면 수신 측이 타임스탬프와 본문으로 서명을 검증할 수 있는지 확인합니다."""
+    receiver = _Receiver()
+
+    async def run():
+        dispatcher = _dispatcher(receiver, secret="shared-secret")
+        dispatcher.notify("http://client.test/hook", {"event": "task.completed", "task_id": "a"})
+        await dispatcher.close()
+
+    asyncio.run(run())
+
+    request = receiver.requests[0]
+    expected = sign_payload("shared-secret", request.headers["x-webhook-timestamp"], request.content)
+    assert request.headers["x-webhook-signature"] == expected
+    assert sign_payload("wrong-secret", request.headers["x-webhook-timestamp"], request.content) != expected
+
+def test_batches_callbacks_per_url():
+    """묶어 보내기를 켜면 같은 URL로 가는 알림이 한 요청으로 합쳐지는지 확인합니다."""
+    receiver = _Receiver()
+
+    async def run():
+        dispatcher = _dispatcher(receiver, batch_window=0.1, batch_max=3)
+        for number in range(4):
+            dispatcher.notify("http://client.test/a", {"event": "task.completed", "task_id": f"a{number}"})
+        dispatcher.notify("http://client.test/b", {"event": "task.completed", "task_id": "b0"})
+        # 최대 개수에 도달한 묶음은 바로 보냄
+        await asyncio.sleep(0.02)
+        sent_early = len(receiver.requests)
+        await asyncio.sleep(0.2)
+        await dispatcher.close()
+        return sent_early, dispatcher.stats()
+
+    sent_early, stats = asyncio.run(run())
+    batches = {(str(request.url), body["count"]): [event["task_id"] for event in body["events"]]
+               for request, body in zip(receiver.requests, receiver.bodies())}
+
+    assert sent_early == 1
+    assert batches == {
+        ("http://client.test/a", 3): ["a0", "a1", "a2"],
+        ("http://client.test/a", 1): ["a3"],
+        ("http://client.test/b", 1): ["b0"]
+    }
+    assert stats["batches"] == 3 and stats["delivered"] == 3
+
+def test_internal_callback_urls_are_rejected():
+    """루프백, 링크 로컬, 사설 주소나 조회되지 않는 내부 호스트로는 콜백을 보내지 않는지 확인합니다."""
+    internal = [
+        "http://localhost:8000/hook",
+        "http://127.0.0.1:6379",
+        "http://169.254.169.254/latest/meta-data",
+        "http://10.0.0.5/hook",
+        "http://192.168.1.10/hook",
+        "http://[::1]/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "http://redis.invalid:6379",
+        "ftp://93.184.216.34/hook"
+    ]
+
+    async def run():
+        rejected = [url for url in internal if not await is_valid_callback_url(url)]
+        public = await is_valid_callback_url("https://93.184.216.34/hook")
+        os.environ["WEBHOOK_ALLOWED_HOSTS"] = "receiver.internal, 10.0.0.5"
+        try:
+            allowed = [await is_valid_callback_url(url) for url in ("http://receiver.internal/hook", "http://10.0.0.5/hook")]
+        finally:
+            del os.environ["WEBHOOK_ALLOWED_HOSTS"]
+        return rejected, public, allowed
+
+    rejected, public, allowed = asyncio.run(run())
+
+    assert rejected == internal
+    assert public is True
+    assert allowed == [True, True]
+
+def test_retry_after_http_date():
+    """Retry-After가 초 단위뿐 아니라 HTTP 날짜 형식이어도 그 시각까지 기다리는지 확인합니다."""
+    retry_at = formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= retry_after_seconds(retry_at) <= 30
+    assert retry_after_seconds("12") == 12
+    assert retry_after_seconds(formatdate(time.time() - 60, usegmt=True)) == 0
+    assert retry_after_seconds("soon") is None
+
+    dispatcher = WebhookDispatcher(None, backoff_base=0.0, backoff_max=60)
+    request = httpx.Request("POST", "http://client.test/hook")
+    error = httpx.HTTPStatusError("503", request=request, response=httpx.Response(503, headers={"Retry-After": retry_at}, request=request))
+    assert 25 <= dispatcher._backoff_delay(0, error) <= 30
+
+def test_background_tasks_call_callback_url(mock_openai, completion, fresh_services, numbered_image):
+    """백그라운드 작업이 끝나면 합류한 작업을 포함해 각 작업의 callback_url로 결과가 전달되는지 확인합니다."""
+    receiver = _Receiver()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=completion("이미지 설명"))
+
+    async def run(results_dir: Path):
+        dispatcher = configure_webhook_dispatcher(results_dir / "webhooks", receiver.client())
+        mock_openai(handler)
+        processor = BackgroundProcessor(results_dir, max_workers=1)
+        await processor.start()
+        leader = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png", callback_url="http://client.test/hook")
+        follower = await processor.submit_image_analysis_task(numbered_image(1), "image_1.png", callback_url="http://client.test/other")
+        silent = await processor.submit_image_analysis_task(numbered_image(2), "image_2.png")
+        for _ in range(100):
+            if all(processor.tasks[task_id]["status"] == "completed" for task_id in [leader, follower, silent]):
+                break
+            await asyncio.sleep(0.05)
+        await processor.stop()
+        await dispatcher.close()
+        return leader, follower
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        leader, follower = asyncio.run(run(Path(temp_dir)))
+
+    bodies = {body["task_id"]: body for body in receiver.bodies()}
+    assert set(bodies) == {leader, follower}
+    assert bodies[leader]["event"] == "task.completed" and bodies[leader]["status"] == "completed"
+    assert bodies[follower]["task"]["result"] == bodies[leader]["task"]["result"]
+
+if __name__ == "__main__":
+    print("🚀 작업 완료 콜백 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+백그라운드 워커 풀(동시 처리, 작업 유형별 제한, 실행 중 크기 변경) 테스트 스크립트
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from pathlib import Path
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import file_processor
+from background_processor import BackgroundProcessor
+from cpu_pool import cpu_executor_workers
+
+class _SlowApi:
+    """응답을 늦게 보내며 동시에 처리 중인 요청 수의 최댓값을 기록하는 가짜 API"""
+
+    def __init__(self, completion, delay: float = 0.3):
+        self.completion = completion
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return httpx.Response(200, json=self.completion("이미지 설명"))
+
+async def _run_tasks(processor: BackgroundProcessor, images: list, on_submitted=None):
+    """이미지마다 이미지 분석 작업을 제출하고 모두 끝날 때까지 기다립니다."""
+    await processor.start()
+    task_ids = [await processor.submit_image_analysis_task(image, f"image_{number}.png") for number, image in enumerate(images)]
+    if on_submitted:
+        await on_submitted()
+    while any(processor.tasks[task_id]["status"] in ("pending", "processing") for task_id in task_ids):
+        await asyncio.sleep(0.05)
+    await processor.stop()
+    return [processor.tasks[task_id] for task_id in task_ids]
+
+def test_workers_process_tasks_concurrently(mock_openai, completion, fresh_services, numbered_image):
+    """워커 수만큼 작업이 동시에 처리되는지 확인합니다."""
+    api = _SlowApi(completion)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as results_dir:
+            tasks = await _run_tasks(BackgroundProcessor(Path(results_dir), max_workers=3), [numbered_image(number) for number in range(6)])
+        return tasks
+
+    tasks = asyncio.run(run())
+
+    assert all(task["status"] == "completed" for task in tasks)
+    assert api.max_in_flight == 3
+
+def test_type_limit_caps_concurrency(mock_openai, completion, fresh_services, numbered_image):
+    """작업 유형별 동시 처리 제한이 워커 수보다 우선하는지 확인합니다."""
+    api = _SlowApi(completion)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as results_dir:
+            processor = BackgroundProcessor(Path(results_dir), max_workers=4, type_limits={"image_analysis": 2})
+            tasks = await _run_tasks(processor, [numbered_image(number) for number in range(4)])
+        return tasks
+
+    tasks = asyncio.run(run())
+
+    assert all(task["status"] == "completed" for task in tasks)
+    assert api.max_in_flight == 2
+
+def test_saturated_type_does_not_block_other_types(mock_openai, completion, fresh_services, numbered_image):
+    """한 유형이 동시 처리 제한에 걸려 있어도 남는 워커가 다른 유형의 작업을 바로 처리하는지 확인합니다."""
+    api = _SlowApi(completion)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as results_dir:
+            processor = BackgroundProcessor(Path(results_dir), max_workers=2, type_limits={"image_analysis": 1})
+            await processor.start()
+            task_ids = [await processor.submit_image_analysis_task(numbered_image(number), f"image_{number}.png") for number in range(3)]
+            task_ids.append(await processor.submit_table_extraction_task(numbered_image(9), "table.png"))
+            finished = []
+            while len(finished) < len(task_ids):
+                finished += [task_id for task_id in task_ids
+                             if task_id not in finished and processor.tasks[task_id]["status"] not in ("pending", "processing")]
+                await asyncio.sleep(0.02)
+            stats = processor.queue.stats()
+            await processor.stop()
+        return task_ids, finished, stats
+
+    task_ids, finished, stats = asyncio.run(run())
+
+    # 표 작업은 앞선 이미지 작업 두 개가 끝나기를 기다리지 않음
+    assert finished.index(task_ids[-1]) < 2
+    assert stats["queued"] == 0 and stats["leased"] == 0
+
+def test_resize_while_running(mock_openai, completion, fresh_services, numbered_image):
+    """실행 중에 워커를 늘리면 바로 동시 처리 수가 늘어나고, 잘못된 값은 거부되는지 확인합니다.
+    CPU 스레드 수를 바꾸면 이미지 전처리가 도는 공유 풀의 크기도 바뀌는지 확인합니다."""
+    api = _SlowApi(completion, delay=0.5)
+    stats = {}
+    preprocess_threads = []
+    preprocess_image = file_processor.preprocess_image
+
+    def recording_preprocess_image(*args):
+        preprocess_threads.append(threading.current_thread().name)
+        return preprocess_image(*args)
+
+    async def run():
+        mock_openai(api.handler)
+        with tempfile.TemporaryDirectory() as results_dir:
+            processor = BackgroundProcessor(Path(results_dir), max_workers=1, cpu_workers=1)
+
+            async def grow():
+                await asyncio.sleep(0.1)
+                stats["grown"] = await processor.resize(max_workers=4, cpu_workers=2)
+                try:
+                    await processor.resize(type_limits={"image_analysis": 0})
+                    stats["rejected"] = False
+                except ValueError:
+                    stats["rejected"] = True
+
+            tasks = await _run_tasks(processor, [numbered_image(number) for number in range(8)], grow)
+        return tasks
+
+    file_processor.preprocess_image = recording_preprocess_image
+    try:
+        tasks = asyncio.run(run())
+    finally:
+        file_processor.preprocess_image = preprocess_image
+    assert all(task["status"] == "completed" for task in tasks)
+    assert api.max_in_flight == 4
+    assert stats["grown"]["max_workers"] == 4 and stats["grown"]["running_workers"] == 4
+    assert stats["grown"]["cpu_workers"] == 2 and cpu_executor_workers() == 2
+    assert len(preprocess_threads) == 8 and all(name.startswith("cpu") for name in preprocess_threads)
+    assert stats["rejected"] is True
+
+if __name__ == "__main__":
+    print("🚀 백그라운드 워커 풀 테스트 시작")
+    # 공용 픽스처(conftest.py)를 쓰므로 pytest로 실행
+    raise SystemExit(pytest.main([__file__, "-v"]))
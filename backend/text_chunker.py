@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Any, List, Optional, AsyncIterator
+from token_estimator import estimate_text_tokens
+
+# 경계 우선순위: 페이지(폼피드) > 문단(빈 줄) > 줄
+PAGE_SEPARATOR = "\f"
+_BOUNDARY_PATTERNS = [re.compile(r"\f"), re.compile(r"\n\s*\n"), re.compile(r"\n")]
+
+
+def chunk_text(text: str, max_tokens: int, model: str = "gpt-4o") -> List[Dict[str, Any]]:
+    """
+    텍스트를 페이지/문단/줄 경계에서 나누어 토큰 한도 안의 청크로 묶습니다.
+
+    한 페이지가 한도를 넘으면 문단, 줄 순서로 더 잘게 나누고, 줄 하나도 넘으면 문자 단위로 자릅니다.
+
+    Args:
+        text: 전체 텍스트
+        max_tokens: 청크당 최대 토큰 수
+        model: 토큰 계산에 사용할 모델명
+
+    Returns:
+        [{"index", "text", "tokens", "start", "end", "start_page", "end_page"}] 형태의 청크 목록
+        (start/end는 원문 문자 위치, 페이지는 1부터)
+    """
+    units = _split_units(text, 0, len(text), max_tokens, model, level=0)
+
+    chunks: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for start, end, tokens in units:
+        if current is not None and current["tokens"] + tokens <= max_tokens:
+            current["end"] = end
+            current["tokens"] += tokens
+            continue
+        current = {"start": start, "end": end, "tokens": tokens}
+        chunks.append(current)
+
+    for index, chunk in enumerate(chunks):
+        chunk["index"] = index
+        chunk["text"] = text[chunk["start"]:chunk["end"]].strip(PAGE_SEPARATOR + "\n ")
+        chunk["start_page"] = text.count(PAGE_SEPARATOR, 0, chunk["start"]) + 1
+        chunk["end_page"] = text.count(PAGE_SEPARATOR, 0, max(chunk["start"], chunk["end"] - 1)) + 1
+    return [chunk for chunk in chunks if chunk["text"]]
+
+
+async def chunk_units(units: AsyncIterator[Dict[str, Any]], max_tokens: int, model: str = "gpt-4o") -> AsyncIterator[Dict[str, Any]]:
+    """
+    문서 단위(페이지/섹션/시트) 스트림을 받아 토큰 한도 안의 청크로 묶으면서 바로 내보냅니다.
+
+    한도를 넘는 단위는 chunk_text로 나누고, 단위 경계를 넘어 묶은 청크는 빈 줄로 잇습니다.
+    앞 청크는 뒤 단위를 파싱하는 동안 이미 처리될 수 있습니다.
+
+    Args:
+        units: FileProcessor.iter_units가 내보내는 단위 스트림
+        max_tokens: 청크당 최대 토큰 수
+        model: 토큰 계산에 사용할 모델명
+
+    Yields:
+        chunk_text와 같은 형태의 청크 (start_page/end_page는 단위 번호, unit_kind는 단위 종류)
+    """
+    current: Optional[Dict[str, Any]] = None
+    index = 0
+    async for unit in units:
+        number = unit.get("page_number") or unit["index"] + 1
+        for piece in chunk_text(unit["text"], max_tokens, model):
+            if current is not None and current["tokens"] + piece["tokens"] <= max_tokens:
+                current["text"] += "\n\n" + piece["text"]
+                current["tokens"] += piece["tokens"]
+                current["end"] = unit["start"] + piece["end"]
+                current["end_page"] = number
+                continue
+            if current is not None:
+                yield current
+                index += 1
+            current = {
+                "index": index,
+                "text": piece["text"],
+                "tokens": piece["tokens"],
+                "start": unit["start"] + piece["start"],
+                "end": unit["start"] + piece["end"],
+                "start_page": number,
+                "end_page": number,
+                "unit_kind": unit["kind"]
+            }
+    if current is not None:
+        yield current
+
+
+def _split_units(text: str, start: int, end: int, max_tokens: int, model: str, level: int) -> List[tuple]:
+    """[start, end) 구간을 한도 이하의 (시작, 끝, 토큰 수) 단위로 재귀 분할합니다."""
+    tokens = estimate_text_tokens(text[start:end], model)
+    if tokens <= max_tokens:
+        return [(start, end, tokens)] if end > start else []
+
+    if level >= len(_BOUNDARY_PATTERNS):
+        # 더 나눌 경계가 없으면 토큰 비율로 문자 위치를 잘라 분할
+        size = max(1, (end - start) * max_tokens // tokens)
+        return [
+            (position, min(position + size, end), estimate_text_tokens(text[position:min(position + size, end)], model))
+            for position in range(start, end, size)
+        ]
+
+    units = []
+    position = start
+    for match in _BOUNDARY_PATTERNS[level].finditer(text, start, end):
+        # 경계 문자는 앞 단위에 포함시켜 원문을 그대로 이어붙일 수 있게 함
+        units.extend(_split_units(text, position, match.end(), max_tokens, model, level + 1))
+        position = match.end()
+    units.extend(_split_units(text, position, end, max_tokens, model, level + 1))
+    return units
@@ -0,0 +1,305 @@
+import base64
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+import PyPDF2
+from PIL import Image
+from image_preprocessor import target_size
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성: 없으면 문자 수 기반 근사치 사용
+    tiktoken = None
+
+# 모델별 이미지 토큰 계산 상수 (기본 토큰, 512px 타일당 토큰)
+IMAGE_TOKEN_RATES = {
+    "gpt-4o": (85, 170),
+    "gpt-4o-mini": (2833, 5667),
+    "gpt-4-vision-preview": (85, 170)
+}
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력). OPENAI_TOKEN_PRICES(JSON)로 덮어쓸 수 있습니다.
+DEFAULT_TOKEN_PRICES = {
+    "gpt-4o": {"input": 2.5, "output": 10.0},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.6}
+}
+
+# 메시지마다 붙는 역할/구분 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_text_tokens(text: str, model: str = "gpt-4o") -> int:
+    """텍스트의 토큰 수를 추정합니다. (tiktoken이 있으면 정확히, 없으면 문자 종류별 근사치)"""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        try:
+            return len(tiktoken.encoding_for_model(model).encode(text))
+        except KeyError:
+            return len(tiktoken.get_encoding("o200k_base").encode(text))
+
+    # ASCII는 약 4자당 1토큰, 한글 등 비 ASCII는 약 1.5자당 1토큰
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "auto", model: str = "gpt-4o") -> int:
+    """
+    디코딩된 이미지 크기와 detail 수준으로 이미지 입력 토큰을 계산합니다.
+
+    high/auto는 2048x2048 안에 맞춘 뒤 짧은 변을 768로 줄이고, 512px 타일 수만큼 토큰이 붙습니다.
+    """
+    base_tokens, tile_tokens = IMAGE_TOKEN_RATES.get(model, IMAGE_TOKEN_RATES["gpt-4o"])
+    if detail == "low":
+        return base_tokens
+
+    width, height = target_size(width, height, "high")
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return base_tokens + tile_tokens * tiles
+
+
+def image_dimensions(image_content: bytes) -> Optional[Tuple[int, int]]:
+    """이미지 헤더만 읽어 크기를 반환합니다. (디코딩 실패 시 None)"""
+    try:
+        with Image.open(io.BytesIO(image_content)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """예상 비용(USD)을 계산합니다. 가격 정보가 없는 모델이면 None"""
+    prices = dict(DEFAULT_TOKEN_PRICES)
+    prices.update(json.loads(os.getenv("OPENAI_TOKEN_PRICES", "{}")))
+    price = prices.get(model)
+    if not price:
+        return None
+    return round((input_tokens * price["input"] + output_tokens * price["output"]) / 1_000_000, 6)
+
+
+def estimate_image_request(image_content: bytes, prompt: str, detail: str = "auto", model: str = "gpt-4o", max_tokens: int = 4000, system_prompt: str = "") -> Dict[str, Any]:
+    """
+    이미지 + 프롬프트 요청의 토큰과 비용을 추정합니다.
+
+    Returns:
+        prompt_tokens, image_tokens, max_output_tokens, total_tokens, estimated_cost_usd 등
+    """
+    size = image_dimensions(image_content)
+    # 크기를 알 수 없으면 최악의 경우(2048x768, 8타일)로 가정
+    width, height = size if size else (2048, 768)
+    image_tokens = estimate_image_tokens(width, height, detail, model)
+    prompt_tokens = estimate_text_tokens(prompt, model) + estimate_text_tokens(system_prompt, model)
+    prompt_tokens += MESSAGE_OVERHEAD_TOKENS * (2 if system_prompt else 1)
+    input_tokens = prompt_tokens + image_tokens
+
+    return {
+        "model": model,
+        "detail": detail,
+        "image_size": [width, height] if size else None,
+        "prompt_tokens": prompt_tokens,
+        "image_tokens": image_tokens,
+        "input_tokens": input_tokens,
+        "max_output_tokens": max_tokens,
+        "total_tokens": input_tokens + max_tokens,
+        "estimated_cost_usd": estimate_cost(model, input_tokens, max_tokens)
+    }
+
+
+def estimate_text_request(text: str, model: str = "gpt-4o", max_tokens: int = 4000, system_prompt: str = "") -> Dict[str, Any]:
+    """텍스트 요청의 토큰과 비용을 추정합니다."""
+    prompt_tokens = estimate_text_tokens(text, model) + estimate_text_tokens(system_prompt, model)
+    prompt_tokens += MESSAGE_OVERHEAD_TOKENS * (2 if system_prompt else 1)
+
+    return {
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "image_tokens": 0,
+        "input_tokens": prompt_tokens,
+        "max_output_tokens": max_tokens,
+        "total_tokens": prompt_tokens + max_tokens,
+        "estimated_cost_usd": estimate_cost(model, prompt_tokens, max_tokens)
+    }
+
+
+def estimate_pdf_request(pdf_content: bytes, prompt: str, model: str = "gpt-4o", max_tokens: int = 4000) -> Dict[str, Any]:
+    """
+    PDF 입력 요청의 토큰과 비용을 추정합니다.
+
+    PDF 입력은 페이지마다 추출 텍스트와 페이지 이미지가 함께 모델에 전달되므로 둘을 합산합니다.
+    """
+    text_tokens = 0
+    image_tokens = 0
+    page_count = None
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        for page in reader.pages:
+            text_tokens += estimate_text_tokens(page.extract_text() or "", model)
+            box = page.mediabox
+            image_tokens += estimate_image_tokens(int(box.width), int(box.height), "high", model)
+        page_count = len(reader.pages)
+    except Exception:
+        # 파싱할 수 없는 PDF는 파일 입력 기본 추정치 사용
+        text_tokens = int(os.getenv("OPENAI_FILE_INPUT_TOKENS", "8000"))
+        image_tokens = 0
+    prompt_tokens = estimate_text_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS + text_tokens
+    input_tokens = prompt_tokens + image_tokens
+
+    return {
+        "model": model,
+        "page_count": page_count,
+        "prompt_tokens": prompt_tokens,
+        "image_tokens": image_tokens,
+        "input_tokens": input_tokens,
+        "max_output_tokens": max_tokens,
+        "total_tokens": input_tokens + max_tokens,
+        "estimated_cost_usd": estimate_cost(model, input_tokens, max_tokens)
+    }
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    chat.completions 요청 파라미터의 전체 토큰(입력 + 최대 출력)을 추정합니다.
+
+    data URL로 전달된 이미지는 헤더를 읽어 실제 크기로 계산합니다.
+    """
+    model = request.get("model", "gpt-4o")
+    tokens = 0
+    for message in request.get("messages", []):
+        tokens += MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += estimate_text_tokens(content, model)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                tokens += estimate_text_tokens(part.get("text", ""), model)
+            elif part.get("type") == "image_url":
+                image_url = part.get("image_url", {})
+                size = _data_url_image_size(image_url.get("url", ""))
+                width, height = size if size else (2048, 768)
+                tokens += estimate_image_tokens(width, height, image_url.get("detail", "auto"), model)
+            elif part.get("type") == "file_url":
+                # PDF 등 파일 입력은 크기를 알 수 없어 보수적으로 가정
+                tokens += int(os.getenv("OPENAI_FILE_INPUT_TOKENS", "8000"))
+    return tokens + int(request.get("max_tokens") or 0)
+
+
+def _data_url_image_size(url: str) -> Optional[Tuple[int, int]]:
+    """data:image/...;base64, URL에서 이미지 크기를 읽습니다."""
+    if not url.startswith("data:image/") or ";base64," not in url:
+        return None
+    try:
+        return image_dimensions(base64.b64decode(url.split(";base64,", 1)[1]))
+    except Exception:
+        return None
+
+
+class TokenBudget:
+    """요청별/테넌트별 토큰 예산을 관리합니다."""
+
+    def __init__(self, max_request_tokens: int = 0, tenant_budget: int = 0, window_seconds: float = 86400, policy: str = "downgrade"):
+        self.max_request_tokens = max_request_tokens
+        self.tenant_budget = tenant_budget
+        self.window_seconds = window_seconds
+        self.policy = policy
+        self._usage: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "allowed": 0,
+            "downgraded": 0,
+            "rejected": 0
+        }
+
+    def tenant_usage(self, tenant_id: str) -> int:
+        """예산 기간 동안 테넌트가 사용한 토큰 수를 반환합니다."""
+        with self._lock:
+            return sum(tokens for _, tokens in self._window(tenant_id))
+
+    def check(self, tenant_id: Optional[str], estimate: Dict[str, Any], downgraded_estimate: Optional[Dict[str, Any]] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        예상 토큰이 예산 안에 있는지 확인합니다.
+
+        Args:
+            tenant_id: 테넌트 ID (없으면 테넌트 예산은 확인하지 않음)
+            estimate: 원래 요청의 추정치
+            downgraded_estimate: detail을 낮췄을 때의 추정치 (다운그레이드 가능할 때만)
+            dry_run: True면 판정 통계에 반영하지 않음
+
+        Returns:
+            {"allowed": bool, "downgraded": bool, "limit": "request"/"tenant"/None, "reason": str, "estimate": 적용할 추정치}
+        """
+        limit, reason = self._over_budget(tenant_id, estimate)
+        if limit is None:
+            decision = {"allowed": True, "downgraded": False, "limit": None, "reason": None, "estimate": estimate}
+        elif self.policy == "downgrade" and downgraded_estimate is not None and self._over_budget(tenant_id, downgraded_estimate)[0] is None:
+            decision = {"allowed": True, "downgraded": True, "limit": limit, "reason": reason, "estimate": downgraded_estimate}
+        else:
+            decision = {"allowed": False, "downgraded": False, "limit": limit, "reason": reason, "estimate": estimate}
+
+        if not dry_run:
+            outcome = "downgraded" if decision["downgraded"] else ("allowed" if decision["allowed"] else "rejected")
+            with self._lock:
+                self._stats[outcome] += 1
+        return decision
+
+    def record(self, tenant_id: Optional[str], tokens: int):
+        """테넌트의 실제 사용 토큰을 기록합니다."""
+        if not tenant_id or tokens <= 0:
+            return
+        with self._lock:
+            self._usage.setdefault(tenant_id, deque()).append((time.time(), tokens))
+
+    def stats(self) -> Dict[str, Any]:
+        """예산 설정과 판정 통계를 반환합니다."""
+        with self._lock:
+            tenants = {tenant_id: sum(tokens for _, tokens in self._window(tenant_id)) for tenant_id in list(self._usage)}
+            outcomes = dict(self._stats)
+        return {
+            "max_request_tokens": self.max_request_tokens,
+            "tenant_budget": self.tenant_budget,
+            "window_seconds": self.window_seconds,
+            "policy": self.policy,
+            "tenant_usage": tenants,
+            **outcomes
+        }
+
+    def _over_budget(self, tenant_id: Optional[str], estimate: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """초과한 한도 종류와 사유를 반환합니다. (초과하지 않으면 (None, None))"""
+        total_tokens = estimate["total_tokens"]
+        if self.max_request_tokens and total_tokens > self.max_request_tokens:
+            return "request", f"요청 예상 토큰({total_tokens})이 요청당 한도({self.max_request_tokens})를 초과합니다."
+        if tenant_id and self.tenant_budget:
+            used = self.tenant_usage(tenant_id)
+            if used + total_tokens > self.tenant_budget:
+                return "tenant", f"테넌트 '{tenant_id}'의 토큰 예산이 부족합니다. (사용 {used} + 예상 {total_tokens} > 한도 {self.tenant_budget})"
+        return None, None
+
+    def _window(self, tenant_id: str) -> deque:
+        """기간이 지난 사용 기록을 제거한 사용 기록을 반환합니다. (lock 보유 상태에서 호출)"""
+        usage = self._usage.get(tenant_id, deque())
+        cutoff = time.time() - self.window_seconds
+        while usage and usage[0][0] < cutoff:
+            usage.popleft()
+        return usage
+
+
+# 프로세스 전체에서 공유하는 토큰 예산
+_token_budget: Optional[TokenBudget] = None
+
+
+def get_token_budget() -> TokenBudget:
+    """환경 변수 설정에 따라 생성된 공유 토큰 예산을 반환합니다."""
+    global _token_budget
+    if _token_budget is None:
+        _token_budget = TokenBudget(
+            max_request_tokens=int(os.getenv("MAX_REQUEST_TOKENS", "0")),
+            tenant_budget=int(os.getenv("TENANT_TOKEN_BUDGET", "0")),
+            window_seconds=float(os.getenv("TENANT_BUDGET_WINDOW_SECONDS", "86400")),
+            policy=os.getenv("TOKEN_BUDGET_POLICY", "downgrade")
+        )
+    return _token_budget
@@ -0,0 +1,327 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import httpx
+from rate_limiter import parse_reset_duration
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """
+    콜백 본문의 HMAC-SHA256 서명을 반환합니다.
+
+    수신 측은 X-Webhook-Timestamp와 본문을 "{timestamp}.{body}"로 이어 같은 비밀 키로 계산한 값과
+    X-Webhook-Signature("sha256=..." 형식)를 비교하면 됩니다. (타임스탬프로 재전송 공격 방지)
+    """
+    digest = hmac.new(secret.encode("utf-8"), timestamp.encode("utf-8") + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def allowed_callback_hosts() -> List[str]:
+    """주소 검사 없이 콜백을 허용할 호스트 목록 (WEBHOOK_ALLOWED_HOSTS, 쉼표 구분, 내부 수신 서버용)"""
+    return [host.strip().lower() for host in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()]
+
+
+async def is_valid_callback_url(url: str) -> bool:
+    """
+    콜백으로 호출할 수 있는 http(s) URL인지 확인합니다.
+
+    서버가 내부 서비스(localhost, redis, 클라우드 메타데이터 등)로 결과를 보내지 않도록 호스트를 조회해
+    루프백, 링크 로컬, 사설, 예약 주소로 풀리면 거부합니다. (WEBHOOK_ALLOWED_HOSTS의 호스트는 예외)
+    """
+    try:
+        parsed = httpx.URL(url)
+    except Exception:
+        return False
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        return False
+    if parsed.host.lower() in allowed_callback_hosts():
+        return True
+
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(parsed.host, parsed.port or (443 if parsed.scheme == "https" else 80))
+    except OSError:
+        return False
+    return bool(addresses) and all(_is_public_address(address[4][0]) for address in addresses)
+
+
+def _is_public_address(address: str) -> bool:
+    """인터넷에서 접근 가능한(global) 유니캐스트 주소인지 확인합니다."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더 값(초, HTTP 날짜, OpenAI 형식 기간)을 지금부터 기다릴 초로 변환합니다."""
+    if not value:
+        return None
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return parse_reset_duration(value)
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class WebhookDispatcher:
+    """
+    백그라운드 작업 완료 콜백을 보내는 디스패처
+
+    - 커넥션 풀을 가진 httpx 클라이언트 하나를 공유하고, 동시에 보내는 요청 수를 제한합니다.
+    - 연결 오류, 타임아웃, 408/429/5xx 응답은 지수 백오프(full jitter)로 재시도하고,
+      끝내 실패하면 dead_letter_dir에 저장해 두었다가 retry_dead_letters로 다시 보냅니다.
+    - secret이 있으면 본문에 서명하고, batch_window가 0보다 크면 같은 URL로 가는 알림을
+      그 시간 동안 모아 한 번에 보냅니다.
+    """
+
+    def __init__(
+        self,
+        dead_letter_dir: Optional[Path] = None,
+        max_concurrency: int = 10,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 10.0,
+        secret: str = "",
+        batch_window: float = 0.0,
+        batch_max: int = 50,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.dead_letter_dir = dead_letter_dir
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.secret = secret
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self._http_client = http_client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._deliveries: set = set()
+        self._batches: Dict[str, List[Dict[str, Any]]] = {}
+        self._batch_timers: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "queued": 0,
+            "delivered": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "batches": 0
+        }
+
+        if self.dead_letter_dir is not None:
+            self.dead_letter_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, dead_letter_dir: Optional[Path] = None, http_client: Optional[httpx.AsyncClient] = None) -> "WebhookDispatcher":
+        """환경 변수로 디스패처를 생성합니다."""
+        return cls(
+            dead_letter_dir=dead_letter_dir,
+            max_concurrency=int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "10")),
+            max_retries=int(os.getenv("WEBHOOK_MAX_RETRIES", "5")),
+            backoff_base=float(os.getenv("WEBHOOK_BACKOFF_BASE", "1.0")),
+            backoff_max=float(os.getenv("WEBHOOK_BACKOFF_MAX", "60")),
+            timeout=float(os.getenv("WEBHOOK_TIMEOUT", "10")),
+            secret=os.getenv("WEBHOOK_SECRET", ""),
+            batch_window=float(os.getenv("WEBHOOK_BATCH_WINDOW", "0")),
+            batch_max=int(os.getenv("WEBHOOK_BATCH_MAX", "50")),
+            http_client=http_client
+        )
+
+    def notify(self, url: str, event: Dict[str, Any]):
+        """
+        콜백 알림을 보냅니다. (기다리지 않고 바로 반환)
+
+        Args:
+            url: 콜백 URL
+            event: 보낼 이벤트 (묶어 보내면 {"event": "batch", "events": [...]}의 한 항목이 됨)
+        """
+        self._stats["queued"] += 1
+        if self.batch_window <= 0:
+            self._start_delivery(url, event)
+            return
+
+        batch = self._batches.setdefault(url, [])
+        batch.append(event)
+        if len(batch) >= self.batch_max:
+            self._flush(url)
+        elif url not in self._batch_timers:
+            self._batch_timers[url] = asyncio.create_task(self._flush_later(url))
+
+    async def retry_dead_letters(self) -> int:
+        """
+        저장된 실패 콜백을 다시 보냅니다. 보낸 항목은 저장소에서 지우며, 또 실패하면 다시 저장됩니다.
+
+        Returns:
+            다시 보낸 항목 수
+        """
+        letters = self.dead_letters()
+        for letter in letters:
+            (self.dead_letter_dir / f"{letter['delivery_id']}.json").unlink(missing_ok=True)
+            self._start_delivery(letter["url"], letter["payload"], letter["delivery_id"])
+        return len(letters)
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """저장된 실패 콜백 목록"""
+        if self.dead_letter_dir is None:
+            return []
+        letters = []
+        for path in sorted(self.dead_letter_dir.glob("*.json")):
+            try:
+                letters.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError) as e:
+                print(f"실패 콜백 파일 읽기 오류: {str(e)}")
+        return letters
+
+    async def drain(self):
+        """모아 둔 알림을 모두 보내고 진행 중인 전송이 끝날 때까지 기다립니다."""
+        for url in list(self._batches):
+            self._flush(url)
+        while self._deliveries:
+            await asyncio.gather(*list(self._deliveries), return_exceptions=True)
+
+    async def close(self):
+        """남은 알림을 보내고 커넥션 풀을 정리합니다."""
+        await self.drain()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def stats(self) -> Dict[str, Any]:
+        """콜백 전송 지표"""
+        return {
+            **self._stats,
+            "in_flight": len(self._deliveries),
+            "pending_batches": sum(len(batch) for batch in self._batches.values()),
+            "dead_letters": len(list(self.dead_letter_dir.glob("*.json"))) if self.dead_letter_dir is not None else 0,
+            "batch_window": self.batch_window,
+            "signed": bool(self.secret)
+        }
+
+    def _client(self) -> httpx.AsyncClient:
+        """공유 httpx 클라이언트 (최초 호출 시 생성)"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                timeout=httpx.Timeout(self.timeout)
+            )
+        return self._http_client
+
+    async def _flush_later(self, url: str):
+        """batch_window 뒤에 모아 둔 알림을 보냅니다."""
+        await asyncio.sleep(self.batch_window)
+        self._batch_timers.pop(url, None)
+        self._flush(url)
+
+    def _flush(self, url: str):
+        """같은 URL로 모아 둔 알림을 한 번에 보냅니다."""
+        timer = self._batch_timers.pop(url, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        events = self._batches.pop(url, [])
+        if events:
+            self._stats["batches"] += 1
+            self._start_delivery(url, {"event": "batch", "count": len(events), "events": events})
+
+    def _start_delivery(self, url: str, payload: Dict[str, Any], delivery_id: Optional[str] = None):
+        """전송 작업을 시작하고 끝날 때까지 참조를 유지합니다."""
+        task = asyncio.create_task(self._deliver(url, payload, delivery_id or uuid.uuid4().hex))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, url: str, payload: Dict[str, Any], delivery_id: str):
+        """재시도하며 콜백을 보내고, 끝내 실패하면 실패 저장소에 기록합니다."""
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self._stats["retries"] += 1
+                await asyncio.sleep(self._backoff_delay(attempt - 1, error))
+            try:
+                async with self._semaphore:
+                    response = await self._client().post(url, content=body, headers=self._headers(delivery_id, body))
+            except httpx.HTTPError as e:
+                error = e
+                continue
+            if response.is_success:
+                self._stats["delivered"] += 1
+                return
+            error = httpx.HTTPStatusError(f"status {response.status_code}", request=response.request, response=response)
+            if response.status_code not in (408, 429) and response.status_code < 500:
+                # 수신 측이 거절한 요청은 다시 보내도 같은 결과
+                break
+
+        self._stats["dead_lettered"] += 1
+        print(f"콜백 전송 실패 ({url}): {str(error)}")
+        self._store_dead_letter(url, payload, delivery_id, error)
+
+    def _headers(self, delivery_id: str, body: bytes) -> Dict[str, str]:
+        """콜백 요청 헤더 (X-Webhook-Id는 재시도해도 같으므로 수신 측 중복 제거에 사용)"""
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Id": delivery_id,
+            "X-Webhook-Timestamp": timestamp
+        }
+        if self.secret:
+            headers["X-Webhook-Signature"] = sign_payload(self.secret, timestamp, body)
+        return headers
+
+    def _backoff_delay(self, attempt: int, error: Optional[BaseException]) -> float:
+        """지수 백오프에 full jitter를 적용한 대기 시간 (Retry-After가 있으면 그 이상)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = retry_after_seconds(error.response.headers.get("retry-after"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _store_dead_letter(self, url: str, payload: Dict[str, Any], delivery_id: str, error: Optional[BaseException]):
+        """보내지 못한 콜백을 파일로 저장합니다."""
+        if self.dead_letter_dir is None:
+            return
+        letter = {
+            "delivery_id": delivery_id,
+            "url": url,
+            "payload": payload,
+            "error": str(error),
+            "failed_at": datetime.now().isoformat()
+        }
+        try:
+            path = self.dead_letter_dir / f"{delivery_id}.json"
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(letter, ensure_ascii=False, default=str), encoding="utf-8")
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"실패 콜백 저장 오류: {str(e)}")
+
+
+# 프로세스 전체에서 공유하는 디스패처
+_webhook_dispatcher: Optional[WebhookDispatcher] = None
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    """공유 콜백 디스패처를 반환합니다. (최초 호출 시 실패 저장소 없이 생성)"""
+    global _webhook_dispatcher
+    if _webhook_dispatcher is None:
+        _webhook_dispatcher = WebhookDispatcher.from_env()
+    return _webhook_dispatcher
+
+
+def configure_webhook_dispatcher(dead_letter_dir: Optional[Path], http_client: Optional[httpx.AsyncClient] = None) -> WebhookDispatcher:
+    """환경 변수 설정과 실패 저장소 경로로 공유 콜백 디스패처를 구성합니다."""
+    global _webhook_dispatcher
+    _webhook_dispatcher = WebhookDispatcher.from_env(dead_letter_dir, http_client)
+    return _webhook_dispatcher